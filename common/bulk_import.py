@@ -0,0 +1,105 @@
+"""Shared plumbing for the spreadsheet importers.
+
+Importers parse every row into unsaved model instances first, look up the
+keys they need (existing bill numbers, parties, ornament codes, ...) with a
+handful of ``IN`` queries, and then write with ``bulk_create`` in batches
+inside a single transaction.  ``ImportStats`` keeps the row counts and the
+wall-clock time so the result message can report throughput.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from django.core.management.color import no_style
+from django.db import connection
+
+# Rows per INSERT / IN (...) query.  Well under SQLite's variable limit even
+# for the widest models.
+BATCH_SIZE = 500
+
+
+def chunked(values: Iterable, size: int = BATCH_SIZE) -> Iterator[list]:
+    """Yield ``values`` in lists of at most ``size`` items."""
+    batch = []
+    for value in values:
+        batch.append(value)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def existing_keys(queryset, field_name: str, keys: Iterable) -> set:
+    """Return the subset of ``keys`` already stored in ``queryset.field_name``."""
+    wanted = {key for key in keys if key not in (None, "")}
+    found = set()
+    for batch in chunked(wanted):
+        found.update(
+            queryset.filter(**{f"{field_name}__in": batch}).values_list(field_name, flat=True)
+        )
+    return found
+
+
+def in_bulk_by(queryset, field_name: str, keys: Iterable) -> dict:
+    """``{key: instance}`` for the given keys, fetched in batches."""
+    wanted = {key for key in keys if key not in (None, "")}
+    found = {}
+    for batch in chunked(wanted):
+        for obj in queryset.filter(**{f"{field_name}__in": batch}):
+            found.setdefault(getattr(obj, field_name), obj)
+    return found
+
+
+def get_or_create_many(queryset, field_name: str, wanted: dict) -> dict:
+    """Return ``{key: instance}`` for ``wanted`` (``{key: unsaved instance}``).
+
+    Rows are matched on ``field_name`` within ``queryset``; the ones that do
+    not exist yet are created with a single ``bulk_create``.
+    """
+    found = in_bulk_by(queryset, field_name, wanted)
+    missing = [obj for key, obj in wanted.items() if key not in found]
+    if missing:
+        queryset.model.objects.bulk_create(missing, batch_size=BATCH_SIZE)
+        for obj in missing:
+            found.setdefault(getattr(obj, field_name), obj)
+    return found
+
+
+def reset_sequences(*models) -> None:
+    """Move PostgreSQL id sequences past rows inserted with explicit pks."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+@dataclass
+class ImportStats:
+    """Row counts and timing for one import run."""
+
+    rows: int = 0
+    created: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    def stop(self) -> "ImportStats":
+        self.finished = time.perf_counter()
+        return self
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return max(end - self.started, 0.0)
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else float(self.rows)
+
+    def throughput(self) -> str:
+        return f"{self.rows} rows in {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/sec)"
@@ -0,0 +1,103 @@
+"""Incremental reading of large JSON arrays.
+
+Database dumps are JSON arrays of records that can run to hundreds of
+megabytes.  :func:`iter_array` yields the elements of a top-level array one
+at a time, so a restore never holds more than a single record (plus a read
+buffer) in memory.
+"""
+from __future__ import annotations
+
+import json
+from typing import IO, Any, Iterator
+
+READ_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+class _Buffer:
+    """Text read from ``fp`` that has not been consumed yet."""
+
+    def __init__(self, fp: IO[str], read_size: int):
+        self.fp = fp
+        self.read_size = read_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read another chunk; ``False`` once the file is exhausted."""
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def delimited(self, end: int) -> bool:
+        """Whether the value decoded up to ``end`` is followed by a delimiter."""
+        while end < len(self.text) and self.text[end] in _WHITESPACE:
+            end += 1
+        return end < len(self.text) and self.text[end] not in _NUMBER_CHARS
+
+    def next_char(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+
+def iter_array(fp: IO[str], read_size: int = READ_SIZE) -> Iterator[Any]:
+    """Yield the elements of the JSON array in text file ``fp`` one by one.
+
+    Raises ``ValueError`` (``json.JSONDecodeError`` for malformed elements)
+    if the file is not a single JSON array.
+    """
+    decoder = json.JSONDecoder()
+    buf = _Buffer(fp, read_size)
+
+    char = buf.next_char()
+    if char == '\ufeff':
+        buf.pos += 1
+        char = buf.next_char()
+    if char != '[':
+        raise ValueError("Expected a JSON array.")
+    buf.pos += 1
+
+    if buf.next_char() == ']':
+        buf.pos += 1
+    else:
+        while True:
+            buf.next_char()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf.text, buf.pos)
+                except json.JSONDecodeError:
+                    if buf.fill():
+                        continue
+                    raise
+                # A number cut by the chunk boundary ("12" of "12.5") decodes
+                # fine, so only accept a value once what follows it is known.
+                if not buf.delimited(end) and buf.fill():
+                    continue
+                break
+            buf.pos = end
+            yield value
+
+            char = buf.next_char()
+            buf.pos += 1
+            if char == ']':
+                break
+            if char != ',':
+                raise ValueError("Expected ',' or ']' between JSON array elements.")
+
+    if buf.next_char():
+        raise ValueError("Unexpected data after the JSON array.")
@@ -16,6 +16,9 @@ pip install -r requirements.txt --quiet
 
 echo "=== Running migrations ==="
 python manage.py migrate --noinput
+python manage.py rebuild_storefront_prices
+python manage.py rebuild_sales_month_summary
+python manage.py rebuild_metal_stock_positions
 
 echo "=== Collecting static files ==="
 python manage.py collectstatic --noinput --clear
@@ -24,5 +27,17 @@ echo "=== Restarting Gunicorn ==="
 sudo systemctl restart "$SERVICE"
 sudo systemctl status "$SERVICE" --no-pager -l
 
+# Barcode images, image cleanup, storefront prices, imports and restores
+# all run in this worker; without it they stay queued.
+if [ ! -f "/etc/systemd/system/$SERVICE-jobs.service" ]; then
+    echo "=== Installing background job worker ==="
+    sudo cp "deploy/$SERVICE-jobs.service" "/etc/systemd/system/$SERVICE-jobs.service"
+    sudo systemctl daemon-reload
+    sudo systemctl enable "$SERVICE-jobs"
+fi
+echo "=== Restarting background job worker ==="
+sudo systemctl restart "$SERVICE-jobs"
+sudo systemctl status "$SERVICE-jobs" --no-pager -l
+
 echo ""
 echo "=== Done! Site is live with latest changes ==="
@@ -58,19 +58,20 @@ def add_current_month_salaries(request):
             messages.info(request, "Salaries for current month already exist for all employees.")
     return redirect('finance:salary_list')
 from decimal import Decimal
-from io import BytesIO
 import openpyxl
-from openpyxl import Workbook
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Sum
-from django.http import HttpResponse, JsonResponse
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Concat
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 
+from common.xlsx_export import XlsxExport, stream
+
 from .forms import ExpenseForm, EmployeeForm, EmployeeSalaryForm, SundryDebtorForm, DebtorTransactionForm, SundryCreditorForm, CreditorTransactionForm
 from .models import Expense, Employee, EmployeeSalary, SundryDebtor, DebtorTransaction, SundryCreditor, CreditorTransaction
 
@@ -635,33 +636,63 @@ def _extract_date(val):
         return None
 
 
+# Column layouts shared by the single-sheet exports and ``finance_export_all``.
+EXPENSE_COLUMNS = ("category", "description", "amount", "expense_date", "notes")
+EMPLOYEE_COLUMNS = ("first_name", "last_name", "email", "phone", "position", "base_salary", "hire_date", "is_active")
+SALARY_HEADERS = (
+    "employee_email", "employee_name", "month", "base_salary", "bonus", "deductions",
+    "total_salary", "amount_paid", "status", "paid_date", "notes",
+)
+SALARY_COLUMNS = ("employee__email", "employee_name") + SALARY_HEADERS[2:]
+DEBTOR_COLUMNS = ("name", "contact_person", "phone", "address", "bs_date", "opening_balance", "current_balance", "credit_limit", "is_active", "notes")
+DEBTOR_TRANSACTION_HEADERS = ("debtor_name", "transaction_type", "reference_no", "amount", "transaction_date", "due_date", "description")
+DEBTOR_TRANSACTION_COLUMNS = ("debtor__name",) + DEBTOR_TRANSACTION_HEADERS[1:]
+CREDITOR_COLUMNS = ("name", "contact_person", "phone", "address", "bs_date", "opening_balance", "current_balance", "is_active", "notes")
+
+
+def _export_cell(val):
+    if isinstance(val, bool):
+        return 'true' if val else 'false'
+    if isinstance(val, Decimal):
+        return float(val)
+    return val
+
+
+def _export_rows(queryset, columns):
+    return ([_export_cell(val) for val in row] for row in stream(queryset, *columns))
+
+
+def _add_expense_sheet(export):
+    export.add_sheet("Expenses", EXPENSE_COLUMNS, _export_rows(Expense.objects.order_by('-expense_date'), EXPENSE_COLUMNS))
+
+
+def _add_employee_sheet(export):
+    employees = Employee.objects.order_by('first_name', 'last_name')
+    export.add_sheet("Employees", EMPLOYEE_COLUMNS, _export_rows(employees, EMPLOYEE_COLUMNS))
+
+
+def _add_salary_sheet(export):
+    salaries = EmployeeSalary.objects.annotate(
+        employee_name=Concat('employee__first_name', Value(' '), 'employee__last_name'),
+    ).order_by('-month')
+    export.add_sheet("Salaries", SALARY_HEADERS, _export_rows(salaries, SALARY_COLUMNS))
+
+
+def _add_debtor_sheet(export, columns=DEBTOR_COLUMNS):
+    export.add_sheet("Debtors", columns, _export_rows(SundryDebtor.objects.order_by('name'), columns))
+
+
+def _add_creditor_sheet(export, columns=CREDITOR_COLUMNS):
+    export.add_sheet("Creditors", columns, _export_rows(SundryCreditor.objects.order_by('name'), columns))
+
+
 # EXPENSE IMPORT/EXPORT
 @login_required
 def expense_export(request):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Expenses"
-    
-    ws.append(["category", "description", "amount", "expense_date", "notes"])
-    for e in Expense.objects.all().order_by('-expense_date'):
-        ws.append([
-            e.category,
-            e.description,
-            float(e.amount),
-            str(e.expense_date) if e.expense_date else '',
-            e.notes or "",
-        ])
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="expenses.xlsx"'
-    return response
+    export = XlsxExport()
+    _add_expense_sheet(export)
+    return export.response("expenses.xlsx")
+
 
 
 @login_required
@@ -698,33 +729,10 @@ def expense_import(request):
 # EMPLOYEE IMPORT/EXPORT
 @login_required
 def employee_export(request):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Employees"
-    
-    ws.append(["first_name", "last_name", "email", "phone", "position", "base_salary", "hire_date", "is_active"])
-    for emp in Employee.objects.all().order_by('first_name', 'last_name'):
-        ws.append([
-            emp.first_name,
-            emp.last_name,
-            emp.email or '',
-            emp.phone or '',
-            emp.position,
-            float(emp.base_salary),
-            str(emp.hire_date) if emp.hire_date else '',
-            'true' if emp.is_active else 'false',
-        ])
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="employees.xlsx"'
-    return response
+    export = XlsxExport()
+    _add_employee_sheet(export)
+    return export.response("employees.xlsx")
+
 
 
 @login_required
@@ -765,39 +773,10 @@ def employee_import(request):
 # SALARY IMPORT/EXPORT
 @login_required
 def salary_export(request):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Salaries"
-    
-    ws.append([
-        "employee_email", "employee_name", "month", "base_salary", "bonus", "deductions",
-        "total_salary", "amount_paid", "status", "paid_date", "notes"
-    ])
-    for s in EmployeeSalary.objects.select_related('employee').all().order_by('-month'):
-        ws.append([
-            s.employee.email or '',
-            f"{s.employee.first_name} {s.employee.last_name}",
-            str(s.month) if s.month else '',
-            float(s.base_salary),
-            float(s.bonus),
-            float(s.deductions),
-            float(s.total_salary),
-            float(s.amount_paid),
-            s.status,
-            str(s.paid_date) if s.paid_date else '',
-            s.notes or '',
-        ])
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="salaries.xlsx"'
-    return response
+    export = XlsxExport()
+    _add_salary_sheet(export)
+    return export.response("salaries.xlsx")
+
 
 
 @login_required
@@ -903,50 +882,16 @@ def salary_import(request):
 # DEBTOR IMPORT/EXPORT
 @login_required
 def debtor_export(request):
-    wb = Workbook()
-    
-    # Debtors Sheet
-    ws_debtors = wb.active
-    ws_debtors.title = "Debtors"
-    ws_debtors.append(["name", "contact_person", "phone", "address", "bs_date", "opening_balance", "current_balance", "credit_limit", "is_active", "notes"])
-    for d in SundryDebtor.objects.all().order_by('name'):
-        ws_debtors.append([
-            d.name,
-            d.contact_person or '',
-            d.phone or '',
-            d.address or '',
-            str(d.bs_date) if d.bs_date else '',
-            float(d.opening_balance),
-            float(d.current_balance),
-            float(d.credit_limit),
-            'true' if d.is_active else 'false',
-            d.notes or '',
-        ])
-    
-    # Debtor Transactions Sheet
-    ws_transactions = wb.create_sheet("Debtor Transactions")
-    ws_transactions.append(["debtor_name", "transaction_type", "reference_no", "amount", "transaction_date", "due_date", "description"])
-    for transaction in DebtorTransaction.objects.select_related('debtor').all().order_by('debtor__name', '-transaction_date'):
-        ws_transactions.append([
-            transaction.debtor.name,
-            transaction.transaction_type,
-            transaction.reference_no or '',
-            float(transaction.amount),
-            str(transaction.transaction_date) if transaction.transaction_date else '',
-            str(transaction.due_date) if transaction.due_date else '',
-            transaction.description or '',
-        ])
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    export = XlsxExport()
+    _add_debtor_sheet(export)
+    transactions = DebtorTransaction.objects.order_by('debtor__name', '-transaction_date')
+    export.add_sheet(
+        "Debtor Transactions",
+        DEBTOR_TRANSACTION_HEADERS,
+        _export_rows(transactions, DEBTOR_TRANSACTION_COLUMNS),
     )
-    response['Content-Disposition'] = 'attachment; filename="debtors_with_transactions.xlsx"'
-    return response
+    return export.response("debtors_with_transactions.xlsx")
+
 
 
 @login_required
@@ -1022,34 +967,10 @@ def debtor_import(request):
 # CREDITOR IMPORT/EXPORT
 @login_required
 def creditor_export(request):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Creditors"
-    
-    ws.append(["name", "contact_person", "phone", "address", "bs_date", "opening_balance", "current_balance", "is_active", "notes"])
-    for c in SundryCreditor.objects.all().order_by('name'):
-        ws.append([
-            c.name,
-            c.contact_person or '',
-            c.phone or '',
-            c.address or '',
-            str(c.bs_date) if c.bs_date else '',
-            float(c.opening_balance),
-            float(c.current_balance),
-            'true' if c.is_active else 'false',
-            c.notes or '',
-        ])
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="creditors.xlsx"'
-    return response
+    export = XlsxExport()
+    _add_creditor_sheet(export)
+    return export.response("creditors.xlsx")
+
 
 
 @login_required
@@ -1092,100 +1013,15 @@ def creditor_import(request):
 @login_required
 def finance_export_all(request):
     """Export all finance data as a single Excel file with multiple sheets."""
-    wb = Workbook()
-    # Remove default sheet
-    if wb.active:
-        wb.remove(wb.active)
-    
-    # Expenses Sheet
-    ws_expenses = wb.create_sheet("Expenses")
-    ws_expenses.append(["category", "description", "amount", "expense_date", "notes"])
-    for e in Expense.objects.all().order_by('-expense_date'):
-        ws_expenses.append([
-            e.category,
-            e.description,
-            float(e.amount),
-            str(e.expense_date) if e.expense_date else '',
-            e.notes or "",
-        ])
-    
-    # Employees Sheet
-    ws_employees = wb.create_sheet("Employees")
-    ws_employees.append(["first_name", "last_name", "email", "phone", "position", "base_salary", "hire_date", "is_active"])
-    for emp in Employee.objects.all().order_by('first_name', 'last_name'):
-        ws_employees.append([
-            emp.first_name,
-            emp.last_name,
-            emp.email or '',
-            emp.phone or '',
-            emp.position,
-            float(emp.base_salary),
-            str(emp.hire_date) if emp.hire_date else '',
-            'true' if emp.is_active else 'false',
-        ])
-    
-    # Salaries Sheet
-    ws_salaries = wb.create_sheet("Salaries")
-    ws_salaries.append([
-        "employee_email", "employee_name", "month", "base_salary", "bonus", "deductions",
-        "total_salary", "amount_paid", "status", "paid_date", "notes"
-    ])
-    for s in EmployeeSalary.objects.select_related('employee').all().order_by('-month'):
-        ws_salaries.append([
-            s.employee.email or '',
-            f"{s.employee.first_name} {s.employee.last_name}",
-            str(s.month) if s.month else '',
-            float(s.base_salary),
-            float(s.bonus),
-            float(s.deductions),
-            float(s.total_salary),
-            float(s.amount_paid),
-            s.status,
-            str(s.paid_date) if s.paid_date else '',
-            s.notes or '',
-        ])
-    
-    # Debtors Sheet
-    ws_debtors = wb.create_sheet("Debtors")
-    ws_debtors.append(["name", "contact_person", "phone", "address", "opening_balance", "current_balance", "credit_limit", "is_active", "notes"])
-    for d in SundryDebtor.objects.all().order_by('name'):
-        ws_debtors.append([
-            d.name,
-            d.contact_person or '',
-            d.phone or '',
-            d.address or '',
-            float(d.opening_balance),
-            float(d.current_balance),
-            float(d.credit_limit),
-            'true' if d.is_active else 'false',
-            d.notes or '',
-        ])
-    
-    # Creditors Sheet
-    ws_creditors = wb.create_sheet("Creditors")
-    ws_creditors.append(["name", "contact_person", "phone", "address", "opening_balance", "current_balance", "is_active", "notes"])
-    for c in SundryCreditor.objects.all().order_by('name'):
-        ws_creditors.append([
-            c.name,
-            c.contact_person or '',
-            c.phone or '',
-            c.address or '',
-            float(c.opening_balance),
-            float(c.current_balance),
-            'true' if c.is_active else 'false',
-            c.notes or '',
-        ])
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename=\"finance_data.xlsx\"'
-    return response
+    export = XlsxExport()
+    _add_expense_sheet(export)
+    _add_employee_sheet(export)
+    _add_salary_sheet(export)
+    # The combined workbook has always left out the BS date columns.
+    _add_debtor_sheet(export, tuple(c for c in DEBTOR_COLUMNS if c != "bs_date"))
+    _add_creditor_sheet(export, tuple(c for c in CREDITOR_COLUMNS if c != "bs_date"))
+    return export.response("finance_data.xlsx")
+
 
 
 # BULK FINANCE IMPORT (Single XLSX with multiple sheets)
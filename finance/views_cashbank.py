@@ -3,11 +3,10 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Sum
 from django.db.models.functions import Coalesce
-from django.http import HttpResponse
 from decimal import Decimal
-from io import BytesIO
 import openpyxl
-from openpyxl import Workbook
+from common.xlsx_export import XlsxExport, stream
+
 from .models import CashBank
 from .forms import CashBankForm, OtherInvestmentForm
 
@@ -94,31 +93,27 @@ def other_investment_update(request, pk):
 @login_required
 def investment_export_excel(request):
     """Export all other investment accounts to XLSX"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Other Investments"
-
-    ws.append(['account_name', 'investment_date', 'investment_amount', 'current_amount', 'notes', 'is_active'])
-    for inv in CashBank.objects.filter(account_type='other_investment').order_by('account_name'):
-        ws.append([
-            inv.account_name,
-            str(inv.investment_date) if inv.investment_date else '',
-            float(inv.investment_amount) if inv.investment_amount is not None else '',
-            float(inv.current_amount) if inv.current_amount is not None else '',
-            inv.notes or '',
-            'Yes' if inv.is_active else 'No',
-        ])
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    investments = stream(
+        CashBank.objects.filter(account_type='other_investment').order_by('account_name'),
+        'account_name', 'investment_date', 'investment_amount', 'current_amount', 'notes', 'is_active',
+    )
+    export = XlsxExport()
+    export.add_sheet(
+        "Other Investments",
+        ['account_name', 'investment_date', 'investment_amount', 'current_amount', 'notes', 'is_active'],
+        (
+            (
+                name,
+                investment_date,
+                float(investment_amount) if investment_amount is not None else '',
+                float(current_amount) if current_amount is not None else '',
+                notes,
+                'Yes' if is_active else 'No',
+            )
+            for name, investment_date, investment_amount, current_amount, notes, is_active in investments
+        ),
     )
-    response['Content-Disposition'] = 'attachment; filename="other_investments.xlsx"'
-    return response
+    return export.response("other_investments.xlsx")
 
 
 @login_required
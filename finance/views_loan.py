@@ -1,21 +1,19 @@
 
 from decimal import Decimal
-from io import BytesIO
 from datetime import date
 from datetime import timedelta
 from calendar import monthrange
 import openpyxl
-from openpyxl import Workbook
 
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.contrib import messages
 from django.db.models import Sum
-from django.http import HttpResponse
 from .models import Loan, LoanInterestPayment, DhukutiLoan, DhukutiKistaPayment, DhukutiKistaPlan, EmiLoan, GoldLoanAccount, GoldLoanInterestPayment
 from .forms import LoanForm, GoldLoanAccountForm
 from common.nepali_utils import ad_to_bs_date_str
+from common.xlsx_export import XlsxExport, stream
 
 
 def _safe_decimal(val):
@@ -712,30 +710,17 @@ def loan_delete(request, pk):
 @login_required
 def loan_export(request):
     """Export all loans to XLSX file"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Loans"
-    
-    ws.append(["bank_name", "amount", "interest_rate", "start_date", "notes"])
-    for loan in Loan.objects.all().order_by('-start_date', '-created_at'):
-        ws.append([
-            loan.bank_name,
-            float(loan.amount),
-            float(loan.interest_rate),
-            str(loan.start_date) if loan.start_date else '',
-            loan.notes or '',
-        ])
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    loans = stream(
+        Loan.objects.order_by('-start_date', '-created_at'),
+        "bank_name", "amount", "interest_rate", "start_date", "notes",
+    )
+    export = XlsxExport()
+    export.add_sheet(
+        "Loans",
+        ["bank_name", "amount", "interest_rate", "start_date", "notes"],
+        ((bank_name, float(amount), float(rate), start_date, notes) for bank_name, amount, rate, start_date, notes in loans),
     )
-    response['Content-Disposition'] = 'attachment; filename="loans.xlsx"'
-    return response
+    return export.response("loans.xlsx")
 
 
 @login_required
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import GoldSilverPurchase, Party, MetalStock, MetalStockType, MetalStockMovement, CustomerPurchase, HomePagePerformanceMetric
+from .models import GoldSilverPurchase, Party, MetalStock, MetalStockType, MetalStockMovement, CustomerPurchase, HomePagePerformanceMetric, RequestQueryMetric
 from .forms import PurchaseForm, PartyForm, MetalStockForm
 
 @admin.register(GoldSilverPurchase)
@@ -177,4 +177,21 @@ class HomePagePerformanceMetricAdmin(admin.ModelAdmin):
     )
     list_filter = ('source', 'created_at')
     search_fields = ('page_path', 'user_agent')
-    readonly_fields = [field.name for field in HomePagePerformanceMetric._meta.fields]
\ No newline at end of file
+    readonly_fields = [field.name for field in HomePagePerformanceMetric._meta.fields]
+
+
+@admin.register(RequestQueryMetric)
+class RequestQueryMetricAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at',
+        'view_name',
+        'method',
+        'status_code',
+        'query_count',
+        'duplicate_count',
+        'db_time_ms',
+        'total_time_ms',
+    )
+    list_filter = ('view_name', 'method', 'created_at')
+    search_fields = ('path', 'view_name')
+    readonly_fields = [field.name for field in RequestQueryMetric._meta.fields]
@@ -9,6 +9,7 @@ class GoldsilverpurchaseConfig(AppConfig):
         """Import signals when app is ready"""
         self._apply_nepali_calendar_overrides()
         import goldsilverpurchase.signals
+        import goldsilverpurchase.jobs  # noqa: F401  (background tasks)
 
     @staticmethod
     def _apply_nepali_calendar_overrides():
@@ -0,0 +1,108 @@
+"""Bulk writers for the purchase spreadsheet imports.
+
+The views parse rows into unsaved ``GoldSilverPurchase`` /
+``CustomerPurchase`` instances; the helpers here number customer purchases
+and write everything with ``bulk_create``.  Bulk inserts
+skip the ``post_save`` handlers, so :func:`post_purchase_movements` books
+the stock movements the purchase signal would have created and brings the
+cost ledger up to date with one :func:`ledger.rebuild` at the end.  Each
+writer also bumps the cached report pages, which the signals would have
+done.
+
+Call these inside ``transaction.atomic()``.
+"""
+from common.bulk_import import BATCH_SIZE
+from main.services import cache_versions
+
+from . import ledger
+from .models import (
+    CustomerPurchase,
+    GoldSilverPurchase,
+    MetalStock,
+    MetalStockMovement,
+    MetalStockType,
+)
+
+
+def create_purchases(purchases):
+    """Bulk insert purchases and post their stock movements."""
+    for purchase in purchases:
+        purchase.calculate_amount()
+    GoldSilverPurchase.objects.bulk_create(purchases, batch_size=BATCH_SIZE)
+    cache_versions.bump_on_commit(cache_versions.REPORTS)
+    post_purchase_movements(purchases)
+    return len(purchases)
+
+
+def post_purchase_movements(purchases):
+    """Book one raw-stock 'in' movement per purchase and refresh the ledger once.
+
+    Mirrors ``create_or_update_metal_stock_and_movement_for_raw``: nothing is
+    booked while no raw stock type exists.
+    """
+    raw_type = MetalStockType.objects.filter(name=MetalStockType.StockTypeChoices.RAW).first()
+    if raw_type is None or not purchases:
+        return 0
+
+    stocks = {}
+    for stock in MetalStock.objects.filter(stock_type=raw_type).order_by('pk'):
+        stocks.setdefault((stock.metal_type, stock.purity), stock)
+
+    movements = []
+    for purchase in purchases:
+        key = (purchase.metal_type, purchase.purity or '24K')
+        stock = stocks.get(key)
+        if stock is None:
+            stock = stocks[key] = MetalStock.objects.create(
+                metal_type=key[0],
+                purity=key[1],
+                stock_type=raw_type,
+                quantity=0,
+                unit_cost=0,
+                rate_unit=purchase.rate_unit or 'tola',
+            )
+        elif not stock.rate_unit:
+            stock.rate_unit = purchase.rate_unit or 'tola'
+            stock.save()
+        movements.append(MetalStockMovement(
+            metal_stock=stock,
+            movement_type='in',
+            quantity=purchase.quantity,
+            rate=purchase.rate,
+            reference_type='GoldSilverPurchase',
+            reference_id=purchase.bill_no,
+            notes=purchase.remarks,
+            movement_date=purchase.bill_date,
+        ))
+
+    MetalStockMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+    cache_versions.bump_on_commit(cache_versions.REPORTS)
+    ledger.rebuild({movement.metal_stock_id for movement in movements})
+    return len(movements)
+
+
+def _next_serial_number():
+    numeric = (
+        CustomerPurchase.objects.filter(sn__regex=r'^\d+$')
+        .values_list('sn', flat=True)
+    )
+    return max((int(sn) for sn in numeric.iterator()), default=0) + 1
+
+
+def create_customer_purchases(purchases):
+    """Bulk insert customer purchases, numbering the ones without an SN.
+
+    New purchases default to ``refined_status='no'``, which has no stock
+    side effects, so skipping the ``post_save`` handler loses nothing.
+    """
+    next_sn = None
+    for purchase in purchases:
+        if not purchase.sn:
+            if next_sn is None:
+                next_sn = _next_serial_number()
+            purchase.sn = str(next_sn)
+            next_sn += 1
+        purchase.calculate_amounts()
+    CustomerPurchase.objects.bulk_create(purchases, batch_size=BATCH_SIZE)
+    cache_versions.bump_on_commit(cache_versions.REPORTS)
+    return len(purchases)
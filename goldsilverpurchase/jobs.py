@@ -0,0 +1,467 @@
+"""Background tasks for the data settings page.
+
+Each function here is registered with :func:`main.services.jobs.task` and
+runs in ``manage.py run_jobs``; the views in ``goldsilverpurchase.views``
+only validate the request and queue them.  The work itself is what those
+views used to do inline.
+"""
+import json
+import os
+
+from django.core.management import call_command
+from django.db import connection, models as dj_models, transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+from common.json_stream import iter_array
+from main.services.jobs import report, result_file, task
+
+# Rows between progress updates while importing.
+PROGRESS_EVERY = 200
+
+FULL_DUMP_EXCLUDES = ("contenttypes", "auth.permission", "main.backgroundjob")
+
+
+@task("gsp.export_full_db_dump", "Full DB dump")
+def export_full_db_dump(job):
+    """Write a full ``dumpdata`` JSON dump to the job's result file."""
+    report(job, message="Writing database dump...")
+    path = result_file(job, "full_db_dump.json")
+    args = []
+    for label in FULL_DUMP_EXCLUDES:
+        args += ["--exclude", label]
+    call_command("dumpdata", *args, output=str(path), verbosity=0)
+    return "Full database dump is ready to download."
+
+
+def nepali_date_fields():
+    """``{"app.model": [field names]}`` for every model with NepaliDateFields."""
+    from django.apps import apps
+    from nepali_datetime_field.models import NepaliDateField
+
+    fields_map = {}
+    for model in apps.get_models():
+        names = [f.name for f in model._meta.get_fields() if isinstance(f, NepaliDateField)]
+        if names:
+            fields_map[model._meta.label_lower] = names
+    return fields_map
+
+
+def sanitize_record(record, fields_map):
+    """Clamp impossible Nepali dates (e.g. 2081-02-32) in one fixture record.
+
+    The day is moved back to the last valid day of that month.  Returns the
+    number of values changed.
+    """
+    import nepali_datetime as _ndt
+
+    names = fields_map.get(str(record.get('model', '')).lower())
+    if not names:
+        return 0
+    _fields = record.get('fields', {})
+    _fixed_count = 0
+    for _fname in names:
+        _val = _fields.get(_fname)
+        if not _val or not isinstance(_val, str) or len(_val) != 10:
+            continue
+        _parts = _val.split('-')
+        if len(_parts) != 3:
+            continue
+        try:
+            _y, _m, _d = int(_parts[0]), int(_parts[1]), int(_parts[2])
+        except ValueError:
+            continue
+        if _y < 2000:
+            continue
+        try:
+            _ndt.date(_y, _m, _d)
+        except Exception:
+            for _ld in range(_d - 1, 0, -1):
+                try:
+                    _ndt.date(_y, _m, _ld)
+                    _fields[_fname] = f"{_y:04d}-{_m:02d}-{_ld:02d}"
+                    _fixed_count += 1
+                    break
+                except Exception:
+                    continue
+    return _fixed_count
+
+
+@task("gsp.import_full_db_dump", "Full DB restore")
+def import_full_db_dump(job):
+    """Wipe the database and load the uploaded ``dumpdata`` JSON.
+
+    This does what ``loaddata`` does, but reads the fixture one record at a
+    time with :func:`iter_array` and fixes Nepali dates on the way, instead
+    of parsing the whole file (twice) into memory.
+    """
+    from django.core import serializers
+
+    from common.bulk_import import reset_sequences
+    from main.services import rates, storefront_prices
+    from ornament import stock_summary
+    from sales import monthly_rollup
+    from . import ledger, positions
+
+    fields_map = nepali_date_fields()
+    size_kb = max(os.path.getsize(job.input_path) // 1024, 1)
+    counts = {'loaded': 0, 'fixed': 0}
+    models_loaded = set()
+    deferred = []
+
+    with open(job.input_path, encoding='utf-8-sig') as fh:
+
+        def records():
+            for record in iter_array(fh):
+                counts['fixed'] += sanitize_record(record, fields_map)
+                yield record
+
+        report(job, 0, size_kb, "Loading data...")
+        with transaction.atomic():
+            call_command("flush", "--noinput")
+            with connection.constraint_checks_disabled():
+                for obj in serializers.deserialize("python", records(), handle_forward_references=True):
+                    obj.save()
+                    models_loaded.add(type(obj.object))
+                    if obj.deferred_fields:
+                        deferred.append(obj)
+                    counts['loaded'] += 1
+                    if counts['loaded'] % PROGRESS_EVERY == 0:
+                        report(job, min(fh.buffer.tell() // 1024, size_kb),
+                               message=f"Loaded {counts['loaded']} records...")
+                for obj in deferred:
+                    obj.save_deferred_fields()
+            connection.check_constraints(table_names=[m._meta.db_table for m in models_loaded])
+            reset_sequences(*models_loaded)
+
+            # Raw saves skip signal side effects; rebuild derived totals and prices.
+            report(job, size_kb, message="Rebuilding stock totals...")
+            stock_summary.rebuild()
+            ledger.rebuild()
+            positions.rebuild()
+            rates.backfill()
+            storefront_prices.rebuild()
+            monthly_rollup.rebuild()
+
+    # The flush removed the job row and possibly the user who queued it;
+    # run_job saves the row again once this returns.
+    job.created_by = None
+    suffix = f" ({counts['fixed']} invalid Nepali date(s) auto-corrected)" if counts['fixed'] else ""
+    return f"Full database restore completed from JSON file: {counts['loaded']} records.{suffix}"
+
+
+@task("gsp.import_all_data_json", "JSON data import")
+def import_all_data_json(job):
+    """Upsert every model from an ``export_all_data_json`` backup."""
+    from nepali_datetime_field.models import NepaliDateField
+
+    from common.nepali_utils import ndt
+    from .views import to_decimal
+
+    report(job, message="Reading JSON file...")
+    try:
+        with open(job.input_path, encoding='utf-8') as fh:
+            data = json.load(fh)
+    except json.JSONDecodeError:
+        raise ValueError("Invalid JSON file format.")
+    imported_count = {}
+    errors = job.errors
+    progress = {"done": 0}
+
+    def parse_nepali_date(value):
+        if not value:
+            return None
+        if hasattr(value, "strftime"):
+            return value
+        try:
+            y, m, d = map(int, str(value).split("-"))
+            return ndt.date(y, m, d) if ndt else None
+        except Exception:
+            return None
+
+    def is_int_like(value):
+        try:
+            int(str(value))
+            return True
+        except Exception:
+            return False
+
+    def parse_field_value(field, value):
+        if value in (None, ""):
+            return None
+        if isinstance(field, dj_models.DecimalField):
+            return to_decimal(value)
+        if isinstance(field, NepaliDateField):
+            return parse_nepali_date(value)
+        if isinstance(field, dj_models.DateTimeField):
+            return parse_datetime(str(value)) or None
+        if isinstance(field, dj_models.DateField):
+            return parse_date(str(value)) or None
+        if isinstance(field, dj_models.BooleanField):
+            if isinstance(value, bool):
+                return value
+            return str(value).lower() in {"1", "true", "yes", "y"}
+        if isinstance(field, (dj_models.IntegerField, dj_models.AutoField, dj_models.BigIntegerField, dj_models.PositiveIntegerField)):
+            try:
+                return int(str(value))
+            except Exception:
+                return None
+        return value
+
+    def resolve_fk_id(model_key, field, row):
+        raw = row.get(field.name)
+        if raw in (None, ""):
+            raw = row.get(f"{field.name}_id")
+
+        if raw in (None, ""):
+            if field.name == "employee":
+                raw = row.get("employee_name")
+                if raw:
+                    parts = str(raw).strip().split()
+                    first = parts[0] if parts else ""
+                    last = " ".join(parts[1:]) if len(parts) > 1 else ""
+                    employee = Employee.objects.filter(first_name=first, last_name=last).first()
+                    return employee.pk if employee else None
+            if field.name == "creditor":
+                raw = row.get("creditor_name")
+            if field.name == "debtor":
+                raw = row.get("debtor_name")
+            if field.name == "party":
+                raw = row.get("party_name")
+            if field.name == "kaligar":
+                raw = row.get("kaligar") or row.get("kaligar_name")
+            if field.name == "stock_type":
+                raw = row.get("stock_type")
+            if field.name == "order_payment":
+                raw = row.get("order_payment_id")
+                if raw in (None, ""):
+                    order_id = row.get("order_id") or row.get("order")
+                    if order_id:
+                        payment = OrderPayment.objects.filter(order_id=order_id).order_by("id").first()
+                        return payment.pk if payment else None
+            if field.name == "order":
+                raw = row.get("order_id")
+            if field.name == "ornament":
+                raw = row.get("ornament_id") or row.get("ornament_code")
+
+        if raw in (None, ""):
+            return None
+
+        if is_int_like(raw):
+            return int(str(raw))
+
+        related_model = field.remote_field.model
+        if hasattr(related_model, "party_name"):
+            obj = related_model.objects.filter(party_name=raw).first()
+            return obj.pk if obj else None
+        if hasattr(related_model, "name"):
+            obj = related_model.objects.filter(name=raw).first()
+            return obj.pk if obj else None
+        if hasattr(related_model, "code"):
+            obj = related_model.objects.filter(code=raw).first()
+            return obj.pk if obj else None
+        return None
+
+    lookup_fields = {
+        "Employee": [("email",), ("first_name", "last_name", "position")],
+        "EmployeeSalary": [("employee", "month")],
+        "Expense": [("category", "description", "expense_date", "amount")],
+        "SundryCreditor": [("name",)],
+        "SundryDebtor": [("name",)],
+        "Loan": [("bank_name", "start_date", "amount", "interest_rate")],
+        "CreditorTransaction": [("creditor", "transaction_type", "reference_no", "amount", "transaction_date")],
+        "DebtorTransaction": [("debtor", "transaction_type", "reference_no", "amount", "transaction_date")],
+        "Party": [("party_name", "panno")],
+        "MetalStockType": [("name",)],
+        "MetalStock": [("metal_type", "stock_type", "purity", "location")],
+        "GoldSilverPurchase": [("bill_no",)],
+        "CustomerPurchase": [("sn",)],
+        "MetalStockMovement": [("metal_stock", "movement_type", "quantity", "rate", "reference_type", "reference_id", "movement_date")],
+        "Stock": [("year",)],
+        "DailyRate": [("bs_date",)],
+        "Stone": [("name",)],
+        "Motimala": [("name",)],
+        "Potey": [("name",)],
+        "MainCategory": [("name",)],
+        "SubCategory": [("name",)],
+        "Kaligar": [("name", "panno")],
+        "Kaligar_Ornaments": [("kaligar", "date", "ornament_weight", "gold_given")],
+        "Kaligar_CashAccount": [("kaligar", "date", "particular", "amount_taken", "to_pay")],
+        "Kaligar_GoldAccount": [("kaligar", "date", "gold_deposit")],
+        "Ornament": [("code",)],
+        "Order": [("sn",)],
+        "OrderMetalStock": [("order", "stock_type", "metal_type", "purity", "quantity", "rate_per_gram")],
+        "OrderPayment": [("order", "payment_mode", "amount")],
+        "OrderOrnament": [("order", "ornament", "line_amount")],
+        "DebtorPayment": [("order_payment",)],
+        "Sale": [("order",)],
+        "SalesMetalStock": [("sale", "stock_type", "metal_type", "purity", "quantity", "rate_per_gram")],
+    }
+
+    def build_lookup(model_key, model, row):
+        pk_field = model._meta.pk
+        pk_name = pk_field.name
+        if pk_name in row and row.get(pk_name) not in (None, ""):
+            return {pk_name: parse_field_value(pk_field, row.get(pk_name))}
+        for fields in lookup_fields.get(model_key, []):
+            values = {}
+            ok = True
+            for field_name in fields:
+                field = model._meta.get_field(field_name)
+                if isinstance(field, dj_models.ForeignKey):
+                    value = resolve_fk_id(model_key, field, row)
+                else:
+                    value = parse_field_value(field, row.get(field_name))
+                if value in (None, ""):
+                    ok = False
+                    break
+                values[field_name] = value
+            if ok:
+                return values
+        return None
+
+    def upsert_rows(model_key, model, rows):
+        count = 0
+        for row in rows:
+            progress["done"] += 1
+            if progress["done"] % PROGRESS_EVERY == 0:
+                report(job, progress["done"])
+            try:
+                lookup = build_lookup(model_key, model, row)
+                if not lookup:
+                    errors.append(f"{model_key}: missing lookup for row")
+                    continue
+
+                defaults = {}
+                for field in model._meta.fields:
+                    if field.primary_key:
+                        continue
+                    if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                        continue
+                    if isinstance(field, dj_models.ForeignKey):
+                        fk_id = resolve_fk_id(model_key, field, row)
+                        if fk_id is not None:
+                            defaults[f"{field.name}_id"] = fk_id
+                        else:
+                            defaults[field.name] = None
+                    else:
+                        if field.name in row:
+                            defaults[field.name] = parse_field_value(field, row.get(field.name))
+
+                model.objects.update_or_create(defaults=defaults, **lookup)
+                count += 1
+            except Exception as exc:
+                errors.append(f"{model_key}: {exc}")
+        imported_count[model_key] = count
+
+    # --- Import models in dependency order ---
+    from finance.models import EmployeeSalary, SundryCreditor, SundryDebtor, Loan, CreditorTransaction, DebtorTransaction, Expense, Employee
+    from goldsilverpurchase.models import GoldSilverPurchase, CustomerPurchase, MetalStock, MetalStockMovement, Party, MetalStockType
+    from main.models import Stock, DailyRate
+    from ornament.models import Stone, Motimala, Potey, MainCategory, SubCategory, Kaligar, Kaligar_Ornaments, Kaligar_CashAccount, Kaligar_GoldAccount, Ornament
+    from order.models import Order, OrderMetalStock, OrderPayment, OrderOrnament, DebtorPayment
+    from sales.models import Sale, SalesMetalStock
+
+    model_order = [
+        ("Employee", Employee),
+        ("SundryCreditor", SundryCreditor),
+        ("SundryDebtor", SundryDebtor),
+        ("Loan", Loan),
+        ("Expense", Expense),
+        ("EmployeeSalary", EmployeeSalary),
+        ("CreditorTransaction", CreditorTransaction),
+        ("DebtorTransaction", DebtorTransaction),
+        ("Party", Party),
+        ("MetalStockType", MetalStockType),
+        ("MetalStock", MetalStock),
+        ("GoldSilverPurchase", GoldSilverPurchase),
+        ("CustomerPurchase", CustomerPurchase),
+        ("Kaligar", Kaligar),
+        ("MetalStockMovement", MetalStockMovement),
+        ("Stock", Stock),
+        ("DailyRate", DailyRate),
+        ("MainCategory", MainCategory),
+        ("SubCategory", SubCategory),
+        ("Stone", Stone),
+        ("Motimala", Motimala),
+        ("Potey", Potey),
+        ("Kaligar_Ornaments", Kaligar_Ornaments),
+        ("Kaligar_CashAccount", Kaligar_CashAccount),
+        ("Kaligar_GoldAccount", Kaligar_GoldAccount),
+        ("Order", Order),
+        ("Ornament", Ornament),
+        ("OrderMetalStock", OrderMetalStock),
+        ("OrderPayment", OrderPayment),
+        ("OrderOrnament", OrderOrnament),
+        ("DebtorPayment", DebtorPayment),
+        ("Sale", Sale),
+        ("SalesMetalStock", SalesMetalStock),
+    ]
+
+    report(job, 0, sum(len(data.get(key) or []) for key, _ in model_order), "Importing rows...")
+    with transaction.atomic():
+        for key, model in model_order:
+            rows = data.get(key, [])
+            if rows:
+                upsert_rows(key, model, rows)
+        # Upserted stocks carry the exported ledger sums while upserted
+        # movements post their own deltas; recompute from the movements.
+        from . import ledger
+        ledger.rebuild()
+
+    summary = " | ".join([f"{k}: {v}" for k, v in imported_count.items() if v > 0])
+    if summary:
+        return f"JSON import completed: {summary}"
+    return "JSON import completed."
+
+
+@task("gsp.delete_all_data", "Delete all data")
+def delete_all_data(job):
+    """Delete all data from ALL tables across all apps."""
+    from finance.models import (
+        EmployeeSalary, Expense, Employee,
+        CreditorTransaction, DebtorTransaction,
+        SundryCreditor, SundryDebtor, Loan
+    )
+    from goldsilverpurchase.models import (
+        MetalStockMovement, MetalStock, CustomerPurchase,
+        GoldSilverPurchase, Party, MetalStockType
+    )
+    from main.models import DailyRate, Stock
+    from ornament.models import (
+        Kaligar_CashAccount, Kaligar_GoldAccount, Kaligar_Ornaments,
+        Ornament, Kaligar, SubCategory, MainCategory,
+        Potey, Motimala, Stone
+    )
+    from order.models import (
+        DebtorPayment, OrderPayment, OrderOrnament, OrderMetalStock, Order
+    )
+    from sales.models import SalesMetalStock, Sale
+
+    # Reverse dependency order (children first, parents last)
+    models_in_order = [
+        # Sales (dependent on Order)
+        SalesMetalStock, Sale,
+        # Order dependencies
+        DebtorPayment, OrderPayment, OrderOrnament, OrderMetalStock, Order,
+        # Ornament models
+        Kaligar_CashAccount, Kaligar_GoldAccount, Kaligar_Ornaments, Ornament,
+        SubCategory, MainCategory, Kaligar, Potey, Motimala, Stone,
+        # Main models
+        DailyRate, Stock,
+        # GoldSilverPurchase models
+        MetalStockMovement, MetalStock, CustomerPurchase, GoldSilverPurchase, MetalStockType, Party,
+        # Finance models (transactions before parent records)
+        CreditorTransaction, DebtorTransaction, EmployeeSalary,
+        SundryCreditor, SundryDebtor, Loan, Expense, Employee,
+    ]
+
+    deleted_counts = {}
+    for done, model in enumerate(models_in_order):
+        name = model.__name__
+        report(job, done, len(models_in_order), f"Deleting {name}...")
+        deleted_counts[name] = model.objects.count()
+        model.objects.all().delete()
+
+    total_deleted = sum(deleted_counts.values())
+    details = " | ".join([f"{model}: {count}" for model, count in deleted_counts.items() if count > 0])
+    return f"All data deleted successfully! Total records removed: {total_deleted}. Details: {details}"
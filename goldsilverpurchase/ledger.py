@@ -0,0 +1,223 @@
+"""Running cost ledger for ``MetalStock``.
+
+A stock's weighted-average ``unit_cost`` is the cost of its priced 'in'
+movements divided by their quantity, and its balance is its 'in' and
+'adjustment' movements less its 'out' movements.  Instead of rescanning
+every movement on each save, ``MetalStock`` keeps the running sums
+(``ledger_quantity``, ``ledger_cost`` and ``ledger_balance``) and each
+``MetalStockMovement`` stores the sums as they stood after it was posted
+(in primary-key order).
+
+Saving or deleting a movement applies its contribution as an ``F()`` delta
+to the stock and to the later movements of that stock, so the cost of a
+change no longer grows with the stock's history.  Raw saves (``loaddata``)
+skip the ledger; run :func:`rebuild` or ``manage.py reconcile_metal_stock
+--rebuild`` afterwards.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+ZERO = Decimal('0')
+QUANTITY_PLACES = Decimal('0.001')
+COST_PLACES = Decimal('0.00001')
+
+TRACKED_FIELDS = ('metal_stock_id', 'movement_type', 'quantity', 'rate')
+
+
+def contribution(movement_type, quantity, rate):
+    """``(quantity, cost)`` a movement adds to the average-cost ledger.
+
+    Only priced 'in' movements count, exactly as the average has always
+    been computed.
+    """
+    if movement_type == 'in' and rate and quantity:
+        return quantity, rate * quantity
+    return ZERO, ZERO
+
+
+def balance_change(movement_type, quantity):
+    """How much a movement changes the stock balance ('out' subtracts)."""
+    quantity = quantity or ZERO
+    return -quantity if movement_type == 'out' else quantity
+
+
+def state_of(instance):
+    """Return ``(metal_stock_id, quantity, cost, balance)`` for a movement instance."""
+    quantity, cost = contribution(instance.movement_type, instance.quantity, instance.rate)
+    balance = balance_change(instance.movement_type, instance.quantity)
+    return instance.metal_stock_id, quantity, cost, balance
+
+
+def capture_state(instance):
+    """Remember the ledger contribution an instance was loaded with."""
+    loaded = instance.__dict__
+    if all(field in loaded for field in TRACKED_FIELDS):
+        instance._ledger_state = state_of(instance)
+    else:
+        instance._ledger_state = None
+
+
+def load_state(instance):
+    """Fetch the stored contribution for an instance that was not loaded with one."""
+    from .models import MetalStockMovement
+
+    row = MetalStockMovement.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+    if row is None:
+        return None
+    return state_of(MetalStockMovement(**row))
+
+
+def _shift(metal_stock_id, after_pk, quantity, cost, balance):
+    """Add a delta to a stock's running sums and to its movements after ``after_pk``."""
+    from .models import MetalStock, MetalStockMovement
+
+    delta = {
+        'ledger_quantity': F('ledger_quantity') + quantity,
+        'ledger_cost': F('ledger_cost') + cost,
+        'ledger_balance': F('ledger_balance') + balance,
+    }
+    MetalStock.objects.filter(pk=metal_stock_id).update(**delta)
+    MetalStockMovement.objects.filter(metal_stock_id=metal_stock_id, pk__gt=after_pk).update(**delta)
+
+
+def _place(instance, metal_stock_id, quantity, cost, balance):
+    """Set a movement's own running sums from the movement posted before it."""
+    from .models import MetalStockMovement
+
+    previous = (
+        MetalStockMovement.objects.filter(metal_stock_id=metal_stock_id, pk__lt=instance.pk)
+        .order_by('-pk')
+        .values_list('ledger_quantity', 'ledger_cost', 'ledger_balance')
+        .first()
+    ) or (ZERO, ZERO, ZERO)
+    ledger_quantity = previous[0] + quantity
+    ledger_cost = previous[1] + cost
+    ledger_balance = previous[2] + balance
+    MetalStockMovement.objects.filter(pk=instance.pk).update(
+        ledger_quantity=ledger_quantity, ledger_cost=ledger_cost, ledger_balance=ledger_balance,
+    )
+    instance.ledger_quantity = ledger_quantity
+    instance.ledger_cost = ledger_cost
+    instance.ledger_balance = ledger_balance
+
+
+def revalue(metal_stock_id):
+    """Recompute a stock's ``unit_cost``/``total_cost`` from its running sums."""
+    from .models import MetalStock
+
+    stock = MetalStock.objects.filter(pk=metal_stock_id).first()
+    if stock is not None:
+        stock.save()
+
+
+def record_save(instance, created):
+    """Apply a saved movement's change in contribution to the ledger."""
+    previous = None if created else getattr(instance, '_ledger_state', None)
+    current = state_of(instance)
+    if previous == current:
+        return
+
+    with transaction.atomic():
+        if previous is not None and any(previous[1:]):
+            _shift(previous[0], instance.pk, *(-value for value in previous[1:]))
+        if any(current[1:]):
+            _shift(current[0], instance.pk, *current[1:])
+        _place(instance, *current)
+        for metal_stock_id in {current[0], previous[0] if previous else current[0]}:
+            revalue(metal_stock_id)
+    instance._ledger_state = current
+
+
+def record_delete(instance):
+    """Remove a deleted movement's contribution from the ledger."""
+    metal_stock_id, quantity, cost, balance = getattr(instance, '_ledger_state', None) or state_of(instance)
+    if not (quantity or cost or balance):
+        return
+    with transaction.atomic():
+        _shift(metal_stock_id, instance.pk, -quantity, -cost, -balance)
+        revalue(metal_stock_id)
+
+
+def expected_ledger(metal_stock_id):
+    """Walk a stock's movements and return ``(stock_sums, {movement_pk: sums})``."""
+    from .models import MetalStockMovement
+
+    running_quantity, running_cost, running_balance = ZERO, ZERO, ZERO
+    per_movement = {}
+    movements = (
+        MetalStockMovement.objects.filter(metal_stock_id=metal_stock_id)
+        .order_by('pk')
+        .values_list('pk', 'movement_type', 'quantity', 'rate')
+    )
+    for pk, movement_type, moved, rate in movements.iterator():
+        quantity, cost = contribution(movement_type, moved, rate)
+        running_quantity += quantity
+        running_cost += cost
+        running_balance += balance_change(movement_type, moved)
+        per_movement[pk] = (running_quantity, running_cost, running_balance)
+    return (running_quantity, running_cost, running_balance), per_movement
+
+
+def _same(stored, expected):
+    return (
+        (stored[0] or ZERO).quantize(QUANTITY_PLACES) == expected[0].quantize(QUANTITY_PLACES)
+        and (stored[1] or ZERO).quantize(COST_PLACES) == expected[1].quantize(COST_PLACES)
+        and (stored[2] or ZERO).quantize(QUANTITY_PLACES) == expected[2].quantize(QUANTITY_PLACES)
+    )
+
+
+def verify(metal_stock_ids=None):
+    """Return ``{metal_stock_id: mismatched movement count}`` for drifted stocks.
+
+    A stock whose own running sums are wrong is reported with the number of
+    wrong movement rows (which may be zero).
+    """
+    from .models import MetalStock, MetalStockMovement
+
+    stocks = MetalStock.objects.order_by('pk')
+    if metal_stock_ids is not None:
+        stocks = stocks.filter(pk__in=metal_stock_ids)
+
+    drifted = {}
+    stored_stocks = stocks.values_list('pk', 'ledger_quantity', 'ledger_cost', 'ledger_balance')
+    for stock_id, *stock_sums in stored_stocks:
+        totals, per_movement = expected_ledger(stock_id)
+        stored = MetalStockMovement.objects.filter(metal_stock_id=stock_id).values_list(
+            'pk', 'ledger_quantity', 'ledger_cost', 'ledger_balance'
+        )
+        bad_rows = sum(
+            1 for pk, *sums in stored.iterator()
+            if not _same(sums, per_movement[pk])
+        )
+        if bad_rows or not _same(stock_sums, totals):
+            drifted[stock_id] = bad_rows
+    return drifted
+
+
+def rebuild(metal_stock_ids=None):
+    """Recompute the running sums of every (or the given) stock from its movements."""
+    from .models import MetalStock, MetalStockMovement
+
+    stocks = MetalStock.objects.order_by('pk')
+    if metal_stock_ids is not None:
+        stocks = stocks.filter(pk__in=metal_stock_ids)
+
+    rebuilt = 0
+    with transaction.atomic():
+        for stock in stocks:
+            totals, per_movement = expected_ledger(stock.pk)
+            movements = [
+                MetalStockMovement(pk=pk, ledger_quantity=quantity, ledger_cost=cost, ledger_balance=balance)
+                for pk, (quantity, cost, balance) in per_movement.items()
+            ]
+            MetalStockMovement.objects.bulk_update(
+                movements, ['ledger_quantity', 'ledger_cost', 'ledger_balance'], batch_size=500,
+            )
+            MetalStock.objects.filter(pk=stock.pk).update(
+                ledger_quantity=totals[0], ledger_cost=totals[1], ledger_balance=totals[2],
+            )
+            stock.save()
+            rebuilt += 1
+    return rebuilt
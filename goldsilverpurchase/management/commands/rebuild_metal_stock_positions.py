@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from goldsilverpurchase import positions
+from goldsilverpurchase.models import MetalStock
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per metal/type/purity stock positions from the metal stock table'
+
+    def handle(self, *args, **options):
+        total = MetalStock.objects.count()
+        self.stdout.write(f'Rebuilding metal stock positions from {total} stocks...')
+        rows = positions.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✓ Completed! Wrote {rows} positions.'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from goldsilverpurchase import ledger
+from goldsilverpurchase.models import MetalStock
+
+
+class Command(BaseCommand):
+    help = 'Verify the MetalStock running cost ledger against its movements (and optionally rebuild it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Rewrite the ledger of every stock instead of only reporting drift',
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            action='append',
+            dest='stocks',
+            help='Limit to this MetalStock id (may be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        stock_ids = options['stocks']
+        if options['rebuild']:
+            rebuilt = ledger.rebuild(stock_ids)
+            self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt the ledger of {rebuilt} metal stocks.'))
+            return
+
+        checked = MetalStock.objects.filter(pk__in=stock_ids).count() if stock_ids else MetalStock.objects.count()
+        drifted = ledger.verify(stock_ids)
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS(f'✓ Ledger is consistent for {checked} metal stocks.'))
+            return
+
+        for stock_id, bad_rows in drifted.items():
+            self.stdout.write(self.style.WARNING(f'MetalStock #{stock_id}: {bad_rows} movement rows out of step'))
+        self.stdout.write(self.style.WARNING(
+            f'{len(drifted)} of {checked} metal stocks have drifted; run with --rebuild to repair them.'
+        ))
@@ -0,0 +1,29 @@
+"""Canonical ``metal_type`` values for purchases.
+
+``GoldSilverPurchase.metal_type`` and ``CustomerPurchase.metal_type`` hold
+``'gold'``, ``'silver'`` or ``'diamond'``.  The forms only offer those, but
+Excel imports carried values such as ``'Gold'`` or ``' GOLD '``, so reports
+used to match with ``metal_type__icontains`` and could not use the metal-type
+indexes.  ``calculate_amount(s)`` (which bulk imports call too) now stores the
+canonical value, and migration 0007 rewrote existing rows, so reports filter
+and group on the exact value.
+"""
+from __future__ import annotations
+
+METAL_TYPES = ('gold', 'silver', 'diamond')
+
+
+def canonical(value):
+    """``value`` as one of :data:`METAL_TYPES` when it names one.
+
+    Surrounding spaces and case are ignored; otherwise the first metal the
+    value contains wins (``'Gold 24K'`` -> ``'gold'``).  Anything else is
+    returned stripped and lower-cased.
+    """
+    text = str(value or '').strip().lower()
+    if text in METAL_TYPES:
+        return text
+    for metal in METAL_TYPES:
+        if metal in text:
+            return metal
+    return text
@@ -0,0 +1,59 @@
+# Generated by Django 5.0 on 2026-10-17 17:21
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def contribution(movement_type, quantity, rate):
+    # Only priced 'in' movements count towards the average cost.
+    if movement_type == 'in' and rate and quantity:
+        return quantity, rate * quantity
+    return Decimal('0'), Decimal('0')
+
+
+def populate_ledger(apps, schema_editor):
+    MetalStock = apps.get_model('goldsilverpurchase', 'MetalStock')
+    MetalStockMovement = apps.get_model('goldsilverpurchase', 'MetalStockMovement')
+    for stock_id in MetalStock.objects.values_list('pk', flat=True):
+        running_quantity, running_cost = Decimal('0'), Decimal('0')
+        movements = []
+        for movement in MetalStockMovement.objects.filter(metal_stock_id=stock_id).order_by('pk'):
+            quantity, cost = contribution(movement.movement_type, movement.quantity, movement.rate)
+            running_quantity += quantity
+            running_cost += cost
+            movement.ledger_quantity = running_quantity
+            movement.ledger_cost = running_cost
+            movements.append(movement)
+        MetalStockMovement.objects.bulk_update(movements, ['ledger_quantity', 'ledger_cost'], batch_size=500)
+        MetalStock.objects.filter(pk=stock_id).update(ledger_quantity=running_quantity, ledger_cost=running_cost)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goldsilverpurchase', '0003_customerpurchase_extra_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metalstock',
+            name='ledger_cost',
+            field=models.DecimalField(decimal_places=5, default=Decimal('0.00000'), editable=False, help_text='Total rate × quantity of priced stock-in movements', max_digits=22),
+        ),
+        migrations.AddField(
+            model_name='metalstock',
+            name='ledger_quantity',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.000'), editable=False, help_text='Total quantity of priced stock-in movements', max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='metalstockmovement',
+            name='ledger_cost',
+            field=models.DecimalField(decimal_places=5, default=Decimal('0.00000'), editable=False, max_digits=22),
+        ),
+        migrations.AddField(
+            model_name='metalstockmovement',
+            name='ledger_quantity',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.000'), editable=False, max_digits=16),
+        ),
+        migrations.RunPython(populate_ledger, migrations.RunPython.noop),
+    ]
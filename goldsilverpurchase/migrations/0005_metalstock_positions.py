@@ -0,0 +1,129 @@
+# Generated by Django 5.0 on 2026-10-17 18:05
+
+import django.db.models.deletion
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+
+ZERO = Decimal('0')
+TOLA_TO_GRAM = Decimal('11.6643')
+KEY_FIELDS = ('metal_type', 'stock_type_id', 'purity')
+LOW_STOCK_THRESHOLDS = {
+    'gold': Decimal('50.000'),
+    'silver': Decimal('200.000'),
+    'platinum': Decimal('10.000'),
+}
+
+
+def balance_change(movement_type, quantity):
+    quantity = quantity or ZERO
+    return -quantity if movement_type == 'out' else quantity
+
+
+def grouped_positions(MetalStock):
+    decimal_output = DecimalField(max_digits=18, decimal_places=5)
+    per_gram_cost = Case(
+        When(rate_unit='gram', then=F('unit_cost')),
+        When(rate_unit='10gram', then=F('unit_cost') / Value(Decimal('10'))),
+        When(rate_unit='tola', then=F('unit_cost') / Value(TOLA_TO_GRAM)),
+        default=Value(ZERO),
+        output_field=decimal_output,
+    )
+    priced = Q(unit_cost__gt=0) & ~Q(quantity=0) & Q(rate_unit__in=('gram', '10gram', 'tola'))
+    rows = (
+        MetalStock.objects.order_by()
+        .values(*KEY_FIELDS)
+        .annotate(
+            _count=Count('id'),
+            _quantity=Sum('quantity'),
+            _value=Sum(F('quantity') * per_gram_cost, output_field=decimal_output),
+            _priced_quantity=Sum('quantity', filter=priced),
+        )
+    )
+    for row in rows:
+        quantity = row['_quantity'] or ZERO
+        value = Decimal(str(row['_value'] or ZERO))
+        priced_quantity = row['_priced_quantity'] or ZERO
+        avg = value / priced_quantity * TOLA_TO_GRAM if priced_quantity else ZERO
+        yield {field: row[field] for field in KEY_FIELDS}, {
+            'stock_count': row['_count'],
+            'quantity': quantity,
+            'value': value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            'priced_quantity': priced_quantity,
+            'avg_cost_per_tola': avg.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            'is_low_stock': quantity < LOW_STOCK_THRESHOLDS.get(row['metal_type'], ZERO),
+        }
+
+
+def populate_balances_and_positions(apps, schema_editor):
+    MetalStock = apps.get_model('goldsilverpurchase', 'MetalStock')
+    MetalStockMovement = apps.get_model('goldsilverpurchase', 'MetalStockMovement')
+    MetalStockPosition = apps.get_model('goldsilverpurchase', 'MetalStockPosition')
+    for stock_id in MetalStock.objects.values_list('pk', flat=True):
+        running_balance = ZERO
+        movements = []
+        for movement in MetalStockMovement.objects.filter(metal_stock_id=stock_id).order_by('pk'):
+            running_balance += balance_change(movement.movement_type, movement.quantity)
+            movement.ledger_balance = running_balance
+            movements.append(movement)
+        MetalStockMovement.objects.bulk_update(movements, ['ledger_balance'], batch_size=500)
+        MetalStock.objects.filter(pk=stock_id).update(ledger_balance=running_balance)
+
+    MetalStockPosition.objects.bulk_create([
+        MetalStockPosition(**key, **values)
+        for key, values in grouped_positions(MetalStock)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goldsilverpurchase', '0004_metalstock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetalStockPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metal_type', models.CharField(choices=[('gold', 'Gold'), ('silver', 'Silver'), ('platinum', 'Platinum')], max_length=10)),
+                ('purity', models.CharField(choices=[('24K', '24 Karat'), ('22K', '22 Karat'), ('18K', '18 Karat'), ('14K', '14 Karat')], max_length=5)),
+                ('stock_count', models.IntegerField(default=0)),
+                ('quantity', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Sum of quantity × per-gram unit cost', max_digits=18)),
+                ('priced_quantity', models.DecimalField(decimal_places=3, default=Decimal('0.000'), help_text='Quantity of the stocks that carry a unit cost', max_digits=16)),
+                ('avg_cost_per_tola', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Quantity-weighted average unit cost per tola', max_digits=12)),
+                ('is_low_stock', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Metal Stock Position',
+                'verbose_name_plural': 'Metal Stock Positions',
+                'ordering': ['metal_type', 'stock_type', 'purity'],
+            },
+        ),
+        migrations.AddField(
+            model_name='metalstock',
+            name='ledger_balance',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.000'), editable=False, help_text='Stock-in and adjustment quantity less stock-out quantity', max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='metalstockmovement',
+            name='ledger_balance',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0.000'), editable=False, max_digits=16),
+        ),
+        migrations.AddIndex(
+            model_name='metalstockmovement',
+            index=models.Index(fields=['metal_stock', '-movement_date', '-created_at', '-id'], name='gsp_movement_history_idx'),
+        ),
+        migrations.AddField(
+            model_name='metalstockposition',
+            name='stock_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='goldsilverpurchase.metalstocktype'),
+        ),
+        migrations.AddConstraint(
+            model_name='metalstockposition',
+            constraint=models.UniqueConstraint(fields=('metal_type', 'stock_type', 'purity'), name='unique_metal_stock_position'),
+        ),
+        migrations.RunPython(populate_balances_and_positions, migrations.RunPython.noop),
+    ]
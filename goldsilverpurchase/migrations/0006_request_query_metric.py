@@ -0,0 +1,35 @@
+# Generated by Django 5.0 on 2026-10-17 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goldsilverpurchase', '0005_metalstock_positions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestQueryMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255)),
+                ('view_name', models.CharField(blank=True, default='', max_length=150)),
+                ('method', models.CharField(default='GET', max_length=10)),
+                ('status_code', models.PositiveSmallIntegerField(default=200)),
+                ('query_count', models.PositiveIntegerField(default=0)),
+                ('duplicate_count', models.PositiveIntegerField(default=0)),
+                ('db_time_ms', models.FloatField(default=0)),
+                ('render_time_ms', models.FloatField(blank=True, null=True)),
+                ('total_time_ms', models.FloatField(default=0)),
+                ('query_budget', models.PositiveIntegerField(blank=True, null=True)),
+                ('duplicates', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='goldsilverp_created_98ec1e_idx'), models.Index(fields=['view_name', 'created_at'], name='goldsilverp_view_na_9f1512_idx')],
+            },
+        ),
+    ]
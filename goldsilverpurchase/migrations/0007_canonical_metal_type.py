@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-17 18:41
+
+from django.db import migrations, models
+
+
+METAL_TYPES = ('gold', 'silver', 'diamond')
+
+
+def canonical(value):
+    text = str(value or '').strip().lower()
+    if text in METAL_TYPES:
+        return text
+    for metal in METAL_TYPES:
+        if metal in text:
+            return metal
+    return text
+
+
+def canonicalize_metal_types(apps, schema_editor):
+    for model_name in ('GoldSilverPurchase', 'CustomerPurchase'):
+        model = apps.get_model('goldsilverpurchase', model_name)
+        values = model.objects.order_by().values_list('metal_type', flat=True).distinct()
+        for value in list(values):
+            if canonical(value) != value:
+                model.objects.filter(metal_type=value).update(metal_type=canonical(value))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goldsilverpurchase', '0006_request_query_metric'),
+    ]
+
+    operations = [
+        migrations.RunPython(canonicalize_metal_types, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customerpurchase',
+            index=models.Index(fields=['metal_type', 'purchase_date'], name='goldsilverp_metal_t_8ea595_idx'),
+        ),
+    ]
@@ -5,6 +5,8 @@ from decimal import Decimal
 
 from ornament.models import Kaligar
 
+from . import ledger, metals, positions
+
 
 class Party(models.Model):
     party_name = models.CharField(max_length=255)
@@ -144,9 +146,16 @@ class GoldSilverPurchase(models.Model):
         return f"{self.bill_no} - {self.particular or 'Untitled'}"
 
     def save(self, *args, **kwargs):
+        self.calculate_amount()
+        super().save(*args, **kwargs)
+
+    def calculate_amount(self):
+        """Normalise inputs and derive ``amount`` (also used by bulk imports)."""
         # Conversion constant: 1 tola = 11.6643 grams
         TOLA_TO_GRAM = Decimal('11.6643')
         
+        self.metal_type = metals.canonical(self.metal_type)
+
         # Ensure Decimal values
         if isinstance(self.quantity, (int, float)):
             self.quantity = Decimal(str(self.quantity))
@@ -182,8 +191,6 @@ class GoldSilverPurchase(models.Model):
         if self.amount < 0:
             self.amount = Decimal('0.00')
 
-        super().save(*args, **kwargs)
-
     @property
     def subtotal(self):
         """Calculate subtotal based on rate_unit without wages and discount"""
@@ -346,12 +353,16 @@ class CustomerPurchase(models.Model):
     profit_weight = models.DecimalField(max_digits=10, decimal_places=3, validators=[MinValueValidator(Decimal('-999999.999'))], blank=True, null=True, help_text='Auto-calculated: Refined Weight - Final Weight')
     profit = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal('-999999.99'))], blank=True, null=True, help_text='Auto-calculated: Profit Weight × Rate (adjusted for rate_unit)')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['metal_type', 'purchase_date']),
+        ]
+
     def __str__(self):
         return f"{self.sn} - {self.customer_name}"
 
     def save(self, *args, **kwargs):
         """Auto-generate SN and calculate amount based on rate_unit"""
-        TOLA_TO_GRAM = Decimal('11.6643')
         # Auto-generate SN if not provided
         if not self.sn:
             all_purchases = CustomerPurchase.objects.all().values_list('sn', flat=True)
@@ -365,6 +376,15 @@ class CustomerPurchase(models.Model):
             else:
                 self.sn = "1"
 
+        self.calculate_amounts()
+        super().save(*args, **kwargs)
+
+    def calculate_amounts(self):
+        """Derive profit, amount and total fields (also used by bulk imports)."""
+        TOLA_TO_GRAM = Decimal('11.6643')
+
+        self.metal_type = metals.canonical(self.metal_type)
+
         # Calculate profit_weight
         if self.refined_weight is not None and self.final_weight is not None:
             self.profit_weight = (self.refined_weight - self.final_weight).quantize(Decimal('0.001'))
@@ -413,8 +433,6 @@ class CustomerPurchase(models.Model):
         else:
             self.profit = None
 
-        super().save(*args, **kwargs)
-
 
 class MetalStockType(models.Model):
     """Model to define different types of metal stock"""
@@ -530,6 +548,29 @@ class MetalStock(models.Model):
         help_text='Additional notes about the stock'
     )
 
+    # Running sums of priced 'in' movements, maintained by goldsilverpurchase.ledger
+    ledger_quantity = models.DecimalField(
+        max_digits=16,
+        decimal_places=3,
+        default=Decimal('0.000'),
+        editable=False,
+        help_text='Total quantity of priced stock-in movements'
+    )
+    ledger_cost = models.DecimalField(
+        max_digits=22,
+        decimal_places=5,
+        default=Decimal('0.00000'),
+        editable=False,
+        help_text='Total rate × quantity of priced stock-in movements'
+    )
+    ledger_balance = models.DecimalField(
+        max_digits=16,
+        decimal_places=3,
+        default=Decimal('0.000'),
+        editable=False,
+        help_text='Stock-in and adjustment quantity less stock-out quantity'
+    )
+
     # Timestamps
     last_updated = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -547,6 +588,14 @@ class MetalStock(models.Model):
             models.Index(fields=['stock_type']),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the position this row was loaded into, so moving it to
+        # another metal/type/purity refreshes both snapshots.
+        positions.capture_key(instance)
+        return instance
+
     def __str__(self):
         stock_type_display = self.stock_type.get_name_display() if self.stock_type else 'Unknown'
         return f"{self.get_metal_type_display()} - {stock_type_display} ({self.purity})"
@@ -560,13 +609,17 @@ class MetalStock(models.Model):
 
         # Only calculate averages if PK exists (object is saved)
         if self.pk:
-            in_movements = self.movements.filter(movement_type='in')
-            total_qty = Decimal('0.00')
-            total_cost = Decimal('0.00')
-            for m in in_movements:
-                if m.rate and m.quantity:
-                    total_qty += m.quantity
-                    total_cost += m.rate * m.quantity
+            # The ledger sums are only ever changed by F() updates, so read
+            # the stored values rather than trusting this (possibly stale) copy.
+            stored = (
+                type(self).objects.filter(pk=self.pk)
+                .values_list('ledger_quantity', 'ledger_cost', 'ledger_balance')
+                .first()
+            )
+            if stored:
+                self.ledger_quantity, self.ledger_cost, self.ledger_balance = stored
+            total_qty = self.ledger_quantity or Decimal('0.00')
+            total_cost = self.ledger_cost or Decimal('0.00')
             if total_qty > 0:
                 avg_rate = (total_cost / total_qty).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
                 self.unit_cost = avg_rate
@@ -587,15 +640,8 @@ class MetalStock(models.Model):
 
     @property
     def is_low_stock(self):
-        """Check if stock is running low (can be customized)"""
-        # You can define a minimum threshold per metal type
-        minimum_thresholds = {
-            'gold': Decimal('50.000'),
-            'silver': Decimal('200.000'),
-            'platinum': Decimal('10.000'),
-        }
-        threshold = minimum_thresholds.get(self.metal_type, Decimal('0.000'))
-        return self.quantity < threshold
+        """Check if stock is running low (thresholds in goldsilverpurchase.positions)"""
+        return positions.is_low(self.metal_type, self.quantity)
 
     @property
     def unit_cost_per_tola(self):
@@ -673,13 +719,42 @@ class MetalStockMovement(models.Model):
     notes = models.TextField(blank=True, null=True)
     movement_date = NepaliDateField(blank=True, null=True, help_text='Date of the stock movement')
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    # Stock's running ledger sums after this movement (see goldsilverpurchase.ledger)
+    ledger_quantity = models.DecimalField(
+        max_digits=16,
+        decimal_places=3,
+        default=Decimal('0.000'),
+        editable=False,
+    )
+    ledger_cost = models.DecimalField(
+        max_digits=22,
+        decimal_places=5,
+        default=Decimal('0.00000'),
+        editable=False,
+    )
+    ledger_balance = models.DecimalField(
+        max_digits=16,
+        decimal_places=3,
+        default=Decimal('0.000'),
+        editable=False,
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the ledger contribution this row was loaded with so the
+        # post_save signal can apply just the difference.
+        ledger.capture_state(instance)
+        return instance
+
     class Meta:
         verbose_name = "Metal Stock Movement"
         verbose_name_plural = "Metal Stock Movements"
         ordering = ['-movement_date', '-created_at']
         indexes = [
             models.Index(fields=['metal_stock', 'movement_date']),
+            models.Index(fields=['metal_stock', '-movement_date', '-created_at', '-id'], name='gsp_movement_history_idx'),
             models.Index(fields=['reference_type', 'reference_id']),
         ]
 
@@ -690,6 +765,54 @@ class MetalStockMovement(models.Model):
             return f"Movement #{self.pk or 'New'}"
 
 
+class MetalStockPosition(models.Model):
+    """Materialized stock totals per (metal_type, stock_type, purity).
+
+    Kept current by ``goldsilverpurchase.signals`` whenever a ``MetalStock``
+    is saved (movement writes save their stock through the ledger), so the
+    stock list reads a handful of rows instead of aggregating every stock.
+    Rebuild with ``manage.py rebuild_metal_stock_positions``.
+    """
+
+    metal_type = models.CharField(max_length=10, choices=MetalStock.MetalType.choices)
+    stock_type = models.ForeignKey(MetalStockType, on_delete=models.CASCADE, related_name='positions')
+    purity = models.CharField(max_length=5, choices=MetalStock.Purity.choices)
+
+    stock_count = models.IntegerField(default=0)
+    quantity = models.DecimalField(max_digits=16, decimal_places=3, default=Decimal('0.000'))
+    value = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Sum of quantity × per-gram unit cost',
+    )
+    priced_quantity = models.DecimalField(
+        max_digits=16,
+        decimal_places=3,
+        default=Decimal('0.000'),
+        help_text='Quantity of the stocks that carry a unit cost',
+    )
+    avg_cost_per_tola = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Quantity-weighted average unit cost per tola',
+    )
+    is_low_stock = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Metal Stock Position"
+        verbose_name_plural = "Metal Stock Positions"
+        ordering = ['metal_type', 'stock_type', 'purity']
+        constraints = [
+            models.UniqueConstraint(fields=['metal_type', 'stock_type', 'purity'], name='unique_metal_stock_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_metal_type_display()} {self.purity} ({self.quantity}g)"
+
+
 class HomePagePerformanceMetric(models.Model):
     """Stores customer-side home page performance measurements."""
 
@@ -721,4 +844,41 @@ class HomePagePerformanceMetric(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.source} at {self.created_at:%Y-%m-%d %H:%M:%S}"
\ No newline at end of file
+        return f"{self.source} at {self.created_at:%Y-%m-%d %H:%M:%S}"
+
+class RequestQueryMetric(models.Model):
+    """Server-side SQL and timing figures for one sampled request.
+
+    Written by ``main.middleware.QueryBudgetMiddleware`` when
+    ``QUERY_METRICS_ENABLED`` is on; old rows are pruned as new ones arrive.
+    """
+
+    path = models.CharField(max_length=255)
+    view_name = models.CharField(max_length=150, blank=True, default='')
+    method = models.CharField(max_length=10, default='GET')
+    status_code = models.PositiveSmallIntegerField(default=200)
+
+    query_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    db_time_ms = models.FloatField(default=0)
+    render_time_ms = models.FloatField(null=True, blank=True)
+    total_time_ms = models.FloatField(default=0)
+    query_budget = models.PositiveIntegerField(null=True, blank=True)
+    # [[sql signature, times run], ...] for statements run more than once.
+    duplicates = models.JSONField(default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['view_name', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.view_name or self.path}: {self.query_count} queries"
+
+    @property
+    def over_budget(self):
+        return self.query_budget is not None and self.query_count > self.query_budget
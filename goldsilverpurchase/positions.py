@@ -0,0 +1,161 @@
+"""Keep ``MetalStockPosition`` in step with the ``MetalStock`` table.
+
+Each position is the running total of the stocks sharing a
+``(metal_type, stock_type, purity)`` key: quantity, value at the
+per-gram unit cost, the quantity-weighted average cost per tola and a
+low-stock flag.  A stock save refreshes the position(s) it touches with one
+grouped query over that key's stocks (there are only ever a few), so the
+stock list no longer aggregates the whole table on every request.  Raw
+saves (``loaddata``) skip the refresh; run :func:`rebuild` afterwards.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+
+ZERO = Decimal('0')
+TOLA_TO_GRAM = Decimal('11.6643')
+KEY_FIELDS = ('metal_type', 'stock_type_id', 'purity')
+
+# Minimum comfortable quantity (grams) per metal; below it a stock or
+# position is flagged as low.
+LOW_STOCK_THRESHOLDS = {
+    'gold': Decimal('50.000'),
+    'silver': Decimal('200.000'),
+    'platinum': Decimal('10.000'),
+}
+
+
+def is_low(metal_type, quantity):
+    return (quantity or ZERO) < LOW_STOCK_THRESHOLDS.get(metal_type, ZERO)
+
+
+def key_of(instance):
+    return tuple(getattr(instance, field) for field in KEY_FIELDS)
+
+
+def capture_key(instance):
+    """Remember the position a loaded stock belongs to (if fully loaded)."""
+    loaded = instance.__dict__
+    instance._position_key = key_of(instance) if all(field in loaded for field in KEY_FIELDS) else None
+
+
+def _key_of_row(row):
+    return tuple(row[field] for field in KEY_FIELDS)
+
+
+def _per_gram_cost():
+    decimal_output = DecimalField(max_digits=18, decimal_places=5)
+    return Case(
+        When(rate_unit='gram', then=F('unit_cost')),
+        When(rate_unit='10gram', then=F('unit_cost') / Value(Decimal('10'))),
+        When(rate_unit='tola', then=F('unit_cost') / Value(TOLA_TO_GRAM)),
+        default=Value(ZERO),
+        output_field=decimal_output,
+    )
+
+
+def grouped_positions(queryset):
+    """Aggregate a MetalStock queryset into ``{key: figures}`` with one query."""
+    decimal_output = DecimalField(max_digits=18, decimal_places=5)
+    priced = Q(unit_cost__gt=0) & ~Q(quantity=0) & Q(rate_unit__in=('gram', '10gram', 'tola'))
+    rows = (
+        queryset.order_by()
+        .values(*KEY_FIELDS)
+        .annotate(
+            _count=Count('id'),
+            _quantity=Sum('quantity'),
+            _value=Sum(F('quantity') * _per_gram_cost(), output_field=decimal_output),
+            _priced_quantity=Sum('quantity', filter=priced),
+        )
+    )
+    figures = {}
+    for row in rows:
+        quantity = row['_quantity'] or ZERO
+        value = Decimal(str(row['_value'] or ZERO))
+        priced_quantity = row['_priced_quantity'] or ZERO
+        avg = value / priced_quantity * TOLA_TO_GRAM if priced_quantity else ZERO
+        figures[_key_of_row(row)] = {
+            'stock_count': row['_count'],
+            'quantity': quantity,
+            'value': value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            'priced_quantity': priced_quantity,
+            'avg_cost_per_tola': avg.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            'is_low_stock': is_low(row['metal_type'], quantity),
+        }
+    return figures
+
+
+def _key_q(key):
+    return Q(**dict(zip(KEY_FIELDS, key)))
+
+
+def refresh(keys):
+    """Recompute the positions for ``keys`` from their stocks."""
+    from .models import MetalStock, MetalStockPosition
+
+    keys = {key for key in keys if key and None not in key}
+    if not keys:
+        return
+    match = Q()
+    for key in keys:
+        match |= _key_q(key)
+
+    with transaction.atomic():
+        figures = grouped_positions(MetalStock.objects.filter(match))
+        for key in keys:
+            if key in figures:
+                MetalStockPosition.objects.update_or_create(
+                    **dict(zip(KEY_FIELDS, key)), defaults=figures[key],
+                )
+        gone = keys - figures.keys()
+        if gone:
+            stale = Q()
+            for key in gone:
+                stale |= _key_q(key)
+            MetalStockPosition.objects.filter(stale).delete()
+
+
+def record_save(instance):
+    """Refresh the position a saved stock is in (and the one it left)."""
+    previous = getattr(instance, '_position_key', None)
+    current = key_of(instance)
+    refresh({previous, current})
+    instance._position_key = current
+
+
+def record_delete(instance):
+    refresh({getattr(instance, '_position_key', None) or key_of(instance)})
+
+
+def rebuild():
+    """Rewrite every position from the stock table; returns the number of rows."""
+    from .models import MetalStock, MetalStockPosition
+
+    with transaction.atomic():
+        figures = grouped_positions(MetalStock.objects.all())
+        MetalStockPosition.objects.all().delete()
+        MetalStockPosition.objects.bulk_create([
+            MetalStockPosition(**dict(zip(KEY_FIELDS, key)), **values)
+            for key, values in figures.items()
+        ])
+    return len(figures)
+
+
+def summarize(positions):
+    """Fold position rows into per-metal totals for the stock dashboard.
+
+    Returns ``{metal_type: {'quantity', 'value', 'avg_cost_per_tola'}}``;
+    unpriced stocks add nothing to ``value``, so the average is the value
+    over the priced quantity.
+    """
+    totals = {}
+    for position in positions:
+        metal = totals.setdefault(position.metal_type, {'quantity': ZERO, 'value': ZERO, 'priced_quantity': ZERO})
+        metal['quantity'] += position.quantity
+        metal['value'] += position.value
+        metal['priced_quantity'] += position.priced_quantity
+    for metal in totals.values():
+        priced_quantity = metal.pop('priced_quantity')
+        metal['avg_cost_per_tola'] = metal['value'] / priced_quantity * TOLA_TO_GRAM if priced_quantity else ZERO
+    return totals
@@ -3,6 +3,7 @@ from django.dispatch import receiver
 from decimal import Decimal
 import nepali_datetime as ndt
 
+from . import ledger, positions
 from .models import MetalStock, MetalStockType, MetalStockMovement, GoldSilverPurchase
 
 
@@ -46,9 +47,6 @@ def create_or_update_metal_stock_and_movement_for_raw(sender, instance, created,
             'movement_date': instance.bill_date
         }
     )
-    # Always recalculate MetalStock after movement update/create
-    metal_stock.refresh_from_db()
-    metal_stock.save()
 from .models import GoldSilverPurchase, MetalStock, MetalStockType, CustomerPurchase, MetalStockMovement
 
 
@@ -129,9 +127,6 @@ def add_refined_weight_to_metal_stock(sender, instance, created, **kwargs):
                     'movement_date': _movement_date_for_customer_purchase(instance),
                 }
             )
-            # Always recalculate MetalStock after movement update/create
-            refined_metal_stock.refresh_from_db()
-            refined_metal_stock.save()
             
             # ===== 2️⃣ ADD TO RAW STOCK (with customer's selected purity) =====
             raw_stock_type, _ = MetalStockType.objects.get_or_create(
@@ -167,9 +162,6 @@ def add_refined_weight_to_metal_stock(sender, instance, created, **kwargs):
                     'movement_date': _movement_date_for_customer_purchase(instance),
                 }
             )
-            # Always recalculate MetalStock after movement update/create
-            raw_metal_stock.refresh_from_db()
-            raw_metal_stock.save()
             
         else:
             # If not refined or no refined_weight, remove any existing movements for this purchase
@@ -189,8 +181,6 @@ def add_refined_weight_to_metal_stock(sender, instance, created, **kwargs):
                         reference_type='CustomerPurchase',
                         reference_id=f"{instance.pk}-refined"
                     ).delete()
-                    refined_metal_stock.refresh_from_db()
-                    refined_metal_stock.save()
                 except MetalStock.DoesNotExist:
                     pass
             
@@ -207,8 +197,6 @@ def add_refined_weight_to_metal_stock(sender, instance, created, **kwargs):
                         reference_type='CustomerPurchase',
                         reference_id=f"{instance.pk}-raw"
                     ).delete()
-                    raw_metal_stock.refresh_from_db()
-                    raw_metal_stock.save()
                 except MetalStock.DoesNotExist:
                     pass
     except Exception as e:
@@ -237,9 +225,6 @@ def remove_refined_weight_from_metal_stock(sender, instance, **kwargs):
             reference_type='CustomerPurchase',
             reference_id=f"{instance.pk}-refined"
         ).delete()
-        # Recalculate MetalStock after movement delete
-        refined_metal_stock.refresh_from_db()
-        refined_metal_stock.save()
         
         # ===== 2️⃣ REMOVE FROM RAW STOCK =====
         raw_stock_type = MetalStockType.objects.get(name=MetalStockType.StockTypeChoices.RAW)
@@ -254,9 +239,6 @@ def remove_refined_weight_from_metal_stock(sender, instance, **kwargs):
             reference_type='CustomerPurchase',
             reference_id=f"{instance.pk}-raw"
         ).delete()
-        # Recalculate MetalStock after movement delete
-        raw_metal_stock.refresh_from_db()
-        raw_metal_stock.save()
         
     except Exception as e:
         print(f"[ERROR] Error removing refined weight from MetalStock for customer purchase {getattr(instance, 'sn', instance.pk)}: {str(e)}")
@@ -563,3 +545,38 @@ def update_metal_stock_on_purchase_delete(sender, instance, **kwargs):
 
 
 
+
+
+# --- Running cost ledger for MetalStock (see goldsilverpurchase.ledger) ---
+@receiver(pre_save, sender=MetalStockMovement)
+def remember_movement_ledger_state(sender, instance, raw=False, **kwargs):
+    """Make sure an update knows what the movement contributed before."""
+    if raw or instance._state.adding or not instance.pk:
+        return
+    if getattr(instance, '_ledger_state', None) is None:
+        instance._ledger_state = ledger.load_state(instance)
+
+
+@receiver(post_save, sender=MetalStockMovement)
+def update_metal_stock_ledger_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    ledger.record_save(instance, created)
+
+
+@receiver(post_delete, sender=MetalStockMovement)
+def update_metal_stock_ledger_on_delete(sender, instance, **kwargs):
+    ledger.record_delete(instance)
+
+
+# --- Per metal/type/purity snapshot (see goldsilverpurchase.positions) ---
+@receiver(post_save, sender=MetalStock)
+def refresh_metal_stock_position_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    positions.record_save(instance)
+
+
+@receiver(post_delete, sender=MetalStock)
+def refresh_metal_stock_position_on_delete(sender, instance, **kwargs):
+    positions.record_delete(instance)
@@ -3,17 +3,18 @@ from io import BytesIO
 import json
 from datetime import timedelta
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.db import models
+from django.db import models, transaction
 from django.db.models import IntegerField, Q, Sum, F, Case, When, DecimalField
 from django.db.models.functions import Cast
 from django.http import HttpResponse, JsonResponse
-from django.shortcuts import redirect, render
-from django.urls import reverse_lazy
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse, reverse_lazy
 from django.utils import timezone
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
@@ -24,19 +25,29 @@ import openpyxl
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 
+from common.bulk_import import BATCH_SIZE, ImportStats, existing_keys, get_or_create_many, in_bulk_by, reset_sequences
 from common.nepali_utils import ndt
+from common.xlsx_export import XlsxExport, stream
+from main.services import cache_versions, query_metrics
+from main.services.jobs import enqueue
 from .forms import CustomerPurchaseForm, MetalStockForm
+from .importing import create_customer_purchases, create_purchases
 from .models import (
     CustomerPurchase,
     GoldSilverPurchase,
     HomePagePerformanceMetric,
     MetalStock,
     MetalStockMovement,
+    MetalStockPosition,
     MetalStockType,
     Party,
+    RequestQueryMetric,
 )
+from . import positions
+from ornament.bulk import create_ornaments
 from ornament.models import Kaligar, MainCategory, Ornament, SubCategory
 from order.models import Order, OrderMetalStock, OrderOrnament, OrderPayment
+from sales import monthly_rollup
 from sales.models import Sale, SalesMetalStock
 
 # Decimal alias used in a few imports
@@ -774,12 +785,12 @@ def import_excel(request):
             return redirect("gsp:gsp_import_excel")
 
         try:
-            wb = openpyxl.load_workbook(file)
+            wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
             ws = wb.active
+            stats = ImportStats()
 
-            imported = 0
-            skipped = 0
-
+            # =============== 1️⃣ Parse every row (no queries) ===============
+            parsed = []
             for row in ws.iter_rows(min_row=2, values_only=True):
 
                 if not any(row):   # skip empty rows
@@ -808,96 +819,75 @@ def import_excel(request):
                     messages.error(request, "Excel format is incorrect. Columns mismatch.")
                     return redirect("gsp:gsp_import_excel")
 
-                # =============== 1️⃣ Duplicate Bill Check ===============
-                if GoldSilverPurchase.objects.filter(bill_no=str(bill_no)).exists():
-                    skipped += 1
-                    continue
+                stats.rows += 1
 
-                # =============== 2️⃣ Find/Create Party ===============
-                party = None
-
-                if party_pan:
-                    party = Party.objects.filter(panno=str(party_pan)).first()
-
-                if not party:
-                    party = Party.objects.create(
-                        party_name=party_name or "Unknown",
-                        panno=str(party_pan) if party_pan else "",
-                    )
-
-                # =============== 3️⃣ Convert BS Date ===============
+                # Convert BS Date
                 try:
                     y, m, d = map(int, str(bill_date_bs).split("-"))
                     bill_date = ndt.date(y, m, d)
                 except:
                     bill_date = ndt.date.today()
 
-                # =============== 4️⃣ Convert all decimals safely ===============
-                qty = to_decimal(qty)
-                rate = to_decimal(rate)
-                wages = to_decimal(wages)
-                amount = to_decimal(amount)
-                discount=to_decimal(discount)
-
-                # =============== 5️⃣ Create Purchase ===============
-                purchase = GoldSilverPurchase.objects.create(
+                purchase = GoldSilverPurchase(
                     bill_no=str(bill_no),
                     bill_date=bill_date,
-                    party=party,
                     metal_type=metal_type,
                     purity=purity or '24K',
                     particular=particular,
-                    quantity=qty,
-                    rate=rate,
+                    quantity=to_decimal(qty),
+                    rate=to_decimal(rate),
                     rate_unit=rate_unit or 'tola',
-                    wages=wages,
-                    amount=amount,
-                    discount=discount,
+                    wages=to_decimal(wages),
+                    amount=to_decimal(amount),
+                    discount=to_decimal(discount),
                     payment_mode=payment_mode,
                     is_paid=bool(is_paid),
                     remarks=remarks
                 )
+                parsed.append((purchase, party_name, str(party_pan) if party_pan else ""))
 
-                # --- MetalStock logic ---
-                # Determine stock_type: 'raw' if 'raw' in particular, else error
-                stock_type_name = 'raw' if particular and 'raw' in particular.lower() else None
-                if not stock_type_name:
-                    messages.error(request, f"Purchase {purchase.bill_no}: Only 'raw' gold is supported for stock. Add 'raw' in particular.")
+            # =============== 2️⃣ Duplicate Bill Check (one lookup) ===============
+            seen = existing_keys(
+                GoldSilverPurchase.objects.all(), "bill_no", [p.bill_no for p, _, _ in parsed]
+            )
+            rows = []
+            for purchase, party_name, party_pan in parsed:
+                if purchase.bill_no in seen:
+                    stats.skipped += 1
                     continue
-                stock_type = MetalStockType.objects.filter(name=stock_type_name).first()
-                if not stock_type:
-                    stock_type = MetalStockType.objects.create(name=stock_type_name)
-                # Always create MetalStock if not exists for metal_type, purity, and stock_type
-                metal_stock, created = MetalStock.objects.get_or_create(
-                    metal_type=metal_type,
-                    purity=purity or '24K',
-                    stock_type=stock_type,
-                    defaults={
-                        'quantity': 0,
-                        'unit_cost': 0,
-                        'rate_unit': rate_unit or 'tola',
-                    }
-                )
-                # If it exists, ensure rate_unit is set (for legacy rows)
-                if not created and not metal_stock.rate_unit:
-                    metal_stock.rate_unit = rate_unit or 'tola'
-                    metal_stock.save()
-                # --- MetalStockMovement logic ---
-                MetalStockMovement.objects.create(
-                    metal_stock=metal_stock,
-                    movement_type='in',
-                    quantity=qty,
-                    rate=rate,
-                    reference_type='GoldSilverPurchase',
-                    reference_id=purchase.bill_no,
-                    notes=remarks,
-                    movement_date=bill_date
-                )
-                imported += 1
+                seen.add(purchase.bill_no)
+                rows.append((purchase, party_name, party_pan))
+
+            not_raw = [
+                purchase.bill_no for purchase, _, _ in rows
+                if not (purchase.particular and 'raw' in purchase.particular.lower())
+            ]
+
+            with transaction.atomic():
+                # =============== 3️⃣ Find/Create Parties ===============
+                by_pan = get_or_create_many(Party.objects.all(), "panno", {
+                    pan: Party(party_name=name or "Unknown", panno=pan)
+                    for _, name, pan in reversed(rows) if pan
+                })
+                by_name = get_or_create_many(Party.objects.filter(panno=""), "party_name", {
+                    name or "Unknown": Party(party_name=name or "Unknown", panno="")
+                    for _, name, pan in reversed(rows) if not pan
+                })
+                for purchase, party_name, party_pan in rows:
+                    purchase.party = by_pan[party_pan] if party_pan else by_name[party_name or "Unknown"]
+
+                # =============== 4️⃣ Create Purchases + stock movements ===============
+                if len(not_raw) < len(rows):
+                    MetalStockType.objects.get_or_create(name=MetalStockType.StockTypeChoices.RAW)
+                stats.created = create_purchases([purchase for purchase, _, _ in rows])
+            stats.stop()
+
+            for bill_no in not_raw[:20]:
+                messages.error(request, f"Purchase {bill_no}: Only 'raw' gold is supported for stock. Add 'raw' in particular.")
 
             messages.success(
                 request,
-                f"Imported: {imported} | Skipped duplicates: {skipped}"
+                f"Imported: {stats.created} | Skipped duplicates: {stats.skipped} | {stats.throughput()}"
             )
             return redirect("gsp:purchaselist")
 
@@ -918,11 +908,10 @@ def import_customer_excel(request):
             return redirect("gsp:customer_import_excel")
 
         try:
-            wb = openpyxl.load_workbook(file)
+            wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
             ws = wb.active
-
-            imported = 0
-            skipped = 0
+            stats = ImportStats()
+            purchases = []
 
             for row in ws.iter_rows(min_row=2, values_only=True):
                 if not any(row):
@@ -952,6 +941,8 @@ def import_customer_excel(request):
                     messages.error(request, "Excel format is incorrect. Columns mismatch.")
                     return redirect("gsp:customer_import_excel")
 
+                stats.rows += 1
+
                 normalized_bill_no = None
                 if bill_no is not None and str(bill_no).strip() != "":
                     if isinstance(bill_no, float) and bill_no.is_integer():
@@ -969,7 +960,7 @@ def import_customer_excel(request):
                 if metal_value not in [choice[0] for choice in CustomerPurchase.MetalType.choices]:
                     metal_value = CustomerPurchase.MetalType.GOLD
 
-                CustomerPurchase.objects.create(
+                purchases.append(CustomerPurchase(
                     bill_no=normalized_bill_no,
                     purchase_date=purchase_date,
                     customer_name=customer_name or "",
@@ -987,12 +978,15 @@ def import_customer_excel(request):
                     diamond_rate=to_decimal(diamond_rate),
                     diamond_amount=to_decimal(diamond_amount),
                     total_amount=to_decimal(total_amount),
-                )
-                imported += 1
+                ))
+
+            with transaction.atomic():
+                stats.created = create_customer_purchases(purchases)
+            stats.stop()
 
             messages.success(
                 request,
-                f"Imported: {imported} records"
+                f"Imported: {stats.created} records | {stats.throughput()}"
             )
             return redirect("gsp:customer_purchase_list")
 
@@ -1044,10 +1038,15 @@ def performance_report(request):
         avg_image_count=models.Avg('image_count'),
     )
 
+    query_metrics_qs = RequestQueryMetric.objects.filter(created_at__gte=since)
+
     context = {
         'days': days,
         'summary': summary,
         'recent_metrics': metrics_qs.order_by('-created_at')[:100],
+        'query_metrics_enabled': settings.QUERY_METRICS_ENABLED,
+        'view_query_summary': query_metrics.view_summary(query_metrics_qs),
+        'repeated_statements': query_metrics.repeated_statements(query_metrics_qs),
     }
     return render(request, 'goldsilverpurchase/performance_report.html', context)
 
@@ -1110,28 +1109,16 @@ def track_home_performance(request):
 
 @login_required(login_url='/accounts/login/')
 def export_full_db_dump(request):
-    """Export a full database dump as JSON using Django dumpdata."""
-    from django.core.management import call_command
-    import io
-
-    out = io.StringIO()
-    call_command(
-        "dumpdata",
-        "--exclude",
-        "contenttypes",
-        "--exclude",
-        "auth.permission",
-        stdout=out,
-    )
-
-    response = HttpResponse(out.getvalue(), content_type="application/json")
-    response["Content-Disposition"] = "attachment; filename=full_db_dump.json"
-    return response
+    """Queue a full database dump (Django dumpdata JSON) for download."""
+    if request.method != "POST":
+        return redirect("gsp:data_settings")
+    job = enqueue("gsp.export_full_db_dump", user=request.user, next_url=reverse("gsp:data_settings"))
+    return redirect("main:job_detail", pk=job.pk)
 
 
 @login_required(login_url='/accounts/login/')
 def import_full_db_dump(request):
-    """Import a full JSON database dump after wiping existing data."""
+    """Queue a full JSON database restore, which wipes existing data."""
     if request.method != "POST" or "import_file" not in request.FILES:
         return redirect("gsp:data_settings")
 
@@ -1145,323 +1132,208 @@ def import_full_db_dump(request):
         messages.error(request, "Please upload a JSON dump file.")
         return redirect("gsp:data_settings")
 
-    from django.core.management import call_command
-    from django.db import transaction
-    import tempfile
-    import os
-
-    tmp_path = None
-    cleaned_path = None
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp:
-            for chunk in file.chunks():
-                tmp.write(chunk)
-            tmp_path = tmp.name
-
-        # Sanitize invalid Nepali dates before loading
-        import json as _json
-        import nepali_datetime as _ndt
-        from nepali_datetime_field.models import NepaliDateField as _NDF
-        from django.apps import apps as _apps
-
-        _nepali_fields_map = {}
-        for _model in _apps.get_models():
-            _label = _model._meta.label_lower
-            _nfields = [f.name for f in _model._meta.get_fields() if isinstance(f, _NDF)]
-            if _nfields:
-                _nepali_fields_map[_label] = _nfields
-
-        with open(tmp_path, 'r', encoding='utf-8') as _fj:
-            _fixture_data = _json.load(_fj)
-
-        _fixed_count = 0
-        for _obj in _fixture_data:
-            _mlabel = _obj.get('model', '').lower()
-            if _mlabel not in _nepali_fields_map:
-                continue
-            _fields = _obj.get('fields', {})
-            for _fname in _nepali_fields_map[_mlabel]:
-                _val = _fields.get(_fname)
-                if not _val or not isinstance(_val, str) or len(_val) != 10:
-                    continue
-                _parts = _val.split('-')
-                if len(_parts) != 3:
-                    continue
-                try:
-                    _y, _m, _d = int(_parts[0]), int(_parts[1]), int(_parts[2])
-                except ValueError:
-                    continue
-                if _y < 2000:
-                    continue
-                try:
-                    _ndt.date(_y, _m, _d)
-                except Exception:
-                    for _ld in range(_d - 1, 0, -1):
-                        try:
-                            _ndt.date(_y, _m, _ld)
-                            _fields[_fname] = f"{_y:04d}-{_m:02d}-{_ld:02d}"
-                            _fixed_count += 1
-                            break
-                        except Exception:
-                            continue
-
-        if _fixed_count:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".json", mode='w', encoding='utf-8') as _fc:
-                _json.dump(_fixture_data, _fc, ensure_ascii=False)
-                cleaned_path = _fc.name
-            load_path = cleaned_path
-        else:
-            load_path = tmp_path
-
-        with transaction.atomic():
-            call_command("flush", "--noinput")
-            call_command("loaddata", load_path)
-
-        suffix = f" ({_fixed_count} invalid Nepali date(s) auto-corrected)" if _fixed_count else ""
-        messages.success(request, f"Full database restore completed from JSON file.{suffix}")
-        
-        return redirect("gsp:data_settings")
-    except Exception as e:
-        messages.error(request, f"Full restore failed: {str(e)}")
-        return redirect("gsp:data_settings")
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
-        if cleaned_path and os.path.exists(cleaned_path):
-            os.unlink(cleaned_path)
+    job = enqueue("gsp.import_full_db_dump", user=request.user, upload=file, next_url=reverse("gsp:data_settings"))
+    return redirect("main:job_detail", pk=job.pk)
 
 
 @login_required(login_url='/accounts/login/')
 def export_all_data(request):
-    from openpyxl import Workbook
-    from django.http import HttpResponse
-    wb = Workbook()
-    default_ws = wb.active
-    wb.remove(default_ws)
-
-    def convert_to_excel_value(val):
-        """Convert any value to Excel-safe format (convert dates to strings)"""
-        if val is None:
-            return ""
-        # Convert nepali_datetime.date objects to string
-        if hasattr(val, 'strftime'):
-            return str(val)
-        return val
-
-    def add_sheet(title, headers, rows):
-        ws = wb.create_sheet(title=title[:31])
-        ws.append(headers)
-        for row in rows:
-            # Convert all values in row to Excel-safe format
-            safe_row = tuple(convert_to_excel_value(v) for v in row)
-            ws.append(safe_row)
+    from django.db.models import Value
+    from django.db.models.functions import Concat
+
+    export = XlsxExport()
+    add_sheet = export.add_sheet
 
     # --- Finance Models ---
     from finance.models import EmployeeSalary, SundryCreditor, SundryDebtor, Loan, CreditorTransaction, DebtorTransaction, Expense, Employee
     
     # Employee sheet
-    employee_rows = [
-        (e.id, e.first_name, e.last_name, e.email, e.phone, e.position, e.base_salary, e.hire_date, e.is_active, e.created_at, e.updated_at) for e in Employee.objects.all().order_by("created_at")
-    ]
-    add_sheet("Employee", ["ID", "First Name", "Last Name", "Email", "Phone", "Position", "Base Salary", "Hire Date", "Is Active", "Created At", "Updated At"], employee_rows)
-
-    salary_rows = [
-        (s.id, s.employee.first_name + ' ' + s.employee.last_name if s.employee else "", s.month, s.total_salary, s.amount_paid, s.status, s.created_at, s.updated_at) for s in EmployeeSalary.objects.select_related('employee').all().order_by("created_at")
-    ]
-    add_sheet("EmployeeSalary", ["ID", "Employee Name", "Month", "Total Salary", "Amount Paid", "Status", "Created At", "Updated At"], salary_rows)
+    add_sheet("Employee", ["ID", "First Name", "Last Name", "Email", "Phone", "Position", "Base Salary", "Hire Date", "Is Active", "Created At", "Updated At"], stream(
+        Employee.objects.order_by("created_at"),
+        "id", "first_name", "last_name", "email", "phone", "position", "base_salary", "hire_date", "is_active", "created_at", "updated_at",
+    ))
+
+    add_sheet("EmployeeSalary", ["ID", "Employee Name", "Month", "Total Salary", "Amount Paid", "Status", "Created At", "Updated At"], stream(
+        EmployeeSalary.objects.annotate(
+            employee_name=Concat("employee__first_name", Value(" "), "employee__last_name")
+        ).order_by("created_at"),
+        "id", "employee_name", "month", "total_salary", "amount_paid", "status", "created_at", "updated_at",
+    ))
 
     # Expense sheet
-    expense_rows = [
-        (ex.id, ex.category, ex.description, ex.amount, ex.expense_date, ex.notes, ex.created_at, ex.updated_at) for ex in Expense.objects.all().order_by("created_at")
-    ]
-    add_sheet("Expense", ["ID", "Category", "Description", "Amount", "Expense Date", "Notes", "Created At", "Updated At"], expense_rows)
-
-    creditor_rows = [
-        (c.id, c.name, c.bs_date, c.opening_balance, c.current_balance, c.is_paid, c.created_at, c.updated_at) for c in SundryCreditor.objects.all().order_by("created_at")
-    ]
-    add_sheet("SundryCreditor", ["ID", "Name", "BS Date", "Opening Balance", "Current Balance", "Is Paid", "Created At", "Updated At"], creditor_rows)
-
-    debtor_rows = [
-        (d.id, d.name, d.bs_date, d.opening_balance, d.current_balance, d.is_paid, d.created_at, d.updated_at) for d in SundryDebtor.objects.all().order_by("created_at")
-    ]
-    add_sheet("SundryDebtor", ["ID", "Name", "BS Date", "Opening Balance", "Current Balance", "Is Paid", "Created At", "Updated At"], debtor_rows)
-
-    loan_rows = [
-        (l.id, l.bank_name, l.amount, l.interest_rate, l.start_date, l.notes, l.created_at, l.updated_at) for l in Loan.objects.all().order_by("created_at")
-    ]
-    add_sheet("Loan", ["ID", "Bank Name", "Amount", "Interest Rate", "Start Date", "Notes", "Created At", "Updated At"], loan_rows)
-
-    creditor_tx_rows = [
-        (tx.id, tx.creditor.name if tx.creditor else "", tx.transaction_type, tx.reference_no, tx.amount, tx.transaction_date, tx.due_date, tx.created_at) for tx in CreditorTransaction.objects.select_related('creditor').all().order_by("created_at")
-    ]
-    add_sheet("CreditorTransaction", ["ID", "Creditor Name", "Transaction Type", "Reference No", "Amount", "Transaction Date", "Due Date", "Created At"], creditor_tx_rows)
-
-    # DebtorTransaction model may not exist, check if it's defined
-    try:
-        debtor_tx_rows = [
-            (tx.id, tx.debtor.name if tx.debtor else "", tx.transaction_type, tx.reference_no, tx.amount, tx.transaction_date, tx.due_date, tx.created_at) for tx in DebtorTransaction.objects.select_related('debtor').all().order_by("created_at")
-        ]
-        add_sheet("DebtorTransaction", ["ID", "Debtor Name", "Transaction Type", "Reference No", "Amount", "Transaction Date", "Due Date", "Created At"], debtor_tx_rows)
-    except Exception:
-        pass  # Skip if DebtorTransaction doesn't exist or has different structure
+    add_sheet("Expense", ["ID", "Category", "Description", "Amount", "Expense Date", "Notes", "Created At", "Updated At"], stream(
+        Expense.objects.order_by("created_at"),
+        "id", "category", "description", "amount", "expense_date", "notes", "created_at", "updated_at",
+    ))
+
+    add_sheet("SundryCreditor", ["ID", "Name", "BS Date", "Opening Balance", "Current Balance", "Is Paid", "Created At", "Updated At"], stream(
+        SundryCreditor.objects.order_by("created_at"),
+        "id", "name", "bs_date", "opening_balance", "current_balance", "is_paid", "created_at", "updated_at",
+    ))
+
+    add_sheet("SundryDebtor", ["ID", "Name", "BS Date", "Opening Balance", "Current Balance", "Is Paid", "Created At", "Updated At"], stream(
+        SundryDebtor.objects.order_by("created_at"),
+        "id", "name", "bs_date", "opening_balance", "current_balance", "is_paid", "created_at", "updated_at",
+    ))
+
+    add_sheet("Loan", ["ID", "Bank Name", "Amount", "Interest Rate", "Start Date", "Notes", "Created At", "Updated At"], stream(
+        Loan.objects.order_by("created_at"),
+        "id", "bank_name", "amount", "interest_rate", "start_date", "notes", "created_at", "updated_at",
+    ))
+
+    add_sheet("CreditorTransaction", ["ID", "Creditor Name", "Transaction Type", "Reference No", "Amount", "Transaction Date", "Due Date", "Created At"], stream(
+        CreditorTransaction.objects.order_by("created_at"),
+        "id", "creditor__name", "transaction_type", "reference_no", "amount", "transaction_date", "due_date", "created_at",
+    ))
+
+    add_sheet("DebtorTransaction", ["ID", "Debtor Name", "Transaction Type", "Reference No", "Amount", "Transaction Date", "Due Date", "Created At"], stream(
+        DebtorTransaction.objects.order_by("created_at"),
+        "id", "debtor__name", "transaction_type", "reference_no", "amount", "transaction_date", "due_date", "created_at",
+    ))
 
     # --- GoldSilverPurchase Models ---
     from goldsilverpurchase.models import GoldSilverPurchase, CustomerPurchase, MetalStock, MetalStockMovement, Party, MetalStockType
     
     # Party sheet
-    party_rows = [
-        (p.id, p.party_name, p.panno) for p in Party.objects.all().order_by("id")
-    ]
-    add_sheet("Party", ["ID", "Party Name", "PAN No"], party_rows)
+    add_sheet("Party", ["ID", "Party Name", "PAN No"], stream(
+        Party.objects.order_by("id"), "id", "party_name", "panno",
+    ))
 
     # MetalStockType sheet
-    metal_type_rows = [
-        (mt.id, mt.name, mt.description) for mt in MetalStockType.objects.all().order_by("id")
-    ]
-    add_sheet("MetalStockType", ["ID", "Name", "Description"], metal_type_rows)
-
-    gsp_rows = [
-        (p.bill_no, p.bill_date, p.party.party_name if p.party else "", p.particular, p.metal_type, p.purity, p.quantity, p.rate, p.rate_unit, p.wages, p.discount, p.amount, p.payment_mode, p.is_paid, p.remarks, p.created_at, p.updated_at) for p in GoldSilverPurchase.objects.select_related("party").order_by("created_at")
-    ]
-    add_sheet("GoldSilverPurchase", ["Bill No", "Bill Date", "Party", "Particular", "Metal Type", "Purity", "Quantity", "Rate", "Rate Unit", "Wages", "Discount", "Amount", "Payment Mode", "Is Paid", "Remarks", "Created At", "Updated At"], gsp_rows)
-
-    customer_rows = [
-        (cp.sn, cp.purchase_date, cp.customer_name, cp.location, cp.phone_no, cp.metal_type, cp.ornament_name, cp.weight, cp.refined_weight, cp.rate, cp.amount, cp.created_at, cp.updated_at) for cp in CustomerPurchase.objects.order_by("created_at")
-    ]
-    add_sheet("CustomerPurchase", ["SN", "Purchase Date", "Customer Name", "Location", "Phone", "Metal Type", "Ornament", "Weight", "Refined Weight", "Rate", "Amount", "Created At", "Updated At"], customer_rows)
-
-    metal_stock_rows = [
-        (ms.id, ms.metal_type, ms.stock_type.name if ms.stock_type else "", ms.purity, ms.quantity, ms.unit_cost, ms.rate_unit, ms.total_cost, ms.location, ms.remarks, ms.last_updated, ms.created_at) for ms in MetalStock.objects.select_related("stock_type").order_by("created_at")
-    ]
-    add_sheet("MetalStock", ["ID", "Metal Type", "Stock Type", "Purity", "Quantity", "Unit Cost", "Rate Unit", "Total Cost", "Location", "Remarks", "Last Updated", "Created At"], metal_stock_rows)
-
-    metal_movement_rows = [
-        (msm.id, msm.metal_stock_id, msm.movement_type, msm.quantity, msm.rate, msm.reference_type, msm.reference_id, msm.notes, msm.movement_date, msm.created_at) for msm in MetalStockMovement.objects.select_related("metal_stock").order_by("created_at")
-    ]
-    add_sheet("MetalStockMovement", ["ID", "Metal Stock ID", "Movement Type", "Quantity", "Rate", "Reference Type", "Reference ID", "Notes", "Movement Date", "Created At"], metal_movement_rows)
+    add_sheet("MetalStockType", ["ID", "Name", "Description"], stream(
+        MetalStockType.objects.order_by("id"), "id", "name", "description",
+    ))
+
+    add_sheet("GoldSilverPurchase", ["Bill No", "Bill Date", "Party", "Particular", "Metal Type", "Purity", "Quantity", "Rate", "Rate Unit", "Wages", "Discount", "Amount", "Payment Mode", "Is Paid", "Remarks", "Created At", "Updated At"], stream(
+        GoldSilverPurchase.objects.order_by("created_at"),
+        "bill_no", "bill_date", "party__party_name", "particular", "metal_type", "purity", "quantity", "rate", "rate_unit", "wages", "discount", "amount", "payment_mode", "is_paid", "remarks", "created_at", "updated_at",
+    ))
+
+    add_sheet("CustomerPurchase", ["SN", "Purchase Date", "Customer Name", "Location", "Phone", "Metal Type", "Ornament", "Weight", "Refined Weight", "Rate", "Amount", "Created At", "Updated At"], stream(
+        CustomerPurchase.objects.order_by("created_at"),
+        "sn", "purchase_date", "customer_name", "location", "phone_no", "metal_type", "ornament_name", "weight", "refined_weight", "rate", "amount", "created_at", "updated_at",
+    ))
+
+    add_sheet("MetalStock", ["ID", "Metal Type", "Stock Type", "Purity", "Quantity", "Unit Cost", "Rate Unit", "Total Cost", "Location", "Remarks", "Last Updated", "Created At"], stream(
+        MetalStock.objects.order_by("created_at"),
+        "id", "metal_type", "stock_type__name", "purity", "quantity", "unit_cost", "rate_unit", "total_cost", "location", "remarks", "last_updated", "created_at",
+    ))
+
+    add_sheet("MetalStockMovement", ["ID", "Metal Stock ID", "Movement Type", "Quantity", "Rate", "Reference Type", "Reference ID", "Notes", "Movement Date", "Created At"], stream(
+        MetalStockMovement.objects.order_by("created_at"),
+        "id", "metal_stock_id", "movement_type", "quantity", "rate", "reference_type", "reference_id", "notes", "movement_date", "created_at",
+    ))
 
     # --- Main Models ---
     from main.models import Stock, DailyRate
     
-    stock_rows = [
-        (s.id, s.year, s.diamond, s.gold, s.silver, s.jardi, s.wages, s.gold_silver_rate_unit, s.diamond_rate, s.gold_rate, s.silver_rate, s.created_at, s.updated_at) for s in Stock.objects.order_by("year")
-    ]
-    add_sheet("Stock", ["ID", "Year", "Diamond", "Gold", "Silver", "Jardi", "Wages", "Rate Unit", "Diamond Rate", "Gold Rate", "Silver Rate", "Created At", "Updated At"], stock_rows)
+    add_sheet("Stock", ["ID", "Year", "Diamond", "Gold", "Silver", "Jardi", "Wages", "Rate Unit", "Diamond Rate", "Gold Rate", "Silver Rate", "Created At", "Updated At"], stream(
+        Stock.objects.order_by("year"),
+        "id", "year", "diamond", "gold", "silver", "jardi", "wages", "gold_silver_rate_unit", "diamond_rate", "gold_rate", "silver_rate", "created_at", "updated_at",
+    ))
 
-    daily_rate_rows = [
-        (dr.id, dr.bs_date, dr.gold_rate, dr.silver_rate, dr.gold_rate_10g, dr.silver_rate_10g, dr.created_at, dr.updated_at) for dr in DailyRate.objects.order_by("-created_at")
-    ]
-    add_sheet("DailyRate", ["ID", "BS Date", "Gold Rate", "Silver Rate", "Gold Rate 10g", "Silver Rate 10g", "Created At", "Updated At"], daily_rate_rows)
+    add_sheet("DailyRate", ["ID", "BS Date", "Gold Rate", "Silver Rate", "Gold Rate 10g", "Silver Rate 10g", "Created At", "Updated At"], stream(
+        DailyRate.objects.order_by("-created_at"),
+        "id", "bs_date", "gold_rate", "silver_rate", "gold_rate_10g", "silver_rate_10g", "created_at", "updated_at",
+    ))
 
     # --- Ornament Models ---
     from ornament.models import Stone, Motimala, Potey, MainCategory, SubCategory, Kaligar, Kaligar_Ornaments, Kaligar_CashAccount, Kaligar_GoldAccount, Ornament
     
     # Stone sheet
-    stone_rows = [
-        (st.id, st.name, st.cost_per_carat, st.carat, st.cost_price, st.sales_per_carat, st.sales_price, st.profit, st.created_at, st.updated_at) for st in Stone.objects.all().order_by("created_at")
-    ]
-    add_sheet("Stone", ["ID", "Name", "Cost Per Carat", "Carat", "Cost Price", "Sales Per Carat", "Sales Price", "Profit", "Created At", "Updated At"], stone_rows)
+    add_sheet("Stone", ["ID", "Name", "Cost Per Carat", "Carat", "Cost Price", "Sales Per Carat", "Sales Price", "Profit", "Created At", "Updated At"], stream(
+        Stone.objects.order_by("created_at"),
+        "id", "name", "cost_per_carat", "carat", "cost_price", "sales_per_carat", "sales_price", "profit", "created_at", "updated_at",
+    ))
 
     # Motimala sheet
-    motimala_rows = [
-        (m.id, m.name, m.cost_per_mala, m.quantity, m.cost_price, m.sales_per_mala, m.sales_price, m.profit, m.created_at, m.updated_at) for m in Motimala.objects.all().order_by("created_at")
-    ]
-    add_sheet("Motimala", ["ID", "Name", "Cost Per Mala", "Quantity", "Cost Price", "Sales Per Mala", "Sales Price", "Profit", "Created At", "Updated At"], motimala_rows)
+    add_sheet("Motimala", ["ID", "Name", "Cost Per Mala", "Quantity", "Cost Price", "Sales Per Mala", "Sales Price", "Profit", "Created At", "Updated At"], stream(
+        Motimala.objects.order_by("created_at"),
+        "id", "name", "cost_per_mala", "quantity", "cost_price", "sales_per_mala", "sales_price", "profit", "created_at", "updated_at",
+    ))
 
     # Potey sheet
-    potey_rows = [
-        (p.id, p.name, p.loon, p.cost_per_loon, p.cost_price, p.sales_per_loon, p.sales_price, p.profit, p.created_at, p.updated_at) for p in Potey.objects.all().order_by("created_at")
-    ]
-    add_sheet("Potey", ["ID", "Name", "Loon", "Cost Per Loon", "Cost Price", "Sales Per Loon", "Sales Price", "Profit", "Created At", "Updated At"], potey_rows)
+    add_sheet("Potey", ["ID", "Name", "Loon", "Cost Per Loon", "Cost Price", "Sales Per Loon", "Sales Price", "Profit", "Created At", "Updated At"], stream(
+        Potey.objects.order_by("created_at"),
+        "id", "name", "loon", "cost_per_loon", "cost_price", "sales_per_loon", "sales_price", "profit", "created_at", "updated_at",
+    ))
 
     # MainCategory sheet
-    main_cat_rows = [
-        (mc.id, mc.name) for mc in MainCategory.objects.all().order_by("id")
-    ]
-    add_sheet("MainCategory", ["ID", "Name"], main_cat_rows)
+    add_sheet("MainCategory", ["ID", "Name"], stream(MainCategory.objects.order_by("id"), "id", "name"))
 
     # SubCategory sheet
-    sub_cat_rows = [
-        (sc.id, sc.name) for sc in SubCategory.objects.all().order_by("id")
-    ]
-    add_sheet("SubCategory", ["ID", "Name"], sub_cat_rows)
+    add_sheet("SubCategory", ["ID", "Name"], stream(SubCategory.objects.order_by("id"), "id", "name"))
 
     # Ornament sheet
-    ornament_rows = [
-        (o.id, o.code, o.ornament_name, o.type, o.ornament_type, o.metal_type, o.weight, o.status, o.created_at, o.updated_at) for o in Ornament.objects.all().order_by("created_at")
-    ]
-    add_sheet("Ornament", ["ID", "Code", "Name", "Type", "Ornament Type", "Metal Type", "Weight", "Status", "Created At", "Updated At"], ornament_rows)
+    add_sheet("Ornament", ["ID", "Code", "Name", "Type", "Ornament Type", "Metal Type", "Weight", "Status", "Created At", "Updated At"], stream(
+        Ornament.objects.order_by("created_at"),
+        "id", "code", "ornament_name", "type", "ornament_type", "metal_type", "weight", "status", "created_at", "updated_at",
+    ))
 
     # Kaligar sheet
-    kaligar_rows = [
-        (k.id, k.name, k.address, k.phone_no) for k in Kaligar.objects.all().order_by("id")
-    ]
-    add_sheet("Kaligar", ["ID", "Name", "Address", "Phone"], kaligar_rows)
+    add_sheet("Kaligar", ["ID", "Name", "Address", "Phone"], stream(
+        Kaligar.objects.order_by("id"), "id", "name", "address", "phone_no",
+    ))
 
     # Kaligar_Ornaments sheet
-    kaligar_orn_rows = [
-        (ko.id, ko.kaligar.name if ko.kaligar else "", ko.date, ko.gold_given, ko.ornament_weight, ko.jarti, ko.gold_return, ko.gold_loss, ko.gold_purity) for ko in Kaligar_Ornaments.objects.select_related("kaligar").all().order_by("id")
-    ]
-    add_sheet("Kaligar_Ornaments", ["ID", "Kaligar", "Date", "Gold Given", "Ornament Weight", "Jarti", "Gold Return", "Gold Loss", "Gold Purity"], kaligar_orn_rows)
+    add_sheet("Kaligar_Ornaments", ["ID", "Kaligar", "Date", "Gold Given", "Ornament Weight", "Jarti", "Gold Return", "Gold Loss", "Gold Purity"], stream(
+        Kaligar_Ornaments.objects.order_by("id"),
+        "id", "kaligar__name", "date", "gold_given", "ornament_weight", "jarti", "gold_return", "gold_loss", "gold_purity",
+    ))
 
     # Kaligar_CashAccount sheet
-    kaligar_cash_rows = [
-        (kc.id, kc.kaligar.name if kc.kaligar else "", kc.date, kc.particular, kc.amount_taken, kc.to_pay, kc.provided_by) for kc in Kaligar_CashAccount.objects.select_related("kaligar").all().order_by("id")
-    ]
-    add_sheet("Kaligar_CashAccount", ["ID", "Kaligar", "Date", "Particular", "Amount Taken", "To Pay", "Provided By"], kaligar_cash_rows)
+    add_sheet("Kaligar_CashAccount", ["ID", "Kaligar", "Date", "Particular", "Amount Taken", "To Pay", "Provided By"], stream(
+        Kaligar_CashAccount.objects.order_by("id"),
+        "id", "kaligar__name", "date", "particular", "amount_taken", "to_pay", "provided_by",
+    ))
 
     # Kaligar_GoldAccount sheet
-    kaligar_gold_rows = [
-        (kg.id, kg.kaligar.name if kg.kaligar else "", kg.date, kg.gold_deposit, kg.gold_loss, kg.gold_remaining) for kg in Kaligar_GoldAccount.objects.select_related("kaligar").all().order_by("id")
-    ]
-    add_sheet("Kaligar_GoldAccount", ["ID", "Kaligar", "Date", "Gold Deposit", "Gold Loss", "Gold Remaining"], kaligar_gold_rows)
+    add_sheet("Kaligar_GoldAccount", ["ID", "Kaligar", "Date", "Gold Deposit", "Gold Loss", "Gold Remaining"], stream(
+        Kaligar_GoldAccount.objects.order_by("id"),
+        "id", "kaligar__name", "date", "gold_deposit", "gold_loss", "gold_remaining",
+    ))
 
     # --- Order Models ---
     from order.models import Order, OrderMetalStock, OrderPayment, OrderOrnament, DebtorPayment
     
-    order_rows = [
-        (o.sn, o.order_date, o.deliver_date, o.customer_name, o.phone_number, o.status, o.order_type, o.description, o.discount, o.amount, o.subtotal, o.tax, o.total, o.remaining_amount, o.created_at, o.updated_at) for o in Order.objects.order_by("created_at")
-    ]
-    add_sheet("Order", ["SN", "Order Date", "Deliver Date", "Customer Name", "Phone", "Status", "Order Type", "Description", "Discount", "Amount", "Subtotal", "Tax", "Total", "Remaining Amount", "Created At", "Updated At"], order_rows)
-
-    order_metal_rows = [
-        (oms.order_id, oms.stock_type.name if oms.stock_type else "", oms.metal_type, oms.purity, oms.quantity, oms.rate_per_gram, oms.rate_unit, oms.line_amount, oms.remarks, oms.created_at, oms.updated_at) for oms in OrderMetalStock.objects.select_related("order", "stock_type").order_by("created_at")
-    ]
-    add_sheet("OrderMetalStock", ["Order ID", "Stock Type", "Metal Type", "Purity", "Quantity", "Rate Per Gram", "Rate Unit", "Line Amount", "Remarks", "Created At", "Updated At"], order_metal_rows)
-
-    payment_rows = [
-        (op.order_id, op.payment_mode, op.amount, op.created_at, op.updated_at) for op in OrderPayment.objects.select_related("order").order_by("created_at")
-    ]
-    add_sheet("OrderPayment", ["Order ID", "Payment Mode", "Amount", "Created At", "Updated At"], payment_rows)
-
-    order_ornament_rows = [
-        (oo.order_id, oo.ornament_id, oo.gold_rate, oo.diamond_rate, oo.zircon_rate, oo.stone_rate, oo.jarti, oo.jyala, oo.line_amount, oo.created_at, oo.updated_at) for oo in OrderOrnament.objects.select_related("order", "ornament").order_by("created_at")
-    ]
-    add_sheet("OrderOrnament", ["Order ID", "Ornament ID", "Gold Rate", "Diamond Rate", "Zircon Rate", "Stone Rate", "Jarti", "Jyala", "Line Amount", "Created At", "Updated At"], order_ornament_rows)
+    add_sheet("Order", ["SN", "Order Date", "Deliver Date", "Customer Name", "Phone", "Status", "Order Type", "Description", "Discount", "Amount", "Subtotal", "Tax", "Total", "Remaining Amount", "Created At", "Updated At"], stream(
+        Order.objects.order_by("created_at"),
+        "sn", "order_date", "deliver_date", "customer_name", "phone_number", "status", "order_type", "description", "discount", "amount", "subtotal", "tax", "total", "remaining_amount", "created_at", "updated_at",
+    ))
+
+    add_sheet("OrderMetalStock", ["Order ID", "Stock Type", "Metal Type", "Purity", "Quantity", "Rate Per Gram", "Rate Unit", "Line Amount", "Remarks", "Created At", "Updated At"], stream(
+        OrderMetalStock.objects.order_by("created_at"),
+        "order_id", "stock_type__name", "metal_type", "purity", "quantity", "rate_per_gram", "rate_unit", "line_amount", "remarks", "created_at", "updated_at",
+    ))
+
+    add_sheet("OrderPayment", ["Order ID", "Payment Mode", "Amount", "Created At", "Updated At"], stream(
+        OrderPayment.objects.order_by("created_at"),
+        "order_id", "payment_mode", "amount", "created_at", "updated_at",
+    ))
+
+    add_sheet("OrderOrnament", ["Order ID", "Ornament ID", "Gold Rate", "Diamond Rate", "Zircon Rate", "Stone Rate", "Jarti", "Jyala", "Line Amount", "Created At", "Updated At"], stream(
+        OrderOrnament.objects.order_by("created_at"),
+        "order_id", "ornament_id", "gold_rate", "diamond_rate", "zircon_rate", "stone_rate", "jarti", "jyala", "line_amount", "created_at", "updated_at",
+    ))
 
     # DebtorPayment sheet
-    debtor_payment_rows = [
-        (dp.id, dp.order_payment.order_id, dp.debtor.name if dp.debtor else "", dp.transaction_type, dp.created_at, dp.updated_at) for dp in DebtorPayment.objects.select_related("order_payment__order", "debtor").all().order_by("created_at")
-    ]
-    add_sheet("DebtorPayment", ["ID", "Order ID", "Debtor Name", "Transaction Type", "Created At", "Updated At"], debtor_payment_rows)
+    add_sheet("DebtorPayment", ["ID", "Order ID", "Debtor Name", "Transaction Type", "Created At", "Updated At"], stream(
+        DebtorPayment.objects.order_by("created_at"),
+        "id", "order_payment__order_id", "debtor__name", "transaction_type", "created_at", "updated_at",
+    ))
 
     # --- Sales Models ---
     from sales.models import Sale, SalesMetalStock
-    sale_rows = [
-        (s.order_id, s.bill_no, s.sale_date, s.created_at, s.updated_at) for s in Sale.objects.select_related("order").filter(is_deleted=False).order_by("created_at")
-    ]
-    add_sheet("Sale", ["Order ID", "Bill No", "Sale Date", "Created At", "Updated At"], sale_rows)
+    add_sheet("Sale", ["Order ID", "Bill No", "Sale Date", "Created At", "Updated At"], stream(
+        Sale.objects.filter(is_deleted=False).order_by("created_at"),
+        "order_id", "bill_no", "sale_date", "created_at", "updated_at",
+    ))
 
-    sales_metal_rows = [
-        (sms.sale_id, sms.stock_type.name if sms.stock_type else "", sms.metal_type, sms.purity, sms.quantity, sms.rate_per_gram, sms.rate_unit, sms.line_amount, sms.remarks, sms.created_at, sms.updated_at) for sms in SalesMetalStock.objects.select_related("sale", "stock_type").order_by("created_at")
-    ]
-    add_sheet("SalesMetalStock", ["Sale ID", "Stock Type", "Metal Type", "Purity", "Quantity", "Rate Per Gram", "Rate Unit", "Line Amount", "Remarks", "Created At", "Updated At"], sales_metal_rows)
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = "attachment; filename=all_data.xlsx"
-    wb.save(response)
-    return response
+    add_sheet("SalesMetalStock", ["Sale ID", "Stock Type", "Metal Type", "Purity", "Quantity", "Rate Per Gram", "Rate Unit", "Line Amount", "Remarks", "Created At", "Updated At"], stream(
+        SalesMetalStock.objects.order_by("created_at"),
+        "sale_id", "stock_type__name", "metal_type", "purity", "quantity", "rate_per_gram", "rate_unit", "line_amount", "remarks", "created_at", "updated_at",
+    ))
+    return export.response("all_data.xlsx")
 
 
 @login_required(login_url='/accounts/login/')
@@ -1491,378 +1363,402 @@ def import_all_data(request):
             except Exception:
                 return None
 
-        # ========== Import GoldSilverPurchase ==========
-        if "GoldSilverPurchase" in wb.sheetnames:
-            ws = wb["GoldSilverPurchase"]
-            count = 0
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if not any(row):
-                    continue
-                try:
-                    (
-                        bill_no,
-                        bill_date,
-                        party_name,
-                        particular,
-                        metal_type,
-                        purity,
-                        quantity,
-                        rate,
-                        rate_unit,
-                        wages,
-                        discount,
-                        amount,
-                        payment_mode,
-                        is_paid,
-                        remarks,
-                        created_at,
-                        updated_at,
-                    ) = row[:17]
-
-                    if GoldSilverPurchase.objects.filter(bill_no=str(bill_no)).exists():
-                        continue
-
-                    party = None
-                    if party_name:
-                        party = Party.objects.filter(party_name=party_name).first()
-                        if not party:
-                            party = Party.objects.create(
-                                party_name=party_name,
-                                panno="000000000",
-                            )
+        stats = ImportStats()
 
-                    GoldSilverPurchase.objects.create(
-                        bill_no=str(bill_no),
-                        bill_date=to_date(bill_date),
-                        party=party,
-                        particular=particular,
-                        metal_type=metal_type or "gold",
-                        purity=purity or "22K",
-                        quantity=to_decimal(quantity),
-                        rate=to_decimal(rate),
-                        rate_unit=rate_unit or "tola",
-                        wages=to_decimal(wages),
-                        discount=to_decimal(discount),
-                        amount=to_decimal(amount),
-                        payment_mode=payment_mode or "cash",
-                        is_paid=bool(is_paid),
-                        remarks=remarks,
-                    )
-                    count += 1
-                except Exception as e:
-                    errors.append(f"GoldSilverPurchase row error: {e}")
-            imported_count["GoldSilverPurchase"] = count
-
-        # ========== Import CustomerPurchase ==========
-        if "CustomerPurchase" in wb.sheetnames:
-            ws = wb["CustomerPurchase"]
-            count = 0
-            for row in ws.iter_rows(min_row=2, values_only=True):
+        def sheet_rows(name):
+            """Yield ``(row_num, row)`` for the non-empty data rows of a sheet."""
+            for row_num, row in enumerate(wb[name].iter_rows(min_row=2, values_only=True), start=2):
                 if not any(row):
                     continue
-                try:
-                    (
-                        sn,
-                        purchase_date,
-                        customer_name,
-                        location,
-                        phone_no,
-                        metal_type,
-                        ornament_name,
-                        weight,
-                        refined_weight,
-                        rate,
-                        amount,
-                        created_at,
-                        updated_at,
-                    ) = row[:13]
-
-                    if CustomerPurchase.objects.filter(sn=str(sn)).exists():
-                        continue
+                stats.rows += 1
+                yield row_num, row
 
-                    CustomerPurchase.objects.create(
-                        sn=str(sn),
-                        purchase_date=to_date(purchase_date),
-                        customer_name=customer_name or "",
-                        location=location or "",
-                        phone_no=phone_no or "0000000000",
-                        metal_type=metal_type or "gold",
-                        ornament_name=ornament_name or "",
-                        weight=to_decimal(weight),
-                        refined_weight=to_decimal(refined_weight),
-                        rate=to_decimal(rate),
-                        amount=to_decimal(amount),
-                    )
-                    count += 1
-                except Exception as e:
-                    errors.append(f"CustomerPurchase row error: {e}")
-            imported_count["CustomerPurchase"] = count
+        def order_key(value):
+            try:
+                return int(value) if value not in (None, "") else None
+            except (TypeError, ValueError):
+                return None
 
-        # ========== Import Orders ==========
-        if "Orders" in wb.sheetnames:
-            ws = wb["Orders"]
-            count = 0
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if not any(row):
-                    continue
-                try:
-                    (
-                        sn,
-                        order_date,
-                        deliver_date,
-                        customer_name,
-                        phone_number,
-                        status,
-                        order_type,
-                        description,
-                        discount,
-                        amount,
-                        subtotal,
-                        tax,
-                        total,
-                        payment_mode,
-                        payment_amount,
-                        remaining_amount,
-                        created_at,
-                        updated_at,
-                    ) = row[:18]
+        # Every sheet is parsed first and written with bulk_create; the whole
+        # workbook is one transaction so a failed batch leaves nothing behind.
+        with transaction.atomic():
+            # ========== Import GoldSilverPurchase ==========
+            if "GoldSilverPurchase" in wb.sheetnames:
+                parsed = []
+                for row_num, row in sheet_rows("GoldSilverPurchase"):
+                    try:
+                        (
+                            bill_no,
+                            bill_date,
+                            party_name,
+                            particular,
+                            metal_type,
+                            purity,
+                            quantity,
+                            rate,
+                            rate_unit,
+                            wages,
+                            discount,
+                            amount,
+                            payment_mode,
+                            is_paid,
+                            remarks,
+                            created_at,
+                            updated_at,
+                        ) = row[:17]
+
+                        purchase = GoldSilverPurchase(
+                            bill_no=str(bill_no),
+                            bill_date=to_date(bill_date),
+                            particular=particular,
+                            metal_type=metal_type or "gold",
+                            purity=purity or "22K",
+                            quantity=to_decimal(quantity),
+                            rate=to_decimal(rate),
+                            rate_unit=rate_unit or "tola",
+                            wages=to_decimal(wages),
+                            discount=to_decimal(discount),
+                            amount=to_decimal(amount),
+                            payment_mode=payment_mode or "cash",
+                            is_paid=bool(is_paid),
+                            remarks=remarks,
+                        )
+                        parsed.append((purchase, party_name))
+                    except Exception as e:
+                        errors.append(f"GoldSilverPurchase row error: {e}")
 
-                    if Order.objects.filter(sn=sn).exists():
+                seen = existing_keys(
+                    GoldSilverPurchase.objects.all(), "bill_no", [p.bill_no for p, _ in parsed]
+                )
+                rows = []
+                for purchase, party_name in parsed:
+                    if purchase.bill_no not in seen:
+                        seen.add(purchase.bill_no)
+                        rows.append((purchase, party_name))
+
+                parties = get_or_create_many(Party.objects.all(), "party_name", {
+                    name: Party(party_name=name, panno="000000000")
+                    for _, name in rows if name
+                })
+                for purchase, party_name in rows:
+                    purchase.party = parties.get(party_name) if party_name else None
+                imported_count["GoldSilverPurchase"] = create_purchases([p for p, _ in rows])
+
+            # ========== Import CustomerPurchase ==========
+            if "CustomerPurchase" in wb.sheetnames:
+                parsed = []
+                for row_num, row in sheet_rows("CustomerPurchase"):
+                    try:
+                        (
+                            sn,
+                            purchase_date,
+                            customer_name,
+                            location,
+                            phone_no,
+                            metal_type,
+                            ornament_name,
+                            weight,
+                            refined_weight,
+                            rate,
+                            amount,
+                            created_at,
+                            updated_at,
+                        ) = row[:13]
+
+                        parsed.append(CustomerPurchase(
+                            sn=str(sn) if sn not in (None, "") else "",
+                            purchase_date=to_date(purchase_date),
+                            customer_name=customer_name or "",
+                            location=location or "",
+                            phone_no=phone_no or "0000000000",
+                            metal_type=metal_type or "gold",
+                            ornament_name=ornament_name or "",
+                            weight=to_decimal(weight),
+                            refined_weight=to_decimal(refined_weight),
+                            rate=to_decimal(rate),
+                            amount=to_decimal(amount),
+                        ))
+                    except Exception as e:
+                        errors.append(f"CustomerPurchase row error: {e}")
+
+                seen = existing_keys(CustomerPurchase.objects.all(), "sn", [p.sn for p in parsed])
+                purchases = []
+                for purchase in parsed:
+                    if purchase.sn and purchase.sn in seen:
                         continue
-
-                    Order.objects.create(
-                        sn=sn,
-                        order_date=to_date(order_date),
-                        deliver_date=to_date(deliver_date),
-                        customer_name=customer_name or "",
-                        phone_number=phone_number or "0000000000",
-                        status=status or "order",
-                        order_type=order_type or "custom",
-                        description=description or "",
-                        discount=to_decimal(discount),
-                        amount=to_decimal(amount),
-                        subtotal=to_decimal(subtotal),
-                        tax=to_decimal(tax),
-                        total=to_decimal(total),
-                        payment_mode=payment_mode or "cash",
-                        payment_amount=to_decimal(payment_amount),
-                        remaining_amount=to_decimal(remaining_amount),
-                    )
-                    count += 1
-                except Exception as e:
-                    errors.append(f"Orders row error: {e}")
-            imported_count["Orders"] = count
-
-        # ========== Import OrderPayments ==========
-        if "OrderPayments" in wb.sheetnames:
-            ws = wb["OrderPayments"]
-            count = 0
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if not any(row):
-                    continue
-                try:
-                    (
-                        order_sn,
-                        payment_mode,
-                        amount,
-                        created_at,
-                        updated_at,
-                    ) = row[:5]
-
+                    seen.add(purchase.sn)
+                    purchases.append(purchase)
+                imported_count["CustomerPurchase"] = create_customer_purchases(purchases)
+
+            # ========== Import Orders ==========
+            if "Orders" in wb.sheetnames:
+                parsed = []
+                for row_num, row in sheet_rows("Orders"):
                     try:
-                        order = Order.objects.get(sn=order_sn)
-                        OrderPayment.objects.create(
-                            order=order,
-                            payment_mode=payment_mode or "cash",
+                        (
+                            sn,
+                            order_date,
+                            deliver_date,
+                            customer_name,
+                            phone_number,
+                            status,
+                            order_type,
+                            description,
+                            discount,
+                            amount,
+                            subtotal,
+                            tax,
+                            total,
+                            payment_mode,
+                            payment_amount,
+                            remaining_amount,
+                            created_at,
+                            updated_at,
+                        ) = row[:18]
+
+                        # payment_mode/payment_amount are kept in the sheet for
+                        # reference only; payments come from "OrderPayments".
+                        order = Order(
+                            sn=order_key(sn),
+                            order_date=to_date(order_date),
+                            deliver_date=to_date(deliver_date),
+                            customer_name=customer_name or "",
+                            phone_number=phone_number or "0000000000",
+                            status=status or "order",
+                            order_type=order_type or "custom",
+                            description=description or "",
+                            discount=to_decimal(discount),
                             amount=to_decimal(amount),
+                            subtotal=to_decimal(subtotal),
+                            tax=to_decimal(tax),
+                            total=to_decimal(total),
+                            remaining_amount=to_decimal(remaining_amount),
                         )
-                        count += 1
-                    except Order.DoesNotExist:
-                        pass
-                except Exception as e:
-                    errors.append(f"OrderPayments row error: {e}")
-            imported_count["OrderPayments"] = count
-
-        # ========== Import Ornaments ==========
-        if "Ornaments" in wb.sheetnames:
-            ws = wb["Ornaments"]
-            count = 0
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if not any(row):
-                    continue
-                try:
-                    (
-                        orn_id,
-                        code,
-                        ornament_name,
-                        metal_type,
-                        karat,
-                        ornament_type,
-                        main_category,
-                        sub_category,
-                        kaligar_name,
-                        weight,
-                        gross_weight,
-                        diamond_weight,
-                        zircon_weight,
-                        stone_weight,
-                        stone_total_price,
-                        jarti,
-                        jyala,
-                        ornament_date,
-                        description,
-                        image_url,
-                        created_at,
-                        updated_at,
-                    ) = row[:22]
-
-                    orn_id = int(orn_id) if orn_id else None
-
-                    if code:
-                        existing = Ornament.objects.filter(code=str(code)).first()
-                        if existing:
-                            ornament_id_map[orn_id] = existing.id
-                            continue
-
-                    main_cat = None
-                    if main_category:
-                        main_cat, _ = MainCategory.objects.get_or_create(name=main_category)
-
-                    sub_cat = None
-                    if sub_category:
-                        sub_cat, _ = SubCategory.objects.get_or_create(name=sub_category)
-
-                    kaligar = None
-                    if kaligar_name:
-                        kaligar, _ = Kaligar.objects.get_or_create(
-                            name=kaligar_name,
-                            defaults={"panno": "000000000"},
+                        order.clean()
+                        parsed.append(order)
+                    except Exception as e:
+                        errors.append(f"Orders row error: {e}")
+
+                seen = existing_keys(Order.objects.all(), "sn", [o.sn for o in parsed])
+                orders = []
+                for order in parsed:
+                    if order.sn is not None and order.sn in seen:
+                        continue
+                    seen.add(order.sn)
+                    orders.append(order)
+                Order.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+                # bulk_create skips the signals that refresh cached report pages.
+                cache_versions.bump_on_commit(cache_versions.REPORTS)
+                reset_sequences(Order)
+                imported_count["Orders"] = len(orders)
+
+            # Orders referenced by the remaining sheets, fetched once.
+            referenced = {
+                order_key(row[0])
+                for name in ("OrderPayments", "OrderOrnaments", "Sales") if name in wb.sheetnames
+                for row in wb[name].iter_rows(min_row=2, max_col=1, values_only=True)
+            }
+            known_orders = existing_keys(Order.objects.all(), "sn", referenced)
+
+            # ========== Import OrderPayments ==========
+            if "OrderPayments" in wb.sheetnames:
+                payments = []
+                for row_num, row in sheet_rows("OrderPayments"):
+                    try:
+                        (
+                            order_sn,
+                            payment_mode,
+                            amount,
+                            created_at,
+                            updated_at,
+                        ) = row[:5]
+
+                        if order_key(order_sn) in known_orders:
+                            payments.append(OrderPayment(
+                                order_id=order_key(order_sn),
+                                payment_mode=payment_mode or "cash",
+                                amount=to_decimal(amount),
+                            ))
+                    except Exception as e:
+                        errors.append(f"OrderPayments row error: {e}")
+                OrderPayment.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+                # bulk_create skips the signals that refresh cached report pages.
+                cache_versions.bump_on_commit(cache_versions.REPORTS)
+                imported_count["OrderPayments"] = len(payments)
+
+            # ========== Import Ornaments ==========
+            if "Ornaments" in wb.sheetnames:
+                parsed = []
+                for row_num, row in sheet_rows("Ornaments"):
+                    try:
+                        (
+                            orn_id,
+                            code,
+                            ornament_name,
+                            metal_type,
+                            karat,
+                            ornament_type,
+                            main_category,
+                            sub_category,
+                            kaligar_name,
+                            weight,
+                            gross_weight,
+                            diamond_weight,
+                            zircon_weight,
+                            stone_weight,
+                            stone_total_price,
+                            jarti,
+                            jyala,
+                            ornament_date,
+                            description,
+                            image_url,
+                            created_at,
+                            updated_at,
+                        ) = row[:22]
+
+                        ornament = Ornament(
+                            code=str(code) if code else None,
+                            ornament_name=ornament_name or "",
+                            metal_type=metal_type or "Gold",
+                            type=karat or "24KARAT",
+                            ornament_type=ornament_type or "stock",
+                            weight=to_decimal(weight),
+                            gross_weight=to_decimal(gross_weight),
+                            diamond_weight=to_decimal(diamond_weight),
+                            zircon_weight=to_decimal(zircon_weight),
+                            stone_weight=to_decimal(stone_weight),
+                            stone_totalprice=to_decimal(stone_total_price),
+                            jarti=to_decimal(jarti),
+                            jyala=to_decimal(jyala),
+                            ornament_date=to_date(ornament_date),
+                            description=description or "",
                         )
-                    else:
-                        kaligar = Kaligar.objects.first()
-                        if not kaligar:
-                            kaligar = Kaligar.objects.create(
-                                name="Default",
-                                panno="000000000",
-                            )
-
-                    new_ornament = Ornament.objects.create(
-                        code=str(code) if code else None,
-                        ornament_name=ornament_name or "",
-                        metal_type=metal_type or "Gold",
-                        type=karat or "24KARAT",
-                        ornament_type=ornament_type or "stock",
-                        maincategory=main_cat,
-                        subcategory=sub_cat,
-                        kaligar=kaligar,
-                        weight=to_decimal(weight),
-                        gross_weight=to_decimal(gross_weight),
-                        diamond_weight=to_decimal(diamond_weight),
-                        zircon_weight=to_decimal(zircon_weight),
-                        stone_weight=to_decimal(stone_weight),
-                        stone_totalprice=to_decimal(stone_total_price),
-                        jarti=to_decimal(jarti),
-                        jyala=to_decimal(jyala),
-                        ornament_date=to_date(ornament_date),
-                        description=description or "",
-                    )
-                    ornament_id_map[orn_id] = new_ornament.id
-                    count += 1
-                except Exception as e:
-                    errors.append(f"Ornaments row error: {e}")
-            imported_count["Ornaments"] = count
-
-        # ========== Import OrderOrnaments ==========
-        if "OrderOrnaments" in wb.sheetnames:
-            ws = wb["OrderOrnaments"]
-            count = 0
-            row_num = 1
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                row_num += 1
-                if not any(row):
-                    continue
-                try:
-                    (
-                        order_sn,
-                        ornament_id,
-                        gold_rate,
-                        diamond_rate,
-                        zircon_rate,
-                        stone_rate,
-                        jarti,
-                        jyala,
-                        line_amount,
-                        created_at,
-                        updated_at,
-                    ) = row[:11]
-
+                        parsed.append((int(orn_id) if orn_id else None, ornament, main_category, sub_category, kaligar_name))
+                    except Exception as e:
+                        errors.append(f"Ornaments row error: {e}")
+
+                existing = in_bulk_by(Ornament.objects.all(), "code", [o.code for _, o, *_ in parsed])
+                main_cats = get_or_create_many(MainCategory.objects.all(), "name", {
+                    name: MainCategory(name=name) for _, _, name, _, _ in parsed if name
+                })
+                sub_cats = get_or_create_many(SubCategory.objects.all(), "name", {
+                    name: SubCategory(name=name) for _, _, _, name, _ in parsed if name
+                })
+                kaligars = get_or_create_many(Kaligar.objects.all(), "name", {
+                    name: Kaligar(name=name, panno="000000000") for _, _, _, _, name in parsed if name
+                })
+                default_kaligar = None
+
+                new_ornaments = []
+                pending_ids = []
+                new_by_code = {}
+                for orn_id, ornament, main_category, sub_category, kaligar_name in parsed:
+                    if ornament.code in existing:
+                        ornament_id_map[orn_id] = existing[ornament.code].id
+                        continue
+                    if ornament.code and ornament.code in new_by_code:
+                        pending_ids.append((orn_id, new_by_code[ornament.code]))
+                        continue
+                    if not kaligar_name and default_kaligar is None:
+                        default_kaligar = Kaligar.objects.first() or Kaligar.objects.create(
+                            name="Default",
+                            panno="000000000",
+                        )
+                    ornament.maincategory = main_cats.get(main_category) if main_category else None
+                    ornament.subcategory = sub_cats.get(sub_category) if sub_category else None
+                    ornament.kaligar = kaligars[kaligar_name] if kaligar_name else default_kaligar
+                    if ornament.code:
+                        new_by_code[ornament.code] = ornament
+                    new_ornaments.append(ornament)
+                    pending_ids.append((orn_id, ornament))
+
+                create_ornaments(new_ornaments)
+                for orn_id, ornament in pending_ids:
+                    ornament_id_map[orn_id] = ornament.id
+                imported_count["Ornaments"] = len(new_ornaments)
+
+            # ========== Import OrderOrnaments ==========
+            if "OrderOrnaments" in wb.sheetnames:
+                lines = []
+                for row_num, row in sheet_rows("OrderOrnaments"):
                     try:
-                        order = Order.objects.get(sn=order_sn)
+                        (
+                            order_sn,
+                            ornament_id,
+                            gold_rate,
+                            diamond_rate,
+                            zircon_rate,
+                            stone_rate,
+                            jarti,
+                            jyala,
+                            line_amount,
+                            created_at,
+                            updated_at,
+                        ) = row[:11]
+
+                        if order_key(order_sn) not in known_orders:
+                            errors.append(f"OrderOrnaments row {row_num}: Order SN {order_sn} not found")
+                            continue
                         ornament_id = int(ornament_id) if ornament_id else None
                         mapped_ornament_id = ornament_id_map.get(ornament_id)
-                        if mapped_ornament_id:
-                            ornament = Ornament.objects.get(id=mapped_ornament_id)
-                            OrderOrnament.objects.create(
-                                order=order,
-                                ornament=ornament,
-                                gold_rate=to_decimal(gold_rate),
-                                diamond_rate=to_decimal(diamond_rate),
-                                zircon_rate=to_decimal(zircon_rate),
-                                stone_rate=to_decimal(stone_rate),
-                                jarti=to_decimal(jarti),
-                                jyala=to_decimal(jyala),
-                                line_amount=to_decimal(line_amount),
-                            )
-                            count += 1
-                        else:
+                        if not mapped_ornament_id:
                             errors.append(
                                 f"OrderOrnaments row {row_num}: Ornament ID {ornament_id} not found in mapping"
                             )
-                    except Order.DoesNotExist:
-                        errors.append(f"OrderOrnaments row {row_num}: Order SN {order_sn} not found")
-                    except Ornament.DoesNotExist:
-                        errors.append(
-                            f"OrderOrnaments row {row_num}: Ornament ID {mapped_ornament_id} not found after mapping"
-                        )
-                except Exception as e:
-                    errors.append(f"OrderOrnaments row error: {e}")
-            imported_count["OrderOrnaments"] = count
-
-        # ========== Import Sales ==========
-        if "Sales" in wb.sheetnames:
-            ws = wb["Sales"]
-            count = 0
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if not any(row):
-                    continue
-                try:
-                    (
-                        order_sn,
-                        bill_no,
-                        sale_date,
-                        created_at,
-                        updated_at,
-                    ) = row[:5]
-
+                            continue
+                        lines.append(OrderOrnament(
+                            order_id=order_key(order_sn),
+                            ornament_id=mapped_ornament_id,
+                            gold_rate=to_decimal(gold_rate),
+                            diamond_rate=to_decimal(diamond_rate),
+                            zircon_rate=to_decimal(zircon_rate),
+                            stone_rate=to_decimal(stone_rate),
+                            jarti=to_decimal(jarti),
+                            jyala=to_decimal(jyala),
+                            line_amount=to_decimal(line_amount),
+                        ))
+                    except Exception as e:
+                        errors.append(f"OrderOrnaments row error: {e}")
+                OrderOrnament.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+                # bulk_create skips the signals that refresh cached report pages.
+                cache_versions.bump_on_commit(cache_versions.REPORTS)
+                imported_count["OrderOrnaments"] = len(lines)
+
+            # ========== Import Sales ==========
+            if "Sales" in wb.sheetnames:
+                sold = existing_keys(Sale.objects.all(), "order_id", known_orders)
+                sales = []
+                for row_num, row in sheet_rows("Sales"):
                     try:
-                        order = Order.objects.get(sn=order_sn)
-                        if not Sale.objects.filter(order=order).exists():
-                            Sale.objects.create(
-                                order=order,
+                        (
+                            order_sn,
+                            bill_no,
+                            sale_date,
+                            created_at,
+                            updated_at,
+                        ) = row[:5]
+
+                        order_id = order_key(order_sn)
+                        if order_id in known_orders and order_id not in sold:
+                            sold.add(order_id)
+                            sales.append(Sale(
+                                order_id=order_id,
                                 bill_no=bill_no or None,
                                 sale_date=to_date(sale_date),
-                            )
-                            count += 1
-                    except Order.DoesNotExist:
-                        pass
-                except Exception as e:
-                    errors.append(f"Sales row error: {e}")
-            imported_count["Sales"] = count
+                            ))
+                    except Exception as e:
+                        errors.append(f"Sales row error: {e}")
+                Sale.objects.bulk_create(sales, batch_size=BATCH_SIZE)
+                imported_count["Sales"] = len(sales)
+                if sales:
+                    monthly_rollup.rebuild()
+        stats.stop()
 
         summary_msg = "Import completed: " + " | ".join(
             [f"{k}: {v}" for k, v in imported_count.items() if v > 0]
         )
         summary_msg += f" | Ornament ID mappings: {len(ornament_id_map)}"
+        summary_msg += f" | {stats.throughput()}"
         messages.success(request, summary_msg)
 
         if errors:
@@ -2016,13 +1912,7 @@ def export_all_data_json(request):
 
 @login_required(login_url='/accounts/login/')
 def import_all_data_json(request):
-    """Import all data from a JSON file for faster restoration."""
-    import json
-    from datetime import date, datetime
-    from django.db import models as dj_models, transaction
-    from django.utils.dateparse import parse_date, parse_datetime
-    from nepali_datetime_field.models import NepaliDateField
-    
+    """Queue an import of all data from a JSON backup file."""
     if request.method != "POST" or "import_file" not in request.FILES:
         return redirect("gsp:data_settings")
 
@@ -2031,270 +1921,13 @@ def import_all_data_json(request):
         messages.error(request, "Please upload a JSON file.")
         return redirect("gsp:data_settings")
 
-    try:
-        # Read and parse JSON
-        file_content = file.read().decode('utf-8')
-        data = json.loads(file_content)
-        imported_count = {}
-        errors = []
-
-        def parse_nepali_date(value):
-            if not value:
-                return None
-            if hasattr(value, "strftime"):
-                return value
-            try:
-                y, m, d = map(int, str(value).split("-"))
-                return ndt.date(y, m, d) if ndt else None
-            except Exception:
-                return None
-
-        def is_int_like(value):
-            try:
-                int(str(value))
-                return True
-            except Exception:
-                return False
-
-        def parse_field_value(field, value):
-            if value in (None, ""):
-                return None
-            if isinstance(field, dj_models.DecimalField):
-                return to_decimal(value)
-            if isinstance(field, NepaliDateField):
-                return parse_nepali_date(value)
-            if isinstance(field, dj_models.DateTimeField):
-                return parse_datetime(str(value)) or None
-            if isinstance(field, dj_models.DateField):
-                return parse_date(str(value)) or None
-            if isinstance(field, dj_models.BooleanField):
-                if isinstance(value, bool):
-                    return value
-                return str(value).lower() in {"1", "true", "yes", "y"}
-            if isinstance(field, (dj_models.IntegerField, dj_models.AutoField, dj_models.BigIntegerField, dj_models.PositiveIntegerField)):
-                try:
-                    return int(str(value))
-                except Exception:
-                    return None
-            return value
-
-        def resolve_fk_id(model_key, field, row):
-            raw = row.get(field.name)
-            if raw in (None, ""):
-                raw = row.get(f"{field.name}_id")
-
-            if raw in (None, ""):
-                if field.name == "employee":
-                    raw = row.get("employee_name")
-                    if raw:
-                        parts = str(raw).strip().split()
-                        first = parts[0] if parts else ""
-                        last = " ".join(parts[1:]) if len(parts) > 1 else ""
-                        employee = Employee.objects.filter(first_name=first, last_name=last).first()
-                        return employee.pk if employee else None
-                if field.name == "creditor":
-                    raw = row.get("creditor_name")
-                if field.name == "debtor":
-                    raw = row.get("debtor_name")
-                if field.name == "party":
-                    raw = row.get("party_name")
-                if field.name == "kaligar":
-                    raw = row.get("kaligar") or row.get("kaligar_name")
-                if field.name == "stock_type":
-                    raw = row.get("stock_type")
-                if field.name == "order_payment":
-                    raw = row.get("order_payment_id")
-                    if raw in (None, ""):
-                        order_id = row.get("order_id") or row.get("order")
-                        if order_id:
-                            payment = OrderPayment.objects.filter(order_id=order_id).order_by("id").first()
-                            return payment.pk if payment else None
-                if field.name == "order":
-                    raw = row.get("order_id")
-                if field.name == "ornament":
-                    raw = row.get("ornament_id") or row.get("ornament_code")
-
-            if raw in (None, ""):
-                return None
-
-            if is_int_like(raw):
-                return int(str(raw))
-
-            related_model = field.remote_field.model
-            if hasattr(related_model, "party_name"):
-                obj = related_model.objects.filter(party_name=raw).first()
-                return obj.pk if obj else None
-            if hasattr(related_model, "name"):
-                obj = related_model.objects.filter(name=raw).first()
-                return obj.pk if obj else None
-            if hasattr(related_model, "code"):
-                obj = related_model.objects.filter(code=raw).first()
-                return obj.pk if obj else None
-            return None
-
-        lookup_fields = {
-            "Employee": [("email",), ("first_name", "last_name", "position")],
-            "EmployeeSalary": [("employee", "month")],
-            "Expense": [("category", "description", "expense_date", "amount")],
-            "SundryCreditor": [("name",)],
-            "SundryDebtor": [("name",)],
-            "Loan": [("bank_name", "start_date", "amount", "interest_rate")],
-            "CreditorTransaction": [("creditor", "transaction_type", "reference_no", "amount", "transaction_date")],
-            "DebtorTransaction": [("debtor", "transaction_type", "reference_no", "amount", "transaction_date")],
-            "Party": [("party_name", "panno")],
-            "MetalStockType": [("name",)],
-            "MetalStock": [("metal_type", "stock_type", "purity", "location")],
-            "GoldSilverPurchase": [("bill_no",)],
-            "CustomerPurchase": [("sn",)],
-            "MetalStockMovement": [("metal_stock", "movement_type", "quantity", "rate", "reference_type", "reference_id", "movement_date")],
-            "Stock": [("year",)],
-            "DailyRate": [("bs_date",)],
-            "Stone": [("name",)],
-            "Motimala": [("name",)],
-            "Potey": [("name",)],
-            "MainCategory": [("name",)],
-            "SubCategory": [("name",)],
-            "Kaligar": [("name", "panno")],
-            "Kaligar_Ornaments": [("kaligar", "date", "ornament_weight", "gold_given")],
-            "Kaligar_CashAccount": [("kaligar", "date", "particular", "amount_taken", "to_pay")],
-            "Kaligar_GoldAccount": [("kaligar", "date", "gold_deposit")],
-            "Ornament": [("code",)],
-            "Order": [("sn",)],
-            "OrderMetalStock": [("order", "stock_type", "metal_type", "purity", "quantity", "rate_per_gram")],
-            "OrderPayment": [("order", "payment_mode", "amount")],
-            "OrderOrnament": [("order", "ornament", "line_amount")],
-            "DebtorPayment": [("order_payment",)],
-            "Sale": [("order",)],
-            "SalesMetalStock": [("sale", "stock_type", "metal_type", "purity", "quantity", "rate_per_gram")],
-        }
-
-        def build_lookup(model_key, model, row):
-            pk_field = model._meta.pk
-            pk_name = pk_field.name
-            if pk_name in row and row.get(pk_name) not in (None, ""):
-                return {pk_name: parse_field_value(pk_field, row.get(pk_name))}
-            for fields in lookup_fields.get(model_key, []):
-                values = {}
-                ok = True
-                for field_name in fields:
-                    field = model._meta.get_field(field_name)
-                    if isinstance(field, dj_models.ForeignKey):
-                        value = resolve_fk_id(model_key, field, row)
-                    else:
-                        value = parse_field_value(field, row.get(field_name))
-                    if value in (None, ""):
-                        ok = False
-                        break
-                    values[field_name] = value
-                if ok:
-                    return values
-            return None
-
-        def upsert_rows(model_key, model, rows):
-            count = 0
-            for row in rows:
-                try:
-                    lookup = build_lookup(model_key, model, row)
-                    if not lookup:
-                        errors.append(f"{model_key}: missing lookup for row")
-                        continue
-
-                    defaults = {}
-                    for field in model._meta.fields:
-                        if field.primary_key:
-                            continue
-                        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
-                            continue
-                        if isinstance(field, dj_models.ForeignKey):
-                            fk_id = resolve_fk_id(model_key, field, row)
-                            if fk_id is not None:
-                                defaults[f"{field.name}_id"] = fk_id
-                            else:
-                                defaults[field.name] = None
-                        else:
-                            if field.name in row:
-                                defaults[field.name] = parse_field_value(field, row.get(field.name))
-
-                    model.objects.update_or_create(defaults=defaults, **lookup)
-                    count += 1
-                except Exception as exc:
-                    errors.append(f"{model_key}: {exc}")
-            imported_count[model_key] = count
-
-        # --- Import models in dependency order ---
-        from finance.models import EmployeeSalary, SundryCreditor, SundryDebtor, Loan, CreditorTransaction, DebtorTransaction, Expense, Employee
-        from goldsilverpurchase.models import GoldSilverPurchase, CustomerPurchase, MetalStock, MetalStockMovement, Party, MetalStockType
-        from main.models import Stock, DailyRate
-        from ornament.models import Stone, Motimala, Potey, MainCategory, SubCategory, Kaligar, Kaligar_Ornaments, Kaligar_CashAccount, Kaligar_GoldAccount, Ornament
-        from order.models import Order, OrderMetalStock, OrderPayment, OrderOrnament, DebtorPayment
-        from sales.models import Sale, SalesMetalStock
-
-        model_order = [
-            ("Employee", Employee),
-            ("SundryCreditor", SundryCreditor),
-            ("SundryDebtor", SundryDebtor),
-            ("Loan", Loan),
-            ("Expense", Expense),
-            ("EmployeeSalary", EmployeeSalary),
-            ("CreditorTransaction", CreditorTransaction),
-            ("DebtorTransaction", DebtorTransaction),
-            ("Party", Party),
-            ("MetalStockType", MetalStockType),
-            ("MetalStock", MetalStock),
-            ("GoldSilverPurchase", GoldSilverPurchase),
-            ("CustomerPurchase", CustomerPurchase),
-            ("Kaligar", Kaligar),
-            ("MetalStockMovement", MetalStockMovement),
-            ("Stock", Stock),
-            ("DailyRate", DailyRate),
-            ("MainCategory", MainCategory),
-            ("SubCategory", SubCategory),
-            ("Stone", Stone),
-            ("Motimala", Motimala),
-            ("Potey", Potey),
-            ("Kaligar_Ornaments", Kaligar_Ornaments),
-            ("Kaligar_CashAccount", Kaligar_CashAccount),
-            ("Kaligar_GoldAccount", Kaligar_GoldAccount),
-            ("Order", Order),
-            ("Ornament", Ornament),
-            ("OrderMetalStock", OrderMetalStock),
-            ("OrderPayment", OrderPayment),
-            ("OrderOrnament", OrderOrnament),
-            ("DebtorPayment", DebtorPayment),
-            ("Sale", Sale),
-            ("SalesMetalStock", SalesMetalStock),
-        ]
-
-        with transaction.atomic():
-            for key, model in model_order:
-                rows = data.get(key, [])
-                if rows:
-                    upsert_rows(key, model, rows)
-
-        summary = " | ".join([f"{k}: {v}" for k, v in imported_count.items() if v > 0])
-        if summary:
-            messages.success(request, f"JSON import completed: {summary}")
-        else:
-            messages.success(request, "JSON import completed.")
-
-        if errors:
-            error_preview = "; ".join(errors[:5])
-            extra = f" ... and {len(errors) - 5} more" if len(errors) > 5 else ""
-            messages.warning(request, f"Some rows were skipped: {error_preview}{extra}")
-
-        return redirect("gsp:data_settings")
-
-    except json.JSONDecodeError:
-        messages.error(request, "Invalid JSON file format.")
-        return redirect("gsp:data_settings")
-    except Exception as e:
-        messages.error(request, f"Import failed: {str(e)}")
-        return redirect("gsp:data_settings")
+    job = enqueue("gsp.import_all_data_json", user=request.user, upload=file, next_url=reverse("gsp:data_settings"))
+    return redirect("main:job_detail", pk=job.pk)
 
 
 @login_required(login_url='/accounts/login/')
 def delete_all_data(request):
-    """Delete all data from ALL tables across all apps (with confirmation)."""
+    """Queue deletion of all data from ALL tables across all apps (with confirmation)."""
     if request.method != "POST":
         return redirect("gsp:data_settings")
 
@@ -2304,152 +1937,8 @@ def delete_all_data(request):
         messages.error(request, "Deletion not confirmed. Data was not deleted.")
         return redirect("gsp:data_settings")
 
-    try:
-        # Import all models
-        from finance.models import (
-            EmployeeSalary, Expense, Employee,
-            CreditorTransaction, DebtorTransaction,
-            SundryCreditor, SundryDebtor, Loan
-        )
-        from goldsilverpurchase.models import (
-            MetalStockMovement, MetalStock, CustomerPurchase, 
-            GoldSilverPurchase, Party, MetalStockType
-        )
-        from main.models import DailyRate, Stock
-        from ornament.models import (
-            Kaligar_CashAccount, Kaligar_GoldAccount, Kaligar_Ornaments,
-            Ornament, Kaligar, SubCategory, MainCategory,
-            Potey, Motimala, Stone
-        )
-        from order.models import (
-            DebtorPayment, OrderPayment, OrderOrnament, OrderMetalStock, Order
-        )
-        from sales.models import SalesMetalStock, Sale
-        
-        deleted_counts = {}
-        
-        # Delete in reverse dependency order (children first, parents last)
-        
-        # Sales (dependent on Order)
-        deleted_counts['SalesMetalStock'] = SalesMetalStock.objects.count()
-        SalesMetalStock.objects.all().delete()
-        
-        deleted_counts['Sale'] = Sale.objects.count()
-        Sale.objects.all().delete()
-        
-        # Order dependencies
-        deleted_counts['DebtorPayment'] = DebtorPayment.objects.count()
-        DebtorPayment.objects.all().delete()
-        
-        deleted_counts['OrderPayment'] = OrderPayment.objects.count()
-        OrderPayment.objects.all().delete()
-        
-        deleted_counts['OrderOrnament'] = OrderOrnament.objects.count()
-        OrderOrnament.objects.all().delete()
-        
-        deleted_counts['OrderMetalStock'] = OrderMetalStock.objects.count()
-        OrderMetalStock.objects.all().delete()
-        
-        deleted_counts['Order'] = Order.objects.count()
-        Order.objects.all().delete()
-        
-        # Ornament models
-        deleted_counts['Kaligar_CashAccount'] = Kaligar_CashAccount.objects.count()
-        Kaligar_CashAccount.objects.all().delete()
-        
-        deleted_counts['Kaligar_GoldAccount'] = Kaligar_GoldAccount.objects.count()
-        Kaligar_GoldAccount.objects.all().delete()
-        
-        deleted_counts['Kaligar_Ornaments'] = Kaligar_Ornaments.objects.count()
-        Kaligar_Ornaments.objects.all().delete()
-        
-        deleted_counts['Ornament'] = Ornament.objects.count()
-        Ornament.objects.all().delete()
-        
-        deleted_counts['SubCategory'] = SubCategory.objects.count()
-        SubCategory.objects.all().delete()
-        
-        deleted_counts['MainCategory'] = MainCategory.objects.count()
-        MainCategory.objects.all().delete()
-        
-        deleted_counts['Kaligar'] = Kaligar.objects.count()
-        Kaligar.objects.all().delete()
-        
-        deleted_counts['Potey'] = Potey.objects.count()
-        Potey.objects.all().delete()
-        
-        deleted_counts['Motimala'] = Motimala.objects.count()
-        Motimala.objects.all().delete()
-        
-        deleted_counts['Stone'] = Stone.objects.count()
-        Stone.objects.all().delete()
-        
-        # Main models
-        deleted_counts['DailyRate'] = DailyRate.objects.count()
-        DailyRate.objects.all().delete()
-        
-        deleted_counts['Stock'] = Stock.objects.count()
-        Stock.objects.all().delete()
-        
-        # GoldSilverPurchase models
-        deleted_counts['MetalStockMovement'] = MetalStockMovement.objects.count()
-        MetalStockMovement.objects.all().delete()
-        
-        deleted_counts['MetalStock'] = MetalStock.objects.count()
-        MetalStock.objects.all().delete()
-        
-        deleted_counts['CustomerPurchase'] = CustomerPurchase.objects.count()
-        CustomerPurchase.objects.all().delete()
-        
-        deleted_counts['GoldSilverPurchase'] = GoldSilverPurchase.objects.count()
-        GoldSilverPurchase.objects.all().delete()
-        
-        deleted_counts['MetalStockType'] = MetalStockType.objects.count()
-        MetalStockType.objects.all().delete()
-        
-        deleted_counts['Party'] = Party.objects.count()
-        Party.objects.all().delete()
-        
-        # Finance models (transactions before parent records)
-        deleted_counts['CreditorTransaction'] = CreditorTransaction.objects.count()
-        CreditorTransaction.objects.all().delete()
-        
-        deleted_counts['DebtorTransaction'] = DebtorTransaction.objects.count()
-        DebtorTransaction.objects.all().delete()
-        
-        deleted_counts['EmployeeSalary'] = EmployeeSalary.objects.count()
-        EmployeeSalary.objects.all().delete()
-        
-        deleted_counts['SundryCreditor'] = SundryCreditor.objects.count()
-        SundryCreditor.objects.all().delete()
-        
-        deleted_counts['SundryDebtor'] = SundryDebtor.objects.count()
-        SundryDebtor.objects.all().delete()
-        
-        deleted_counts['Loan'] = Loan.objects.count()
-        Loan.objects.all().delete()
-        
-        deleted_counts['Expense'] = Expense.objects.count()
-        Expense.objects.all().delete()
-        
-        deleted_counts['Employee'] = Employee.objects.count()
-        Employee.objects.all().delete()
-        
-        # Calculate total
-        total_deleted = sum(deleted_counts.values())
-        
-        # Build detailed message
-        details = " | ".join([f"{model}: {count}" for model, count in deleted_counts.items() if count > 0])
-        
-        messages.success(
-            request,
-            f"All data deleted successfully! Total records removed: {total_deleted}. Details: {details}"
-        )
-        
-    except Exception as e:
-        messages.error(request, f"Error deleting data: {str(e)}")
-
-    return redirect("gsp:data_settings")
+    job = enqueue("gsp.delete_all_data", user=request.user, next_url=reverse("gsp:data_settings"))
+    return redirect("main:job_detail", pk=job.pk)
 
 class MetalStockListView(LoginRequiredMixin, ListView):
     """View to display all metal stocks (raw and refined)"""
@@ -2459,7 +1948,7 @@ class MetalStockListView(LoginRequiredMixin, ListView):
     paginate_by = 15
 
     def get_queryset(self):
-        queryset = super().get_queryset().order_by('-last_updated', '-created_at')
+        queryset = super().get_queryset().select_related('stock_type').order_by('-last_updated', '-created_at')
         
         # Filter by metal type
         metal_type = self.request.GET.get('metal_type')
@@ -2488,130 +1977,108 @@ class MetalStockListView(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Get the filtered base queryset
-        filtered_queryset = self.get_queryset()
-        
-        # Summary statistics (always use unfiltered totals for dashboard)
-        context['total_gold_quantity'] = (
-            MetalStock.objects.filter(metal_type='gold')
-            .aggregate(total=Sum('quantity'))['total'] or Decimal('0.000')
-        )
-        context['total_silver_quantity'] = (
-            MetalStock.objects.filter(metal_type='silver')
-            .aggregate(total=Sum('quantity'))['total'] or Decimal('0.000')
+
+        # Dashboard figures come from the per metal/type/purity positions
+        # (a handful of rows kept current on every stock write).
+        all_positions = list(MetalStockPosition.objects.select_related('stock_type'))
+        totals = positions.summarize(all_positions)
+        empty = {'quantity': Decimal('0.000'), 'value': Decimal('0.00'), 'avg_cost_per_tola': Decimal('0.00')}
+        gold, silver, platinum = (totals.get(metal, empty) for metal in ('gold', 'silver', 'platinum'))
+
+        context['total_gold_quantity'] = gold['quantity']
+        context['total_silver_quantity'] = silver['quantity']
+        context['total_platinum_quantity'] = platinum['quantity']
+        context['total_gold_value'] = gold['value']
+        context['total_silver_value'] = silver['value']
+        context['total_value'] = gold['value'] + silver['value']
+
+        # Breakdown by stock type
+        context['raw_stocks'] = sum(
+            (p.quantity for p in all_positions if p.stock_type.name == 'raw'), Decimal('0.000')
         )
-        context['total_platinum_quantity'] = (
-            MetalStock.objects.filter(metal_type='platinum')
-            .aggregate(total=Sum('quantity'))['total'] or Decimal('0.000')
+        context['refined_stocks'] = sum(
+            (p.quantity for p in all_positions if p.stock_type.name == 'refined'), Decimal('0.000')
         )
-        
-        # Total value
-        gold_value = MetalStock.objects.filter(metal_type='gold').aggregate(
-            total=Sum(models.F('quantity') * models.F('unit_cost'), output_field=models.DecimalField())
-        )['total'] or Decimal('0.00')
-        
-        silver_value = MetalStock.objects.filter(metal_type='silver').aggregate(
-            total=Sum(models.F('quantity') * models.F('unit_cost'), output_field=models.DecimalField())
-        )['total'] or Decimal('0.00')
-        
-        context['total_gold_value'] = gold_value
-        context['total_silver_value'] = silver_value
-        context['total_value'] = gold_value + silver_value
-        
-        # Breakdown by stock type
-        context['raw_stocks'] = MetalStock.objects.filter(
-            stock_type__name='raw'
-        ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.000')
-        
-        context['refined_stocks'] = MetalStock.objects.filter(
-            stock_type__name='refined'
-        ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.000')
-        
-        # Low stock alerts (from filtered queryset)
-        context['low_stock_items'] = [
-            item for item in filtered_queryset if item.is_low_stock
+
+        # Low stock alerts and average rates follow the metal/type/purity filters
+        filters = {
+            'metal_type': self.request.GET.get('metal_type'),
+            'stock_type': self.request.GET.get('stock_type'),
+            'purity': self.request.GET.get('purity'),
+        }
+        filtered_positions = [
+            p for p in all_positions
+            if (not filters['metal_type'] or p.metal_type == filters['metal_type'])
+            and (not filters['stock_type'] or p.stock_type.name == filters['stock_type'])
+            and (not filters['purity'] or p.purity == filters['purity'])
         ]
-        
+        context['low_stock_items'] = [p for p in filtered_positions if p.is_low_stock]
+
         # Split filtered queryset into gold and silver for tabs
-        gold_stocks = filtered_queryset.filter(metal_type='gold')
-        silver_stocks = filtered_queryset.filter(metal_type='silver')
-        
-        context['gold_stocks'] = gold_stocks
-        context['silver_stocks'] = silver_stocks
-        
-        # Average unit cost rates from MetalStock (weighted by quantity)
-        # 1 tola = 11.6643 grams
-        TOLA_TO_GRAM = Decimal('11.6643')
-        
-        # Function to calculate weighted average cost in tola
-        def calculate_weighted_average_cost(stock_qs):
-            """Calculate quantity-weighted average unit cost in per-tola"""
-            total_value_per_gram = Decimal('0.00')
-            total_quantity = Decimal('0.00')
-            
-            for stock in stock_qs:
-                # Skip if no cost or quantity
-                if not stock.unit_cost or not stock.quantity:
-                    continue
-                    
-                # Convert unit cost to per-gram based on rate_unit
-                if stock.rate_unit == 'gram':
-                    per_gram = stock.unit_cost
-                elif stock.rate_unit == '10gram':
-                    per_gram = stock.unit_cost / Decimal('10')
-                elif stock.rate_unit == 'tola':
-                    per_gram = stock.unit_cost / TOLA_TO_GRAM
-                else:
-                    continue
-                
-                # Accumulate: (cost_per_gram × quantity)
-                total_value_per_gram += per_gram * stock.quantity
-                total_quantity += stock.quantity
-            
-            if total_quantity == 0:
-                return Decimal('0.00')
-            
-            # Weighted average per-gram = total_value / total_quantity
-            avg_per_gram = total_value_per_gram / total_quantity
-            # Convert per-gram to per-tola
-            avg_per_tola = avg_per_gram * TOLA_TO_GRAM
-            return avg_per_tola
-        
-        gold_avg_rate_tola = calculate_weighted_average_cost(gold_stocks)
-        silver_avg_rate_tola = calculate_weighted_average_cost(silver_stocks)
-        
-        context['avg_gold_purchase_rate_tola'] = gold_avg_rate_tola
-        context['avg_silver_purchase_rate_tola'] = silver_avg_rate_tola
-        
+        filtered_queryset = self.get_queryset()
+        context['gold_stocks'] = filtered_queryset.filter(metal_type='gold')
+        context['silver_stocks'] = filtered_queryset.filter(metal_type='silver')
+
+        # Quantity-weighted average unit cost per tola
+        filtered_totals = positions.summarize(filtered_positions)
+        context['avg_gold_purchase_rate_tola'] = filtered_totals.get('gold', empty)['avg_cost_per_tola']
+        context['avg_silver_purchase_rate_tola'] = filtered_totals.get('silver', empty)['avg_cost_per_tola']
+
         return context
 
 
+MOVEMENT_PAGE_SIZE = 50
+
+
+def _movements_after(movements, anchor):
+    """Movements that sort after ``anchor`` (newest first, undated rows last)."""
+    date, created_at, pk = anchor
+    same_date_later = Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+    if date is None:
+        return movements.filter(Q(movement_date__isnull=True) & same_date_later)
+    return movements.filter(
+        Q(movement_date__lt=date)
+        | Q(movement_date__isnull=True)
+        | (Q(movement_date=date) & same_date_later)
+    )
+
+
 @login_required(login_url='/accounts/login/')
 def metal_stock_detail(request, pk):
-    """View stock details and its movement history"""
-    # Always re-fetch the MetalStock from the DB to get the latest quantity
-    from django.db.models import Sum
-    metal_stock = MetalStock.objects.get(pk=pk)
-    # Recalculate quantity from all movements (defensive, in case of any desync)
-    total_in = metal_stock.movements.filter(movement_type='in').aggregate(total=Sum('quantity'))['total'] or 0
-    total_out = metal_stock.movements.filter(movement_type='out').aggregate(total=Sum('quantity'))['total'] or 0
-    total_adj = metal_stock.movements.filter(movement_type='adjustment').aggregate(total=Sum('quantity'))['total'] or 0
-    metal_stock.quantity = total_in - total_out + total_adj
-    metal_stock.save()
-    movements = MetalStockMovement.objects.filter(metal_stock=metal_stock).order_by('-movement_date')
-    # Calculate average unit cost from 'in' movements
-    in_movements = movements.filter(movement_type='in')
-    total_qty = 0
-    total_cost = 0
-    for m in in_movements:
-        if m.rate and m.quantity:
-            total_qty += float(m.quantity)
-            total_cost += float(m.rate) * float(m.quantity)
-    avg_unit_cost = (total_cost / total_qty) if total_qty else 0
+    """View stock details and its movement history, a keyset page at a time"""
+    metal_stock = get_object_or_404(MetalStock.objects.select_related('stock_type'), pk=pk)
+    # The ledger keeps the in - out + adjustment balance of the movements;
+    # only write when the stored quantity has drifted from it.
+    if metal_stock.quantity != metal_stock.ledger_balance:
+        metal_stock.quantity = metal_stock.ledger_balance
+        metal_stock.save()
+
+    movements = (
+        metal_stock.movements.select_related('kaligar')
+        .order_by(F('movement_date').desc(nulls_last=True), '-created_at', '-pk')
+    )
+    after = request.GET.get('after')
+    anchor = None
+    if after and after.isdigit():
+        anchor = (
+            metal_stock.movements.filter(pk=after)
+            .values_list('movement_date', 'created_at', 'pk')
+            .first()
+        )
+    if anchor:
+        movements = _movements_after(movements, anchor)
+    page = list(movements[:MOVEMENT_PAGE_SIZE + 1])
+    has_older = len(page) > MOVEMENT_PAGE_SIZE
+    page = page[:MOVEMENT_PAGE_SIZE]
+
+    avg_unit_cost = (
+        metal_stock.ledger_cost / metal_stock.ledger_quantity if metal_stock.ledger_quantity else Decimal('0')
+    )
     context = {
         'metal_stock': metal_stock,
-        'movements': movements,
+        'movements': page,
+        'is_first_page': anchor is None,
+        'older_cursor': page[-1].pk if has_older else None,
         'avg_unit_cost_from_movements': avg_unit_cost,
     }
     return render(request, 'goldsilverpurchase/metalstock_detail.html', context)
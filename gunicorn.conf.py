@@ -0,0 +1,31 @@
+"""Gunicorn configuration, picked up automatically when gunicorn runs from the project root.
+
+    gunicorn mysite.wsgi
+
+Every worker thread holds its own database connection, so with persistent
+connections the site keeps up to ``GUNICORN_WORKERS * GUNICORN_THREADS``
+PostgreSQL connections open (plus one per ``run_jobs`` worker).  Keep that
+below the server's ``max_connections``.  See docs/DEPLOYMENT.md.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:8000')
+
+# Threads let a worker serve other requests while one waits on PostgreSQL or
+# Cloudinary, without the memory of another process.
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 5)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so a slow leak can't grow without bound;
+# the jitter keeps them from all restarting at once.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = 100
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
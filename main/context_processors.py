@@ -1,16 +1,21 @@
-from main.models import DailyRate, CustomerPageImage
+from main.models import CustomerPageImage
+from main.services import cache_versions, rates
 
 
 def latest_rate(request):
     """Provide the most recent DailyRate to all templates."""
-    rate = DailyRate.objects.order_by('-created_at').first()
-    return {'latest_rate': rate}
+    return {'latest_rate': rates.latest(request)}
 
 
 def site_branding(request):
     """Provide dynamic site logo URL for customer and admin templates."""
-    logo = CustomerPageImage.get_for_slot(CustomerPageImage.PageSlot.SITE_LOGO)
-    return {'site_logo_url': logo.image_url}
+    logo_url = cache_versions.get_or_build(
+        cache_versions.PAGE_IMAGES,
+        'site_logo_url',
+        lambda: CustomerPageImage.get_for_slot(CustomerPageImage.PageSlot.SITE_LOGO).image_url,
+        request=request,
+    )
+    return {'site_logo_url': logo_url}
 
 
 def customer_nav(request):
@@ -19,39 +24,50 @@ def customer_nav(request):
     if path.startswith(('/admin-dashboard', '/accounts', '/finance', '/ornament', '/order', '/sales', '/gsp')):
         return {}
 
-    from ornament.models import Ornament, MainCategory
+    nav = cache_versions.get_or_build(
+        cache_versions.CUSTOMER_NAV, 'sidebar', _build_customer_nav, request=request,
+    )
+    return {**nav, 'customer_nav_tab': ''}
+
+
+def _build_customer_nav():
+    from ornament.models import Ornament, MainCategory, OrnamentStockSummary
+
+    # Which metals / categories have active stock comes from the summary table.
+    buckets = OrnamentStockSummary.objects.filter(
+        ornament_type='stock',
+        status='active',
+        count__gt=0,
+    ).values_list('metal_type', 'maincategory_id').distinct()
+
+    metals_in_stock = set()
+    category_ids_by_metal = {}
+    for metal_key, category_id in buckets:
+        metals_in_stock.add(metal_key)
+        if category_id is not None:
+            category_ids_by_metal.setdefault(metal_key, set()).add(category_id)
+
+    all_category_ids = set().union(*category_ids_by_metal.values()) if category_ids_by_metal else set()
+    categories = list(MainCategory.objects.filter(id__in=all_category_ids).order_by('name'))
 
     categories_by_metal = []
     metal_type_pages = []
 
     for metal_key, metal_label in Ornament.MetalTypeCategory.choices:
-        metal_products = Ornament.objects.filter(
-            ornament_type='stock',
-            status='active',
-            metal_type=metal_key,
-        )
-
-        if metal_products.exists():
+        if metal_key in metals_in_stock:
             metal_type_pages.append({
                 'value': metal_key,
                 'label': metal_label,
             })
 
-        metal_categories = MainCategory.objects.filter(
-            ornament__ornament_type='stock',
-            ornament__status='active',
-            ornament__metal_type=metal_key,
-            ornament__maincategory__isnull=False,
-        ).distinct().order_by('name')
-
-        if metal_categories.exists():
+        metal_category_ids = category_ids_by_metal.get(metal_key)
+        if metal_category_ids:
             categories_by_metal.append({
                 'metal_type': metal_label,
-                'categories': metal_categories,
+                'categories': [c for c in categories if c.id in metal_category_ids],
             })
 
     return {
         'customer_categories_by_metal': categories_by_metal,
         'customer_metal_type_pages': metal_type_pages,
-        'customer_nav_tab': '',
     }
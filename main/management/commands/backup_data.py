@@ -5,6 +5,8 @@ from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 
+from main.services import rates
+
 
 class Command(BaseCommand):
     help = "Backup or restore database data using dumpdata/loaddata."
@@ -85,6 +87,12 @@ class Command(BaseCommand):
 
             self.stdout.write(f"Restoring from: {restore_path}")
             call_command("loaddata", str(restore_path))
+            call_command("rebuild_ornament_stock_summary", stdout=self.stdout)
+            call_command("reconcile_metal_stock", "--rebuild", stdout=self.stdout)
+            call_command("rebuild_metal_stock_positions", stdout=self.stdout)
+            rates.backfill()
+            call_command("rebuild_storefront_prices", stdout=self.stdout)
+            call_command("rebuild_sales_month_summary", stdout=self.stdout)
             self.stdout.write(self.style.SUCCESS("Restore completed."))
             return
 
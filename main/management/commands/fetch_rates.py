@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from main.models import DailyRate
+from main.services import rates
 from datetime import date
 from decimal import Decimal, InvalidOperation
 import re
@@ -25,7 +26,7 @@ class Command(BaseCommand):
     help = 'Fetch gold and silver rates from FENEGOSIDA'
 
     def _save_latest_rate_as_fallback(self, bs_date=None, reason='fallback'):
-        latest_rate = DailyRate.objects.order_by('-created_at').first()
+        latest_rate = rates.latest()
         if not latest_rate:
             return False
 
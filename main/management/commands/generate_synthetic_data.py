@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.services import synthetic_data
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with synthetic shop data for benchmarks and load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ornaments', type=int, default=1000, help='Stock ornaments to create.')
+        parser.add_argument('--orders', type=int, default=None, help='Orders to create (default: ornaments / 2).')
+        parser.add_argument('--purchases', type=int, default=None, help='Supplier purchases (default: ornaments / 10).')
+        parser.add_argument(
+            '--customer-purchases', type=int, default=None, help='Customer purchases (default: ornaments / 5).',
+        )
+        parser.add_argument('--years', type=float, default=3, help='Years of history (rates and dates).')
+        parser.add_argument('--sold-share', type=float, default=0.6, help='Share of orders that became sales.')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data.')
+        parser.add_argument(
+            '--force', action='store_true', help='Allow running against a production database.',
+        )
+
+    def handle(self, *args, **options):
+        if settings.IS_PRODUCTION and not options['force']:
+            raise CommandError('Refusing to write synthetic data to a production database (use --force).')
+
+        counts = synthetic_data.generate(
+            ornaments=options['ornaments'],
+            orders=options['orders'],
+            purchases=options['purchases'],
+            customer_purchases=options['customer_purchases'],
+            years=options['years'],
+            sold_share=options['sold_share'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        for kind, count in counts.items():
+            self.stdout.write(f'  {kind}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'✓ Completed! Wrote {sum(counts.values())} rows.'))
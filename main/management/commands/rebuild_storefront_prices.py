@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from main.services import storefront_prices
+
+
+class Command(BaseCommand):
+    help = 'Recompute the storefront price index from the latest daily rate and pricing config'
+
+    def handle(self, *args, **options):
+        total = storefront_prices.listed_ornaments().count()
+        self.stdout.write(f'Pricing {total} listed ornaments...')
+        written = storefront_prices.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✓ Completed! Wrote {written} storefront prices.'))
@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from main.services import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Time the key pages and count their queries; write the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help=f"Entry points to run (default: all of {', '.join(e.name for e in benchmarks.ENTRY_POINTS)}).",
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per entry point.')
+        parser.add_argument('--user', default=None, help='Username to request pages as (default: first superuser).')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file.')
+        parser.add_argument('--compare', default=None, help='Earlier JSON report to compare against.')
+        parser.add_argument('--view-cache', action='store_true', help='Leave page caching on (measures cache hits).')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(is_active=True)
+        if options['user']:
+            user = users.filter(username=options['user']).first()
+        else:
+            user = users.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('No such active user; pass --user or create a superuser first.')
+
+        try:
+            report = benchmarks.run(
+                user, names=options['names'], repeat=options['repeat'], view_cache=options['view_cache'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for row in report['results']:
+            self.stdout.write(
+                f"{row['name']:<20} {row['status']:>4} {row['median_ms']:>10.1f} ms "
+                f"{row['queries']:>5} queries ({row['duplicate_queries']} repeated, {row['db_ms']:.1f} ms db)"
+            )
+
+        if options['compare']:
+            previous = json.loads(Path(options['compare']).read_text())
+            self.stdout.write(f"\nAgainst {previous.get('commit') or options['compare']}:")
+            for name, old_ms, new_ms, change, old_queries, new_queries in benchmarks.compare(previous, report):
+                if old_ms is None:
+                    self.stdout.write(f'{name:<20} new')
+                    continue
+                change_text = f'{change:+.1f}%' if change is not None else '-'
+                self.stdout.write(
+                    f'{name:<20} {old_ms:>10.1f} -> {new_ms:>10.1f} ms ({change_text}), '
+                    f'queries {old_queries} -> {new_queries}'
+                )
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"✓ Completed! Report written to {options['output']}."))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.services import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (imports, dumps, restores, bulk deletes, barcode images, image cleanup, storefront prices)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run the jobs queued now, then exit.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to wait between polls when idle.")
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=360,
+            help="Fail jobs left running longer than this by a worker that died (0 = never).",
+        )
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=14,
+            help="Delete finished jobs and their files after this many days (0 = keep).",
+        )
+
+    def handle(self, *args, **options):
+        if options["stale_minutes"]:
+            stale = jobs.fail_stale(timedelta(minutes=options["stale_minutes"]))
+            if stale:
+                self.stdout.write(self.style.WARNING(f"Marked {stale} stale job(s) as failed."))
+        if options["keep_days"]:
+            purged = jobs.purge(timedelta(days=options["keep_days"]))
+            if purged:
+                self.stdout.write(f"Purged {purged} old job(s).")
+
+        while True:
+            close_old_connections()
+            job = jobs.claim_next()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+
+            self.stdout.write(f"Running {job.label or job.kind} #{job.pk} ...")
+            job = jobs.run_job(job)
+            style = self.style.SUCCESS if job.status == "succeeded" else self.style.ERROR
+            self.stdout.write(style(f"  {job.status}: {job.message}"))
@@ -7,7 +7,8 @@ from django.core.management.base import BaseCommand
 from django.db.models import Q
 from django.utils import timezone
 
-from main.models import CampaignMessageLog, CustomerCampaignContact, DailyRate
+from main.models import CampaignMessageLog, CustomerCampaignContact
+from main.services import rates
 from main.services.messaging import send_message
 from order.models import Order
 
@@ -158,7 +159,7 @@ class Command(BaseCommand):
         return rows
 
     def _collect_rate_alert(self, channel: str) -> List[Dict]:
-        latest_rate = DailyRate.objects.order_by("-created_at").first()
+        latest_rate = rates.latest()
         if not latest_rate:
             return []
 
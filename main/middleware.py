@@ -1,6 +1,13 @@
+import random
+import time
+
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
 from django.shortcuts import redirect
 
+from main.services import query_metrics
+
 
 class LoginRequiredMiddleware:
     """Redirect anonymous users to login for all non-exempt paths."""
@@ -49,3 +56,41 @@ class LoginRequiredMiddleware:
         # Redirect to login with next param
         login_url = '/accounts/login/'
         return redirect(f"{login_url}?next={path}")
+
+
+class QueryBudgetMiddleware:
+    """Record SQL count, DB time, repeated queries and render time per request.
+
+    Opt-in: enabled by ``QUERY_METRICS_ENABLED`` and sampled at
+    ``QUERY_METRICS_SAMPLE_RATE``.  Figures are stored as
+    ``RequestQueryMetric`` rows and shown on the performance report.
+    """
+
+    skipped_prefixes = ('/static/', '/media/', '/favicon.ico')
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, 'QUERY_METRICS_SAMPLE_RATE', 1.0))
+
+    def __call__(self, request):
+        if request.path.startswith(self.skipped_prefixes) or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        recorder = query_metrics.QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        query_metrics.record(request, response, recorder, total, getattr(request, '_query_metrics_render', None))
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._query_metrics_render = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-17 17:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_backgroundjob'),
+        ('ornament', '0004_ornamentstocksummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorefrontPrice',
+            fields=[
+                ('ornament', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='storefront_price', serialize=False, to='ornament.ornament')),
+                ('selling_amount', models.DecimalField(db_index=True, decimal_places=2, max_digits=14)),
+                ('version', models.CharField(help_text='DailyRate / pricing config revision the price was computed for', max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Storefront price',
+                'verbose_name_plural': 'Storefront prices',
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.0 on 2026-10-17 18:11
+
+import re
+from datetime import date
+
+import nepali_datetime as ndt
+from django.db import migrations, models
+
+BS_MONTHS = {
+    'baisakh': 1, 'baishakh': 1,
+    'jestha': 2, 'jeth': 2,
+    'ashadh': 3, 'asar': 3,
+    'shrawan': 4, 'sawan': 4,
+    'bhadra': 5, 'bhadau': 5,
+    'ashwin': 6, 'asoj': 6,
+    'kartik': 7, 'kartick': 7,
+    'mangsir': 8, 'mangshir': 8,
+    'poush': 9, 'paush': 9,
+    'magh': 10,
+    'falgun': 11, 'phalgun': 11,
+    'chaitra': 12, 'chait': 12,
+    'बैशाख': 1, 'वैशाख': 1, 'जेठ': 2, 'असार': 3, 'साउन': 4, 'श्रावण': 4,
+    'भदौ': 5, 'असोज': 6, 'कात्तिक': 7, 'कार्तिक': 7, 'मंसिर': 8, 'पुष': 9,
+    'पौष': 9, 'माघ': 10, 'फागुन': 11, 'चैत': 12, 'चैत्र': 12,
+}
+FIRST_BS_YEAR = 2050
+NEPALI_DIGITS = str.maketrans('०१२३४५६७८९', '0123456789')
+NAMED = re.compile(r'^(\d{1,2})\s+(\S+)\s+(\d{4})$')
+ISO = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$')
+
+
+def bs_to_ad(year, month, day):
+    try:
+        return ndt.date(int(year), int(month), int(day)).to_datetime_date()
+    except Exception:
+        return None
+
+
+def parse_rate_date(text):
+    cleaned = ' '.join(str(text or '').translate(NEPALI_DIGITS).split())
+    named = NAMED.match(cleaned)
+    if named:
+        day, month, year = named.groups()
+        month = BS_MONTHS.get(month.lower())
+        return bs_to_ad(year, month, day) if month else None
+    iso = ISO.match(cleaned)
+    if iso:
+        year, month, day = (int(part) for part in iso.groups())
+        if year >= FIRST_BS_YEAR:
+            return bs_to_ad(year, month, day)
+        try:
+            return date(year, month, day)
+        except ValueError:
+            return None
+    return None
+
+
+def populate_rate_date(apps, schema_editor):
+    DailyRate = apps.get_model('main', 'DailyRate')
+    rates = list(DailyRate.objects.only('pk', 'bs_date', 'created_at'))
+    for rate in rates:
+        rate.rate_date = parse_rate_date(rate.bs_date) or rate.created_at.date()
+    DailyRate.objects.bulk_update(rates, ['rate_date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_storefrontprice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyrate',
+            name='rate_date',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_rate_date, migrations.RunPython.noop),
+    ]
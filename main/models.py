@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from decimal import Decimal
 from datetime import datetime, date
@@ -15,6 +16,9 @@ class DailyRate(models.Model):
     gold_rate_10g = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text="Gold rate per 10 grams")
     silver_rate_10g = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text="Silver rate per 10 grams")
 
+    # AD date the rate applies to, parsed from bs_date (see main.services.rates)
+    rate_date = models.DateField(null=True, blank=True, db_index=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -24,6 +28,17 @@ class DailyRate(models.Model):
     def __str__(self):
         return f"Rates - {self.bs_date}"
 
+    def save(self, *args, **kwargs):
+        from django.utils import timezone
+        from main.services.rates import parse_rate_date
+
+        self.rate_date = (
+            parse_rate_date(self.bs_date)
+            or self.rate_date
+            or (timezone.localtime(self.created_at).date() if self.created_at else timezone.localdate())
+        )
+        super().save(*args, **kwargs)
+
 
 class Stock(models.Model):
     """
@@ -230,6 +245,34 @@ class MetalCategoryPricingConfig(models.Model):
         return config
 
 
+class StorefrontPrice(models.Model):
+    """Selling price of an active stock ornament at the current rate and pricing config.
+
+    Maintained by ``main.services.storefront_prices`` so the shop pages can
+    filter, sort and paginate by price in SQL.
+    """
+
+    ornament = models.OneToOneField(
+        'ornament.Ornament',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='storefront_price',
+    )
+    selling_amount = models.DecimalField(max_digits=14, decimal_places=2, db_index=True)
+    version = models.CharField(
+        max_length=64,
+        help_text="DailyRate / pricing config revision the price was computed for",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Storefront price'
+        verbose_name_plural = 'Storefront prices'
+
+    def __str__(self):
+        return f"{self.ornament_id}: {self.selling_amount}"
+
+
 class CustomerPageImage(models.Model):
     """Configurable images and hero text for the customer-facing storefront."""
 
@@ -340,3 +383,50 @@ class CustomerPageImage(models.Model):
     def all_slots(cls):
         """Ensure every defined slot has a row and return them in order."""
         return [cls.get_for_slot(choice.value) for choice in cls.PageSlot]
+
+
+class BackgroundJob(models.Model):
+    """Long-running admin task queued by a view and run by ``manage.py run_jobs``."""
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    label = models.CharField(max_length=255, blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    payload = models.JSONField(default=dict, blank=True)
+
+    # Files live under settings.BACKGROUND_JOBS_DIR, shared by web and worker.
+    input_path = models.CharField(max_length=500, blank=True, default='')
+    result_path = models.CharField(max_length=500, blank=True, default='')
+    result_name = models.CharField(max_length=255, blank=True, default='')
+
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True, default='')
+    errors = models.JSONField(default=list, blank=True)
+    next_url = models.CharField(max_length=255, blank=True, default='')
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.label or self.kind} #{self.pk} [{self.status}]"
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
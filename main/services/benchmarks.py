@@ -0,0 +1,184 @@
+"""Timing and query counts for the pages that matter.
+
+:func:`run` requests each entry point through the Django test client as a
+logged-in user, once to warm caches and then ``repeat`` times under a
+:class:`~main.services.query_metrics.QueryRecorder`, and returns a
+JSON-serialisable report: per entry point the median/min/max wall time,
+the query count, repeated queries and DB time, plus the row counts of the
+main tables and the git commit, so reports from different commits (or
+data scales) can be compared with :func:`compare`.
+
+Imports are benchmarked by uploading the file the matching export just
+produced, inside a transaction that is rolled back.  Page caching
+(``main.services.view_cache``) is off while measuring unless ``view_cache``
+is set, so the warm-up request does not turn the timed ones into cache hits.
+"""
+from __future__ import annotations
+
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import query_metrics
+
+
+@dataclass(frozen=True)
+class EntryPoint:
+    name: str
+    url_name: str
+    # For imports: the export whose output is uploaded.
+    upload_from: str | None = None
+
+
+ENTRY_POINTS = (
+    EntryPoint('dashboard', 'main:dashboard'),
+    EntryPoint('sales_list', 'sales:sales_list'),
+    EntryPoint('order_list', 'order:list'),
+    EntryPoint('stock_report', 'main:stock_report'),
+    EntryPoint('total_assets', 'main:total_assets'),
+    EntryPoint('daily_profit_loss', 'order:daily_profit_loss_report'),
+    EntryPoint('metal_stock_list', 'gsp:metal_stock_list'),
+    EntryPoint('ornament_export', 'ornament:export_excel'),
+    EntryPoint('sales_export', 'sales:export_excel'),
+    EntryPoint('purchase_export', 'gsp:export_excel'),
+    EntryPoint('ornament_import', 'ornament:import_excel', upload_from='ornament:export_excel'),
+)
+
+COUNTED_MODELS = (
+    'ornament.Ornament',
+    'order.Order',
+    'order.OrderOrnament',
+    'order.OrderPayment',
+    'order.Sale',
+    'goldsilverpurchase.GoldSilverPurchase',
+    'goldsilverpurchase.CustomerPurchase',
+    'goldsilverpurchase.MetalStockMovement',
+    'main.DailyRate',
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def _body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def _request(client, entry, upload):
+    if upload is None:
+        return client.get(reverse(entry.url_name), secure=True)
+    try:
+        with transaction.atomic():
+            response = client.post(
+                reverse(entry.url_name),
+                {'file': SimpleUploadedFile('benchmark.xlsx', upload)},
+                secure=True,
+            )
+            raise _Rollback(response)
+    except _Rollback as rolled_back:
+        return rolled_back.args[0]
+
+
+def measure(client, entry, repeat=5):
+    """Request ``entry`` once to warm up, then ``repeat`` times; return its figures."""
+    upload = None
+    if entry.upload_from:
+        upload = _body(client.get(reverse(entry.upload_from), secure=True))
+
+    response = _request(client, entry, upload)
+    _body(response)
+
+    timings, recorders = [], []
+    for _ in range(max(int(repeat), 1)):
+        recorder = query_metrics.QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = _request(client, entry, upload)
+            size = len(_body(response))
+        timings.append((time.perf_counter() - started) * 1000)
+        recorders.append(recorder)
+
+    last = recorders[-1]
+    return {
+        'name': entry.name,
+        'url': reverse(entry.url_name),
+        'status': response.status_code,
+        'median_ms': round(statistics.median(timings), 2),
+        'min_ms': round(min(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'db_ms': round(statistics.median(r.duration for r in recorders) * 1000, 2),
+        'queries': last.count,
+        'duplicate_queries': last.duplicate_count,
+        'response_bytes': size,
+    }
+
+
+def data_counts():
+    return {label: apps.get_model(label).objects.count() for label in COUNTED_MODELS}
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run(user, names=None, repeat=5, view_cache=False):
+    """Benchmark the entry points (all, or those in ``names``) as ``user``."""
+    entries = [entry for entry in ENTRY_POINTS if not names or entry.name in names]
+    unknown = set(names or ()) - {entry.name for entry in entries}
+    if unknown:
+        raise ValueError(f"Unknown entry point(s): {', '.join(sorted(unknown))}")
+
+    client = Client(HTTP_HOST=_host())
+    client.force_login(user)
+    cache_settings = {} if view_cache else {'VIEW_CACHE_TIMEOUT': 0}
+    with override_settings(**cache_settings):
+        results = [measure(client, entry, repeat) for entry in entries]
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'commit': git_commit(),
+        'database': connection.vendor,
+        'repeat': repeat,
+        'view_cache': view_cache,
+        'data': data_counts(),
+        'results': results,
+    }
+
+
+def compare(previous, current):
+    """Rows of ``(name, old median, new median, change %, old queries, new queries)``."""
+    before = {row['name']: row for row in previous.get('results', [])}
+    rows = []
+    for row in current['results']:
+        old = before.get(row['name'])
+        if old is None:
+            rows.append((row['name'], None, row['median_ms'], None, None, row['queries']))
+            continue
+        change = (row['median_ms'] - old['median_ms']) / old['median_ms'] * 100 if old['median_ms'] else None
+        rows.append((row['name'], old['median_ms'], row['median_ms'], change, old['queries'], row['queries']))
+    return rows
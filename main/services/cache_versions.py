@@ -0,0 +1,111 @@
+"""Version-keyed caching for data shared by every page render.
+
+Each cached value lives under ``<namespace>:v<version>:<key>``.  Changing
+the data only has to bump the namespace's version (one cache write); stale
+entries are never read again and simply expire.  ``main.signals`` bumps the
+namespaces below when the underlying rows are saved or deleted.
+
+:func:`versioned_key` builds keys that depend on several namespaces at
+once; ``main.services.view_cache`` keys whole pages with it.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.db import transaction
+
+DAILY_RATE = 'daily_rate'
+PAGE_IMAGES = 'page_images'
+CUSTOMER_NAV = 'customer_nav'
+# Cached pages (main.services.view_cache).
+REPORTS = 'reports'
+STOREFRONT = 'storefront'
+
+# Safety net for caches that are not shared between worker processes.
+DEFAULT_TIMEOUT = 300
+
+_REQUEST_ATTR = '_cache_versions_memo'
+_PENDING_ATTR = '_cache_versions_pending'
+
+
+def _version_key(namespace: str) -> str:
+    return f'cachever:{namespace}'
+
+
+def version(namespace: str) -> int:
+    """Current version of ``namespace`` (initialised to 1 on first use)."""
+    key = _version_key(namespace)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, 1, timeout=None)
+        current = cache.get(key) or 1
+    return current
+
+
+def bump(*namespaces: str) -> None:
+    """Invalidate everything cached under ``namespaces``."""
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, timeout=None)
+
+
+def _flush_pending():
+    connection = transaction.get_connection()
+    pending = getattr(connection, _PENDING_ATTR, None)
+    setattr(connection, _PENDING_ATTR, None)
+    if pending:
+        bump(*sorted(pending))
+
+
+def bump_on_commit(*namespaces: str) -> None:
+    """:func:`bump` once the current transaction commits (at once outside one).
+
+    A page rebuilt while the transaction is still open reads the old rows;
+    bumping only after the commit keeps that page from being cached under
+    the new version.  Namespaces bumped many times in one transaction (a
+    bulk import) are bumped once.
+    """
+    connection = transaction.get_connection()
+    pending = getattr(connection, _PENDING_ATTR, None)
+    if pending is None:
+        pending = set()
+        setattr(connection, _PENDING_ATTR, pending)
+    pending.update(namespaces)
+    transaction.on_commit(_flush_pending)
+
+
+def versioned_key(namespaces, key: str) -> str:
+    """Cache key for ``key`` that changes whenever any of ``namespaces`` is bumped."""
+    stamp = '.'.join(str(version(namespace)) for namespace in namespaces)
+    return f"{'+'.join(namespaces)}:v{stamp}:{key}"
+
+
+def get_or_build(namespace: str, key: str, builder: Callable[[], Any], timeout: int = DEFAULT_TIMEOUT, request=None):
+    """Return the cached value for ``key``, building and storing it on a miss.
+
+    When ``request`` is given the value is also memoised on it, so several
+    templates rendered for one request share a single cache read.
+    """
+    memo = None
+    if request is not None:
+        memo = getattr(request, _REQUEST_ATTR, None)
+        if memo is None:
+            memo = {}
+            setattr(request, _REQUEST_ATTR, memo)
+        if (namespace, key) in memo:
+            return memo[(namespace, key)]
+
+    cache_key = f'{namespace}:v{version(namespace)}:{key}'
+    missing = object()
+    value = cache.get(cache_key, missing)
+    if value is missing:
+        value = builder()
+        cache.set(cache_key, value, timeout)
+
+    if memo is not None:
+        memo[(namespace, key)] = value
+    return value
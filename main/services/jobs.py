@@ -0,0 +1,239 @@
+"""Database-backed queue for long-running admin tasks.
+
+Views validate their input, call :func:`enqueue` and redirect to the job
+page straight away; ``manage.py run_jobs`` claims queued rows one at a time
+and runs the function registered for the job's ``kind`` with
+:func:`task`.  A task receives the ``BackgroundJob``, reports progress with
+:func:`report`, may append strings to ``job.errors``, writes downloadable
+output to the path returned by :func:`result_file` and returns the message
+shown when it finishes.
+
+Uploads and results are kept on disk under ``settings.BACKGROUND_JOBS_DIR``,
+so the worker has to run on the same host (or share that directory) with
+the web processes.  Progress goes to a small JSON file in the job's
+directory rather than to the job row: restores run inside one transaction,
+and a row update made there would stay invisible to the status endpoint
+until the task had finished.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from main.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+TASKS: dict[str, tuple[Callable, str]] = {}
+
+_PROGRESS_FILE = 'progress.json'
+
+
+def task(kind: str, label: str):
+    """Register ``func(job) -> message`` as the runner for ``kind`` jobs."""
+
+    def decorator(func):
+        TASKS[kind] = (func, label)
+        return func
+
+    return decorator
+
+
+def jobs_root() -> Path:
+    return Path(getattr(settings, 'BACKGROUND_JOBS_DIR', Path(settings.BASE_DIR) / 'backups' / 'jobs'))
+
+
+def job_dir(job: BackgroundJob) -> Path:
+    path = jobs_root() / str(job.pk)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def enqueue(kind: str, *, user=None, payload: Optional[dict] = None, upload=None,
+            input_path: Optional[str] = None, next_url: str = '') -> BackgroundJob:
+    """Queue a ``kind`` job and return it.
+
+    ``upload`` (an ``UploadedFile``) is copied into the job's directory in
+    chunks; ``input_path`` names a file already on disk, which is moved there.
+    """
+    if kind not in TASKS:
+        raise KeyError(f"No background task registered for {kind!r}")
+
+    job = BackgroundJob.objects.create(
+        kind=kind,
+        label=TASKS[kind][1],
+        payload=payload or {},
+        next_url=next_url,
+        created_by=user if user is not None and user.is_authenticated else None,
+        status='queued' if upload is None and input_path is None else 'running',
+    )
+    # Held as 'running' until the input file is in place so a worker
+    # polling in the meantime cannot pick up a job without its file.
+    if upload is not None or input_path is not None:
+        try:
+            if upload is not None:
+                target = job_dir(job) / f"input{Path(upload.name).suffix}"
+                with open(target, 'wb') as fh:
+                    for chunk in upload.chunks():
+                        fh.write(chunk)
+            else:
+                target = job_dir(job) / f"input{Path(input_path).suffix}"
+                shutil.move(input_path, target)
+        except Exception as exc:
+            # fail_stale() only reclaims started jobs, so fail this one here.
+            job.status = 'failed'
+            job.message = f"Could not store the input file: {exc}"
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'message', 'finished_at'])
+            shutil.rmtree(jobs_root() / str(job.pk), ignore_errors=True)
+            raise
+        job.input_path = str(target)
+        job.status = 'queued'
+        job.save(update_fields=['input_path', 'status'])
+
+    if getattr(settings, 'BACKGROUND_JOBS_EAGER', False):
+        claimed = claim(job.pk)
+        if claimed is not None:
+            run_job(claimed)
+            job.refresh_from_db()
+    return job
+
+
+def report(job: BackgroundJob, done: Optional[int] = None, total: Optional[int] = None,
+           message: Optional[str] = None) -> None:
+    """Record progress for ``job`` where the status endpoint can see it."""
+    if done is not None:
+        job.progress_done = done
+    if total is not None:
+        job.progress_total = total
+    if message is not None:
+        job.message = message
+
+    path = job_dir(job) / _PROGRESS_FILE
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump({'done': job.progress_done, 'total': job.progress_total, 'message': job.message}, fh)
+    os.replace(tmp, path)
+
+
+def read_progress(job: BackgroundJob) -> dict:
+    """Progress of a running job, falling back to the values on the row."""
+    progress = {'done': job.progress_done, 'total': job.progress_total, 'message': job.message}
+    if job.status == 'running':
+        try:
+            with open(jobs_root() / str(job.pk) / _PROGRESS_FILE, encoding='utf-8') as fh:
+                progress.update(json.load(fh))
+        except (OSError, ValueError):
+            pass
+    return progress
+
+
+def result_file(job: BackgroundJob, filename: str) -> Path:
+    """Path the task should write its downloadable output to."""
+    path = job_dir(job) / f"result{Path(filename).suffix}"
+    job.result_path = str(path)
+    job.result_name = filename
+    return path
+
+
+def claim(pk: int) -> Optional[BackgroundJob]:
+    """Mark queued job ``pk`` as running; ``None`` if another worker got it."""
+    claimed = BackgroundJob.objects.filter(pk=pk, status='queued').update(
+        status='running', started_at=timezone.now()
+    )
+    return BackgroundJob.objects.get(pk=pk) if claimed else None
+
+
+def claim_next() -> Optional[BackgroundJob]:
+    """Claim the oldest queued job.
+
+    The conditional ``UPDATE`` in :func:`claim` is the lock, so several
+    workers can poll the same table on PostgreSQL and SQLite alike.
+    """
+    while True:
+        pk = (
+            BackgroundJob.objects.filter(status='queued')
+            .order_by('created_at', 'pk')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if pk is None:
+            return None
+        job = claim(pk)
+        if job is not None:
+            return job
+
+
+def run_job(job: BackgroundJob) -> BackgroundJob:
+    """Run a claimed job and store its outcome."""
+    func = TASKS.get(job.kind, (None, ''))[0]
+    try:
+        if func is None:
+            raise KeyError(f"No background task registered for {job.kind!r}")
+        message = func(job)
+    except Exception as exc:
+        logger.exception("Background job %s (%s) failed", job.pk, job.kind)
+        job.status = 'failed'
+        job.message = str(exc) or exc.__class__.__name__
+        job.result_path = job.result_name = ''
+    else:
+        job.status = 'succeeded'
+        if message:
+            job.message = message
+        if job.progress_total:
+            job.progress_done = job.progress_total
+    job.finished_at = timezone.now()
+    job.save()
+
+    workdir = jobs_root() / str(job.pk)
+    for name in (_PROGRESS_FILE, os.path.basename(job.input_path)):
+        if name and (workdir / name).exists():
+            (workdir / name).unlink()
+    return job
+
+
+def run_pending(limit: Optional[int] = None) -> int:
+    """Run queued jobs until none are left (or ``limit`` have run)."""
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def fail_stale(older_than: timedelta) -> int:
+    """Fail jobs left 'running' by a worker that died mid-task.
+
+    They are not retried: restores and deletions are not safe to repeat
+    blindly.
+    """
+    return BackgroundJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - older_than
+    ).update(
+        status='failed',
+        message='The worker stopped before this job finished.',
+        finished_at=timezone.now(),
+    )
+
+
+def purge(older_than: timedelta) -> int:
+    """Delete finished jobs older than ``older_than`` along with their files."""
+    old = BackgroundJob.objects.filter(
+        status__in=('succeeded', 'failed'), finished_at__lt=timezone.now() - older_than
+    )
+    pks = list(old.values_list('pk', flat=True))
+    for pk in pks:
+        shutil.rmtree(jobs_root() / str(pk), ignore_errors=True)
+    old.delete()
+    return len(pks)
@@ -0,0 +1,176 @@
+"""Per-request SQL accounting.
+
+:class:`QueryRecorder` is a database ``execute_wrapper`` that counts the
+statements run on a connection, their total time and how often each SQL
+signature repeats (the statement with its literal values masked, so an N+1
+loop shows up as one signature run N times).  It backs both the opt-in
+``main.middleware.QueryBudgetMiddleware``, which stores one
+``RequestQueryMetric`` row per sampled request for the performance report,
+and :func:`query_budget`, the test helper that fails when a block runs
+more queries than the view's declared budget.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Declared query budgets per URL name; ``settings.QUERY_BUDGETS`` adds to
+# or overrides these.  A view whose query count depends on the number of
+# rows it lists has no business being here until that is fixed.
+VIEW_BUDGETS = {
+    'sales:sales_list': 22,
+    'main:dashboard': 30,
+}
+
+SIGNATURE_LENGTH = 500
+TOP_DUPLICATES = 10
+RETENTION_DAYS = 30
+# Prune old rows once every this many recorded requests.
+PRUNE_EVERY = 200
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+
+def signature(sql: str) -> str:
+    """``sql`` with whitespace collapsed, literals masked and ``IN`` lists folded."""
+    masked = _LITERALS.sub('?', ' '.join(str(sql).split()))
+    return _PLACEHOLDER_LISTS.sub('(...)', masked)[:SIGNATURE_LENGTH]
+
+
+class QueryRecorder:
+    """``execute_wrapper`` counting queries, their time and repeated signatures."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.signatures[signature(sql)] += 1
+
+    @property
+    def duplicate_count(self) -> int:
+        """Queries that repeated a signature already run in this block."""
+        return sum(times - 1 for times in self.signatures.values() if times > 1)
+
+    def duplicates(self, limit: int = TOP_DUPLICATES) -> list:
+        return [[sql, times] for sql, times in self.signatures.most_common(limit) if times > 1]
+
+
+def budget_for(view_name: str) -> int | None:
+    budgets = {**VIEW_BUDGETS, **getattr(settings, 'QUERY_BUDGETS', {})}
+    return budgets.get(view_name)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(budget, using: str = DEFAULT_DB_ALIAS):
+    """Fail when the block runs more queries than ``budget`` allows.
+
+    ``budget`` is a number or a URL name from :data:`VIEW_BUDGETS`::
+
+        with query_budget('sales:sales_list'):
+            self.client.get(reverse('sales:sales_list'))
+    """
+    limit = budget_for(budget) if isinstance(budget, str) else budget
+    if limit is None:
+        raise ValueError(f'No query budget declared for {budget!r}')
+
+    recorder = QueryRecorder()
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
+    if recorder.count > limit:
+        repeated = '\n'.join(f'  {times}x {sql}' for sql, times in recorder.duplicates())
+        raise QueryBudgetExceeded(
+            f'{recorder.count} queries run, budget for {budget!r} is {limit}'
+            + (f'\nRepeated statements:\n{repeated}' if repeated else '')
+        )
+
+
+def record(request, response, recorder: QueryRecorder, total_seconds: float, render_seconds: float | None = None):
+    """Store the figures for one request; failures are logged, never raised."""
+    from goldsilverpurchase.models import RequestQueryMetric
+
+    match = getattr(request, 'resolver_match', None)
+    view_name = (match.view_name if match else '')[:150]
+    try:
+        metric = RequestQueryMetric.objects.create(
+            path=request.path[:255],
+            view_name=view_name,
+            method=request.method[:10],
+            status_code=response.status_code,
+            query_count=recorder.count,
+            duplicate_count=recorder.duplicate_count,
+            db_time_ms=round(recorder.duration * 1000, 2),
+            render_time_ms=round(render_seconds * 1000, 2) if render_seconds is not None else None,
+            total_time_ms=round(total_seconds * 1000, 2),
+            query_budget=budget_for(view_name),
+            duplicates=recorder.duplicates(),
+        )
+        if metric.pk % PRUNE_EVERY == 0:
+            prune()
+    except DatabaseError:
+        logger.exception('Could not record query metrics for %s', request.path)
+
+
+def prune(days: int | None = None) -> int:
+    """Delete metrics older than the retention window; returns the row count."""
+    from goldsilverpurchase.models import RequestQueryMetric
+
+    days = days or getattr(settings, 'QUERY_METRICS_RETENTION_DAYS', RETENTION_DAYS)
+    deleted, _ = RequestQueryMetric.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
+
+
+def view_summary(metrics, limit: int = 50):
+    """Per-view averages and maxima for a ``RequestQueryMetric`` queryset."""
+    rows = (
+        metrics.order_by()
+        .values('view_name')
+        .annotate(
+            requests=Count('id'),
+            avg_queries=Avg('query_count'),
+            max_queries=Max('query_count'),
+            avg_duplicates=Avg('duplicate_count'),
+            avg_db_ms=Avg('db_time_ms'),
+            avg_render_ms=Avg('render_time_ms'),
+            avg_total_ms=Avg('total_time_ms'),
+        )
+        .order_by('-avg_queries')[:limit]
+    )
+    summary = []
+    for row in rows:
+        row['budget'] = budget_for(row['view_name'])
+        row['over_budget'] = row['budget'] is not None and row['max_queries'] > row['budget']
+        summary.append(row)
+    return summary
+
+
+def repeated_statements(metrics, sample: int = 500, limit: int = TOP_DUPLICATES):
+    """The signatures repeated most often across the latest ``sample`` requests."""
+    totals = Counter()
+    for duplicates in metrics.order_by('-created_at').values_list('duplicates', flat=True)[:sample]:
+        for sql, times in duplicates or ():
+            totals[sql] += times
+    return totals.most_common(limit)
@@ -0,0 +1,135 @@
+"""Gold and silver rate history.
+
+``DailyRate.bs_date`` is free text ('11 Poush 2082', '2082-09-11', or an
+AD ISO date when the fetch fell back), so every rate also stores the AD
+``rate_date`` it applies to, parsed once on save and indexed.  A BS date
+maps to exactly one AD date, so that one index answers both BS and AD
+lookups:
+
+* :func:`latest` - the current rate, cached under the ``daily_rate``
+  version namespace that ``main.signals`` bumps on every rate change;
+* :func:`rate_on` - the rate in force on a day (one indexed query);
+* :func:`rates_between` - the rate in force on every day of a window,
+  forward-filled from two queries.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, timedelta
+
+from django.db.models import F
+
+from common.nepali_utils import bs_to_ad_date, ndt, normalize_nepali_numerals
+
+from . import cache_versions
+
+BS_MONTHS = {
+    'baisakh': 1, 'baishakh': 1,
+    'jestha': 2, 'jeth': 2,
+    'ashadh': 3, 'asar': 3,
+    'shrawan': 4, 'sawan': 4,
+    'bhadra': 5, 'bhadau': 5,
+    'ashwin': 6, 'asoj': 6,
+    'kartik': 7, 'kartick': 7,
+    'mangsir': 8, 'mangshir': 8,
+    'poush': 9, 'paush': 9,
+    'magh': 10,
+    'falgun': 11, 'phalgun': 11,
+    'chaitra': 12, 'chait': 12,
+    'बैशाख': 1, 'वैशाख': 1, 'जेठ': 2, 'असार': 3, 'साउन': 4, 'श्रावण': 4,
+    'भदौ': 5, 'असोज': 6, 'कात्तिक': 7, 'कार्तिक': 7, 'मंसिर': 8, 'पुष': 9,
+    'पौष': 9, 'माघ': 10, 'फागुन': 11, 'चैत': 12, 'चैत्र': 12,
+}
+# BS years run about 57 years ahead of AD; anything past this is BS.
+FIRST_BS_YEAR = 2050
+
+_NAMED = re.compile(r'^(\d{1,2})\s+(\S+)\s+(\d{4})$')
+_ISO = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$')
+
+
+def parse_rate_date(text) -> date | None:
+    """AD date for a ``bs_date`` value, or ``None`` when it cannot be read."""
+    cleaned = ' '.join(normalize_nepali_numerals(str(text or '')).split())
+    named = _NAMED.match(cleaned)
+    if named:
+        day, month, year = named.groups()
+        month = BS_MONTHS.get(month.lower())
+        return bs_to_ad_date(f'{year}-{month}-{day}') if month else None
+    iso = _ISO.match(cleaned)
+    if iso:
+        year, month, day = (int(part) for part in iso.groups())
+        if year >= FIRST_BS_YEAR:
+            return bs_to_ad_date(cleaned)
+        try:
+            return date(year, month, day)
+        except ValueError:
+            return None
+    return None
+
+
+def _as_ad(day) -> date:
+    if ndt is not None and isinstance(day, ndt.date):
+        return day.to_datetime_date()
+    return day
+
+
+def ordered():
+    """All rates, newest rate date first (undated rows last)."""
+    from main.models import DailyRate
+
+    return DailyRate.objects.order_by(F('rate_date').desc(nulls_last=True), '-created_at')
+
+
+def latest(request=None):
+    """The current ``DailyRate`` (or ``None``), cached until a rate changes."""
+    return cache_versions.get_or_build(
+        cache_versions.DAILY_RATE, 'latest', lambda: ordered().first(), request=request,
+    )
+
+
+def rate_on(day):
+    """The rate in force on ``day`` (an AD or BS date)."""
+    return ordered().filter(rate_date__lte=_as_ad(day)).first()
+
+
+def rates_between(start, end):
+    """``(gold, silver)`` per-tola rate lists, one entry per day of ``[start, end]``.
+
+    Each day carries the latest rate dated on or before it; days before
+    the first known rate are ``None``.
+    """
+    start, end = _as_ad(start), _as_ad(end)
+    days = (end - start).days + 1
+    if days <= 0:
+        return [], []
+
+    opening = rate_on(start - timedelta(days=1))
+    current = (opening.gold_rate, opening.silver_rate) if opening else None
+    known = {}
+    rows = (
+        ordered().filter(rate_date__gte=start, rate_date__lte=end)
+        .reverse()
+        .values_list('rate_date', 'gold_rate', 'silver_rate')
+    )
+    for rate_date, gold_rate, silver_rate in rows:
+        known[rate_date] = (gold_rate, silver_rate)
+
+    gold, silver = [None] * days, [None] * days
+    for index in range(days):
+        current = known.get(start + timedelta(days=index), current)
+        if current is not None:
+            gold[index], silver[index] = float(current[0] or 0), float(current[1] or 0)
+    return gold, silver
+
+
+def backfill():
+    """Set ``rate_date`` on rates loaded without one (raw fixture loads)."""
+    from main.models import DailyRate
+
+    rates = list(DailyRate.objects.filter(rate_date__isnull=True).only('pk', 'bs_date', 'created_at'))
+    for rate in rates:
+        rate.rate_date = parse_rate_date(rate.bs_date) or rate.created_at.date()
+    DailyRate.objects.bulk_update(rates, ['rate_date'], batch_size=500)
+    if rates:
+        cache_versions.bump(cache_versions.DAILY_RATE)
+    return len(rates)
@@ -0,0 +1,289 @@
+"""Figures for the fiscal-year stock report (``main:stock_report``).
+
+Each source table is read with one grouped query, with conditional sums
+where the report needs a subset:
+
+* ``GoldSilverPurchase`` per ``metal_type``: amount, wages, quantity and the
+  Jardi amount (``particular`` mentions jardi/jarti).
+* ``CustomerPurchase`` per ``metal_type``: amounts and weights.
+* ``Order``: the customer total.
+* Sold ``OrderOrnament`` lines per ornament ``(metal_type, type)``: amounts,
+  weights, jarti, jyala and the diamond value (weight × rate per line).
+  Purity factors are applied to the grouped sums afterwards.
+* ``SalesMetalStock`` per ``metal_type``: raw metal sold.
+* ``Stock``: the opening stock.
+
+Purchase metal types are canonical (see ``goldsilverpurchase.metals``), so
+every query filters on exact values and can use the metal-type indexes.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
+
+from goldsilverpurchase.models import CustomerPurchase, GoldSilverPurchase
+from main.models import Stock
+from order.models import Order, OrderOrnament
+from sales.models import SalesMetalStock
+
+ZERO = Decimal('0')
+
+# Fiscal year whose opening stock the report starts from.
+OPENING_STOCK_YEAR = 2082
+
+# Purity factors for converting sold ornament weights to fine metal.
+PURITY_FACTORS = {
+    '24KARAT': Decimal('1.00'),
+    '23KARAT': Decimal('0.99'),
+    '22KARAT': Decimal('0.98'),
+    '18KARAT': Decimal('0.75'),
+    '14KARAT': Decimal('0.58'),
+}
+
+JARDI_PURCHASE = Q(particular__icontains='jardi') | Q(particular__icontains='jarti')
+
+
+def _date_range(field, from_date, to_date):
+    condition = Q()
+    if from_date:
+        condition &= Q(**{f'{field}__gte': from_date})
+    if to_date:
+        condition &= Q(**{f'{field}__lte': to_date})
+    return condition
+
+
+def _zeros():
+    return defaultdict(lambda: ZERO)
+
+
+def _grouped(queryset, key, **sums):
+    """``{key value: {name: sum}}`` from one grouped query.
+
+    Missing groups and ``None`` sums read as zero.
+    """
+    # Prefixed so a sum may share its name with a model field.
+    annotations = {f'sum_{name}': total for name, total in sums.items()}
+    grouped = defaultdict(_zeros)
+    for row in queryset.order_by().values(key).annotate(**annotations):
+        grouped[row[key]].update({name: row[f'sum_{name}'] or ZERO for name in sums})
+    return grouped
+
+
+def _purchases(from_date, to_date):
+    company = _grouped(
+        GoldSilverPurchase.objects.filter(_date_range('bill_date', from_date, to_date)),
+        'metal_type',
+        amount=Sum('amount'),
+        wages=Sum('wages'),
+        quantity=Sum('quantity'),
+        jardi=Sum('amount', filter=JARDI_PURCHASE),
+    )
+    customer = _grouped(
+        CustomerPurchase.objects.filter(_date_range('purchase_date', from_date, to_date)),
+        'metal_type',
+        total_amount=Sum('total_amount'),
+        final_weight=Sum('final_weight'),
+        diamond_amount=Sum('diamond_amount'),
+        diamond_weight=Sum('diamond_weight'),
+    )
+    return company, customer
+
+
+def _sold_lines(from_date, to_date):
+    """Sold ornament lines summed per ``(metal_type, type)``."""
+    lines = OrderOrnament.objects.filter(
+        Q(order__sale__isnull=False) & _date_range('order__sale__sale_date', from_date, to_date)
+    )
+    rows = lines.order_by().values('ornament__metal_type', 'ornament__type').annotate(
+        amount=Sum('line_amount'),
+        weight=Sum('ornament__weight'),
+        diamond_weight=Sum('ornament__diamond_weight'),
+        jarti=Sum('jarti'),
+        jyala=Sum('jyala'),
+        diamond_value=Sum(ExpressionWrapper(
+            F('ornament__diamond_weight') * F('diamond_rate'),
+            output_field=DecimalField(max_digits=25, decimal_places=5),
+        )),
+    )
+    return [
+        {
+            'metal_type': row['ornament__metal_type'],
+            'factor': PURITY_FACTORS.get(row['ornament__type'], Decimal('1.00')),
+            **{name: row[name] or ZERO for name in ('amount', 'weight', 'diamond_weight', 'jarti', 'jyala', 'diamond_value')},
+        }
+        for row in rows
+    ]
+
+
+def _opening_stock():
+    return (
+        Stock.objects.filter(year=OPENING_STOCK_YEAR).first()
+        or Stock.objects.order_by('-year').first()
+    )
+
+
+def build(from_date=None, to_date=None):
+    """Totals and table rows for the stock report between two BS dates."""
+    company, customer = _purchases(from_date, to_date)
+    gold, silver, diamond = company['gold'], company['silver'], company['diamond']
+
+    totals = {
+        # Customer purchases of diamond jewellery add their final weight to gold.
+        'gold_purchase_amount': gold['amount'] - gold['wages'] + customer['gold']['total_amount'],
+        'gold_purchase_weight': (
+            gold['quantity'] + customer['gold']['final_weight'] + customer['diamond']['final_weight']
+        ),
+        'silver_purchase_amount': silver['amount'] - silver['wages'] + customer['silver']['total_amount'],
+        'silver_purchase_weight': silver['quantity'] + customer['silver']['final_weight'],
+        'diamond_purchase_amount': diamond['amount'] + customer['diamond']['diamond_amount'],
+        'diamond_purchase_weight': diamond['quantity'] + customer['diamond']['diamond_weight'],
+        'customer_amount': Order.objects.filter(
+            _date_range('order_date', from_date, to_date)
+        ).aggregate(total=Sum('total'))['total'] or 0,
+    }
+    purchase_jardi_amount = gold['jardi'] + silver['jardi']
+    total_wages = gold['wages'] + silver['wages']
+
+    sold = {metal: _zeros() for metal in ('Gold', 'Silver', 'Diamond')}
+    gold_equivalent = silver_equivalent = ZERO
+    for line in _sold_lines(from_date, to_date):
+        metal = line['metal_type']
+        if metal not in sold:
+            continue
+        totals_for_metal = sold[metal]
+        for name in ('amount', 'weight', 'diamond_weight', 'diamond_value', 'jyala'):
+            totals_for_metal[name] += line[name]
+        totals_for_metal['jarti_equivalent'] += line['jarti'] * line['factor']
+        if metal == 'Silver':
+            silver_equivalent += line['weight'] * line['factor']
+        else:
+            gold_equivalent += line['weight'] * line['factor']
+
+    raw = _grouped(
+        SalesMetalStock.objects.filter(_date_range('sale__sale_date', from_date, to_date)),
+        'metal_type',
+        quantity=Sum('quantity'),
+        amount=Sum('line_amount'),
+    )
+
+    # Diamond sales are valued at the diamond rate of each line, not the line amount.
+    gold_sales_amount, gold_sales_weight = sold['Gold']['amount'], sold['Gold']['weight']
+    silver_sales_amount, silver_sales_weight = sold['Silver']['amount'], sold['Silver']['weight']
+    diamond_sales_amount = sold['Diamond']['diamond_value']
+    diamond_sales_weight = sold['Diamond']['diamond_weight']
+
+    sales_jardi_gold = sold['Gold']['jarti_equivalent']
+    sales_jardi_silver = sold['Silver']['jarti_equivalent']
+    sales_wages_gold = sold['Gold']['jyala']
+    sales_wages_silver = sold['Silver']['jyala']
+
+    totals['sales_amount'] = (
+        diamond_sales_amount + gold_sales_amount + silver_sales_amount
+        + raw['gold']['amount'] + raw['silver']['amount']
+    )
+    totals['sales_weight'] = (
+        diamond_sales_weight + gold_sales_weight + silver_sales_weight
+        + raw['gold']['quantity'] + raw['silver']['quantity']
+    )
+    totals['gold_stock_amount'] = totals['gold_purchase_amount'] - (gold_sales_amount + raw['gold']['amount'])
+    totals['gold_stock_weight'] = totals['gold_purchase_weight'] - (gold_sales_weight + raw['gold']['quantity'])
+    totals['silver_stock_amount'] = totals['silver_purchase_amount'] - (silver_sales_amount + raw['silver']['amount'])
+    totals['silver_stock_weight'] = totals['silver_purchase_weight'] - (silver_sales_weight + raw['silver']['quantity'])
+    totals['diamond_stock_amount'] = totals['diamond_purchase_amount'] - diamond_sales_amount
+    totals['diamond_stock_weight'] = totals['diamond_purchase_weight'] - diamond_sales_weight
+
+    purchase_rows = [
+        {'label': 'Diamond', 'qty': totals['diamond_purchase_weight'], 'amount': totals['diamond_purchase_amount']},
+        {'label': 'Gold', 'qty': totals['gold_purchase_weight'], 'amount': totals['gold_purchase_amount']},
+        {'label': 'Silver', 'qty': totals['silver_purchase_weight'], 'amount': totals['silver_purchase_amount']},
+        {'label': 'Jardi (Gold)', 'qty': 0, 'amount': gold['jardi']},
+        {'label': 'Wages (Gold)', 'qty': 0, 'amount': gold['wages']},
+        {'label': 'Jardi (Silver)', 'qty': 0, 'amount': silver['jardi']},
+        {'label': 'Wages (Silver)', 'qty': 0, 'amount': silver['wages']},
+    ]
+    sales_rows = [
+        {'label': 'Diamond', 'qty': diamond_sales_weight, 'amount': diamond_sales_amount},
+        {'label': 'Gold', 'qty': gold_equivalent + raw['gold']['quantity'], 'amount': gold_sales_amount + raw['gold']['amount']},
+        {'label': 'Silver', 'qty': silver_equivalent + raw['silver']['quantity'], 'amount': silver_sales_amount + raw['silver']['amount']},
+        {'label': 'Jardi (Gold)', 'qty': sales_jardi_gold, 'amount': sales_jardi_gold},
+        {'label': 'Wages (Gold)', 'qty': 0, 'amount': sales_wages_gold},
+        {'label': 'Jardi (Silver)', 'qty': sales_jardi_silver, 'amount': sales_jardi_silver},
+        {'label': 'Wages (Silver)', 'qty': 0, 'amount': sales_wages_silver},
+    ]
+
+    opening = _zeros()
+    opening_stock_rows = []
+    opening_stock_totals = {'qty': ZERO, 'amount': ZERO}
+    stock_data = _opening_stock()
+    if stock_data:
+        opening.update(
+            diamond=stock_data.diamond,
+            gold=stock_data.gold,
+            silver=stock_data.silver,
+            jardi=stock_data.jardi,
+            wages=stock_data.wages,
+            diamond_amount=stock_data.diamond * (stock_data.diamond_rate or ZERO),
+            gold_amount=stock_data.gold * (stock_data.gold_rate or ZERO),
+            silver_amount=stock_data.silver * (stock_data.silver_rate or ZERO),
+        )
+        opening_stock_rows = [
+            {'label': 'Diamond', 'qty': opening['diamond'], 'amount': opening['diamond_amount']},
+            {'label': 'Gold', 'qty': opening['gold'], 'amount': opening['gold_amount']},
+            {'label': 'Silver', 'qty': opening['silver'], 'amount': opening['silver_amount']},
+            {'label': 'Jardi', 'qty': ZERO, 'amount': opening['jardi']},
+            {'label': 'Wages', 'qty': ZERO, 'amount': opening['wages']},
+        ]
+        opening_stock_totals = {
+            'qty': opening['diamond'] + opening['gold'] + opening['silver'],
+            'amount': sum(row['amount'] for row in opening_stock_rows),
+        }
+
+    # Closing stock = opening + purchases - sales (ornament lines only).
+    stock_rows = [
+        {
+            'label': 'Diamond',
+            'qty': opening['diamond'] + totals['diamond_purchase_weight'] - diamond_sales_weight,
+            'amount': opening['diamond_amount'] + totals['diamond_purchase_amount'] - diamond_sales_amount,
+        },
+        {
+            'label': 'Gold',
+            'qty': opening['gold'] + totals['gold_purchase_weight'] - gold_sales_weight,
+            'amount': opening['gold_amount'] + totals['gold_purchase_amount'] - gold_sales_amount,
+        },
+        {
+            'label': 'Silver',
+            'qty': opening['silver'] + totals['silver_purchase_weight'] - silver_sales_weight,
+            'amount': opening['silver_amount'] + totals['silver_purchase_amount'] - silver_sales_amount,
+        },
+        {
+            'label': 'Jardi',
+            'qty': ZERO,
+            'amount': opening['jardi'] + purchase_jardi_amount - (sales_jardi_gold + sales_jardi_silver),
+        },
+        {
+            'label': 'Wages',
+            'qty': ZERO,
+            'amount': opening['wages'] + total_wages - (sales_wages_gold + sales_wages_silver),
+        },
+    ]
+
+    return {
+        'totals': totals,
+        'purchase_rows': purchase_rows,
+        'sales_rows': sales_rows,
+        'purchase_totals': _column_totals(purchase_rows),
+        'sales_totals': _column_totals(sales_rows),
+        'stock_rows': stock_rows,
+        'stock_totals': _column_totals(stock_rows),
+        'opening_stock_rows': opening_stock_rows,
+        'opening_stock_totals': opening_stock_totals,
+    }
+
+
+def _column_totals(rows):
+    return {
+        'qty': sum(row['qty'] for row in rows),
+        'amount': sum(row['amount'] for row in rows),
+    }
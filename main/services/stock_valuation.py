@@ -0,0 +1,203 @@
+"""Single-pass valuation of ornament stock.
+
+The dashboard, total assets page and ornament weight report all need the
+same grouped weights (per metal type and karat) and then price them against
+one or more rate sets.  ``OrnamentStockSnapshot`` reads those weights with a
+single grouped query (from the ``OrnamentStockSummary`` table, or straight
+from an Ornament queryset); valuing the snapshot against any number of rates
+does not touch the database again.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.db.models import Count, Sum
+
+ZERO = Decimal('0')
+
+# Conversion factor used by the daily P&L: 1 tola = 11.66 grams.
+TOLA_TO_GRAMS = Decimal('11.66')
+TOLA_CONVERSION = Decimal('11.664')
+
+# Purity factors used for the dashboard's daily P&L valuation.
+DAILY_PURITY_FACTORS = {
+    '24KARAT': Decimal('1.00'),
+    '23KARAT': Decimal('0.99'),
+    '22KARAT': Decimal('0.98'),
+    '18KARAT': Decimal('0.75'),
+    '14KARAT': Decimal('0.58'),
+}
+
+SNAPSHOT_FIELDS = (
+    'weight',
+    'gross_weight',
+    'diamond_weight',
+    'jarti',
+    'jyala',
+    'stone_totalprice',
+)
+
+
+class OrnamentStockSnapshot:
+    """Grouped ornament weights keyed by ``(metal_type, type)``."""
+
+    def __init__(self, rows: Iterable[dict]):
+        self.rows = [dict(row) for row in rows]
+
+    @classmethod
+    def from_queryset(cls, queryset) -> 'OrnamentStockSnapshot':
+        """Build a snapshot from an Ornament queryset with one grouped query."""
+        annotations = {field: Sum(field) for field in SNAPSHOT_FIELDS}
+        rows = (
+            queryset.order_by()
+            .values('metal_type', 'type')
+            .annotate(count=Count('id'), **annotations)
+        )
+        return cls(
+            {
+                'metal_type': row['metal_type'],
+                'type': row['type'],
+                'count': row['count'] or 0,
+                **{field: row[field] or ZERO for field in SNAPSHOT_FIELDS},
+            }
+            for row in rows
+        )
+
+    @classmethod
+    def from_summary(cls, summary_queryset) -> 'OrnamentStockSnapshot':
+        """Build a snapshot from ``OrnamentStockSummary`` buckets.
+
+        This reads a handful of pre-aggregated rows instead of the ornament
+        table, so the cost scales with the number of buckets.
+        """
+        annotations = {field: Sum(field) for field in SNAPSHOT_FIELDS}
+        rows = (
+            summary_queryset.order_by()
+            .values('metal_type', 'type')
+            .annotate(count=Sum('count'), **annotations)
+        )
+        return cls(
+            {
+                'metal_type': row['metal_type'],
+                'type': row['type'],
+                'count': row['count'] or 0,
+                **{field: row[field] or ZERO for field in SNAPSHOT_FIELDS},
+            }
+            for row in rows
+            if row['count']
+        )
+
+    def _rows_for(self, metal_type: Optional[str]):
+        if metal_type is None:
+            return self.rows
+        return [row for row in self.rows if row['metal_type'] == metal_type]
+
+    def metal_types(self):
+        """Distinct metal types present in the snapshot, sorted by name."""
+        return sorted({row['metal_type'] for row in self.rows})
+
+    def count(self, metal_type: Optional[str] = None) -> int:
+        return sum(row['count'] for row in self._rows_for(metal_type))
+
+    def total(self, field: str, metal_type: Optional[str] = None) -> Decimal:
+        return sum((row[field] for row in self._rows_for(metal_type)), ZERO)
+
+    def weight_by_type(self, metal_type: str) -> Dict[str, Decimal]:
+        """Return ``{karat_type: summed weight}`` for one metal type."""
+        result: Dict[str, Decimal] = {}
+        for row in self._rows_for(metal_type):
+            result[row['type']] = result.get(row['type'], ZERO) + row['weight']
+        return result
+
+    def equivalent_24k(self, metal_type: str, factors: Dict[str, Decimal], default=Decimal('1.00')) -> Decimal:
+        """24K-equivalent weight using ``factors`` (unknown karats use ``default``)."""
+        return sum(
+            (weight * factors.get(karat, default) for karat, weight in self.weight_by_type(metal_type).items()),
+            ZERO,
+        )
+
+
+def value_daily_totals(snapshot, target_date, gold_rate, silver_rate, stock_diamond_rate=None):
+    """Value a snapshot the same way the dashboard's daily P&L always has.
+
+    ``gold_rate`` and ``silver_rate`` are per tola.  ``stock_diamond_rate`` is
+    the closing-stock diamond rate applied to ``diamond_weight``; when it is
+    falsy the diamond stone component is zero.
+    """
+    gold_rate = gold_rate or ZERO
+    silver_rate = silver_rate or ZERO
+
+    result = {
+        'date': target_date,
+        'gold_amount': Decimal('0'),
+        'silver_amount': Decimal('0'),
+        'diamond_amount': Decimal('0'),
+        'gold_count': 0,
+        'silver_count': 0,
+        'diamond_count': 0,
+        'gold_weight': Decimal('0'),
+        'silver_weight': Decimal('0'),
+        'diamond_weight': Decimal('0'),
+        'total_amount': Decimal('0'),
+    }
+
+    gold_rate_per_gram = gold_rate / TOLA_TO_GRAMS if gold_rate > 0 else Decimal('0')
+    silver_rate_per_gram = silver_rate / TOLA_TO_GRAMS if silver_rate > 0 else Decimal('0')
+
+    # Gold: 24K equivalent plus jarti at the gold rate, jyala as an amount.
+    gold_count = snapshot.count('Gold')
+    if gold_count:
+        result['gold_count'] = gold_count
+        result['gold_weight'] = snapshot.total('weight', 'Gold')
+        if gold_rate_per_gram and gold_rate_per_gram > 0:
+            gold_24k_equivalent = snapshot.equivalent_24k('Gold', DAILY_PURITY_FACTORS)
+            gold_amount = gold_24k_equivalent * gold_rate_per_gram
+            jarti_amount = snapshot.total('jarti', 'Gold') * gold_rate_per_gram
+            result['gold_amount'] = gold_amount + jarti_amount + snapshot.total('jyala', 'Gold')
+
+    # Silver: 24K equivalent at the silver rate plus jyala.
+    silver_count = snapshot.count('Silver')
+    if silver_count:
+        result['silver_count'] = silver_count
+        result['silver_weight'] = snapshot.total('weight', 'Silver')
+        if silver_rate_per_gram and silver_rate_per_gram > 0:
+            silver_24k_equivalent = snapshot.equivalent_24k('Silver', DAILY_PURITY_FACTORS)
+            silver_amount = silver_24k_equivalent * silver_rate_per_gram
+            result['silver_amount'] = silver_amount + snapshot.total('jyala', 'Silver')
+
+    # Diamond: metal at the gold rate, diamond weight at the stock diamond
+    # rate, plus jyala and stone prices.
+    diamond_count = snapshot.count('Diamond')
+    if diamond_count:
+        result['diamond_count'] = diamond_count
+        result['diamond_weight'] = snapshot.total('weight', 'Diamond')
+
+        diamond_24k_equivalent = snapshot.equivalent_24k('Diamond', DAILY_PURITY_FACTORS)
+        diamond_metal_weight_in_tola = diamond_24k_equivalent / TOLA_CONVERSION
+        component1_amount = diamond_metal_weight_in_tola * gold_rate if gold_rate > 0 else Decimal('0')
+
+        if stock_diamond_rate:
+            component2_amount = snapshot.total('diamond_weight', 'Diamond') * stock_diamond_rate
+        else:
+            component2_amount = Decimal('0')
+
+        component3_amount = snapshot.total('jyala', 'Diamond')
+        component4_amount = snapshot.total('stone_totalprice', 'Diamond')
+
+        result['diamond_amount'] = component1_amount + component2_amount + component3_amount + component4_amount
+
+    result['total_amount'] = result['gold_amount'] + result['silver_amount'] + result['diamond_amount']
+    return result
+
+
+def stock_diamond_rate_for(target_date):
+    """Closing-stock diamond rate for ``target_date``'s year (latest year as fallback)."""
+    from main.models import Stock
+
+    stock_record = Stock.objects.filter(year=target_date.year).first()
+    if not stock_record:
+        stock_record = Stock.objects.order_by('-year').first()
+    if stock_record and stock_record.diamond_rate:
+        return stock_record.diamond_rate
+    return None
@@ -0,0 +1,235 @@
+"""Precomputed storefront selling prices.
+
+The shop pages show a selling price for every active stock ornament.  The
+price depends only on the ornament, the latest ``DailyRate`` and the
+``MetalCategoryPricingConfig``, so it is computed once and stored in
+``StorefrontPrice``; listing pages join it in and can filter, sort and
+paginate by price in SQL.
+
+Each row records the rate/config revision it was computed for in
+``version``.  ``main.signals`` keeps the table current: a rate or
+pricing-config change queues one ``main.storefront_prices`` background job
+when the transaction commits (:func:`schedule_refresh`), which recomputes
+the rows whose version is out of date (:func:`refresh_stale`), and an
+ornament save refreshes that one row (:func:`refresh`).  Queryset
+``.update()`` calls skip signals, so
+``ornament.stock_summary.update_ornaments`` refreshes the affected rows with
+:func:`refresh_many`.  :func:`rebuild` rewrites the whole table (deploys,
+restores).
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import F
+
+from .jobs import enqueue, task
+
+ZERO = Decimal('0.00')
+TOLA_CONVERSION = Decimal('11.664')
+
+# Defaults of the ornament price calculator for non-fixed-jyala items.
+DIAMOND_RATE = Decimal('60000')
+DEFAULT_JARTI_PERCENT = Decimal('12')
+DEFAULT_JYALA_PER_GRAM = Decimal('2500')
+
+# Ornament fields the price depends on; saves touching none of them skip the refresh.
+PRICE_FIELDS = (
+    'ornament_type', 'status', 'metal_type', 'type', 'weight', 'gross_weight',
+    'diamond_weight', 'stone_weight', 'stone_percaratprice', 'jarti',
+)
+
+BATCH_SIZE = 1000
+TASK_KIND = 'main.storefront_prices'
+
+
+def _decimal(value):
+    return Decimal(str(value or 0))
+
+
+def selling_amount(product, rate, config) -> Optional[Decimal]:
+    """Selling price of ``product`` at ``rate`` (same logic as the price calculator)."""
+    if not rate:
+        return None
+
+    net_metal_weight = product.net_metal_weight
+    net_weight_in_tola = net_metal_weight / TOLA_CONVERSION
+
+    # Special handling for Gold and Silver with fixed jyala (when enabled)
+    if product.metal_type == 'Gold' and config.gold_enabled:
+        return net_weight_in_tola * _decimal(rate.gold_rate) + config.gold_fixed_jyala
+
+    if product.metal_type == 'Silver' and config.silver_enabled:
+        return net_weight_in_tola * _decimal(rate.silver_rate) + config.silver_fixed_jyala
+
+    # Standard formula for other items
+    diamond_weight = _decimal(product.diamond_weight)
+    stone_weight = _decimal(product.stone_weight)
+
+    effective_metal_type = product.metal_type
+    if effective_metal_type in ['Diamond', 'Others']:
+        effective_metal_type = 'Gold'
+
+    metal_value = ZERO
+    adjusted_gold_rate = ZERO
+
+    if effective_metal_type == 'Gold':
+        adjusted_gold_rate = _decimal(rate.gold_rate) * product.get_purity_factor()
+        metal_value = net_weight_in_tola * adjusted_gold_rate
+    elif effective_metal_type == 'Silver':
+        metal_value = net_weight_in_tola * _decimal(rate.silver_rate)
+
+    diamond_value = diamond_weight * DIAMOND_RATE if diamond_weight > 0 else ZERO
+
+    if stone_weight > 0 and product.stone_percaratprice:
+        stone_value = stone_weight * _decimal(product.stone_percaratprice)
+    else:
+        stone_value = ZERO
+
+    jarti_value = _decimal(product.jarti)
+
+    gold_net_weight_tola = net_weight_in_tola if effective_metal_type == 'Gold' else ZERO
+    calculated_jarti_value = (gold_net_weight_tola * DEFAULT_JARTI_PERCENT) / Decimal('100') * adjusted_gold_rate
+    calculated_jyala_value = net_metal_weight * DEFAULT_JYALA_PER_GRAM
+
+    return (
+        metal_value + stone_value + jarti_value
+        + diamond_value
+        + calculated_jarti_value
+        + calculated_jyala_value
+    )
+
+
+def current_inputs():
+    """The ``(rate, config)`` pair prices are computed from right now."""
+    from main.models import MetalCategoryPricingConfig
+
+    from . import rates
+
+    return rates.latest(), MetalCategoryPricingConfig.get_config()
+
+
+def version_of(rate, config) -> str:
+    """Identify the rate/config revision a stored price was computed for."""
+    if rate is None:
+        return ''
+    return f"{rate.pk}@{rate.updated_at:%Y%m%d%H%M%S%f}/{config.updated_at:%Y%m%d%H%M%S%f}"
+
+
+def listed_ornaments():
+    """Ornaments that appear on the storefront."""
+    from ornament.models import Ornament
+
+    return Ornament.objects.filter(
+        ornament_type=Ornament.OrnamentCategory.STOCK,
+        status=Ornament.StatusCategory.ACTIVE,
+    )
+
+
+def _rows(ornaments, rate, config):
+    from main.models import StorefrontPrice
+
+    version = version_of(rate, config)
+    for ornament in ornaments:
+        amount = selling_amount(ornament, rate, config)
+        if amount is not None:
+            yield StorefrontPrice(
+                ornament_id=ornament.pk,
+                selling_amount=amount.quantize(Decimal('0.01')),
+                version=version,
+            )
+
+
+def rebuild() -> int:
+    """Recompute every storefront price; returns the number of rows written."""
+    from main.models import StorefrontPrice
+
+    rate, config = current_inputs()
+    ornaments = listed_ornaments().only('pk', *PRICE_FIELDS).order_by().iterator(chunk_size=BATCH_SIZE)
+
+    written = 0
+    with transaction.atomic():
+        StorefrontPrice.objects.all().delete()
+        batch = []
+        for row in _rows(ornaments, rate, config):
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                StorefrontPrice.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            StorefrontPrice.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def refresh_many(pks: Iterable[int]) -> None:
+    """Recompute the stored prices of the ornaments ``pks``."""
+    from main.models import StorefrontPrice
+
+    pks = list(pks)
+    if not pks:
+        return
+    rate, config = current_inputs()
+    ornaments = listed_ornaments().filter(pk__in=pks).only('pk', *PRICE_FIELDS)
+    with transaction.atomic():
+        StorefrontPrice.objects.filter(ornament_id__in=pks).delete()
+        StorefrontPrice.objects.bulk_create(_rows(ornaments, rate, config), batch_size=BATCH_SIZE)
+
+
+def stale_ornament_ids(rate, config) -> list:
+    """Ornaments whose stored price is missing or was computed for other inputs."""
+    from main.models import StorefrontPrice
+
+    stale = set(
+        StorefrontPrice.objects.exclude(version=version_of(rate, config))
+        .values_list('ornament_id', flat=True)
+    )
+    if rate is not None:
+        stale.update(
+            listed_ornaments().filter(storefront_price__isnull=True).values_list('pk', flat=True)
+        )
+    return sorted(stale)
+
+
+def refresh_stale() -> int:
+    """Recompute the out-of-date prices in batches; returns how many were checked."""
+    from . import cache_versions
+
+    stale = stale_ornament_ids(*current_inputs())
+    for start in range(0, len(stale), BATCH_SIZE):
+        refresh_many(stale[start:start + BATCH_SIZE])
+    if stale:
+        cache_versions.bump_on_commit(cache_versions.STOREFRONT)
+    return len(stale)
+
+
+@task(TASK_KIND, 'Storefront prices')
+def refresh_stale_job(job):
+    return f"Refreshed {refresh_stale()} storefront price(s)."
+
+
+def _enqueue_refresh():
+    from main.models import BackgroundJob
+
+    if not BackgroundJob.objects.filter(kind=TASK_KIND, status='queued').exists():
+        enqueue(TASK_KIND)
+
+
+def schedule_refresh() -> None:
+    """Queue :func:`refresh_stale` once the current transaction commits."""
+    transaction.on_commit(_enqueue_refresh)
+
+
+def refresh(ornament, update_fields=None) -> None:
+    """Recompute the stored price of one saved ornament."""
+    if update_fields is not None and not set(update_fields) & set(PRICE_FIELDS):
+        return
+    refresh_many([ornament.pk])
+
+
+def with_prices(queryset):
+    """Annotate an Ornament queryset with ``calculated_selling_amount`` from the index."""
+    return queryset.annotate(calculated_selling_amount=F('storefront_price__selling_amount'))
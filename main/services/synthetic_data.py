@@ -0,0 +1,366 @@
+"""Synthetic shop data for benchmarks and load tests.
+
+:func:`generate` fills the database with a reproducible (seeded) but
+realistic mix: daily rates for several years, stock ornaments across
+metals and karats, orders with their ornament lines and payments (most of
+them sold), supplier and customer purchases, and raw metal stock issued
+back out to kaligars.  Rows are written with ``bulk_create`` and the
+derived tables are rebuilt afterwards, exactly as a restore does, so a
+generated database looks to the reports like one built through the UI.
+
+Every generated code, barcode and bill number starts with
+:data:`CODE_PREFIX`, so runs can be repeated on top of each other.
+"""
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from common.bulk_import import BATCH_SIZE
+from common.nepali_utils import ad_to_bs_date_str, ndt
+
+from . import cache_versions
+
+CODE_PREFIX = 'SYN'
+TOLA = Decimal('11.664')
+
+# (metal, karats, weight range in grams, share of ornaments)
+METALS = (
+    ('Gold', ('24KARAT', '22KARAT', '22KARAT', '18KARAT', '14KARAT'), (2, 60), 70),
+    ('Silver', ('24KARAT',), (10, 400), 20),
+    ('Diamond', ('18KARAT', '14KARAT'), (2, 15), 8),
+    ('Others', ('24KARAT',), (1, 20), 2),
+)
+MAIN_CATEGORIES = ('Necklace', 'Ring', 'Earring', 'Bangle', 'Chain')
+SUB_CATEGORIES = ('Plain', 'Stone', 'Antique', 'Filigree', 'Kids')
+PAYMENT_MODES = ('cash', 'cash', 'fonepay', 'bank')
+PURITIES = ('24K', '24K', '22K', '18K')
+
+
+def _bs(day):
+    return ndt.date.from_datetime_date(day)
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def _weight(rng, low, high):
+    return Decimal(str(round(rng.uniform(low, high), 3)))
+
+
+class _Generator:
+
+    def __init__(self, seed, years):
+        self.rng = random.Random(seed)
+        self.today = timezone.localdate()
+        self.first_day = self.today - timedelta(days=int(years * 365))
+        self.counts = {}
+
+    def day(self, after=None):
+        start = after or self.first_day
+        span = max((self.today - start).days, 0)
+        return start + timedelta(days=self.rng.randint(0, span))
+
+    def gold_rate(self, day):
+        rate = self.rates.get(day)
+        return rate[0] if rate else Decimal('150000')
+
+    def silver_rate(self, day):
+        rate = self.rates.get(day)
+        return rate[1] if rate else Decimal('2000')
+
+    def next_number(self, model):
+        """First number to use in this run's ``<CODE_PREFIX>-<n>`` values for ``model``."""
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    # -- reference data -------------------------------------------------
+
+    def reference_data(self):
+        from goldsilverpurchase.models import MetalStockType, Party
+        from ornament.models import Kaligar, MainCategory, SubCategory
+
+        self.kaligars = list(Kaligar.objects.all()[:20]) or Kaligar.objects.bulk_create([
+            Kaligar(name=f'Kaligar {n}', panno=f'{600000000 + n}') for n in range(1, 21)
+        ])
+        self.main_categories = list(MainCategory.objects.all()) or MainCategory.objects.bulk_create([
+            MainCategory(name=name) for name in MAIN_CATEGORIES
+        ])
+        self.sub_categories = list(SubCategory.objects.all()) or SubCategory.objects.bulk_create([
+            SubCategory(name=name) for name in SUB_CATEGORIES
+        ])
+        self.parties = list(Party.objects.all()[:15]) or Party.objects.bulk_create([
+            Party(party_name=f'Supplier {n}', panno=f'{700000000 + n}') for n in range(1, 16)
+        ])
+        for name, _label in MetalStockType.StockTypeChoices.choices:
+            MetalStockType.objects.get_or_create(name=name)
+
+    def daily_rates(self):
+        from main.models import DailyRate
+
+        known = set(DailyRate.objects.filter(rate_date__gte=self.first_day).values_list('rate_date', flat=True))
+        gold, silver = 120000.0, 1500.0
+        self.rates = {}
+        rows = []
+        day = self.first_day
+        while day <= self.today:
+            gold = max(gold * (1 + self.rng.gauss(0.0004, 0.008)), 50000.0)
+            silver = max(silver * (1 + self.rng.gauss(0.0003, 0.012)), 500.0)
+            self.rates[day] = (_money(gold), _money(silver))
+            if day not in known:
+                rows.append(DailyRate(
+                    bs_date=ad_to_bs_date_str(day),
+                    rate_date=day,
+                    gold_rate=self.rates[day][0],
+                    silver_rate=self.rates[day][1],
+                    gold_rate_10g=_money(gold * 10 / float(TOLA)),
+                    silver_rate_10g=_money(silver * 10 / float(TOLA)),
+                ))
+            day += timedelta(days=1)
+        DailyRate.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        self.counts['daily_rates'] = len(rows)
+
+    # -- ornaments, orders and sales ------------------------------------
+
+    def ornament(self, number, day, ornament_type, order=None):
+        from ornament.models import Ornament
+
+        metal, karats, (low, high), _share = self.rng.choices(METALS, weights=[m[3] for m in METALS])[0]
+        weight = _weight(self.rng, low, high)
+        diamond_weight = _weight(self.rng, 0.1, 2) if metal == 'Diamond' else Decimal('0')
+        return Ornament(
+            ornament_date=_bs(day),
+            code=f'{CODE_PREFIX}-{number}',
+            barcode=f'{CODE_PREFIX}-{number:010d}',
+            metal_type=metal,
+            type=self.rng.choice(karats),
+            ornament_type=ornament_type,
+            maincategory=self.rng.choice(self.main_categories),
+            subcategory=self.rng.choice(self.sub_categories),
+            ornament_name=f'{self.rng.choice(MAIN_CATEGORIES)} {number}',
+            gross_weight=weight + diamond_weight,
+            weight=weight,
+            diamond_weight=diamond_weight,
+            jarti=_weight(self.rng, 0, 1),
+            jyala=_money(self.rng.uniform(500, 5000)),
+            kaligar=self.rng.choice(self.kaligars),
+            order=order,
+        )
+
+    def stock_ornaments(self, count):
+        from ornament.models import Ornament
+
+        first = self.next_number(Ornament)
+        ornaments = [
+            self.ornament(first + n, self.day(), Ornament.OrnamentCategory.STOCK)
+            for n in range(count)
+        ]
+        Ornament.objects.bulk_create(ornaments, batch_size=BATCH_SIZE)
+        self.counts['stock_ornaments'] = len(ornaments)
+
+    def orders(self, count, sold_share):
+        from order.models import Order, OrderOrnament, OrderPayment
+        from ornament.models import Ornament
+        from sales.models import Sale, SalesMetalStock
+
+        first_order = self.next_number(Order)
+        orders = []
+        for _ in range(count):
+            day = self.day()
+            orders.append(Order(
+                order_date=_bs(day),
+                deliver_date=_bs(min(day + timedelta(days=self.rng.randint(3, 30)), self.today)),
+                customer_name=f'Customer {self.rng.randint(1, max(count // 3, 1))}',
+                phone_number=f'98{self.rng.randint(10000000, 99999999)}',
+                status=self.rng.choice(('order', 'processing', 'on_hold')),
+            ))
+            orders[-1]._day = day
+        Order.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+
+        next_code = self.next_number(Ornament)
+        ornaments, lines = [], []
+        sold = set()
+        for order in orders:
+            is_sold = self.rng.random() < sold_share
+            if is_sold:
+                sold.add(order.pk)
+            kind = Ornament.OrnamentCategory.SALES if is_sold else Ornament.OrnamentCategory.ORDER
+            for _ in range(self.rng.randint(1, 3)):
+                ornament = self.ornament(next_code, order._day, kind, order=order)
+                next_code += 1
+                ornaments.append(ornament)
+                lines.append((order, ornament))
+        Ornament.objects.bulk_create(ornaments, batch_size=BATCH_SIZE)
+
+        order_lines = []
+        totals = {}
+        for order, ornament in lines:
+            gold_rate = self.gold_rate(order._day)
+            rate = self.silver_rate(order._day) if ornament.metal_type == 'Silver' else gold_rate
+            amount = _money(ornament.weight / TOLA * rate + ornament.jyala)
+            totals[order.pk] = totals.get(order.pk, Decimal('0')) + amount
+            order_lines.append(OrderOrnament(
+                order=order, ornament=ornament, gold_rate=rate, jyala=ornament.jyala, line_amount=amount,
+            ))
+        OrderOrnament.objects.bulk_create(order_lines, batch_size=BATCH_SIZE)
+
+        payments, sales, sale_metals = [], [], []
+        for order in orders:
+            total = totals.get(order.pk, Decimal('0'))
+            paid = total if order.pk in sold else _money(total * Decimal(str(self.rng.uniform(0.2, 0.8))))
+            order.subtotal = order.amount = order.taxable_amount = order.total = total
+            order.remaining_amount = total - paid
+            advance = _money(paid * Decimal(str(self.rng.choice((0, 0.3, 0.5)))))
+            for amount in (advance, paid - advance):
+                if amount:
+                    payments.append(OrderPayment(order=order, payment_mode=self.rng.choice(PAYMENT_MODES), amount=amount))
+            if order.pk in sold:
+                order.status = 'delivered'
+                sale = Sale(
+                    order=order,
+                    sale_date=_bs(min(order._day + timedelta(days=self.rng.randint(0, 20)), self.today)),
+                    bill_no=f'{CODE_PREFIX}-{first_order + len(sales)}',
+                )
+                sales.append(sale)
+        Order.objects.bulk_update(
+            orders, ['status', 'subtotal', 'amount', 'taxable_amount', 'total', 'remaining_amount'],
+            batch_size=BATCH_SIZE,
+        )
+        OrderPayment.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+        Sale.objects.bulk_create(sales, batch_size=BATCH_SIZE)
+
+        for sale in sales:
+            if self.rng.random() < 0.2:
+                quantity = _weight(self.rng, 1, 20)
+                rate = _money(self.gold_rate(sale.order._day) / TOLA)
+                sale_metals.append(SalesMetalStock(
+                    sale=sale, metal_type='gold', purity='24K', quantity=quantity,
+                    rate_per_gram=rate, line_amount=_money(quantity * rate),
+                ))
+        SalesMetalStock.objects.bulk_create(sale_metals, batch_size=BATCH_SIZE)
+
+        self.counts.update(
+            orders=len(orders), order_ornaments=len(order_lines), order_payments=len(payments),
+            sales=len(sales), sales_metal_stock=len(sale_metals),
+        )
+
+    # -- purchases and metal stock --------------------------------------
+
+    def purchases(self, count):
+        from goldsilverpurchase.importing import create_purchases
+        from goldsilverpurchase.models import GoldSilverPurchase
+
+        first = self.next_number(GoldSilverPurchase)
+        purchases = []
+        for n in range(count):
+            day = self.day()
+            metal = self.rng.choice(('gold', 'gold', 'silver'))
+            purchases.append(GoldSilverPurchase(
+                bill_no=f'{CODE_PREFIX}-P{first + n}',
+                bill_date=_bs(day),
+                party=self.rng.choice(self.parties),
+                particular='Fine metal',
+                metal_type=metal,
+                purity=self.rng.choice(PURITIES) if metal == 'gold' else '24K',
+                quantity=_weight(self.rng, 10, 500) if metal == 'gold' else _weight(self.rng, 500, 5000),
+                rate=self.gold_rate(day) if metal == 'gold' else self.silver_rate(day),
+                rate_unit='tola',
+                payment_mode=self.rng.choice(('cash', 'bank', 'fonepay')),
+                is_paid=self.rng.random() < 0.8,
+            ))
+        create_purchases(purchases)
+        self.counts['purchases'] = len(purchases)
+
+    def customer_purchases(self, count):
+        from goldsilverpurchase.importing import create_customer_purchases
+        from goldsilverpurchase.models import CustomerPurchase
+
+        first = self.next_number(CustomerPurchase)
+        purchases = []
+        for n in range(count):
+            day = self.day()
+            metal = self.rng.choice(('gold', 'gold', 'silver'))
+            purchases.append(CustomerPurchase(
+                bill_no=f'{CODE_PREFIX}-C{first + n}',
+                purchase_date=_bs(day),
+                customer_name=f'Seller {self.rng.randint(1, max(count // 2, 1))}',
+                phone_no=f'98{self.rng.randint(10000000, 99999999)}',
+                metal_type=metal,
+                ornament_name=self.rng.choice(MAIN_CATEGORIES),
+                weight=_weight(self.rng, 2, 50),
+                percentage=Decimal(str(self.rng.choice((90, 92, 95, 98)))),
+                rate=self.gold_rate(day) if metal == 'gold' else self.silver_rate(day),
+                rate_unit='tola',
+            ))
+        create_customer_purchases(purchases)
+        self.counts['customer_purchases'] = len(purchases)
+
+    def stock_issues(self, share=0.3):
+        """Issue part of each raw stock back out to kaligars."""
+        from goldsilverpurchase import ledger
+        from goldsilverpurchase.models import MetalStock, MetalStockMovement, MetalStockType
+
+        movements = []
+        raw = MetalStock.objects.filter(stock_type__name=MetalStockType.StockTypeChoices.RAW, ledger_balance__gt=0)
+        for stock in raw:
+            remaining = stock.ledger_balance * Decimal(str(share))
+            while remaining > 1:
+                quantity = min(_weight(self.rng, 1, 50), remaining).quantize(Decimal('0.001'))
+                remaining -= quantity
+                movements.append(MetalStockMovement(
+                    metal_stock=stock,
+                    movement_type='out',
+                    quantity=quantity,
+                    kaligar=self.rng.choice(self.kaligars),
+                    reference_type='Synthetic',
+                    movement_date=_bs(self.day()),
+                ))
+        MetalStockMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+        ledger.rebuild({movement.metal_stock_id for movement in movements})
+        self.counts['metal_stock_movements_out'] = len(movements)
+
+
+def generate(ornaments=1000, orders=None, purchases=None, customer_purchases=None,
+             years=3, sold_share=0.6, seed=1, log=print):
+    """Generate a data set and return the number of rows written per kind.
+
+    ``orders``, ``purchases`` and ``customer_purchases`` default to a
+    fixed ratio of ``ornaments``.
+    """
+    from goldsilverpurchase import positions
+    from ornament import stock_summary
+    from sales import monthly_rollup
+
+    from . import storefront_prices
+
+    orders = ornaments // 2 if orders is None else orders
+    purchases = max(ornaments // 10, 1) if purchases is None else purchases
+    customer_purchases = ornaments // 5 if customer_purchases is None else customer_purchases
+
+    generator = _Generator(seed, years)
+    with transaction.atomic():
+        generator.reference_data()
+        log('Writing daily rates...')
+        generator.daily_rates()
+        log(f'Writing {ornaments} stock ornaments...')
+        generator.stock_ornaments(ornaments)
+        log(f'Writing {orders} orders with lines, payments and sales...')
+        generator.orders(orders, sold_share)
+        log(f'Writing {purchases} purchases and {customer_purchases} customer purchases...')
+        generator.purchases(purchases)
+        generator.customer_purchases(customer_purchases)
+        generator.stock_issues()
+
+        # Bulk inserts skip the signal handlers; rebuild the derived tables.
+        log('Rebuilding summaries...')
+        stock_summary.rebuild()
+        positions.rebuild()
+        storefront_prices.rebuild()
+        monthly_rollup.rebuild()
+    cache_versions.bump(cache_versions.DAILY_RATE)
+    return generator.counts
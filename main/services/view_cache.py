@@ -0,0 +1,127 @@
+"""Whole-page caching for read-heavy views, invalidated by data versions.
+
+``@cached_view(cache_versions.REPORTS)`` serves a GET from the cache when
+the same page was rendered since the namespace was last bumped.  The key
+covers the path and query string, the namespace versions and the viewer.
+``main.signals`` bumps :data:`~main.services.cache_versions.REPORTS` (on
+commit) whenever a model in :data:`REPORT_MODELS` changes.  It bumps
+:data:`~main.services.cache_versions.STOREFRONT` for
+:data:`STOREFRONT_MODELS`.  A sale therefore shows up on the next request,
+not when a timeout runs out.  ``settings.VIEW_CACHE_TIMEOUT`` only bounds
+pages that depend on the date, such as "today" in aging reports.
+
+The viewer is part of the key:
+
+* Signed-in staff pages carry a CSRF token (the logout form, filters), so
+  they are cached per user *and* CSRF cookie.  They are not cached while
+  the browser has no CSRF cookie yet.
+* Anonymous pages are shared, unless rendering them used a CSRF token or
+  set a cookie.  Such a response is never stored.
+
+Pages are not served from the cache while the request has flash messages
+waiting, so a "Sale saved" message is not swallowed by a cached page.
+"""
+from __future__ import annotations
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+
+from . import cache_versions
+
+# Rows the cached report pages are computed from (bumps REPORTS).
+REPORT_MODELS = (
+    'main.DailyRate',
+    'main.Stock',
+    'ornament.Ornament',
+    'ornament.MainCategory',
+    'ornament.SubCategory',
+    'ornament.Kaligar',
+    'ornament.Stone',
+    'ornament.Potey',
+    'order.Order',
+    'order.OrderOrnament',
+    'order.OrderPayment',
+    'order.DebtorPayment',
+    'order.OrderMetalStock',
+    'order.Sale',
+    'sales.SalesMetalStock',
+    'goldsilverpurchase.GoldSilverPurchase',
+    'goldsilverpurchase.CustomerPurchase',
+    'goldsilverpurchase.MetalStock',
+    'goldsilverpurchase.MetalStockMovement',
+)
+
+# Rows the customer storefront shows (bumps STOREFRONT).
+STOREFRONT_MODELS = (
+    'main.DailyRate',
+    'main.MetalCategoryPricingConfig',
+    'main.CustomerPageImage',
+    'ornament.Ornament',
+    'ornament.MainCategory',
+)
+
+_MISS = object()
+
+
+def _viewer(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anon'
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    if not csrf_cookie:
+        return None
+    return f'u{user.pk}:{csrf_cookie}'
+
+
+def page_key(request, namespaces, viewer):
+    """Cache key for the page ``request`` asks for, as seen by ``viewer``."""
+    digest = hashlib.md5(
+        f'{request.method}|{request.get_full_path()}|{viewer}'.encode(), usedforsecurity=False,
+    ).hexdigest()
+    return cache_versions.versioned_key(namespaces, f'page:{digest}')
+
+
+def _cacheable(request, response, viewer):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    if viewer == 'anon' and request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        return False
+    return True
+
+
+def cached_view(*namespaces, timeout=None):
+    """Cache a view's GET responses until one of ``namespaces`` is bumped.
+
+    Works on function views and, through ``method_decorator(...,
+    name='dispatch')``, on class-based ones.  Put it below
+    ``login_required`` so the login check still runs first.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            page_timeout = settings.VIEW_CACHE_TIMEOUT if timeout is None else timeout
+            viewer = _viewer(request)
+            if request.method not in ('GET', 'HEAD') or not page_timeout or viewer is None:
+                return view(request, *args, **kwargs)
+
+            key = page_key(request, namespaces, viewer)
+            if not len(messages.get_messages(request)):
+                response = cache.get(key, _MISS)
+                if response is not _MISS:
+                    return response
+
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+            if _cacheable(request, response, viewer):
+                cache.set(key, response, page_timeout)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ornament.models import MainCategory, Ornament
+
+from .models import CustomerPageImage, DailyRate, MetalCategoryPricingConfig
+from .services import cache_versions, storefront_prices, view_cache
+
+
+@receiver(post_save, sender=DailyRate)
+@receiver(post_delete, sender=DailyRate)
+def invalidate_daily_rate_cache(sender, **kwargs):
+    cache_versions.bump(cache_versions.DAILY_RATE)
+
+
+@receiver(post_save, sender=CustomerPageImage)
+@receiver(post_delete, sender=CustomerPageImage)
+def invalidate_page_image_cache(sender, **kwargs):
+    cache_versions.bump(cache_versions.PAGE_IMAGES)
+
+
+@receiver(post_save, sender=Ornament)
+@receiver(post_delete, sender=Ornament)
+@receiver(post_save, sender=MainCategory)
+@receiver(post_delete, sender=MainCategory)
+def invalidate_customer_nav_cache(sender, **kwargs):
+    cache_versions.bump(cache_versions.CUSTOMER_NAV)
+
+
+def invalidate_cached_reports(sender, **kwargs):
+    cache_versions.bump_on_commit(cache_versions.REPORTS)
+
+
+def invalidate_cached_storefront(sender, **kwargs):
+    cache_versions.bump_on_commit(cache_versions.STOREFRONT)
+
+
+for _label in view_cache.REPORT_MODELS:
+    post_save.connect(invalidate_cached_reports, sender=_label, dispatch_uid=f'reports-save-{_label}')
+    post_delete.connect(invalidate_cached_reports, sender=_label, dispatch_uid=f'reports-delete-{_label}')
+for _label in view_cache.STOREFRONT_MODELS:
+    post_save.connect(invalidate_cached_storefront, sender=_label, dispatch_uid=f'storefront-save-{_label}')
+    post_delete.connect(invalidate_cached_storefront, sender=_label, dispatch_uid=f'storefront-delete-{_label}')
+
+
+@receiver(post_save, sender=DailyRate)
+@receiver(post_delete, sender=DailyRate)
+@receiver(post_save, sender=MetalCategoryPricingConfig)
+@receiver(post_delete, sender=MetalCategoryPricingConfig)
+def schedule_storefront_price_refresh(sender, raw=False, created=False, **kwargs):
+    # get_config() creates the default config on first use, while prices are
+    # being computed from it, so nothing is stale yet.
+    if raw or (created and sender is MetalCategoryPricingConfig):
+        return
+    storefront_prices.schedule_refresh()
+
+
+@receiver(post_save, sender=Ornament)
+def refresh_storefront_price(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    storefront_prices.refresh(instance, update_fields)
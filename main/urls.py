@@ -2,6 +2,7 @@ from django.urls import path
 from . import views
 from . import views_accounts
 from . import views_assets
+from . import views_jobs
 from . import views_marketing
 from . import views_page_images
 
@@ -57,6 +58,12 @@ urlpatterns = [
     # Assets URLs
     path('total-assets/', views_assets.total_assets, name='total_assets'),
 
+    # Background jobs
+    path('jobs/', views_jobs.job_list, name='job_list'),
+    path('jobs/<int:pk>/', views_jobs.job_detail, name='job_detail'),
+    path('jobs/<int:pk>/status/', views_jobs.job_status, name='job_status'),
+    path('jobs/<int:pk>/download/', views_jobs.job_download, name='job_download'),
+
     # Marketing URLs
     path('marketing/', views_marketing.marketing_dashboard, name='marketing_dashboard'),
     path('api/marketing/meta-insights/', views_marketing.api_meta_insights, name='marketing_meta_insights'),
@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.db.models import Sum, Q, F, DecimalField
+from django.db.models.functions import TruncDate
 from decimal import Decimal
 from django.utils import timezone
 from datetime import datetime, timedelta, date
@@ -10,84 +11,36 @@ import io
 import nepali_datetime as ndt
 from django.contrib import messages
 
-from ornament.models import Ornament, Kaligar
+from ornament.models import Ornament, Kaligar, OrnamentStockSummary
 from goldsilverpurchase.models import GoldSilverPurchase, Party, CustomerPurchase
 from order.models import Order, OrderOrnament
-from sales.models import SalesMetalStock
 from main.models import Stock, DailyRate
 from main.forms import DailyRateForm
+from main.services import rates as rate_history
+from main.services import cache_versions, storefront_prices
+from main.services import stock_report as stock_report_figures
+from main.services.view_cache import cached_view
+from main.services.stock_valuation import (
+    OrnamentStockSnapshot,
+    stock_diamond_rate_for,
+    value_daily_totals,
+)
 
 # Create your views here.
 
 def calculate_product_selling_amount(product, latest_rate):
-    """Calculate product selling amount using the same logic as the price calculator."""
+    """Calculate product selling amount using the same logic as the price calculator.
+
+    Listing pages read the stored result from ``StorefrontPrice`` instead
+    (see ``main.services.storefront_prices``).
+    """
     if not latest_rate:
         return None
 
-    net_metal_weight = product.net_metal_weight
-    net_weight_in_tola = net_metal_weight / Decimal('11.664')
-
-    # Check if metal pricing is enabled
     from .models import MetalCategoryPricingConfig
-    pricing_config = MetalCategoryPricingConfig.get_config()
-    
-    # Special handling for Gold and Silver with fixed jyala (when enabled)
-    if product.metal_type == 'Gold' and pricing_config.gold_enabled:
-        gold_rate = Decimal(str(latest_rate.gold_rate or 0))
-        metal_value = net_weight_in_tola * gold_rate
-        return metal_value + pricing_config.gold_fixed_jyala
-    
-    if product.metal_type == 'Silver' and pricing_config.silver_enabled:
-        silver_rate = Decimal(str(latest_rate.silver_rate or 0))
-        metal_value = net_weight_in_tola * silver_rate
-        return metal_value + pricing_config.silver_fixed_jyala
-
-    # Standard formula for other items
-    diamond_weight = Decimal(str(product.diamond_weight or 0))
-    stone_weight = Decimal(str(product.stone_weight or 0))
-
-    effective_metal_type = product.metal_type
-    if effective_metal_type in ['Diamond', 'Others']:
-        effective_metal_type = 'Gold'
-
-    karat_factor = product.get_purity_factor()
-
-    metal_value = Decimal('0.00')
-    adjusted_gold_rate = Decimal('0.00')
-
-    if effective_metal_type == 'Gold':
-        adjusted_gold_rate = Decimal(str(latest_rate.gold_rate or 0)) * karat_factor
-        metal_value = net_weight_in_tola * adjusted_gold_rate
-    elif effective_metal_type == 'Silver':
-        metal_value = net_weight_in_tola * Decimal(str(latest_rate.silver_rate or 0))
+    return storefront_prices.selling_amount(product, latest_rate, MetalCategoryPricingConfig.get_config())
 
-    diamond_rate_used = Decimal('60000')
-    diamond_value = diamond_weight * diamond_rate_used if diamond_weight > 0 else Decimal('0.00')
-
-    if stone_weight > 0 and product.stone_percaratprice:
-        stone_value = stone_weight * Decimal(str(product.stone_percaratprice or 0))
-    else:
-        stone_value = Decimal('0.00')
-
-    jarti_value = Decimal(str(product.jarti or 0))
-
-    default_jarti_percent = Decimal('12')
-    gold_net_weight_tola = net_weight_in_tola if effective_metal_type == 'Gold' else Decimal('0.00')
-    calculated_jarti_weight_tola = (gold_net_weight_tola * default_jarti_percent) / Decimal('100')
-    calculated_jarti_value = calculated_jarti_weight_tola * adjusted_gold_rate
-
-    default_jyala_rate_per_gram = Decimal('2500')
-    calculated_jyala_value = net_metal_weight * default_jyala_rate_per_gram
-
-    base_price_without_dynamic = metal_value + stone_value + jarti_value
-    return (
-        base_price_without_dynamic
-        + diamond_value
-        + calculated_jarti_value
-        + calculated_jyala_value
-    )
-
-def calculate_daily_ornament_totals(target_date, gold_rate=None, silver_rate=None, diamond_rate=None, use_date_filter=False):
+def calculate_daily_ornament_totals(target_date, gold_rate=None, silver_rate=None, diamond_rate=None, use_date_filter=False, snapshot=None):
     """
     Calculate total ornament values for a given date.
     
@@ -98,188 +51,49 @@ def calculate_daily_ornament_totals(target_date, gold_rate=None, silver_rate=Non
         diamond_rate: Override diamond rate (optional, per gram)
         use_date_filter: If True, filter ornaments by created_at__date=target_date
                         If False, use all current stock ornaments
+        snapshot: Optional pre-built ``OrnamentStockSnapshot``; pass the same
+                  snapshot to value current stock against several rate sets
+                  without re-reading the ornament table.
     
     Note: Gold/Silver daily rates are in per-tola basis (1 tola = 11.66 grams)
     Returns dict with metal totals based on weight report logic.
     """
-    from datetime import datetime as dt
-    
-    # Conversion factor: 1 tola = 11.66 grams
-    TOLA_TO_GRAMS = Decimal('11.66')
-    
-    result = {
-        'date': target_date,
-        'gold_amount': Decimal('0'),
-        'silver_amount': Decimal('0'),
-        'diamond_amount': Decimal('0'),
-        'gold_count': 0,
-        'silver_count': 0,
-        'diamond_count': 0,
-        'gold_weight': Decimal('0'),
-        'silver_weight': Decimal('0'),
-        'diamond_weight': Decimal('0'),
-        'total_amount': Decimal('0'),
-    }
-    
     # Try to get rates for the target date
     if gold_rate is None or silver_rate is None or diamond_rate is None:
         try:
-            rate_obj = DailyRate.objects.order_by('-created_at').first()
+            rate_obj = rate_history.latest()
             if rate_obj:
                 if gold_rate is None:
                     gold_rate = rate_obj.gold_rate
                 if silver_rate is None:
                     silver_rate = rate_obj.silver_rate
                 if diamond_rate is None:
-                    diamond_rate = rate_obj.diamond_rate
-            else:
-                if gold_rate is None:
-                    gold_rate = Decimal('0')
-                if silver_rate is None:
-                    silver_rate = Decimal('0')
-                if diamond_rate is None:
-                    diamond_rate = Decimal('0')
-        except:
-            if gold_rate is None:
-                gold_rate = Decimal('0')
-            if silver_rate is None:
-                silver_rate = Decimal('0')
-            if diamond_rate is None:
-                diamond_rate = Decimal('0')
-    
-    # Convert tola rates to per-gram rates for gold and silver
-    gold_rate_per_gram = gold_rate / TOLA_TO_GRAMS if gold_rate > 0 else Decimal('0')
-    silver_rate_per_gram = silver_rate / TOLA_TO_GRAMS if silver_rate > 0 else Decimal('0')
-    
-    # Filter ornaments: all current stock or filtered by date
-    if use_date_filter:
-        ornaments_today = Ornament.objects.filter(
-            ornament_type=Ornament.OrnamentCategory.STOCK,
-            created_at__date=target_date
-        )
-    else:
-        # Use all current stock ornaments (regardless of created_at date)
-        ornaments_today = Ornament.objects.filter(
-            ornament_type=Ornament.OrnamentCategory.STOCK
-        )
-    
-    # Purity conversion factors for 24k equivalent
-    purity_factors = {
-        '24KARAT': Decimal('1.00'),
-        '23KARAT': Decimal('0.99'),
-        '22KARAT': Decimal('0.98'),
-        '18KARAT': Decimal('0.75'),
-        '14KARAT': Decimal('0.58'),
-    }
-    
-    # Process Gold ornaments
-    gold_ornaments = ornaments_today.filter(metal_type='Gold')
-    if gold_ornaments.exists():
-        result['gold_count'] = gold_ornaments.count()
-        
-        # Calculate 24k equivalent by iterating through ornaments
-        gold_24k_equivalent = Decimal('0')
-        total_gold_weight = Decimal('0')
-        for ornament in gold_ornaments:
-            weight = ornament.weight or Decimal('0')
-            total_gold_weight += weight
-            factor = purity_factors.get(ornament.type, Decimal('1.00'))
-            gold_24k_equivalent += weight * factor
-        
-        result['gold_weight'] = total_gold_weight
-        
-        # Calculate jarti and jyala amounts
-        total_jarti = gold_ornaments.aggregate(total=Sum('jarti'))['total'] or Decimal('0')
-        total_jyala = gold_ornaments.aggregate(total=Sum('jyala'))['total'] or Decimal('0')
-        
-        # Calculate amounts with per-gram rate
-        if gold_rate_per_gram and gold_rate_per_gram > 0:
-            gold_amount = gold_24k_equivalent * gold_rate_per_gram
-            jarti_amount = total_jarti * gold_rate_per_gram
-            result['gold_amount'] = gold_amount + jarti_amount + total_jyala
-    
-    # Process Silver ornaments
-    silver_ornaments = ornaments_today.filter(metal_type='Silver')
-    if silver_ornaments.exists():
-        result['silver_count'] = silver_ornaments.count()
-        
-        # Calculate 24k equivalent for silver
-        silver_24k_equivalent = Decimal('0')
-        total_silver_weight = Decimal('0')
-        for ornament in silver_ornaments:
-            weight = ornament.weight or Decimal('0')
-            total_silver_weight += weight
-            factor = purity_factors.get(ornament.type, Decimal('1.00'))
-            silver_24k_equivalent += weight * factor
-        
-        result['silver_weight'] = total_silver_weight
-        
-        # Calculate amounts with per-gram rate
-        if silver_rate_per_gram and silver_rate_per_gram > 0:
-            silver_amount = silver_24k_equivalent * silver_rate_per_gram
-            total_jyala = silver_ornaments.aggregate(total=Sum('jyala'))['total'] or Decimal('0')
-            result['silver_amount'] = silver_amount + total_jyala
-    
-    # Process Diamond ornaments
-    diamond_ornaments = ornaments_today.filter(metal_type='Diamond')
-    if diamond_ornaments.exists():
-        result['diamond_count'] = diamond_ornaments.count()
-        
-        # For diamond ornaments, calculate four components:
-        # 1. Metal weight (24K equivalent) valued at gold rate
-        # 2. Diamond weight valued at diamond rate
-        # 3. Jyala amounts
-        # 4. Stone price amounts
-        
-        # Component 1: Calculate 24K equivalent metal weight
-        diamond_24k_equivalent = Decimal('0')
-        diamond_metal_weight_for_display = Decimal('0')
-        
-        for ornament in diamond_ornaments:
-            weight = ornament.weight or Decimal('0')
-            factor = purity_factors.get(ornament.type, Decimal('1.00'))
-            diamond_24k_equivalent += weight * factor
-            diamond_metal_weight_for_display += weight
-        
-        result['diamond_weight'] = diamond_metal_weight_for_display
-        
-        # Component 1 value: Convert to tola and multiply by gold rate
-        TOLA_CONVERSION = Decimal('11.664')
-        diamond_metal_weight_in_tola = diamond_24k_equivalent / TOLA_CONVERSION
-        component1_amount = diamond_metal_weight_in_tola * gold_rate if gold_rate > 0 else Decimal('0')
-        
-        # Component 2: Sum all diamond_weight and multiply by stock diamond_rate
-        total_actual_diamond_weight = diamond_ornaments.aggregate(total=Sum('diamond_weight'))['total'] or Decimal('0')
-        
-        # Get stock data for diamond_rate
-        # First try current year, then fall back to most recent stock record
-        stock_record = Stock.objects.filter(year=target_date.year).first()
-        if not stock_record:
-            # If no record for current year, get the most recent one
-            stock_record = Stock.objects.order_by('-year').first()
-        
-        if stock_record and stock_record.diamond_rate:
-            diamond_rate_to_use = stock_record.diamond_rate
-            # diamond_weight is in carat, diamond_rate is per carat (no conversion needed)
-            component2_amount = total_actual_diamond_weight * diamond_rate_to_use
+                    diamond_rate = getattr(rate_obj, 'diamond_rate', None)
+        except Exception:
+            pass
+        gold_rate = Decimal('0') if gold_rate is None else gold_rate
+        silver_rate = Decimal('0') if silver_rate is None else silver_rate
+        diamond_rate = Decimal('0') if diamond_rate is None else diamond_rate
+
+    if snapshot is None:
+        # Filter ornaments: all current stock (from the summary table) or filtered by date
+        if use_date_filter:
+            snapshot = OrnamentStockSnapshot.from_queryset(
+                Ornament.objects.filter(
+                    ornament_type=Ornament.OrnamentCategory.STOCK,
+                    created_at__date=target_date,
+                )
+            )
         else:
-            component2_amount = Decimal('0')
-        
-        # Component 3: Sum all jyala amounts
-        component3_amount = diamond_ornaments.aggregate(total=Sum('jyala'))['total'] or Decimal('0')
-        
-        # Component 4: Sum all stone_price amounts
-        component4_amount = diamond_ornaments.aggregate(total=Sum('stone_totalprice'))['total'] or Decimal('0')
-        
-        # Total diamond amount = all components
-        diamond_amount = component1_amount + component2_amount + component3_amount + component4_amount
-        result['diamond_amount'] = diamond_amount
-    
-    result['total_amount'] = result['gold_amount'] + result['silver_amount'] + result['diamond_amount']
-    
-    return result
+            snapshot = OrnamentStockSnapshot.from_summary(
+                OrnamentStockSummary.objects.filter(ornament_type=Ornament.OrnamentCategory.STOCK)
+            )
+
+    stock_diamond_rate = stock_diamond_rate_for(target_date) if snapshot.count('Diamond') else None
+    return value_daily_totals(snapshot, target_date, gold_rate, silver_rate, stock_diamond_rate)
 
 
+@cached_view(cache_versions.STOREFRONT)
 def customer_home(request):
     """Customer-facing home page with products display."""
     from ornament.models import Ornament, MainCategory
@@ -292,11 +106,11 @@ def customer_home(request):
     ).order_by('-created_at')[:12]
     
     # Get new arrivals (last 6 active ornaments with images)
-    new_arrivals = Ornament.objects.filter(
+    new_arrivals = storefront_prices.with_prices(Ornament.objects.filter(
         ornament_type='stock',
         status='active',
         image__isnull=False
-    ).order_by('-created_at')[:6]
+    )).order_by('-created_at')[:6]
     
     # Get categories
     categories = MainCategory.objects.all()
@@ -331,14 +145,11 @@ def customer_home(request):
             })
     
     # Get latest gold and silver rates
-    latest_rate = DailyRate.objects.order_by('-created_at').first()
+    latest_rate = rate_history.latest(request)
 
     from .models import CustomerPageImage
     home_hero = CustomerPageImage.get_for_slot(CustomerPageImage.PageSlot.HOME_HERO)
 
-    for product in new_arrivals:
-        product.calculated_selling_amount = calculate_product_selling_amount(product, latest_rate)
-    
     context = {
         'featured_products': featured_products,
         'new_arrivals': new_arrivals,
@@ -360,6 +171,7 @@ def stock_hub(request):
     return render(request, 'main/stock_hub.html')
 
 
+@cached_view(cache_versions.STOREFRONT)
 def api_products_by_category(request, category_id):
     """API endpoint to fetch products by category."""
     from ornament.models import Ornament
@@ -376,6 +188,7 @@ def api_products_by_category(request, category_id):
 
 def api_search_products(request):
     """API endpoint to search products."""
+    from ornament import search as ornament_search
     from ornament.models import Ornament
     
     query = request.GET.get('q', '').strip()
@@ -384,15 +197,18 @@ def api_search_products(request):
         return JsonResponse({'products': []})
     
     products = Ornament.objects.filter(
-        Q(ornament_name__icontains=query) | Q(code__icontains=query),
         ornament_type='stock',
         status='active',
         image__isnull=False
+    )
+    products = ornament_search.search(
+        products, query, fields=('ornament_name', 'code'), weight_fields=('weight',)
     ).values('id', 'ornament_name', 'code', 'type', 'weight', 'maincategory__name')[:15]
     
     return JsonResponse({'products': list(products)})
 
 
+@cached_view(cache_versions.STOREFRONT)
 def api_featured_products(request):
     """API endpoint for featured products."""
     from ornament.models import Ornament
@@ -408,6 +224,7 @@ def api_featured_products(request):
     return JsonResponse({'products': list(products)})
 
 
+@cached_view(cache_versions.STOREFRONT)
 def product_detail(request, product_id):
     """Display full details of a single product."""
     from ornament.models import Ornament
@@ -415,7 +232,7 @@ def product_detail(request, product_id):
     product = get_object_or_404(Ornament, id=product_id, ornament_type='stock', status='active')
     
     # Get latest gold and silver rates
-    latest_rate = DailyRate.objects.order_by('-created_at').first()
+    latest_rate = rate_history.latest(request)
 
     # Match the same pricing logic used in ornament price calculator (barcode flow)
     total_selling_amount = calculate_product_selling_amount(product, latest_rate)
@@ -430,40 +247,90 @@ def product_detail(request, product_id):
     return render(request, 'main/product_detail.html', context)
 
 
+STOREFRONT_PAGE_SIZE = 24
+
+STOREFRONT_SORTS = {
+    'newest': ('-created_at', '-id'),
+    'price-low': (F('calculated_selling_amount').asc(nulls_last=True), '-created_at', '-id'),
+    'price-high': (F('calculated_selling_amount').desc(nulls_last=True), '-created_at', '-id'),
+    'name-asc': ('ornament_name', 'id'),
+}
+
+
+def _range_filter(field, values):
+    """``Q`` matching any of the ``"low-high"`` ranges in ``values`` (bad ones are ignored)."""
+    condition = Q()
+    for value in values:
+        low, _, high = value.partition('-')
+        try:
+            condition |= Q(**{f'{field}__gte': Decimal(low), f'{field}__lte': Decimal(high)})
+        except (ArithmeticError, ValueError):
+            continue
+    return condition
+
+
+@cached_view(cache_versions.STOREFRONT)
 def category_products(request, category_id=None):
-    """Display products filtered by category."""
+    """Display products filtered by category.
+
+    Filtering, sorting and paging all happen in SQL; prices come from the
+    precomputed ``StorefrontPrice`` index.
+    """
+    from django.core.paginator import Paginator
     from ornament.models import Ornament, MainCategory
 
     selected_metal_type = request.GET.get('metal_type')
     
     category = None
+    products = Ornament.objects.filter(ornament_type='stock', status='active')
     if category_id:
         category = get_object_or_404(MainCategory, id=category_id)
-        products = Ornament.objects.filter(
-            maincategory=category,
-            ornament_type='stock',
-            status='active'
-        ).order_by('-created_at')
-    else:
-        products = Ornament.objects.filter(
-            ornament_type='stock',
-            status='active'
-        ).order_by('-created_at')
+        products = products.filter(maincategory=category)
 
     if selected_metal_type in dict(Ornament.MetalTypeCategory.choices):
         products = products.filter(metal_type=selected_metal_type)
-    
+
+    selected = {
+        'metal': request.GET.getlist('metal'),
+        'karat': request.GET.getlist('karat'),
+        'price': request.GET.getlist('price'),
+        'weight': request.GET.getlist('weight'),
+    }
+    metal_types = [
+        value for value in Ornament.MetalTypeCategory.values
+        if value.lower() in {metal.lower() for metal in selected['metal']}
+    ]
+    if metal_types:
+        products = products.filter(metal_type__in=metal_types)
+    if selected['karat']:
+        products = products.filter(type__in=selected['karat'])
+    products = storefront_prices.with_prices(products)
+    if selected['price']:
+        products = products.filter(_range_filter('calculated_selling_amount', selected['price']))
+    if selected['weight']:
+        products = products.filter(_range_filter('weight', selected['weight']))
+
+    sort = request.GET.get('sort')
+    if sort not in STOREFRONT_SORTS:
+        sort = 'newest'
+    products = products.order_by(*STOREFRONT_SORTS[sort])
+
+    page_obj = Paginator(products, STOREFRONT_PAGE_SIZE).get_page(request.GET.get('page'))
+    query = request.GET.copy()
+    query.pop('page', None)
+
     # Get latest gold and silver rates
-    latest_rate = DailyRate.objects.order_by('-created_at').first()
+    latest_rate = rate_history.latest(request)
 
-    # Precompute listing prices so templates can render real values instead of placeholders.
-    for product in products:
-        product.calculated_selling_amount = calculate_product_selling_amount(product, latest_rate)
-    
     context = {
         'category': category,
-        'products': products,
+        'products': page_obj.object_list,
+        'page_obj': page_obj,
+        'total_products': page_obj.paginator.count,
         'selected_metal_type': selected_metal_type,
+        'selected_filters': selected,
+        'selected_sort': sort,
+        'page_query': query.urlencode(),
         'latest_rate': latest_rate,
         'customer_nav_tab': 'shop',
     }
@@ -474,7 +341,7 @@ def category_products(request, category_id=None):
 def cart(request):
     """Shopping cart page."""
     # Get latest gold and silver rates
-    latest_rate = DailyRate.objects.order_by('-created_at').first()
+    latest_rate = rate_history.latest(request)
     
     context = {
         'latest_rate': latest_rate,
@@ -539,7 +406,7 @@ def admin_dashboard(request):
     new_customers_today = Order.objects.filter(created_at__date=date.today()).values('customer_name').distinct().count()
     
     # Gold rate
-    latest_rate = DailyRate.objects.order_by('-created_at').first()
+    latest_rate = rate_history.latest(request)
     gold_rate = Decimal('0')
     gold_change = Decimal('-0.2')  # Default placeholder
     
@@ -605,7 +472,7 @@ def dashboard(request):
             return redirect('main:dashboard')
     else:
         # Get most recent rate
-        today_rate = DailyRate.objects.order_by('-created_at').first()
+        today_rate = rate_history.latest(request)
         if today_rate:
             daily_rate_form = DailyRateForm(instance=today_rate)
         else:
@@ -629,24 +496,10 @@ def dashboard(request):
     if total_active_bucket > 0:
         processing_percent = int((processing_orders / total_active_bucket) * 100)
 
-    # Sales by month for chart - using Sale model with NepaliDateField
+    # Sales by Nepali month for chart, from the monthly sales summary
     import json
-    from sales.models import Sale
-    from collections import defaultdict
-    
-    # Get all sales with their Nepali dates and order totals
-    sales = Sale.objects.select_related('order').filter(is_deleted=False, sale_date__isnull=False).order_by('sale_date')
-    
-    # Group sales by Nepali year-month
-    monthly_sales = defaultdict(Decimal)
-    for sale in sales:
-        if sale.sale_date:
-            # Create a month key like "2081-01" from Nepali date
-            month_key = f"{sale.sale_date.year}-{sale.sale_date.month:02d}"
-            monthly_sales[month_key] += sale.order.total or Decimal('0')
-    
-    # Sort by month key and create labels/totals
-    sorted_months = sorted(monthly_sales.keys())
+    from sales.models import SalesMonthSummary
+
     sales_month_labels = []
     sales_month_totals = []
     
@@ -654,27 +507,26 @@ def dashboard(request):
     nepali_months = ['', 'Baisakh', 'Jestha', 'Ashadh', 'Shrawan', 'Bhadra', 'Ashwin', 
                      'Kartik', 'Mangsir', 'Poush', 'Magh', 'Falgun', 'Chaitra']
     
-    for month_key in sorted_months:
-        year, month = month_key.split('-')
-        month_name = nepali_months[int(month)]
-        sales_month_labels.append(f"{month_name} {year}")
-        sales_month_totals.append(float(monthly_sales[month_key]))
+    monthly_sales = SalesMonthSummary.objects.order_by('year', 'month').values_list('year', 'month', 'total_sales_amount')
+    for year, month, total in monthly_sales:
+        sales_month_labels.append(f"{nepali_months[month]} {year}")
+        sales_month_totals.append(float(total))
     
     # For Chart.js, serialize as JSON for safe JS rendering
     sales_month_labels_json = json.dumps(sales_month_labels)
     sales_month_totals_json = json.dumps(sales_month_totals)
 
-    # Sparkline: last 7 days sales totals
-    sparkline_points = []
-    for i in range(6, -1, -1):
-        day = date.today() - timedelta(days=i)
-        day_total = (
-            Order.objects.filter(created_at__date=day)
-            .aggregate(total=Sum('total'))
-            .get('total')
-            or Decimal('0')
-        )
-        sparkline_points.append(float(day_total))
+    # Sparkline: last 7 days sales totals, one grouped query
+    sparkline_days = [date.today() - timedelta(days=i) for i in range(6, -1, -1)]
+    day_totals = dict(
+        Order.objects.annotate(day=TruncDate('created_at'))
+        .filter(day__gte=sparkline_days[0], day__lte=sparkline_days[-1])
+        .order_by()
+        .values('day')
+        .annotate(total=Sum('total'))
+        .values_list('day', 'total')
+    )
+    sparkline_points = [float(day_totals.get(day) or Decimal('0')) for day in sparkline_days]
 
     sparkline_path = "M0 15 L100 15"
     if sparkline_points:
@@ -691,13 +543,13 @@ def dashboard(request):
         sparkline_path = "M" + " L".join(coords)
 
     # Stock report by metal type
-    # Gold stock: sum of all gold purchases (quantity)
-    gold_stock = (
-        GoldSilverPurchase.objects.filter(metal_type__icontains="gold")
-        .aggregate(total=Sum("quantity"))
-        .get("total")
-        or 0
+    # Gold and silver stock: sum of all purchases (quantity) of each metal
+    purchase_stock = GoldSilverPurchase.objects.aggregate(
+        gold=Sum("quantity", filter=Q(metal_type__icontains="gold")),
+        silver=Sum("quantity", filter=Q(metal_type__icontains="silver")),
     )
+    gold_stock = purchase_stock["gold"] or 0
+    silver_stock = purchase_stock["silver"] or 0
 
     # Diamond stock: total diamond_weight of all Diamond ornaments
     diamond_stock = (
@@ -706,23 +558,20 @@ def dashboard(request):
         .get('total')
         or 0
     )
-
-    # Silver stock: sum of all silver purchases (quantity)
-    silver_stock = (
-        GoldSilverPurchase.objects.filter(metal_type__icontains="silver")
-        .aggregate(total=Sum("quantity"))
-        .get("total")
-        or 0
-    )
     
     # Calculate daily P&L using bs_date from DailyRate
     # Get today's and yesterday's rates from DailyRate table
-    today_rate = DailyRate.objects.order_by('-created_at').first()
-    yesterday_rate = DailyRate.objects.order_by('-created_at')[1:2].first()
+    today_rate = rate_history.latest(request)
+    yesterday_rate = rate_history.ordered()[1:2].first()
     
     today_date_label = today_rate.bs_date if today_rate else "Today"
     yesterday_date_label = yesterday_rate.bs_date if yesterday_rate else "Yesterday"
     
+    # Read current stock weights once and value them against every rate set.
+    stock_snapshot = OrnamentStockSnapshot.from_summary(
+        OrnamentStockSummary.objects.filter(ornament_type=Ornament.OrnamentCategory.STOCK)
+    )
+
     # Calculate totals using today's and yesterday's rates
     if today_rate:
         today_totals = calculate_daily_ornament_totals(
@@ -730,10 +579,10 @@ def dashboard(request):
             gold_rate=today_rate.gold_rate,
             silver_rate=today_rate.silver_rate,
             diamond_rate=Decimal('0'),
-            use_date_filter=False
+            snapshot=stock_snapshot,
         )
     else:
-        today_totals = calculate_daily_ornament_totals(date.today(), use_date_filter=False)
+        today_totals = calculate_daily_ornament_totals(date.today(), snapshot=stock_snapshot)
     
     if yesterday_rate:
         yesterday_totals = calculate_daily_ornament_totals(
@@ -741,10 +590,10 @@ def dashboard(request):
             gold_rate=yesterday_rate.gold_rate,
             silver_rate=yesterday_rate.silver_rate,
             diamond_rate=Decimal('0'),
-            use_date_filter=False
+            snapshot=stock_snapshot,
         )
     else:
-        yesterday_totals = calculate_daily_ornament_totals(date.today(), use_date_filter=False)
+        yesterday_totals = calculate_daily_ornament_totals(date.today(), snapshot=stock_snapshot)
     
     # Calculate stock closing rate totals (using stock year rates instead of daily rates)
     current_year = date.today().year
@@ -759,10 +608,10 @@ def dashboard(request):
             gold_rate=stock_data.gold_rate,
             silver_rate=stock_data.silver_rate,
             diamond_rate=stock_data.diamond_rate,
-            use_date_filter=False
+            snapshot=stock_snapshot,
         )
     else:
-        stock_closing_totals = calculate_daily_ornament_totals(date.today(), use_date_filter=False)
+        stock_closing_totals = calculate_daily_ornament_totals(date.today(), snapshot=stock_snapshot)
     
     # Calculate differences
     pl_difference = today_totals['total_amount'] - yesterday_totals['total_amount']
@@ -1056,11 +905,13 @@ def delete_daily_rate(request, pk):
 
 
 @login_required(login_url='/accounts/login/')
+@cached_view(cache_versions.REPORTS)
 def stock_report(request):
     """Stock report filtered by optional date range (BS).
 
     Shows sales and purchase totals for all records, or filtered by
-    from_date and to_date parameters (Bikram Sambat).
+    from_date and to_date parameters (Bikram Sambat).  The figures come
+    from ``main.services.stock_report``.
     """
 
     # Optional BS date range (YYYY-MM-DD)
@@ -1083,339 +934,7 @@ def stock_report(request):
         except Exception:
             to_date = None
 
-    # Global totals for the selected BS month/year
-    totals = {
-        "gold_purchase_amount": 0,
-        "silver_purchase_amount": 0,
-        "diamond_purchase_amount": 0,
-        "customer_amount": 0,
-        "sales_amount": 0,
-        "gold_purchase_weight": 0,
-        "silver_purchase_weight": 0,
-        "diamond_purchase_weight": 0,
-        "sales_weight": 0,
-        "gold_stock_amount": 0,
-        "silver_stock_amount": 0,
-        "diamond_stock_amount": 0,
-        "gold_stock_weight": 0,
-        "silver_stock_weight": 0,
-        "diamond_stock_weight": 0,
-    }
-
-    # Helpers: customer purchase inflow by business rules
-    def _customer_qs(metal_type):
-        qs = CustomerPurchase.objects.filter(metal_type__icontains=metal_type)
-        if from_date:
-            qs = qs.filter(purchase_date__gte=from_date)
-        if to_date:
-            qs = qs.filter(purchase_date__lte=to_date)
-        return qs
-
-    def customer_gold_purchase_totals():
-        gold_qs = _customer_qs("gold")
-        diamond_qs = _customer_qs("diamond")
-
-        gold_amount = gold_qs.aggregate(total_amount=Sum("total_amount")).get("total_amount") or Decimal("0")
-        gold_final_weight = gold_qs.aggregate(total_weight=Sum("final_weight")).get("total_weight") or Decimal("0")
-        diamond_final_weight = diamond_qs.aggregate(total_weight=Sum("final_weight")).get("total_weight") or Decimal("0")
-
-        # Keep stock report aligned with customer purchase business rule:
-        # total gold purchase includes diamond final weight contribution.
-        return gold_amount, (gold_final_weight + diamond_final_weight)
-
-    def customer_silver_purchase_totals():
-        qs = _customer_qs("silver")
-        agg = qs.aggregate(total_amount=Sum("total_amount"), total_weight=Sum("final_weight"))
-        return (
-            agg.get("total_amount") or Decimal("0"),
-            agg.get("total_weight") or Decimal("0"),
-        )
-
-    def customer_diamond_purchase_totals():
-        qs = _customer_qs("diamond")
-        agg = qs.aggregate(total_amount=Sum("diamond_amount"), total_weight=Sum("diamond_weight"))
-        return (
-            agg.get("total_amount") or Decimal("0"),
-            agg.get("total_weight") or Decimal("0"),
-        )
-
-    # Gold purchases (all parties) for the chosen BS period
-    # Use case-insensitive containment to tolerate imported values like 'Gold', ' GOLD ', etc.
-    gold_qs = GoldSilverPurchase.objects.filter(metal_type__icontains="gold")
-    if from_date:
-        gold_qs = gold_qs.filter(bill_date__gte=from_date)
-    if to_date:
-        gold_qs = gold_qs.filter(bill_date__lte=to_date)
-    gold_purchases = gold_qs.aggregate(
-        total_amount=Sum("amount"),
-        total_wages=Sum("wages"),
-        total_qty=Sum("quantity"),
-    )
-    gold_cust_amount, gold_cust_weight = customer_gold_purchase_totals()
-    totals["gold_purchase_amount"] = (
-        (gold_purchases.get("total_amount") or Decimal("0"))
-        - (gold_purchases.get("total_wages") or Decimal("0"))
-        + gold_cust_amount
-    )
-    totals["gold_purchase_weight"] = (gold_purchases.get("total_qty") or 0) + gold_cust_weight
-
-    # Silver purchases (all parties) for the chosen BS period
-    silver_qs = GoldSilverPurchase.objects.filter(metal_type__icontains="silver")
-    if from_date:
-        silver_qs = silver_qs.filter(bill_date__gte=from_date)
-    if to_date:
-        silver_qs = silver_qs.filter(bill_date__lte=to_date)
-    silver_purchases = silver_qs.aggregate(
-        total_amount=Sum("amount"),
-        total_wages=Sum("wages"),
-        total_qty=Sum("quantity"),
-    )
-    silver_cust_amount, silver_cust_weight = customer_silver_purchase_totals()
-    totals["silver_purchase_amount"] = (
-        (silver_purchases.get("total_amount") or Decimal("0"))
-        - (silver_purchases.get("total_wages") or Decimal("0"))
-        + silver_cust_amount
-    )
-    totals["silver_purchase_weight"] = (silver_purchases.get("total_qty") or 0) + silver_cust_weight
-
-    # Diamond purchases (all parties) for the chosen BS period
-    diamond_qs = GoldSilverPurchase.objects.filter(metal_type__icontains="diamond")
-    if from_date:
-        diamond_qs = diamond_qs.filter(bill_date__gte=from_date)
-    if to_date:
-        diamond_qs = diamond_qs.filter(bill_date__lte=to_date)
-    diamond_purchases = diamond_qs.aggregate(total_amount=Sum("amount"), total_qty=Sum("quantity"))
-    diamond_cust_amount, diamond_cust_weight = customer_diamond_purchase_totals()
-    totals["diamond_purchase_amount"] = (diamond_purchases.get("total_amount") or Decimal("0")) + diamond_cust_amount
-    totals["diamond_purchase_weight"] = (diamond_purchases.get("total_qty") or 0) + diamond_cust_weight
-
-    # Wages from company purchases for gold and silver only
-    wages_qs = GoldSilverPurchase.objects.filter(
-        Q(metal_type__icontains="gold") | Q(metal_type__icontains="silver")
-    )
-    if from_date:
-        wages_qs = wages_qs.filter(bill_date__gte=from_date)
-    if to_date:
-        wages_qs = wages_qs.filter(bill_date__lte=to_date)
-    wages_agg = wages_qs.aggregate(total_wages=Sum("wages"))
-    total_wages = wages_agg.get("total_wages") or 0
-
-    purchase_wages_gold = gold_purchases.get("total_wages") or Decimal("0")
-    purchase_wages_silver = silver_purchases.get("total_wages") or Decimal("0")
-
-    # Purchase Jardi split by metal (gold/silver company purchases only)
-    purchase_jardi_gold_qs = GoldSilverPurchase.objects.filter(
-        Q(metal_type__icontains="gold")
-        & (Q(particular__icontains="jardi") | Q(particular__icontains="jarti"))
-    )
-    purchase_jardi_silver_qs = GoldSilverPurchase.objects.filter(
-        Q(metal_type__icontains="silver")
-        & (Q(particular__icontains="jardi") | Q(particular__icontains="jarti"))
-    )
-    if from_date:
-        purchase_jardi_gold_qs = purchase_jardi_gold_qs.filter(bill_date__gte=from_date)
-        purchase_jardi_silver_qs = purchase_jardi_silver_qs.filter(bill_date__gte=from_date)
-    if to_date:
-        purchase_jardi_gold_qs = purchase_jardi_gold_qs.filter(bill_date__lte=to_date)
-        purchase_jardi_silver_qs = purchase_jardi_silver_qs.filter(bill_date__lte=to_date)
-    purchase_jardi_gold_amount = purchase_jardi_gold_qs.aggregate(total_amount=Sum("amount")).get("total_amount") or Decimal("0")
-    purchase_jardi_silver_amount = purchase_jardi_silver_qs.aggregate(total_amount=Sum("amount")).get("total_amount") or Decimal("0")
-    purchase_jardi_amount = purchase_jardi_gold_amount + purchase_jardi_silver_amount
-
-    # Customer sales (orders) for the chosen BS period (all customers)
-    order_qs = Order.objects.all()
-    if from_date:
-        order_qs = order_qs.filter(order_date__gte=from_date)
-    if to_date:
-        order_qs = order_qs.filter(order_date__lte=to_date)
-    customer_sales = order_qs.aggregate(total_amount=Sum("total"))
-    totals["customer_amount"] = customer_sales.get("total_amount") or 0
-
-    # Sales detail (line amounts) grouped by ornament metal type
-    # Use Sale.sale_date for sales filters so stock report matches monthly-sales logic
-    sales_qs = OrderOrnament.objects.select_related("order", "ornament").filter(order__sale__isnull=False)
-    if from_date:
-        sales_qs = sales_qs.filter(order__sale__sale_date__gte=from_date)
-    if to_date:
-        sales_qs = sales_qs.filter(order__sale__sale_date__lte=to_date)
-
-    def aggregate_sales(metal_type, weight_field):
-        qs = sales_qs.filter(ornament__metal_type__icontains=metal_type)
-        agg = qs.aggregate(total_amount=Sum("line_amount"), total_weight=Sum(weight_field))
-        return (
-            agg.get("total_amount") or 0,
-            agg.get("total_weight") or 0,
-        )
-
-    diamond_sales_amount, diamond_sales_weight = aggregate_sales("diamond", "ornament__diamond_weight")
-    gold_sales_amount, gold_sales_weight = aggregate_sales("gold", "ornament__weight")
-    silver_sales_amount, silver_sales_weight = aggregate_sales("silver", "ornament__weight")
-
-    # Raw metal lines attached to Sale; filter by Sale.sale_date to match monthly report
-    raw_sales_qs = SalesMetalStock.objects.select_related('sale')
-    if from_date:
-        raw_sales_qs = raw_sales_qs.filter(sale__sale_date__gte=from_date)
-    if to_date:
-        raw_sales_qs = raw_sales_qs.filter(sale__sale_date__lte=to_date)
-
-    raw_gold_weight = raw_sales_qs.filter(metal_type='gold').aggregate(total_qty=Sum('quantity')).get('total_qty') or Decimal('0')
-    raw_gold_amount = raw_sales_qs.filter(metal_type='gold').aggregate(total_amount=Sum('line_amount')).get('total_amount') or Decimal('0')
-    raw_silver_weight = raw_sales_qs.filter(metal_type='silver').aggregate(total_qty=Sum('quantity')).get('total_qty') or Decimal('0')
-    raw_silver_amount = raw_sales_qs.filter(metal_type='silver').aggregate(total_amount=Sum('line_amount')).get('total_amount') or Decimal('0')
-
-    # Requested sales-detail metrics
-    purity_factors = {
-        '24KARAT': Decimal('1.00'),
-        '23KARAT': Decimal('0.99'),
-        '22KARAT': Decimal('0.98'),
-        '18KARAT': Decimal('0.75'),
-        '14KARAT': Decimal('0.58'),
-    }
-
-    gold_sales_lines = sales_qs.filter(ornament__metal_type__iexact='Gold').select_related('ornament')
-    gold_and_diamond_sales_lines = sales_qs.filter(
-        Q(ornament__metal_type__iexact='Gold') | Q(ornament__metal_type__iexact='Diamond')
-    ).select_related('ornament')
-    silver_sales_lines = sales_qs.filter(ornament__metal_type__iexact='Silver').select_related('ornament')
-
-    sales_gold_equivalent_qty = Decimal('0')
-    sales_silver_equivalent_qty = Decimal('0')
-    sales_jarti_equivalent_gold_qty = Decimal('0')
-    sales_jarti_equivalent_silver_qty = Decimal('0')
-    sales_wages_gold_amount = Decimal('0')
-    sales_wages_silver_amount = Decimal('0')
-
-    for line in gold_and_diamond_sales_lines:
-        factor = purity_factors.get(getattr(line.ornament, 'type', None), Decimal('1.00'))
-        ornament_weight = line.ornament.weight or Decimal('0')
-        sales_gold_equivalent_qty += ornament_weight * factor
-
-    for line in gold_sales_lines:
-        factor = purity_factors.get(getattr(line.ornament, 'type', None), Decimal('1.00'))
-        sales_jarti_equivalent_gold_qty += (line.jarti or Decimal('0')) * factor
-        sales_wages_gold_amount += line.jyala or Decimal('0')
-
-    for line in silver_sales_lines:
-        factor = purity_factors.get(getattr(line.ornament, 'type', None), Decimal('1.00'))
-        ornament_weight = line.ornament.weight or Decimal('0')
-        sales_silver_equivalent_qty += ornament_weight * factor
-        sales_jarti_equivalent_silver_qty += (line.jarti or Decimal('0')) * factor
-        sales_wages_silver_amount += line.jyala or Decimal('0')
-
-    # Diamond detail: compute amount per sale line (diamond_weight * diamond_rate) and total it.
-    diamond_sales_lines = sales_qs.filter(ornament__metal_type__iexact='Diamond').select_related('ornament')
-    sales_diamond_total_weight = Decimal('0')
-    diamond_sales_amount = Decimal('0')
-    for line in diamond_sales_lines:
-        line_diamond_weight = (line.ornament.diamond_weight or Decimal('0'))
-        line_diamond_rate = (line.diamond_rate or Decimal('0'))
-        sales_diamond_total_weight += line_diamond_weight
-        diamond_sales_amount += line_diamond_weight * line_diamond_rate
-    sales_jardi_amount_gold = sales_jarti_equivalent_gold_qty
-    sales_jardi_amount_silver = sales_jarti_equivalent_silver_qty
-    sales_jardi_amount = sales_jardi_amount_gold + sales_jardi_amount_silver
-    sales_wages_amount = sales_wages_gold_amount + sales_wages_silver_amount
-
-    totals["sales_amount"] = diamond_sales_amount + gold_sales_amount + silver_sales_amount + raw_gold_amount + raw_silver_amount
-    totals["sales_weight"] = diamond_sales_weight + gold_sales_weight + silver_sales_weight + raw_gold_weight + raw_silver_weight
-
-    # Compute stock as purchases minus sales
-    totals["gold_stock_amount"] = (totals["gold_purchase_amount"] or Decimal("0")) - ((gold_sales_amount + raw_gold_amount) or Decimal("0"))
-    totals["gold_stock_weight"] = (totals["gold_purchase_weight"] or Decimal("0")) - ((gold_sales_weight + raw_gold_weight) or Decimal("0"))
-    totals["silver_stock_amount"] = (totals["silver_purchase_amount"] or Decimal("0")) - ((silver_sales_amount + raw_silver_amount) or Decimal("0"))
-    totals["silver_stock_weight"] = (totals["silver_purchase_weight"] or Decimal("0")) - ((silver_sales_weight + raw_silver_weight) or Decimal("0"))
-    totals["diamond_stock_amount"] = (totals["diamond_purchase_amount"] or Decimal("0")) - (diamond_sales_amount or Decimal("0"))
-    totals["diamond_stock_weight"] = (totals["diamond_purchase_weight"] or Decimal("0")) - (diamond_sales_weight or Decimal("0"))
-
-    purchase_rows = [
-        {"label": "Diamond", "qty": totals["diamond_purchase_weight"], "amount": totals["diamond_purchase_amount"]},
-        {"label": "Gold", "qty": totals["gold_purchase_weight"], "amount": totals["gold_purchase_amount"]},
-        {"label": "Silver", "qty": totals["silver_purchase_weight"], "amount": totals["silver_purchase_amount"]},
-        {"label": "Jardi (Gold)", "qty": 0, "amount": purchase_jardi_gold_amount},
-        {"label": "Wages (Gold)", "qty": 0, "amount": purchase_wages_gold},
-        {"label": "Jardi (Silver)", "qty": 0, "amount": purchase_jardi_silver_amount},
-        {"label": "Wages (Silver)", "qty": 0, "amount": purchase_wages_silver},
-    ]
-
-    sales_rows = [
-        {"label": "Diamond", "qty": sales_diamond_total_weight, "amount": diamond_sales_amount},
-        {"label": "Gold", "qty": sales_gold_equivalent_qty + raw_gold_weight, "amount": gold_sales_amount + raw_gold_amount},
-        {"label": "Silver", "qty": sales_silver_equivalent_qty + raw_silver_weight, "amount": silver_sales_amount + raw_silver_amount},
-        {"label": "Jardi (Gold)", "qty": sales_jarti_equivalent_gold_qty, "amount": sales_jardi_amount_gold},
-        {"label": "Wages (Gold)", "qty": 0, "amount": sales_wages_gold_amount},
-        {"label": "Jardi (Silver)", "qty": sales_jarti_equivalent_silver_qty, "amount": sales_jardi_amount_silver},
-        {"label": "Wages (Silver)", "qty": 0, "amount": sales_wages_silver_amount},
-    ]
-
-    purchase_totals = {
-        "qty": sum(row["qty"] for row in purchase_rows),
-        "amount": sum(row["amount"] for row in purchase_rows),
-    }
-
-    sales_totals = {
-        "qty": sum(row["qty"] for row in sales_rows),
-        "amount": sum(row["amount"] for row in sales_rows),
-    }
-
-    # Purchase extras already computed above (gold/silver split and combined)
-
-    # Fetch previous year remaining stock
-    # Try to get stock for year 2082 first, if not available use any previous year
-    try:
-        stock_data = Stock.objects.get(year=2082)
-    except Stock.DoesNotExist:
-        # If 2082 not found, get the most recent stock data
-        stock_data = Stock.objects.order_by('-year').first()
-    
-    opening_diamond = Decimal("0")
-    opening_gold = Decimal("0")
-    opening_silver = Decimal("0")
-    opening_jardi = Decimal("0")
-    opening_wages = Decimal("0")
-    opening_diamond_amount = Decimal("0")
-    opening_gold_amount = Decimal("0")
-    opening_silver_amount = Decimal("0")
-    
-    opening_stock_rows = []
-    opening_stock_totals = {"qty": Decimal("0"), "amount": Decimal("0")}
-    
-    if stock_data:
-        opening_diamond = stock_data.diamond
-        opening_gold = stock_data.gold
-        opening_silver = stock_data.silver
-        opening_jardi = stock_data.jardi
-        opening_wages = stock_data.wages
-        
-        # Calculate amounts using rates
-        opening_diamond_amount = opening_diamond * (stock_data.diamond_rate or Decimal("0"))
-        opening_gold_amount = opening_gold * (stock_data.gold_rate or Decimal("0"))
-        opening_silver_amount = opening_silver * (stock_data.silver_rate or Decimal("0"))
-        
-        opening_stock_rows = [
-            {"label": "Diamond", "qty": opening_diamond, "amount": opening_diamond_amount},
-            {"label": "Gold", "qty": opening_gold, "amount": opening_gold_amount},
-            {"label": "Silver", "qty": opening_silver, "amount": opening_silver_amount},
-            {"label": "Jardi", "qty": Decimal("0"), "amount": opening_jardi},
-            {"label": "Wages", "qty": Decimal("0"), "amount": opening_wages},
-        ]
-        opening_stock_totals = {
-            "qty": opening_diamond + opening_gold + opening_silver,
-            "amount": opening_diamond_amount + opening_gold_amount + opening_silver_amount + opening_jardi + opening_wages,
-        }
-
-    # Calculate stock as: Opening + Purchase - Sales
-    stock_rows = [
-        {"label": "Diamond", "qty": opening_diamond + (totals["diamond_purchase_weight"] or Decimal("0")) - (diamond_sales_weight or Decimal("0")), "amount": opening_diamond_amount + (totals["diamond_purchase_amount"] or Decimal("0")) - (diamond_sales_amount or Decimal("0"))},
-        {"label": "Gold", "qty": opening_gold + (totals["gold_purchase_weight"] or Decimal("0")) - (gold_sales_weight or Decimal("0")), "amount": opening_gold_amount + (totals["gold_purchase_amount"] or Decimal("0")) - (gold_sales_amount or Decimal("0"))},
-        {"label": "Silver", "qty": opening_silver + (totals["silver_purchase_weight"] or Decimal("0")) - (silver_sales_weight or Decimal("0")), "amount": opening_silver_amount + (totals["silver_purchase_amount"] or Decimal("0")) - (silver_sales_amount or Decimal("0"))},
-        {"label": "Jardi", "qty": Decimal("0"), "amount": opening_jardi + (purchase_jardi_amount or Decimal("0")) - (sales_jardi_amount or Decimal("0"))},
-        {"label": "Wages", "qty": Decimal("0"), "amount": opening_wages + (total_wages or Decimal("0")) - (sales_wages_amount or Decimal("0"))},
-    ]
-
-    stock_totals = {
-        "qty": sum(row["qty"] for row in stock_rows),
-        "amount": sum(row["amount"] for row in stock_rows),
-    }
+    context = stock_report_figures.build(from_date, to_date)
 
     # Check if a category is selected for detail view
     selected_category = request.GET.get("category")
@@ -1437,23 +956,13 @@ def stock_report(request):
                 ornament_type=Ornament.OrnamentCategory.SALES
             )
 
-    context = {
-        "totals": totals,
-        "purchase_rows": purchase_rows,
-        "sales_rows": sales_rows,
-        "purchase_totals": purchase_totals,
-        "sales_totals": sales_totals,
-        "stock_rows": stock_rows,
-        "stock_totals": stock_totals,
-        "opening_stock_rows": opening_stock_rows,
-        "opening_stock_totals": opening_stock_totals,
-        "category_ornaments": category_ornaments,
-        "selected_category": selected_category,
-    }
+    context["category_ornaments"] = category_ornaments
+    context["selected_category"] = selected_category
     return render(request, "main/stock_report.html", context)
 
 
 @login_required(login_url='/accounts/login/')
+@cached_view(cache_versions.REPORTS)
 def monthly_stock_report(request):
     """Monthly stock report filtered by BS month (YYYY-MM).
 
@@ -4,13 +4,15 @@ from django.db.models import Sum, F, DecimalField, Q
 from django.db.models.functions import Coalesce
 from decimal import Decimal
 
-from ornament.models import Ornament, Stone, Motimala, Potey
+from ornament.models import Ornament, OrnamentStockSummary, Stone, Motimala, Potey
 from goldsilverpurchase.models import MetalStock
 from order.models import Order, OrderOrnament, OrderMetalStock
 from sales.models import Sale
-from main.models import DailyRate, Stock
+from main.models import Stock
+from main.services import rates
 from finance.models import SundryDebtor, SundryCreditor, CashBank, Loan, GoldLoanAccount, DhukutiLoan
 from finance.views_loan import _compute_dhukuti_summary
+from main.services.stock_valuation import OrnamentStockSnapshot
 
 
 @login_required
@@ -24,7 +26,7 @@ def total_assets(request):
     """
     
     # Get latest rates
-    latest_rate = DailyRate.objects.latest('created_at') if DailyRate.objects.exists() else None
+    latest_rate = rates.latest(request)
     fallback_rate = Stock.objects.latest('year') if Stock.objects.exists() else None
     
     gold_rate = Decimal('0')
@@ -42,12 +44,6 @@ def total_assets(request):
     # ============================================================
     # 1. ORNAMENT INVENTORY (from weight report)
     # ============================================================
-    ornaments = Ornament.objects.filter(
-        ornament_type=Ornament.OrnamentCategory.STOCK,
-        status=Ornament.StatusCategory.ACTIVE,
-        weight__gt=0
-    )
-    
     # Karat conversion factors
     KARAT_FACTORS = {
         '24KARAT': Decimal('1.00'),
@@ -56,10 +52,17 @@ def total_assets(request):
         '14KARAT': Decimal('0.58'),
     }
     
+    # All ornament weights come from the pre-aggregated stock summary.
+    snapshot = OrnamentStockSnapshot.from_summary(
+        OrnamentStockSummary.objects.filter(
+            ornament_type=Ornament.OrnamentCategory.STOCK,
+            status=Ornament.StatusCategory.ACTIVE,
+            has_weight=True,
+        )
+    )
+
     # Gold ornaments calculation
-    gold_qs = ornaments.filter(metal_type='Gold')
-    gold_karats = gold_qs.values('type').annotate(weight_sum=Sum('weight'))
-    gold_karat_dict = {k['type']: k['weight_sum'] or Decimal('0') for k in gold_karats}
+    gold_karat_dict = snapshot.weight_by_type('Gold')
     
     gold_24k = gold_karat_dict.get('24KARAT', Decimal('0'))
     gold_22k = gold_karat_dict.get('22KARAT', Decimal('0'))
@@ -73,14 +76,12 @@ def total_assets(request):
                           gold_14k * KARAT_FACTORS['14KARAT'])
     
     total_gold_amount = (gold_24k_equivalent / Decimal('11.664')) * gold_rate
-    total_gold_jarti = gold_qs.aggregate(total=Sum('jarti'))['total'] or Decimal('0')
-    total_gold_jyala = gold_qs.aggregate(total=Sum('jyala'))['total'] or Decimal('0')
+    total_gold_jarti = snapshot.total('jarti', 'Gold')
+    total_gold_jyala = snapshot.total('jyala', 'Gold')
     gold_jarti_amount = (total_gold_jarti / Decimal('11.664')) * gold_rate
     
     # Silver ornaments calculation
-    silver_qs = ornaments.filter(metal_type='Silver')
-    silver_karats = silver_qs.values('type').annotate(weight_sum=Sum('weight'))
-    silver_karat_dict = {k['type']: k['weight_sum'] or Decimal('0') for k in silver_karats}
+    silver_karat_dict = snapshot.weight_by_type('Silver')
     
     silver_24k = silver_karat_dict.get('24KARAT', Decimal('0'))
     silver_22k = silver_karat_dict.get('22KARAT', Decimal('0'))
@@ -96,9 +97,7 @@ def total_assets(request):
     total_silver_amount = (silver_24k_equivalent / Decimal('11.664')) * silver_rate
     
     # Diamond ornaments calculation (weight stores net gold weight)
-    diamond_qs = ornaments.filter(metal_type='Diamond')
-    diamond_karats = diamond_qs.values('type').annotate(weight_sum=Sum('weight'))
-    diamond_karat_dict = {k['type']: k['weight_sum'] or Decimal('0') for k in diamond_karats}
+    diamond_karat_dict = snapshot.weight_by_type('Diamond')
     total_diamond_weight = sum(diamond_karat_dict.values(), Decimal('0'))
     diamond_24k_equivalent = (
         diamond_karat_dict.get('24KARAT', Decimal('0')) * KARAT_FACTORS['24KARAT']
@@ -109,7 +108,7 @@ def total_assets(request):
     diamond_gold_amount = (diamond_24k_equivalent / Decimal('11.664')) * gold_rate
     
     # Diamond weight amount (diamond stones in diamond ornaments)
-    diamond_weight_total = diamond_qs.aggregate(dw=Sum('diamond_weight'))['dw'] or Decimal('0')
+    diamond_weight_total = snapshot.total('diamond_weight', 'Diamond')
     total_diamond_amount = diamond_weight_total * Decimal('35000')
     
     # Diamond jyala
@@ -120,7 +119,7 @@ def total_assets(request):
     
     # Combined totals
     ornaments_total = total_gold_amount + gold_jarti_amount + total_gold_jyala + total_silver_amount + total_diamond_value
-    ornament_count = ornaments.count()
+    ornament_count = snapshot.count()
     
     # ============================================================
     # 2. RAW METALS (Bulk gold/silver not in ornaments)
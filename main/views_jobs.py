@@ -0,0 +1,64 @@
+import os
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+
+from main.models import BackgroundJob
+from main.services.jobs import read_progress
+
+# Only the first errors are sent with each status poll.
+MAX_ERRORS_SHOWN = 50
+
+
+def job_state(job):
+    """JSON-friendly status of ``job`` (shared by the page and the endpoint)."""
+    progress = read_progress(job)
+    total = progress['total'] or 0
+    done = min(progress['done'] or 0, total) if total else progress['done'] or 0
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'label': job.label,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'finished': job.is_finished,
+        'done': done,
+        'total': total,
+        'percent': 100 if job.status == 'succeeded' else (int(done * 100 / total) if total else 0),
+        'message': progress['message'],
+        'errors': job.errors[:MAX_ERRORS_SHOWN],
+        'error_count': len(job.errors),
+        'download_url': reverse('main:job_download', args=[job.pk]) if job.status == 'succeeded' and job.result_path else '',
+        'next_url': job.next_url,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+@login_required
+def job_list(request):
+    jobs = BackgroundJob.objects.select_related('created_by')[:50]
+    return render(request, 'main/job_list.html', {'jobs': jobs})
+
+
+@login_required
+def job_detail(request, pk):
+    job = get_object_or_404(BackgroundJob, pk=pk)
+    return render(request, 'main/job_detail.html', {'job': job, 'state': job_state(job)})
+
+
+@login_required
+def job_status(request, pk):
+    job = get_object_or_404(BackgroundJob, pk=pk)
+    return JsonResponse(job_state(job))
+
+
+@login_required
+def job_download(request, pk):
+    job = get_object_or_404(BackgroundJob, pk=pk, status='succeeded')
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise Http404("This job has no downloadable result.")
+    return FileResponse(open(job.result_path, 'rb'), as_attachment=True, filename=job.result_name or None)
@@ -0,0 +1,50 @@
+"""Cache backend, chosen by the ``CACHE_BACKEND`` environment variable.
+
+* ``locmem``: per-process memory.  The default outside production, and
+  what the tests use.  Version bumps made in one gunicorn worker are not
+  seen by the others, so it is unsuitable for more than one process.
+* ``file``: ``CACHE_LOCATION`` directory (default ``<BASE_DIR>/cache``),
+  shared by every process on the host.  The production default.
+* ``redis``: any Redis-compatible server at ``CACHE_URL`` (Redis, Valkey,
+  KeyDB).  Shared across hosts.  Needs ``pip install redis``.
+* ``dummy``: caches nothing.
+
+``CACHE_KEY_PREFIX`` separates several sites sharing one cache.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_config(env=None, base_dir=None, default='locmem'):
+    """``CACHES['default']`` from ``env`` (``os.environ`` by default)."""
+    env = os.environ if env is None else env
+    backend = env.get('CACHE_BACKEND', default).lower()
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"CACHE_BACKEND must be one of {', '.join(BACKENDS)}; got {backend!r}."
+        )
+
+    config = {
+        'BACKEND': BACKENDS[backend],
+        'KEY_PREFIX': env.get('CACHE_KEY_PREFIX', ''),
+        'TIMEOUT': int(env.get('CACHE_TIMEOUT', '300')),
+    }
+    if backend == 'locmem':
+        config['LOCATION'] = env.get('CACHE_LOCATION', 'default')
+    elif backend == 'file':
+        config['LOCATION'] = env.get('CACHE_LOCATION') or str(Path(base_dir or '.') / 'cache')
+        config['OPTIONS'] = {'MAX_ENTRIES': int(env.get('CACHE_MAX_ENTRIES', '5000'))}
+    elif backend == 'redis':
+        config['LOCATION'] = env.get('CACHE_URL', 'redis://127.0.0.1:6379/1')
+    return config
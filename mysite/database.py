@@ -0,0 +1,79 @@
+"""PostgreSQL connection profile, built from environment variables.
+
+Without ``CONN_MAX_AGE`` Django opens a new PostgreSQL connection for every
+request (TCP, TLS and auth, often several milliseconds of TTFB) and closes
+it again at the end.  :func:`postgres_config` keeps connections open
+between requests instead, with health checks, so a connection that the
+server dropped is replaced instead of failing the next request.
+
+Optionally it uses psycopg's connection pool (``DATABASE_POOL=True``).
+That needs Django 5.1+ and psycopg 3 with ``psycopg-pool``; asking for it
+on an older stack is a configuration error rather than a silent fallback.
+The variables, and how they relate to the gunicorn workers and
+threads, are described in docs/DEPLOYMENT.md.
+"""
+from __future__ import annotations
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _flag(env, name, default):
+    return env.get(name, str(default)) == 'True'
+
+
+def _conn_max_age(value):
+    if value in ('None', ''):
+        return None
+    return int(value)
+
+
+def _pool_available():
+    import django
+
+    if django.VERSION < (5, 1):
+        return False
+    try:
+        import psycopg  # noqa: F401
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def postgres_config(env=None):
+    """``DATABASES['default']`` for PostgreSQL from ``env`` (``os.environ`` by default)."""
+    env = os.environ if env is None else env
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('DATABASE_NAME'),
+        'USER': env.get('DATABASE_USER'),
+        'PASSWORD': env.get('DATABASE_PASSWORD'),
+        'HOST': env.get('DATABASE_HOST'),
+        'PORT': env.get('DATABASE_PORT'),
+        'CONN_MAX_AGE': _conn_max_age(env.get('DATABASE_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': _flag(env, 'DATABASE_CONN_HEALTH_CHECKS', True),
+        'OPTIONS': {
+            'connect_timeout': int(env.get('DATABASE_CONNECT_TIMEOUT', '5')),
+        },
+    }
+
+    if _flag(env, 'DATABASE_POOL', False):
+        if not _pool_available():
+            raise ImproperlyConfigured(
+                'DATABASE_POOL=True needs Django 5.1+ and psycopg 3 with psycopg-pool '
+                '(pip install "psycopg[binary,pool]"). Unset it to use persistent '
+                'connections (DATABASE_CONN_MAX_AGE) instead.'
+            )
+        # Django refuses persistent connections on top of a pool.
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(env.get('DATABASE_POOL_MIN_SIZE', '2')),
+            'max_size': int(env.get('DATABASE_POOL_MAX_SIZE', '10')),
+            'timeout': int(env.get('DATABASE_POOL_TIMEOUT', '10')),
+        }
+
+    if _flag(env, 'DATABASE_PGBOUNCER', False):
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return config
@@ -4,6 +4,9 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from .caches import cache_config
+from .database import postgres_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -117,6 +120,7 @@ MEDIA_URL = '/media/'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'main.middleware.QueryBudgetMiddleware',
     'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -159,16 +163,19 @@ WSGI_APPLICATION = 'mysite.wsgi.application'
 
 # Use PostgreSQL as the primary application database
 
+# Persistent connections with health checks, optionally psycopg's pool;
+# see mysite/database.py for the DATABASE_* variables.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('DATABASE_NAME'),
-        'USER': os.getenv('DATABASE_USER'),
-        'PASSWORD': os.getenv('DATABASE_PASSWORD'),
-        'HOST': os.getenv('DATABASE_HOST'),
-        'PORT': os.getenv('DATABASE_PORT'),
-    }
+    'default': postgres_config(),
+}
+
+# Shared cache for version-keyed data and cached report/storefront pages
+# (main.services.view_cache); see mysite/caches.py for CACHE_BACKEND.
+CACHES = {
+    'default': cache_config(base_dir=BASE_DIR, default='file' if IS_PRODUCTION else 'locmem'),
 }
+# Seconds a cached page may be served; 0 turns page caching off.
+VIEW_CACHE_TIMEOUT = int(os.getenv('VIEW_CACHE_TIMEOUT', '600'))
 
 
 # Password validation
@@ -217,3 +224,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
+
+# Background jobs (imports, dumps, restores) run by `manage.py run_jobs`.
+# Uploads and results are kept here; the worker must share this directory.
+BACKGROUND_JOBS_DIR = Path(os.getenv('BACKGROUND_JOBS_DIR', BASE_DIR / 'backups' / 'jobs'))
+# Run jobs inside the request instead (single-process setups without a worker).
+BACKGROUND_JOBS_EAGER = os.getenv('BACKGROUND_JOBS_EAGER', 'False') == 'True'
+
+# Barcode images are rendered by the `ornament.render_barcodes` background job
+# and uploaded to Cloudinary; 'local' writes them under BARCODE_LOCAL_DIR.
+BARCODE_STORAGE = os.getenv('BARCODE_STORAGE', 'cloudinary')
+BARCODE_LOCAL_DIR = Path(os.getenv('BARCODE_LOCAL_DIR', BASE_DIR / 'media' / 'barcodes'))
+
+# Replaced and deleted ornament images are removed from Cloudinary by the
+# `ornament.purge_images` background job; 'stub' only records the deletions.
+IMAGE_PURGE_SERVICE = os.getenv('IMAGE_PURGE_SERVICE', 'cloudinary')
+
+# Per-request SQL counts and timings for the performance report
+# (main.middleware.QueryBudgetMiddleware). Off unless enabled.
+QUERY_METRICS_ENABLED = os.getenv('QUERY_METRICS_ENABLED', 'False') == 'True'
+QUERY_METRICS_SAMPLE_RATE = float(os.getenv('QUERY_METRICS_SAMPLE_RATE', '1.0'))
+QUERY_METRICS_RETENTION_DAYS = int(os.getenv('QUERY_METRICS_RETENTION_DAYS', '30'))
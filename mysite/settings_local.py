@@ -2,20 +2,14 @@
 
 import os
 
+from .database import postgres_config
 from .settings import *  # noqa: F401,F403
 
 DEBUG = True
 
 if os.getenv('DATABASE_NAME'):
     DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.postgresql',
-            'NAME': os.getenv('DATABASE_NAME'),
-            'USER': os.getenv('DATABASE_USER'),
-            'PASSWORD': os.getenv('DATABASE_PASSWORD'),
-            'HOST': os.getenv('DATABASE_HOST', 'localhost'),
-            'PORT': os.getenv('DATABASE_PORT', '5432'),
-        }
+        'default': postgres_config({'DATABASE_HOST': 'localhost', 'DATABASE_PORT': '5432', **os.environ}),
     }
 else:
     DATABASES = {
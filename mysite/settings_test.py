@@ -1,5 +1,8 @@
 """Test settings: SQLite in-memory DB, no external services required."""
 
+import tempfile
+from pathlib import Path
+
 from .settings import *  # noqa: F401,F403
 
 DATABASES = {
@@ -17,6 +20,22 @@ DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 
+BACKGROUND_JOBS_DIR = Path(tempfile.mkdtemp(prefix='test-jobs-'))
+
+BARCODE_STORAGE = 'local'
+BARCODE_LOCAL_DIR = Path(tempfile.mkdtemp(prefix='test-barcodes-'))
+IMAGE_PURGE_SERVICE = 'stub'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test',
+    }
+}
+# Test databases roll back without bumping cache versions, so page caching
+# stays off except in tests that enable it.
+VIEW_CACHE_TIMEOUT = 0
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': True,
@@ -0,0 +1,81 @@
+"""Persist the ornament lines posted by the order form.
+
+The order form sends its lines as JSON.  :func:`save_order_lines` stores
+them with a fixed number of queries however long the order is: the
+ornaments are fetched with one ``in_bulk``, the lines are inserted with one
+``bulk_create`` and the ornaments are moved to the order with one
+``update_ornaments`` call (which keeps the stock summary and storefront
+prices current, as per-ornament ``save()`` signals used to).
+"""
+import json
+from decimal import Decimal
+
+from django.db import transaction
+
+from ornament.models import Ornament
+from ornament.stock_summary import update_ornaments
+
+from .models import OrderOrnament
+
+LINE_DECIMAL_FIELDS = (
+    'gold_rate', 'diamond_rate', 'zircon_rate', 'stone_rate',
+    'jarti', 'own_gold', 'jyala', 'line_amount',
+)
+
+
+def parse_lines(raw):
+    """Decode the ``order_lines_json`` payload; bad JSON means no lines."""
+    try:
+        lines = json.loads(raw or '[]')
+    except (TypeError, ValueError):
+        return []
+    return lines if isinstance(lines, list) else []
+
+
+def _ornament_id(line):
+    try:
+        return int(line.get('ornament_id') or 0)
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def save_order_lines(order, lines, replace=False):
+    """Create ``order``'s lines from the decoded payload; returns them.
+
+    Lines without a known ornament are skipped.  With ``replace`` the
+    existing lines are deleted first and ornaments no longer on the order
+    go back to stock.
+    """
+    ornament_ids = [pk for pk in map(_ornament_id, lines) if pk]
+    with transaction.atomic():
+        ornaments = Ornament.objects.in_bulk(ornament_ids)
+        if replace:
+            order.order_ornaments.all().delete()
+
+        rows = []
+        for line in lines:
+            ornament = ornaments.get(_ornament_id(line))
+            if ornament is None:
+                continue
+            values = {field: Decimal(str(line.get(field, 0) or 0)) for field in LINE_DECIMAL_FIELDS}
+            rows.append(OrderOrnament(order=order, ornament=ornament, **values))
+        created = OrderOrnament.objects.bulk_create(rows)
+
+        kept_ids = {row.ornament_id for row in created}
+        if kept_ids:
+            update_ornaments(
+                Ornament.objects.filter(pk__in=kept_ids).exclude(
+                    order=order, ornament_type=Ornament.OrnamentCategory.ORDER
+                ),
+                order=order,
+                ornament_type=Ornament.OrnamentCategory.ORDER,
+            )
+            # An empty payload leaves existing ornaments attached, as a
+            # failed form script should not put a whole order back in stock.
+            if replace:
+                update_ornaments(
+                    Ornament.objects.filter(order=order).exclude(pk__in=kept_ids),
+                    order=None,
+                    ornament_type=Ornament.OrnamentCategory.STOCK,
+                )
+    return created
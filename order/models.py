@@ -121,12 +121,24 @@ class Order(models.Model):
     
     @property
     def total_paid(self):
-        """Calculate total amount paid from all OrderPayment records."""
+        """Calculate total amount paid from all OrderPayment records.
+
+        Orders loaded through ``order.totals.with_total_paid`` already carry
+        the sum and skip the payments lookup.
+        """
+        if "paid_total" in self.__dict__:
+            return self.paid_total
         from decimal import Decimal as _D
         payment_sum = sum(
             (p.amount or _D("0")) for p in self.payments.all()
         )
         return payment_sum
+
+    def refresh_from_db(self, *args, **kwargs):
+        # A reloaded order sums its payments again rather than keep the
+        # ``paid_total`` annotation it was loaded with.
+        self.__dict__.pop("paid_total", None)
+        super().refresh_from_db(*args, **kwargs)
     
     def clean(self):
         """Validate order data."""
@@ -149,29 +161,13 @@ class Order(models.Model):
         - remaining_amount = max(0, total - payment_amount from OrderPayment)
         """
         from decimal import Decimal as _D
+        from .totals import line_figures
 
-        # Sum from both ornaments and metal stock items
-        ornament_sum = sum(
-            (line.line_amount or _D("0")) for line in self.order_ornaments.all()
-        )
-        metal_sum = sum(
-            (line.line_amount or _D("0")) for line in self.order_metals.all()
-        )
-        line_sum = ornament_sum + metal_sum
-
-        # Calculate taxable amount (gold and diamond only, exclude silver)
-        taxable_ornament_sum = sum(
-            (line.line_amount or _D("0")) for line in self.order_ornaments.all()
-            if line.ornament.metal_type.lower() in ('gold', 'diamond')
-        )
-        taxable_metal_sum = sum(
-            (line.line_amount or _D("0")) for line in self.order_metals.all()
-            if (line.metal_type or '').lower() in ('gold', 'diamond')
-        )
-        taxable_before_discount = taxable_ornament_sum + taxable_metal_sum
-
-        payment_entries = list(self.payments.all()) if hasattr(self, "payments") else []
-        payment_sum = sum((p.amount or _D("0")) for p in payment_entries)
+        # Line and payment sums come from one aggregate query
+        figures = line_figures(self.pk)
+        line_sum = figures["amount"]
+        taxable_before_discount = figures["taxable_amount"]
+        payment_sum = figures["paid"]
 
         self.amount = line_sum
 
@@ -0,0 +1,259 @@
+"""Daily stock valuation series for the profit & loss report.
+
+The report used to take today's stock weights and revalue them at each of
+the last N rates.  :func:`daily_series` instead rebuilds the stock weight
+held at the end of every day in a window and values it at that day's rate:
+
+* today's weights come from the pre-aggregated ``OrnamentStockSummary``
+  buckets and the metal stock ledger balances;
+* the day-by-day changes come from three grouped queries (ornaments
+  entering stock on their purchase date, ornaments leaving it on their
+  sale date, and metal stock movements);
+* the weights are rolled back from today with one reverse running sum per
+  series, rates come forward-filled from ``main.services.rates``, and every value
+  column is then computed element-wise over the whole window.
+
+So the number of queries is fixed and the Python work is a few passes over
+``days`` floats, whether the window is a week or several years.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db.models import Case, DateField, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from common.nepali_utils import ad_to_bs_date_str
+from main.services import rates
+
+TOLA_TO_GRAM = 11.664
+# Estimated value of a gram of diamond stones.
+DIAMOND_RATE_PER_GRAM = 5000.0
+MAX_DAYS = 5 * 366
+
+ORNAMENT_PURITY_FACTORS = {
+    '24KARAT': Decimal('1.00'),
+    '23KARAT': Decimal('0.99'),
+    '22KARAT': Decimal('0.98'),
+    '18KARAT': Decimal('0.75'),
+    '14KARAT': Decimal('0.58'),
+}
+METAL_PURITY_FACTORS = {
+    '24K': Decimal('1.00'),
+    '22K': Decimal('0.98'),
+    '18K': Decimal('0.75'),
+    '14K': Decimal('0.58'),
+}
+
+TRACKED_METALS = ('Gold', 'Silver', 'Diamond')
+# Weight series, in grams (gold and diamond metal in 24K equivalent).
+SERIES = ('gold', 'silver', 'diamond_metal', 'diamond_stone', 'stock_gold', 'stock_silver')
+
+WEIGHT_FIELD = DecimalField(max_digits=18, decimal_places=5)
+
+
+def _factor(field, factors):
+    return Case(
+        *(When(**{field: key}, then=Value(factor)) for key, factor in factors.items()),
+        default=Value(Decimal('1.00')),
+        output_field=WEIGHT_FIELD,
+    )
+
+
+def _ornament_sums():
+    weight = Coalesce(F('weight'), Value(Decimal('0')), output_field=WEIGHT_FIELD)
+    return {
+        'pure_weight': Sum(weight * _factor('type', ORNAMENT_PURITY_FACTORS), output_field=WEIGHT_FIELD),
+        'metal_weight': Sum(weight, output_field=WEIGHT_FIELD),
+        'stone_weight': Sum('diamond_weight', output_field=WEIGHT_FIELD),
+    }
+
+
+def _ornament_amounts(metal_type, row):
+    """Map a grouped ornament row onto the weight series it moves."""
+    pure = float(row['pure_weight'] or 0)
+    if metal_type == 'Gold':
+        return {'gold': pure}
+    if metal_type == 'Silver':
+        return {'silver': float(row['metal_weight'] or 0)}
+    return {'diamond_metal': pure, 'diamond_stone': float(row['stone_weight'] or 0)}
+
+
+def _metal_amounts(metal_type, purity, quantity):
+    if metal_type == 'gold':
+        return {'stock_gold': float(quantity * METAL_PURITY_FACTORS.get(purity, Decimal('1.00')))}
+    if metal_type == 'silver':
+        return {'stock_silver': float(quantity)}
+    return {}
+
+
+def current_weights():
+    """Weights held right now, per series."""
+    from goldsilverpurchase.models import MetalStock
+    from ornament.models import Ornament, OrnamentStockSummary
+
+    weights = dict.fromkeys(SERIES, 0.0)
+    buckets = (
+        OrnamentStockSummary.objects.filter(
+            ornament_type=Ornament.OrnamentCategory.STOCK,
+            status=Ornament.StatusCategory.ACTIVE,
+            metal_type__in=TRACKED_METALS,
+            count__gt=0,
+        )
+        .values('metal_type', 'type', 'weight', 'diamond_weight')
+    )
+    for bucket in buckets:
+        factor = ORNAMENT_PURITY_FACTORS.get(bucket['type'], Decimal('1.00'))
+        row = {
+            'pure_weight': bucket['weight'] * factor,
+            'metal_weight': bucket['weight'],
+            'stone_weight': bucket['diamond_weight'],
+        }
+        for name, amount in _ornament_amounts(bucket['metal_type'], row).items():
+            weights[name] += amount
+
+    balances = MetalStock.objects.order_by().values('metal_type', 'purity').annotate(balance=Sum('ledger_balance'))
+    for row in balances:
+        for name, amount in _metal_amounts(row['metal_type'], row['purity'], row['balance'] or Decimal('0')).items():
+            weights[name] += amount
+    return weights
+
+
+def _day(expression, fallback):
+    return Coalesce(expression, TruncDate(fallback), output_field=DateField())
+
+
+def daily_changes(after, until):
+    """Net weight change per series per day for days in ``(after, until]``.
+
+    Returns ``{date: {series: grams}}``.
+    """
+    from goldsilverpurchase.models import MetalStockMovement
+    from ornament.models import Ornament
+
+    changes = {}
+
+    def add(day, amounts, sign=1):
+        bucket = changes.setdefault(day, dict.fromkeys(SERIES, 0.0))
+        for name, amount in amounts.items():
+            bucket[name] += sign * amount
+
+    in_stock = Q(ornament_type=Ornament.OrnamentCategory.STOCK, status=Ornament.StatusCategory.ACTIVE)
+    sold = Q(order__sale__sale_date__isnull=False)
+    removed = Q(status__in=(Ornament.StatusCategory.DELETED, Ornament.StatusCategory.DESTROYED))
+    ornaments = Ornament.objects.filter(metal_type__in=TRACKED_METALS).order_by()
+
+    entries = (
+        ornaments.filter(in_stock | sold | removed)
+        .annotate(day=_day(F('ornament_date'), 'created_at'))
+        .filter(day__gt=after, day__lte=until)
+        .values('day', 'metal_type')
+        .annotate(**_ornament_sums())
+    )
+    for row in entries:
+        add(row['day'], _ornament_amounts(row['metal_type'], row))
+
+    exits = (
+        ornaments.filter(sold | removed)
+        .exclude(in_stock)
+        .annotate(day=_day(F('order__sale__sale_date'), 'updated_at'))
+        .filter(day__gt=after, day__lte=until)
+        .values('day', 'metal_type')
+        .annotate(**_ornament_sums())
+    )
+    for row in exits:
+        add(row['day'], _ornament_amounts(row['metal_type'], row), sign=-1)
+
+    movements = (
+        MetalStockMovement.objects.order_by()
+        .annotate(day=_day(F('movement_date'), 'created_at'))
+        .filter(day__gt=after, day__lte=until)
+        .values('day', 'metal_stock__metal_type', 'metal_stock__purity')
+        .annotate(net=Sum(
+            Case(When(movement_type='out', then=-F('quantity')), default=F('quantity')),
+            output_field=WEIGHT_FIELD,
+        ))
+    )
+    for row in movements:
+        add(row['day'], _metal_amounts(row['metal_stock__metal_type'], row['metal_stock__purity'], row['net'] or 0))
+    return changes
+
+
+def daily_series(days=30, end=None, weights=None):
+    """Valuation of the stock held at the end of each of ``days`` days up to ``end``.
+
+    Returns a list of dicts (oldest first) with the BS date, the rates, the
+    weights and the gold/silver/diamond/metal stock/total values.  Days
+    before the first recorded rate are left out.  Pass ``weights`` from
+    :func:`current_weights` when the caller needs today's weights too.
+    """
+    today = timezone.localdate()
+    end = min(end or today, today)
+    days = max(1, min(int(days), MAX_DAYS))
+    start = end - timedelta(days=days - 1)
+
+    # Roll today's weights back: the weight at the end of day i is today's
+    # weight less every change after day i.
+    changes = daily_changes(start, today)
+    if weights is None:
+        weights = current_weights()
+    columns = {}
+    for name in SERIES:
+        later = sum(amount[name] for day, amount in changes.items() if day > end)
+        deltas = [changes.get(start + timedelta(days=i), {}).get(name, 0.0) for i in range(1, days)] + [later]
+        after = list(accumulate(reversed(deltas)))[::-1]
+        columns[name] = [weights[name] - change for change in after]
+
+    gold_rate, silver_rate = rates.rates_between(start, end)
+    gold_gram = [(rate or 0.0) / TOLA_TO_GRAM for rate in gold_rate]
+    silver_gram = [(rate or 0.0) / TOLA_TO_GRAM for rate in silver_rate]
+
+    gold_value = [w * r for w, r in zip(columns['gold'], gold_gram)]
+    silver_value = [w * r for w, r in zip(columns['silver'], silver_gram)]
+    diamond_value = [
+        w * r + s * DIAMOND_RATE_PER_GRAM
+        for w, r, s in zip(columns['diamond_metal'], gold_gram, columns['diamond_stone'])
+    ]
+    stock_value = [
+        g * gr + s * sr
+        for g, gr, s, sr in zip(columns['stock_gold'], gold_gram, columns['stock_silver'], silver_gram)
+    ]
+    total_value = [sum(values) for values in zip(gold_value, silver_value, diamond_value, stock_value)]
+
+    rows = []
+    for i in range(days):
+        if gold_rate[i] is None:
+            continue
+        rows.append({
+            'date': ad_to_bs_date_str(start + timedelta(days=i)),
+            'gold_rate': gold_rate[i],
+            'silver_rate': silver_rate[i],
+            'gold_weight': columns['gold'][i],
+            'silver_weight': columns['silver'][i],
+            'diamond_metal_weight': columns['diamond_metal'][i],
+            'diamond_stone_weight': columns['diamond_stone'][i],
+            'stock_gold_weight': columns['stock_gold'][i],
+            'stock_silver_weight': columns['stock_silver'][i],
+            'gold_value': gold_value[i],
+            'silver_value': silver_value[i],
+            'diamond_value': diamond_value[i],
+            'metal_stock_value': stock_value[i],
+            'total_value': total_value[i],
+        })
+    return rows
+
+
+def profit_loss(rows):
+    """Change of each day's total value against the first day of the series."""
+    if len(rows) < 2:
+        return []
+    base = rows[0]['total_value']
+    return [
+        {
+            'date': row['date'],
+            'value': row['total_value'] - base,
+            'percent': (row['total_value'] - base) / base * 100 if base > 0 else 0,
+        }
+        for row in rows
+    ]
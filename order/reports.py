@@ -1,5 +1,6 @@
 """Order reports and analytics views"""
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
 from django.views import View
 from django.db.models import Sum, Count, Q, F, DecimalField, Case, When, Value, Max, Min
 from django.db.models.functions import Coalesce, TruncMonth, TruncYear
@@ -8,9 +9,15 @@ from decimal import Decimal
 from datetime import datetime, timedelta
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from main.services import cache_versions
+from main.services.view_cache import cached_view
+
+from . import pnl
 from .models import Order, OrderPayment
+from .totals import with_line_counts, with_total_paid
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class OrderDashboardReport(View):
     """Main order dashboard with key metrics and charts"""
     
@@ -91,6 +98,7 @@ class OrderDashboardReport(View):
         return render(request, 'order/reports/dashboard.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class OrderSalesAnalysis(View):
     """Detailed sales analysis with profit calculations"""
     
@@ -99,7 +107,7 @@ class OrderSalesAnalysis(View):
         date_to = request.GET.get('date_to')
         order_type = request.GET.get('order_type')
         
-        orders_qs = Order.objects.prefetch_related('order_ornaments')
+        orders_qs = Order.objects.all()
         
         if date_from:
             orders_qs = orders_qs.filter(order_date__gte=date_from)
@@ -129,9 +137,10 @@ class OrderSalesAnalysis(View):
         
         # Orders by status
         order_details = []
-        for order in orders_qs.order_by('-order_date'):
-            ornament_count = order.order_ornaments.count()
-            metal_count = order.order_metals.count()
+        detail_qs = with_line_counts(with_total_paid(orders_qs))
+        for order in detail_qs.order_by('-order_date'):
+            ornament_count = order.ornament_count
+            metal_count = order.metal_count
             pending = order.total - order.total_paid
             order_details.append({
                 'sn': order.sn,
@@ -166,6 +175,7 @@ class OrderSalesAnalysis(View):
         return render(request, 'order/reports/sales_analysis.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class OrderPaymentAnalysis(View):
     """Payment collection and pending analysis"""
     
@@ -229,6 +239,7 @@ class OrderPaymentAnalysis(View):
         return render(request, 'order/reports/payment_analysis.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class OrderMetalAnalysis(View):
     """Metal usage and stock analysis in orders"""
     
@@ -255,6 +266,7 @@ class OrderMetalAnalysis(View):
         return render(request, 'order/reports/metal_analysis.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class OrderCustomerAnalysis(View):
     """Customer analysis and segmentation"""
     
@@ -289,6 +301,7 @@ class OrderCustomerAnalysis(View):
         return render(request, 'order/reports/customer_analysis.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class FastSlowMoversReport(View):
     """Identify fast-moving and slow-moving ornaments by order frequency"""
     
@@ -322,6 +335,7 @@ class FastSlowMoversReport(View):
         return render(request, 'order/reports/fast_slow_movers.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class StockAgingReport(View):
     """Analyze ornament stock age and inventory aging"""
     
@@ -354,6 +368,7 @@ class StockAgingReport(View):
         return render(request, 'order/reports/stock_aging.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class MarginByCategoryReport(View):
     """Margin analysis by ornament category/type"""
     
@@ -376,6 +391,7 @@ class MarginByCategoryReport(View):
         return render(request, 'order/reports/margin_by_category.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class PaymentMixDiscountsReport(View):
     """Payment modes mix and discount analysis"""
     
@@ -415,6 +431,7 @@ class PaymentMixDiscountsReport(View):
         return render(request, 'order/reports/payment_mix_discounts.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class DebtorAgingReport(View):
     """Analyze debtor accounts aging and collections"""
     
@@ -483,354 +500,51 @@ class DebtorAgingReport(View):
         return render(request, 'order/reports/debtor_aging.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class MonthlySalesReport(View):
     """Monthly sales report showing aggregated sales data by month"""
     
     def get(self, request):
-        from sales.models import Sale
-        from ornament.models import Ornament
-        import nepali_datetime as ndt
-        
-        # Get all sales
-        sales = Sale.objects.select_related('order').prefetch_related(
-            'order__order_ornaments__ornament',
-            'sale_metals',
-            'order__payments'
-        ).filter(is_deleted=False).exclude(sale_date__isnull=True).order_by('-sale_date', 'bill_no', 'order__sn')
-        
-        # Group sales by month/year
-        monthly_data = {}
-        
-        purity_factors = {
-            Ornament.TypeCategory.TWENTYFOURKARAT: Decimal("1"),
-            Ornament.TypeCategory.TWENTHREEKARAT: Decimal("23") / Decimal("24"),
-            Ornament.TypeCategory.TWENTYTWOKARAT: Decimal("22") / Decimal("24"),
-            Ornament.TypeCategory.EIGHTEENKARAT: Decimal("18") / Decimal("24"),
-            Ornament.TypeCategory.FOURTEENKARAT: Decimal("14") / Decimal("24"),
-        }
-        
-        for sale in sales:
-            if not sale.sale_date:
-                continue
-            
-            # Get year and month from sale_date
-            try:
-                year = sale.sale_date.year
-                month = sale.sale_date.month
-            except AttributeError:
-                continue
-            
-            month_key = f"{year}-{month:02d}"
-            
-            if month_key not in monthly_data:
-                monthly_data[month_key] = {
-                    'year': year,
-                    'month': month,
-                    'sales_count': 0,
-                    'ornament_gold_weight': Decimal("0"),
-                    'ornament_gold_weight_24k': Decimal("0"),
-                    'ornament_silver_weight': Decimal("0"),
-                    'ornament_silver_weight_24k': Decimal("0"),
-                    'ornament_diamond_weight': Decimal("0"),
-                    'ornament_diamond_weight_24k': Decimal("0"),
-                    'ornament_total_weight_24k': Decimal("0"),
-                    'ornament_diamond_carat': Decimal("0"),
-                    'total_gold_weight': Decimal("0"),
-                    'total_silver_weight': Decimal("0"),
-                    'total_diamond_weight': Decimal("0"),
-                    'raw_gold_weight': Decimal("0"),
-                    'raw_silver_weight': Decimal("0"),
-                    'total_jarti': Decimal("0"),
-                    'ornament_gold_amount': Decimal("0"),
-                    'ornament_silver_amount': Decimal("0"),
-                    'ornament_diamond_amount': Decimal("0"),
-                    'ornament_sales_amount': Decimal("0"),
-                    'raw_gold_amount': Decimal("0"),
-                    'raw_silver_amount': Decimal("0"),
-                    'raw_sales_amount': Decimal("0"),
-                    'total_sales_amount': Decimal("0"),
-                    'total_remaining': Decimal("0"),
-                    'total_tax': Decimal("0"),
-                    'total_profit': Decimal("0"),
-                }
-            
-            # Update counts
-            monthly_data[month_key]['sales_count'] += 1
-            
-            # Calculate weights, jarti, and profit
-            ornament_gold_count = 0
-            ornament_silver_count = 0
-            ornament_diamond_count = 0
-            
-            for line in sale.order.order_ornaments.all():
-                weight = line.ornament.weight or Decimal("0")
-                factor = purity_factors.get(getattr(line.ornament, 'type', None), Decimal("1.00"))
-                
-                metal_type = str(getattr(line.ornament, 'metal_type', '')).lower()
-                if metal_type == str(getattr(Ornament.MetalTypeCategory, 'GOLD', 'gold')).lower():
-                    gold_weight_24k = weight * factor
-                    monthly_data[month_key]['ornament_gold_weight'] += weight
-                    monthly_data[month_key]['ornament_gold_weight_24k'] += gold_weight_24k
-                    monthly_data[month_key]['ornament_total_weight_24k'] += gold_weight_24k
-                    ornament_gold_count += 1
-                elif metal_type == str(getattr(Ornament.MetalTypeCategory, 'SILVER', 'silver')).lower():
-                    monthly_data[month_key]['ornament_silver_weight'] += weight
-                    monthly_data[month_key]['ornament_silver_weight_24k'] += weight * factor
-                    ornament_silver_count += 1
-                elif metal_type == str(getattr(Ornament.MetalTypeCategory, 'DIAMOND', 'diamond')).lower():
-                    monthly_data[month_key]['ornament_diamond_weight'] += weight
-                    monthly_data[month_key]['ornament_diamond_weight_24k'] += weight * factor
-                    monthly_data[month_key]['ornament_total_weight_24k'] += weight * factor
-                    monthly_data[month_key]['ornament_diamond_carat'] += line.ornament.diamond_weight or Decimal("0")
-                    ornament_diamond_count += 1
-                
-                # Jarti (customer jarti)
-                jarti_amount = line.jarti or Decimal("0")
-                monthly_data[month_key]['total_jarti'] += jarti_amount
-                
-                # Calculate profit
-                customer_jarti = line.jarti or Decimal("0")
-                ornament_jarti = line.ornament.jarti or Decimal("0")
-                rate = line.gold_rate or Decimal("0")
-                jyala = line.jyala or Decimal("0")
-                
-                jarti_difference = customer_jarti - ornament_jarti
-                profit = (jarti_difference / Decimal("11.664") * rate) + jyala
-                monthly_data[month_key]['total_profit'] += profit
-            
-            # Raw metals with amounts
-            sale_raw_gold_amount = Decimal("0")
-            sale_raw_silver_amount = Decimal("0")
-            for metal in sale.sale_metals.all():
-                metal_amount = metal.line_amount or Decimal("0")
-                if metal.metal_type == 'gold':
-                    monthly_data[month_key]['raw_gold_weight'] += metal.quantity
-                    monthly_data[month_key]['raw_gold_amount'] += metal_amount
-                    sale_raw_gold_amount += metal_amount
-                elif metal.metal_type == 'silver':
-                    monthly_data[month_key]['raw_silver_weight'] += metal.quantity
-                    monthly_data[month_key]['raw_silver_amount'] += metal_amount
-                    sale_raw_silver_amount += metal_amount
-            
-            raw_metal_amount = sale_raw_gold_amount + sale_raw_silver_amount
-            monthly_data[month_key]['raw_sales_amount'] += raw_metal_amount
-
-            monthly_data[month_key]['total_gold_weight'] = (
-                monthly_data[month_key]['ornament_total_weight_24k']
-                + monthly_data[month_key]['raw_gold_weight']
-            )
-            monthly_data[month_key]['total_silver_weight'] = (
-                monthly_data[month_key]['ornament_silver_weight_24k']
-                + monthly_data[month_key]['raw_silver_weight']
-            )
-            monthly_data[month_key]['total_diamond_weight'] = (
-                monthly_data[month_key]['ornament_diamond_weight_24k']
-            )
-            
-            # Calculate ornament sales amount by metal type (proportional split)
-            ornament_amount = (sale.order.total or Decimal("0")) - raw_metal_amount
-            total_ornament_count = ornament_gold_count + ornament_silver_count + ornament_diamond_count
-            
-            if total_ornament_count > 0 and ornament_amount > 0:
-                amount_per_item = ornament_amount / total_ornament_count
-                monthly_data[month_key]['ornament_gold_amount'] += amount_per_item * ornament_gold_count
-                monthly_data[month_key]['ornament_silver_amount'] += amount_per_item * ornament_silver_count
-                monthly_data[month_key]['ornament_diamond_amount'] += amount_per_item * ornament_diamond_count
-            
-            monthly_data[month_key]['ornament_sales_amount'] += ornament_amount
-            
-            # Add order totals
-            monthly_data[month_key]['total_sales_amount'] += sale.order.total or Decimal("0")
-            monthly_data[month_key]['total_remaining'] += sale.order.remaining_amount or Decimal("0")
-            monthly_data[month_key]['total_tax'] += sale.order.tax or Decimal("0")
-            
-        # Convert to sorted list
-        nepali_months = {
-            1: 'Baishakh', 2: 'Jestha', 3: 'Ashadh', 4: 'Shrawan',
-            5: 'Bhadra', 6: 'Ashwin', 7: 'Kartik', 8: 'Mangsir',
-            9: 'Poush', 10: 'Magh', 11: 'Falgun', 12: 'Chaitra'
-        }
-        
-        monthly_list = []
-        for key in sorted(monthly_data.keys(), reverse=True):
-            data = monthly_data[key]
-            data['month_name'] = nepali_months.get(data['month'], str(data['month']))
-            data['month_key'] = key
-            monthly_list.append(data)
+        from sales.models import SalesMonthSummary
+        from sales.monthly_rollup import summary_totals
 
-        totals = {
-            'sales_count': Decimal("0"),
-            'ornament_gold_weight': Decimal("0"),
-            'ornament_gold_weight_24k': Decimal("0"),
-            'ornament_silver_weight': Decimal("0"),
-            'ornament_silver_weight_24k': Decimal("0"),
-            'ornament_diamond_weight': Decimal("0"),
-            'ornament_diamond_weight_24k': Decimal("0"),
-            'ornament_total_weight_24k': Decimal("0"),
-            'ornament_diamond_carat': Decimal("0"),
-            'total_gold_weight': Decimal("0"),
-            'total_silver_weight': Decimal("0"),
-            'total_diamond_weight': Decimal("0"),
-            'raw_gold_weight': Decimal("0"),
-            'raw_silver_weight': Decimal("0"),
-            'ornament_gold_amount': Decimal("0"),
-            'ornament_silver_amount': Decimal("0"),
-            'ornament_diamond_amount': Decimal("0"),
-            'raw_gold_amount': Decimal("0"),
-            'raw_silver_amount': Decimal("0"),
-            'ornament_sales_amount': Decimal("0"),
-            'raw_sales_amount': Decimal("0"),
-            'total_sales_amount': Decimal("0"),
-            'total_tax': Decimal("0"),
-            'total_remaining': Decimal("0"),
-            'total_profit': Decimal("0"),
-        }
+        # One precomputed row per Nepali month, newest first
+        monthly_list = list(SalesMonthSummary.objects.order_by('-year', '-month'))
 
-        for data in monthly_list:
-            totals['sales_count'] += Decimal(str(data.get('sales_count', 0)))
-            totals['ornament_gold_weight'] += data.get('ornament_gold_weight', Decimal("0"))
-            totals['ornament_gold_weight_24k'] += data.get('ornament_gold_weight_24k', Decimal("0"))
-            totals['ornament_silver_weight'] += data.get('ornament_silver_weight', Decimal("0"))
-            totals['ornament_silver_weight_24k'] += data.get('ornament_silver_weight_24k', Decimal("0"))
-            totals['ornament_diamond_weight'] += data.get('ornament_diamond_weight', Decimal("0"))
-            totals['ornament_diamond_weight_24k'] += data.get('ornament_diamond_weight_24k', Decimal("0"))
-            totals['ornament_total_weight_24k'] += data.get('ornament_total_weight_24k', Decimal("0"))
-            totals['ornament_diamond_carat'] += data.get('ornament_diamond_carat', Decimal("0"))
-            totals['total_gold_weight'] += data.get('total_gold_weight', Decimal("0"))
-            totals['total_silver_weight'] += data.get('total_silver_weight', Decimal("0"))
-            totals['total_diamond_weight'] += data.get('total_diamond_weight', Decimal("0"))
-            totals['raw_gold_weight'] += data.get('raw_gold_weight', Decimal("0"))
-            totals['raw_silver_weight'] += data.get('raw_silver_weight', Decimal("0"))
-            totals['ornament_gold_amount'] += data.get('ornament_gold_amount', Decimal("0"))
-            totals['ornament_silver_amount'] += data.get('ornament_silver_amount', Decimal("0"))
-            totals['ornament_diamond_amount'] += data.get('ornament_diamond_amount', Decimal("0"))
-            totals['raw_gold_amount'] += data.get('raw_gold_amount', Decimal("0"))
-            totals['raw_silver_amount'] += data.get('raw_silver_amount', Decimal("0"))
-            totals['ornament_sales_amount'] += data.get('ornament_sales_amount', Decimal("0"))
-            totals['raw_sales_amount'] += data.get('raw_sales_amount', Decimal("0"))
-            totals['total_sales_amount'] += data.get('total_sales_amount', Decimal("0"))
-            totals['total_tax'] += data.get('total_tax', Decimal("0"))
-            totals['total_remaining'] += data.get('total_remaining', Decimal("0"))
-            totals['total_profit'] += data.get('total_profit', Decimal("0"))
-        
         context = {
             'monthly_data': monthly_list,
-            'monthly_totals': totals,
+            'monthly_totals': summary_totals(monthly_list),
         }
         
         return render(request, 'order/reports/monthly_sales.html', context)
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class DailyProfitLossReport(View):
     """Daily Profit & Loss report with charts based on daily rates and stock"""
-    
+
     def get(self, request):
-        from main.models import DailyRate
-        from ornament.models import Ornament
-        from datetime import timedelta
-        
-        # Get number of days to show (default 30)
-        days = int(request.GET.get('days', 30))
-        
-        # Get daily rates for the period
-        rates = DailyRate.objects.all().order_by('-created_at')[:days]
-        
-        # Purity factors for gold
-        purity_factors = {
-            Ornament.TypeCategory.TWENTYFOURKARAT: Decimal("1.00"),
-            Ornament.TypeCategory.TWENTHREEKARAT: Decimal("0.99"),
-            Ornament.TypeCategory.TWENTYTWOKARAT: Decimal("0.98"),
-            Ornament.TypeCategory.EIGHTEENKARAT: Decimal("0.75"),
-            Ornament.TypeCategory.FOURTEENKARAT: Decimal("0.58"),
-        }
-        
-        # Get current stock ornaments
-        gold_ornaments = Ornament.objects.filter(
-            metal_type=Ornament.MetalTypeCategory.GOLD,
-            ornament_type=Ornament.OrnamentCategory.STOCK,
-            status=Ornament.StatusCategory.ACTIVE
-        )
-        
-        silver_ornaments = Ornament.objects.filter(
-            metal_type=Ornament.MetalTypeCategory.SILVER,
-            ornament_type=Ornament.OrnamentCategory.STOCK,
-            status=Ornament.StatusCategory.ACTIVE
-        )
-        
-        diamond_ornaments = Ornament.objects.filter(
-            metal_type=Ornament.MetalTypeCategory.DIAMOND,
-            ornament_type=Ornament.OrnamentCategory.STOCK,
-            status=Ornament.StatusCategory.ACTIVE
+        from ornament.models import Ornament, OrnamentStockSummary
+
+        try:
+            days = int(request.GET.get('days', 30))
+        except ValueError:
+            days = 30
+        days = max(1, min(days, pnl.MAX_DAYS))
+
+        # Today's holdings for the summary cards, also the series' starting point
+        weights = pnl.current_weights()
+        chart_data = pnl.daily_series(days, weights=weights)
+        profit_loss_data = pnl.profit_loss(chart_data)
+
+        counts = dict(
+            OrnamentStockSummary.objects.filter(
+                ornament_type=Ornament.OrnamentCategory.STOCK,
+                status=Ornament.StatusCategory.ACTIVE,
+                metal_type__in=pnl.TRACKED_METALS,
+            ).values('metal_type').annotate(total=Sum('count')).values_list('metal_type', 'total')
         )
-        
-        # Calculate total weights
-        gold_24k_weight = Decimal("0")
-        for ornament in gold_ornaments:
-            weight = ornament.weight or Decimal("0")
-            factor = purity_factors.get(ornament.type, Decimal("1.00"))
-            gold_24k_weight += weight * factor
-        
-        silver_weight = Decimal("0")
-        for ornament in silver_ornaments:
-            silver_weight += ornament.weight or Decimal("0")
-        
-        # Diamond: metal weight + diamond weight
-        diamond_metal_weight = Decimal("0")
-        diamond_stone_weight = Decimal("0")
-        for ornament in diamond_ornaments:
-            weight = ornament.weight or Decimal("0")
-            factor = purity_factors.get(ornament.type, Decimal("1.00"))
-            diamond_metal_weight += weight * factor
-            diamond_stone_weight += ornament.diamond_weight or Decimal("0")
-        
-        # Prepare chart data
-        chart_data = []
-        TOLA_CONVERSION = Decimal("11.664")
-        
-        for rate in reversed(list(rates)):  # Reverse to show oldest to newest
-            # Convert per tola to per gram for calculations
-            gold_rate_per_gram = (rate.gold_rate or Decimal("0")) / TOLA_CONVERSION
-            silver_rate_per_gram = (rate.silver_rate or Decimal("0")) / TOLA_CONVERSION
-            
-            # Gold value
-            gold_value = gold_24k_weight * gold_rate_per_gram
-            
-            # Silver value
-            silver_value = silver_weight * silver_rate_per_gram
-            
-            # Diamond value: metal value + stone value (assuming some diamond rate)
-            # For simplicity, using gold rate for metal part
-            diamond_metal_value = diamond_metal_weight * gold_rate_per_gram
-            # Diamond stone value at estimated rate per gram (you can adjust this)
-            diamond_rate_per_gram = Decimal("5000")  # Example rate
-            diamond_stone_value = diamond_stone_weight * diamond_rate_per_gram
-            diamond_value = diamond_metal_value + diamond_stone_value
-            
-            total_value = gold_value + silver_value + diamond_value
-            
-            chart_data.append({
-                'date': rate.bs_date,
-                'gold_rate': float(rate.gold_rate),
-                'silver_rate': float(rate.silver_rate),
-                'gold_value': float(gold_value),
-                'silver_value': float(silver_value),
-                'diamond_value': float(diamond_value),
-                'total_value': float(total_value),
-            })
-        
-        # Calculate P&L if we have at least 2 data points
-        profit_loss_data = []
-        if len(chart_data) >= 2:
-            base_value = chart_data[0]['total_value']
-            for data in chart_data:
-                pl = data['total_value'] - base_value
-                pl_percent = (pl / base_value * 100) if base_value > 0 else 0
-                profit_loss_data.append({
-                    'date': data['date'],
-                    'value': pl,
-                    'percent': pl_percent,
-                })
-        
+
         # Summary statistics
         if chart_data:
             latest = chart_data[-1]
@@ -840,36 +554,114 @@ class DailyProfitLossReport(View):
         else:
             latest = oldest = None
             total_change = total_change_percent = 0
-        
+
         context = {
             'chart_data': chart_data,
             'profit_loss_data': profit_loss_data,
-            'gold_weight': gold_24k_weight,
-            'silver_weight': silver_weight,
-            'diamond_metal_weight': diamond_metal_weight,
-            'diamond_stone_weight': diamond_stone_weight,
-            'gold_count': gold_ornaments.count(),
-            'silver_count': silver_ornaments.count(),
-            'diamond_count': diamond_ornaments.count(),
+            'gold_weight': weights['gold'],
+            'silver_weight': weights['silver'],
+            'diamond_metal_weight': weights['diamond_metal'],
+            'diamond_stone_weight': weights['diamond_stone'],
+            'stock_gold_weight': weights['stock_gold'],
+            'stock_silver_weight': weights['stock_silver'],
+            'gold_count': counts.get(Ornament.MetalTypeCategory.GOLD, 0),
+            'silver_count': counts.get(Ornament.MetalTypeCategory.SILVER, 0),
+            'diamond_count': counts.get(Ornament.MetalTypeCategory.DIAMOND, 0),
             'latest': latest,
             'oldest': oldest,
             'total_change': total_change,
             'total_change_percent': total_change_percent,
             'days': days,
         }
-        
+
         return render(request, 'order/reports/daily_profit_loss.html', context)
 
 
+def _ornament_stock_by_category(gold_rate_per_gram, silver_rate_per_gram):
+    """Per-category stock totals for active stock ornaments.
+
+    Reads the pre-aggregated ``OrnamentStockSummary`` buckets, so the cost
+    depends on the number of categories and karats, not on stock size.
+    Diamond ornaments are grouped with gold.
+    """
+    from ornament.models import Ornament, OrnamentStockSummary
+
+    # Purity conversion factors to 24K equivalent
+    purity_factors = {
+        Ornament.TypeCategory.TWENTYFOURKARAT: Decimal("1.00"),
+        Ornament.TypeCategory.TWENTHREEKARAT: Decimal("0.99"),
+        Ornament.TypeCategory.TWENTYTWOKARAT: Decimal("0.98"),
+        Ornament.TypeCategory.EIGHTEENKARAT: Decimal("0.75"),
+        Ornament.TypeCategory.FOURTEENKARAT: Decimal("0.58"),
+    }
+
+    buckets = OrnamentStockSummary.objects.filter(
+        ornament_type=Ornament.OrnamentCategory.STOCK,
+        status=Ornament.StatusCategory.ACTIVE,
+        metal_type__in=[
+            Ornament.MetalTypeCategory.GOLD,
+            Ornament.MetalTypeCategory.SILVER,
+            Ornament.MetalTypeCategory.DIAMOND,
+        ],
+        count__gt=0,
+    ).select_related('maincategory')
+
+    gold_category_data = {}
+    silver_category_data = {}
+    totals = {
+        'gold_weight': Decimal("0"),
+        'gold_amount': Decimal("0"),
+        'diamond_weight': Decimal("0"),
+        'silver_weight': Decimal("0"),
+        'silver_amount': Decimal("0"),
+    }
+
+    for bucket in buckets:
+        category_name = bucket.maincategory.name if bucket.maincategory else "Uncategorized"
+        is_silver = bucket.metal_type == Ornament.MetalTypeCategory.SILVER
+        category_data = silver_category_data if is_silver else gold_category_data
+        if category_name not in category_data:
+            category_data[category_name] = {
+                'count': 0,
+                'total_weight': Decimal("0"),
+                'total_diamond': Decimal("0"),
+                'total_amount': Decimal("0"),
+                'metal_type': bucket.metal_type,
+            }
+        data = category_data[category_name]
+        data['count'] += bucket.count
+
+        if is_silver:
+            # Silver: weight × silver rate + jyala
+            amount = bucket.weight * silver_rate_per_gram + bucket.jyala
+            data['total_weight'] += bucket.weight
+            data['total_amount'] += amount
+            totals['silver_weight'] += bucket.weight
+            totals['silver_amount'] += amount
+        else:
+            # Gold and diamond: 24K weight × gold rate + jyala + diamond value
+            weight_24k = bucket.weight * purity_factors.get(bucket.type, Decimal("1.00"))
+            amount = weight_24k * gold_rate_per_gram + bucket.jyala + bucket.diamond_value
+            data['total_weight'] += weight_24k
+            data['total_diamond'] += bucket.diamond_weight
+            data['total_amount'] += amount
+            totals['gold_weight'] += weight_24k
+            totals['gold_amount'] += amount
+            totals['diamond_weight'] += bucket.diamond_weight
+
+    return gold_category_data, silver_category_data, totals
+
+
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class OrnamentStockReport(View):
     """Stock ornament report by category with today's valuation"""
     
     def get(self, request):
-        from ornament.models import Ornament, MainCategory, Stone, Potey
-        from main.models import DailyRate
+        from ornament.models import Stone, Potey
+        from main.services import rates
         
         # Get today's gold and silver rates
-        today_rate = DailyRate.objects.first()
+        today_rate = rates.latest(request)
         gold_rate = today_rate.gold_rate if today_rate else Decimal("0")
         silver_rate = today_rate.silver_rate if today_rate else Decimal("0")
         
@@ -878,129 +670,15 @@ class OrnamentStockReport(View):
         gold_rate_per_gram = gold_rate / TOLA_CONVERSION if gold_rate else Decimal("0")
         silver_rate_per_gram = silver_rate / TOLA_CONVERSION if silver_rate else Decimal("0")
         
-        # Get all active stock ornaments
-        ornaments = Ornament.objects.filter(
-            ornament_type=Ornament.OrnamentCategory.STOCK,
-            status=Ornament.StatusCategory.ACTIVE
-        ).select_related('maincategory', 'subcategory')
-        
-        # Purity conversion factors to 24K equivalent
-        purity_factors = {
-            Ornament.TypeCategory.TWENTYFOURKARAT: Decimal("1.00"),
-            Ornament.TypeCategory.TWENTHREEKARAT: Decimal("0.99"),
-            Ornament.TypeCategory.TWENTYTWOKARAT: Decimal("0.98"),
-            Ornament.TypeCategory.EIGHTEENKARAT: Decimal("0.75"),
-            Ornament.TypeCategory.FOURTEENKARAT: Decimal("0.58"),
-        }
-        
-        # Group ornaments by metal type and main category
-        gold_category_data = {}
-        silver_category_data = {}
-        
-        # Summary totals
-        total_gold_weight = Decimal("0")
-        total_gold_amount = Decimal("0")
-        total_diamond_weight = Decimal("0")
-        total_silver_weight = Decimal("0")
-        total_silver_amount = Decimal("0")
-        
-        for ornament in ornaments:
-            category_name = ornament.maincategory.name if ornament.maincategory else "Uncategorized"
-        for ornament in ornaments:
-            category_name = ornament.maincategory.name if ornament.maincategory else "Uncategorized"
-            
-            # Calculate weight and amount based on metal type
-            if ornament.metal_type == Ornament.MetalTypeCategory.GOLD:
-                if category_name not in gold_category_data:
-                    gold_category_data[category_name] = {
-                        'count': 0,
-                        'total_weight': Decimal("0"),
-                        'total_diamond': Decimal("0"),
-                        'total_amount': Decimal("0"),
-                        'metal_type': 'Gold',
-                    }
-                
-                gold_category_data[category_name]['count'] += 1
-                
-                weight = ornament.weight or Decimal("0")
-                factor = purity_factors.get(ornament.type, Decimal("1.00"))
-                weight_24k = weight * factor
-                
-                gold_category_data[category_name]['total_weight'] += weight_24k
-                
-                # Calculate amount: (weight * gold_rate) + jyala + diamond value
-                gold_value = weight_24k * gold_rate_per_gram
-                jyala = ornament.jyala or Decimal("0")
-                diamond_weight = ornament.diamond_weight or Decimal("0")
-                diamond_value = diamond_weight * (ornament.diamond_rate or Decimal("0"))
-                
-                amount = gold_value + jyala + diamond_value
-                gold_category_data[category_name]['total_amount'] += amount
-                gold_category_data[category_name]['total_diamond'] += diamond_weight
-                
-                # Add to summary
-                total_gold_weight += weight_24k
-                total_gold_amount += amount
-                total_diamond_weight += diamond_weight
-                
-            elif ornament.metal_type == Ornament.MetalTypeCategory.SILVER:
-                if category_name not in silver_category_data:
-                    silver_category_data[category_name] = {
-                        'count': 0,
-                        'total_weight': Decimal("0"),
-                        'total_diamond': Decimal("0"),
-                        'total_amount': Decimal("0"),
-                        'metal_type': 'Silver',
-                    }
-                
-                silver_category_data[category_name]['count'] += 1
-                
-                weight = ornament.weight or Decimal("0")
-                silver_category_data[category_name]['total_weight'] += weight
-                
-                # Calculate amount
-                silver_value = weight * silver_rate_per_gram
-                jyala = ornament.jyala or Decimal("0")
-                amount = silver_value + jyala
-                
-                silver_category_data[category_name]['total_amount'] += amount
-                
-                # Add to summary
-                total_silver_weight += weight
-                total_silver_amount += amount
-                
-            elif ornament.metal_type == Ornament.MetalTypeCategory.DIAMOND:
-                if category_name not in gold_category_data:
-                    gold_category_data[category_name] = {
-                        'count': 0,
-                        'total_weight': Decimal("0"),
-                        'total_diamond': Decimal("0"),
-                        'total_amount': Decimal("0"),
-                        'metal_type': 'Diamond',
-                    }
-                
-                gold_category_data[category_name]['count'] += 1
-                
-                weight = ornament.weight or Decimal("0")
-                factor = purity_factors.get(ornament.type, Decimal("1.00"))
-                weight_24k = weight * factor
-                
-                diamond_weight = ornament.diamond_weight or Decimal("0")
-                gold_category_data[category_name]['total_weight'] += weight_24k
-                gold_category_data[category_name]['total_diamond'] += diamond_weight
-                
-                # Calculate amount
-                gold_value = weight_24k * gold_rate_per_gram
-                jyala = ornament.jyala or Decimal("0")
-                diamond_value = diamond_weight * (ornament.diamond_rate or Decimal("0"))
-                
-                amount = gold_value + jyala + diamond_value
-                gold_category_data[category_name]['total_amount'] += amount
-                
-                # Add to summary (Diamond is counted in gold section)
-                total_gold_weight += weight_24k
-                total_diamond_weight += diamond_weight
-                total_gold_amount += amount
+        # Group stock by metal type and main category
+        gold_category_data, silver_category_data, stock_totals = _ornament_stock_by_category(
+            gold_rate_per_gram, silver_rate_per_gram
+        )
+        total_gold_weight = stock_totals['gold_weight']
+        total_gold_amount = stock_totals['gold_amount']
+        total_diamond_weight = stock_totals['diamond_weight']
+        total_silver_weight = stock_totals['silver_weight']
+        total_silver_amount = stock_totals['silver_amount']
         
         # Get Potey and Stones stock
         potey_stock = Potey.objects.all()
@@ -1062,11 +740,11 @@ class OrnamentStockReport(View):
 
 def ornament_stock_export_excel(request):
     """Export ornament stock report to Excel."""
-    from ornament.models import Ornament, MainCategory, Stone, Potey
-    from main.models import DailyRate
+    from ornament.models import Stone, Potey
+    from main.services import rates
     
     # Get today's gold and silver rates
-    today_rate = DailyRate.objects.first()
+    today_rate = rates.latest()
     gold_rate = today_rate.gold_rate if today_rate else Decimal("0")
     silver_rate = today_rate.silver_rate if today_rate else Decimal("0")
     
@@ -1075,127 +753,15 @@ def ornament_stock_export_excel(request):
     gold_rate_per_gram = gold_rate / TOLA_CONVERSION if gold_rate else Decimal("0")
     silver_rate_per_gram = silver_rate / TOLA_CONVERSION if silver_rate else Decimal("0")
     
-    # Get all active stock ornaments
-    ornaments = Ornament.objects.filter(
-        ornament_type=Ornament.OrnamentCategory.STOCK,
-        status=Ornament.StatusCategory.ACTIVE
-    ).select_related('maincategory', 'subcategory')
-    
-    # Purity conversion factors to 24K equivalent
-    purity_factors = {
-        Ornament.TypeCategory.TWENTYFOURKARAT: Decimal("1.00"),
-        Ornament.TypeCategory.TWENTHREEKARAT: Decimal("0.99"),
-        Ornament.TypeCategory.TWENTYTWOKARAT: Decimal("0.98"),
-        Ornament.TypeCategory.EIGHTEENKARAT: Decimal("0.75"),
-        Ornament.TypeCategory.FOURTEENKARAT: Decimal("0.58"),
-    }
-    
-    # Group ornaments by metal type and main category
-    gold_category_data = {}
-    silver_category_data = {}
-    
-    # Summary totals
-    total_gold_weight = Decimal("0")
-    total_gold_amount = Decimal("0")
-    total_diamond_weight = Decimal("0")
-    total_silver_weight = Decimal("0")
-    total_silver_amount = Decimal("0")
-    
-    for ornament in ornaments:
-        category_name = ornament.maincategory.name if ornament.maincategory else "Uncategorized"
-        
-        # Calculate weight and amount based on metal type
-        if ornament.metal_type == Ornament.MetalTypeCategory.GOLD:
-            if category_name not in gold_category_data:
-                gold_category_data[category_name] = {
-                    'count': 0,
-                    'total_weight': Decimal("0"),
-                    'total_diamond': Decimal("0"),
-                    'total_amount': Decimal("0"),
-                    'metal_type': 'Gold',
-                }
-            
-            gold_category_data[category_name]['count'] += 1
-            
-            weight = ornament.weight or Decimal("0")
-            factor = purity_factors.get(ornament.type, Decimal("1.00"))
-            weight_24k = weight * factor
-            
-            gold_category_data[category_name]['total_weight'] += weight_24k
-            
-            # Calculate amount: (weight * gold_rate) + jyala + diamond value
-            gold_value = weight_24k * gold_rate_per_gram
-            jyala = ornament.jyala or Decimal("0")
-            diamond_weight = ornament.diamond_weight or Decimal("0")
-            diamond_value = diamond_weight * (ornament.diamond_rate or Decimal("0"))
-            
-            amount = gold_value + jyala + diamond_value
-            gold_category_data[category_name]['total_amount'] += amount
-            gold_category_data[category_name]['total_diamond'] += diamond_weight
-            
-            # Add to summary
-            total_gold_weight += weight_24k
-            total_gold_amount += amount
-            total_diamond_weight += diamond_weight
-            
-        elif ornament.metal_type == Ornament.MetalTypeCategory.SILVER:
-            if category_name not in silver_category_data:
-                silver_category_data[category_name] = {
-                    'count': 0,
-                    'total_weight': Decimal("0"),
-                    'total_diamond': Decimal("0"),
-                    'total_amount': Decimal("0"),
-                    'metal_type': 'Silver',
-                }
-            
-            silver_category_data[category_name]['count'] += 1
-            
-            weight = ornament.weight or Decimal("0")
-            silver_category_data[category_name]['total_weight'] += weight
-            
-            # Calculate amount
-            silver_value = weight * silver_rate_per_gram
-            jyala = ornament.jyala or Decimal("0")
-            amount = silver_value + jyala
-            
-            silver_category_data[category_name]['total_amount'] += amount
-            
-            # Add to summary
-            total_silver_weight += weight
-            total_silver_amount += amount
-            
-        elif ornament.metal_type == Ornament.MetalTypeCategory.DIAMOND:
-            if category_name not in gold_category_data:
-                gold_category_data[category_name] = {
-                    'count': 0,
-                    'total_weight': Decimal("0"),
-                    'total_diamond': Decimal("0"),
-                    'total_amount': Decimal("0"),
-                    'metal_type': 'Diamond',
-                }
-            
-            gold_category_data[category_name]['count'] += 1
-            
-            weight = ornament.weight or Decimal("0")
-            factor = purity_factors.get(ornament.type, Decimal("1.00"))
-            weight_24k = weight * factor
-            
-            diamond_weight = ornament.diamond_weight or Decimal("0")
-            gold_category_data[category_name]['total_weight'] += weight_24k
-            gold_category_data[category_name]['total_diamond'] += diamond_weight
-            
-            # Calculate amount
-            gold_value = weight_24k * gold_rate_per_gram
-            jyala = ornament.jyala or Decimal("0")
-            diamond_value = diamond_weight * (ornament.diamond_rate or Decimal("0"))
-            
-            amount = gold_value + jyala + diamond_value
-            gold_category_data[category_name]['total_amount'] += amount
-            
-            # Add to summary (Diamond is counted in gold section)
-            total_gold_weight += weight_24k
-            total_diamond_weight += diamond_weight
-            total_gold_amount += amount
+    # Group stock by metal type and main category
+    gold_category_data, silver_category_data, stock_totals = _ornament_stock_by_category(
+        gold_rate_per_gram, silver_rate_per_gram
+    )
+    total_gold_weight = stock_totals['gold_weight']
+    total_gold_amount = stock_totals['gold_amount']
+    total_diamond_weight = stock_totals['diamond_weight']
+    total_silver_weight = stock_totals['silver_weight']
+    total_silver_amount = stock_totals['silver_amount']
     
     # Get Potey and Stones stock
     potey_stock = Potey.objects.all()
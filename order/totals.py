@@ -0,0 +1,174 @@
+"""SQL-side order figures.
+
+``annotate_order_figures`` attaches each order's ornament weight and 24K gold
+weight as correlated subqueries, and ``status_totals`` groups an annotated
+order queryset by status, so every tab's count and totals come from one
+query instead of a Python pass over the order lines per status.
+``line_figures`` sums one order's line amounts and payments in one query
+for ``Order.recompute_totals_from_lines``, ``with_total_paid`` lets
+list and report querysets carry ``Order.total_paid`` as an annotation, and
+``with_line_counts`` counts each order's ornament and metal lines.
+"""
+from decimal import Decimal
+
+from django.db.models import Case, Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from ornament.models import Ornament
+
+from .models import Order, OrderMetalStock, OrderOrnament, OrderPayment
+
+ZERO = Decimal("0")
+
+WEIGHT_FIELD = DecimalField(max_digits=18, decimal_places=5)
+AMOUNT_FIELD = DecimalField(max_digits=18, decimal_places=2)
+
+# Line metals that count towards the taxable amount (silver is exempt).
+TAXABLE_METALS = ("gold", "diamond")
+
+# Purity factors the order list has always used for its 24K gold figures.
+PURITY_FACTORS = {
+    Ornament.TypeCategory.TWENTYFOURKARAT: Decimal("1.00"),
+    Ornament.TypeCategory.TWENTHREEKARAT: Decimal("0.99"),
+    Ornament.TypeCategory.TWENTYTWOKARAT: Decimal("0.98"),
+    Ornament.TypeCategory.EIGHTEENKARAT: Decimal("0.75"),
+    Ornament.TypeCategory.FOURTEENKARAT: Decimal("0.60"),
+}
+
+TOTAL_FIELDS = ("count", "remaining", "amount", "total", "gold_24k_weight")
+
+
+def _purity_factor():
+    whens = [When(ornament__type=karat, then=Value(factor)) for karat, factor in PURITY_FACTORS.items()]
+    return Case(*whens, default=Value(Decimal("1.00")), output_field=WEIGHT_FIELD)
+
+
+def _sum(lines, expression):
+    rows = (
+        lines.order_by()
+        .values("order")
+        .annotate(_total=Sum(expression, output_field=WEIGHT_FIELD))
+        .values("_total")
+    )
+    return Subquery(rows, output_field=WEIGHT_FIELD)
+
+
+def annotate_order_figures(queryset):
+    """Annotate an Order queryset with ``total_weight`` and ``gold_24k_weight``."""
+    lines = OrderOrnament.objects.filter(order=OuterRef("pk"))
+    gold_lines = lines.filter(ornament__metal_type=Ornament.MetalTypeCategory.GOLD)
+    return queryset.annotate(
+        total_weight=_sum(lines, "ornament__weight"),
+        gold_24k_weight=Coalesce(
+            _sum(gold_lines, Coalesce(F("ornament__weight"), Value(ZERO)) * _purity_factor()),
+            Value(ZERO),
+            output_field=WEIGHT_FIELD,
+        ),
+    )
+
+
+def _empty():
+    totals = dict.fromkeys(TOTAL_FIELDS, ZERO)
+    totals["count"] = 0
+    return totals
+
+
+def status_totals(annotated_queryset):
+    """Return ``{status: totals}`` for every order status with one grouped query.
+
+    Each totals dict has the keys in :data:`TOTAL_FIELDS`; statuses without
+    orders get zeros.
+    """
+    rows = (
+        annotated_queryset.order_by()
+        .values("status")
+        .annotate(
+            count=Count("pk"),
+            remaining=Sum("remaining_amount"),
+            amount=Sum("amount"),
+            total=Sum("total"),
+            gold_24k_weight=Sum("gold_24k_weight"),
+        )
+    )
+    result = {status: _empty() for status, _label in Order.STATUS_CHOICES}
+    for row in rows:
+        totals = result.setdefault(row["status"], _empty())
+        for field in TOTAL_FIELDS:
+            totals[field] = row[field] or totals[field]
+    return result
+
+
+def overall_totals(by_status):
+    """Sum the per-status totals from :func:`status_totals`."""
+    overall = _empty()
+    for totals in by_status.values():
+        for field in TOTAL_FIELDS:
+            overall[field] += totals[field]
+    return overall
+
+
+def _taxable(field):
+    query = Q()
+    for metal in TAXABLE_METALS:
+        query |= Q(**{f"{field}__iexact": metal})
+    return query
+
+
+def _amount_sum(rows, field):
+    rows = rows.order_by().values("order").annotate(_total=Sum(field)).values("_total")
+    return Coalesce(Subquery(rows, output_field=AMOUNT_FIELD), Value(ZERO), output_field=AMOUNT_FIELD)
+
+
+def line_figures(order_pk):
+    """``{"amount", "taxable_amount", "paid"}`` of one order, in one query.
+
+    ``amount`` and ``taxable_amount`` are before discount and cover both
+    ornament and raw-metal lines.
+    """
+    ornament_lines = OrderOrnament.objects.filter(order=OuterRef("pk"))
+    metal_lines = OrderMetalStock.objects.filter(order=OuterRef("pk"))
+    payments = OrderPayment.objects.filter(order=OuterRef("pk"))
+    figures = (
+        Order.objects.filter(pk=order_pk)
+        .annotate(
+            _ornament_amount=_amount_sum(ornament_lines, "line_amount"),
+            _ornament_taxable=_amount_sum(ornament_lines.filter(_taxable("ornament__metal_type")), "line_amount"),
+            _metal_amount=_amount_sum(metal_lines, "line_amount"),
+            _metal_taxable=_amount_sum(metal_lines.filter(_taxable("metal_type")), "line_amount"),
+            _paid=_amount_sum(payments, "amount"),
+        )
+        .values("_ornament_amount", "_ornament_taxable", "_metal_amount", "_metal_taxable", "_paid")
+        .get()
+    )
+    return {
+        "amount": figures["_ornament_amount"] + figures["_metal_amount"],
+        "taxable_amount": figures["_ornament_taxable"] + figures["_metal_taxable"],
+        "paid": figures["_paid"],
+    }
+
+
+def with_total_paid(queryset):
+    """Annotate an Order queryset with ``paid_total`` (the sum of its payments).
+
+    ``Order.total_paid`` returns the annotated value instead of summing the
+    payments again.
+    """
+    payments = OrderPayment.objects.filter(order=OuterRef("pk"))
+    return queryset.annotate(paid_total=_amount_sum(payments, "amount"))
+
+
+def _count(rows):
+    rows = rows.order_by().values("order").annotate(_count=Count("pk")).values("_count")
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def with_line_counts(queryset):
+    """Annotate an Order queryset with ``ornament_count`` and ``metal_count``.
+
+    Each count is its own subquery; counting both relations in one join
+    would multiply the rows.
+    """
+    return queryset.annotate(
+        ornament_count=_count(OrderOrnament.objects.filter(order=OuterRef("pk"))),
+        metal_count=_count(OrderMetalStock.objects.filter(order=OuterRef("pk"))),
+    )
@@ -4,7 +4,8 @@ from django.views.generic import ListView, CreateView, UpdateView
 from django.views.generic.edit import DeleteView
 from django.http import JsonResponse, HttpResponse
 from django.views import View
-from django.db.models import Q, Sum, F
+from django.db import transaction
+from django.db.models import Q, F
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils.decorators import method_decorator
@@ -18,10 +19,15 @@ import openpyxl
 from openpyxl.utils import get_column_letter
 
 from .models import Order, OrderOrnament, OrderPayment, OrderMetalStock
+from . import totals as order_totals
+from .lines import parse_lines, save_order_lines
 from sales.models import Sale
 from .forms import OrderForm, OrnamentFormSet, MetalStockFormSet
 from ornament.models import Ornament, Kaligar, MainCategory, SubCategory
+from ornament import search as ornament_search
 from goldsilverpurchase.models import MetalStock, MetalStockMovement
+from common.bulk_import import chunked
+from common.xlsx_export import XlsxExport, stream
 
 app_name = 'order'
 
@@ -37,11 +43,7 @@ class SearchOrnamentsAPI(View):
         ).select_related('order').order_by('-id')
         
         if query:
-            ornaments = ornaments.filter(
-                Q(ornament_name__icontains=query) |
-                Q(code__icontains=query) |
-                Q(weight__icontains=query)
-            )
+            ornaments = ornament_search.search(ornaments, query, weight_fields=('weight',))
         
         data = []
         for ornament in ornaments[:50]:  # Increased limit to 50 results
@@ -173,90 +175,46 @@ class OrderListView(LoginRequiredMixin, ListView):
     context_object_name = 'orders'
     ordering = ['-order_date', '-sn']
     paginate_by = 25
+    default_status = 'order'
 
-    def get_queryset(self):
+    def get_base_queryset(self):
         """Show only orders that have not yet been converted to sales, except for delivered orders which should always show."""
-        qs = super().get_queryset()
-        # Show orders without sales OR delivered orders (delivered orders should be visible even if in sales)
-        return (
-            qs.filter(Q(sale__isnull=True) | Q(status='delivered'))
-            .annotate(total_weight=Sum('order_ornaments__ornament__weight'))
-            .prefetch_related(
-                'order_ornaments__ornament',
-                'payments',
-                'ornaments',  # ornament FK on Ornament model if present
-            )
-            .distinct()  # Remove duplicates from OR condition
+        # Sale is one-to-one with Order, so the OR below cannot duplicate rows.
+        return order_totals.annotate_order_figures(
+            Order.objects.filter(Q(sale__isnull=True) | Q(status='delivered')).order_by(*self.ordering)
         )
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        # Get unpaginated queryset for aggregations and calculations
-        qs = self.get_queryset()  # Fresh queryset without pagination
-
-        # Group orders by status
-        orders_by_status = {}
-        status_choices = {choice[0]: choice[1] for choice in Order.STATUS_CHOICES}
-        
-        for status_key in status_choices:
-            orders_by_status[status_key] = qs.filter(status=status_key).order_by('-order_date', '-sn')
-        
-        ctx['orders_by_status'] = orders_by_status
-        ctx['status_choices'] = status_choices
-
-        aggregates = qs.aggregate(
-            total_remaining=Sum('remaining_amount'),
-            total_amount=Sum('amount'),
-            total_total=Sum('total'),
-        )
+    def get_active_status(self):
+        status = self.request.GET.get('status', self.default_status)
+        return status if status in dict(Order.STATUS_CHOICES) else self.default_status
 
-        purity_factors = {
-            '24KARAT': Decimal('1.00'),
-            '23KARAT': Decimal('0.99'),
-            '22KARAT': Decimal('0.98'),
-            '18KARAT': Decimal('0.75'),
-            '14KARAT': Decimal('0.60'),
-        }
-
-        gold_lines = (
-            OrderOrnament.objects.filter(order__in=qs)
-            .select_related('ornament')
-            .filter(ornament__metal_type=Ornament.MetalTypeCategory.GOLD)
+    def get_queryset(self):
+        # Only the selected tab is fetched and paginated; the other tabs are
+        # links whose counts come from the grouped totals query.
+        self.active_status = self.get_active_status()
+        return (
+            order_totals.with_total_paid(self.get_base_queryset())
+            .filter(status=self.active_status)
+            .select_related('sale')
+            .prefetch_related('order_ornaments__ornament', 'order_metals', 'payments')
         )
 
-        total_24k_weight = Decimal('0')
-        for line in gold_lines:
-            weight = line.ornament.weight or Decimal('0')
-            factor = purity_factors.get(line.ornament.type, Decimal('1.00'))
-            total_24k_weight += weight * factor
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        by_status = order_totals.status_totals(self.get_base_queryset())
+        overall = order_totals.overall_totals(by_status)
 
-        ctx['total_24k_weight'] = float(total_24k_weight)
-        ctx['order_count'] = qs.count()
+        ctx['status_choices'] = dict(Order.STATUS_CHOICES)
+        ctx['active_status'] = self.active_status
+        ctx['status_totals'] = by_status
+        ctx['status_counts'] = {status: totals['count'] for status, totals in by_status.items()}
+        ctx['status_24k_weights'] = {status: float(totals['gold_24k_weight']) for status, totals in by_status.items()}
 
+        ctx['total_24k_weight'] = float(overall['gold_24k_weight'])
+        ctx['order_count'] = overall['count']
         # Profit proxy: total - amount (net over line base) across orders
-        total_total = aggregates.get('total_total') or 0
-        total_amount = aggregates.get('total_amount') or 0
-        ctx['total_profit'] = float(total_total - total_amount)
-
-        ctx['total_remaining'] = float(aggregates.get('total_remaining') or 0)
-
-        # Calculate 24K weight for each status
-        status_24k_weights = {}
-        for status_key, orders_list in orders_by_status.items():
-            status_24k = Decimal('0')
-            status_gold_lines = (
-                OrderOrnament.objects.filter(order__in=orders_list)
-                .select_related('ornament')
-                .filter(ornament__metal_type=Ornament.MetalTypeCategory.GOLD)
-            )
-            for line in status_gold_lines:
-                weight = line.ornament.weight or Decimal('0')
-                factor = purity_factors.get(line.ornament.type, Decimal('1.00'))
-                status_24k += weight * factor
-            status_24k_weights[status_key] = float(status_24k)
-        
-        ctx['status_24k_weights'] = status_24k_weights
-
+        ctx['total_profit'] = float(overall['total'] - overall['amount'])
+        ctx['total_remaining'] = float(overall['remaining'])
         return ctx
 
 
@@ -315,47 +273,14 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
     def get_success_url(self):
         return reverse_lazy('order:list')
 
+    @transaction.atomic
     def form_valid(self, form):
         # Save the order first
         self.object = form.save()
 
-
-        # Create per-line OrderOrnament entries from JSON payload
-        order_lines_raw = form.cleaned_data.get('order_lines_json') or '[]'
-        try:
-            lines = json.loads(order_lines_raw)
-        except (TypeError, ValueError):
-            lines = []
-
-        for line in lines:
-            ornament_id = line.get('ornament_id')
-            if not ornament_id:
-                continue
-            try:
-                ornament = Ornament.objects.get(pk=ornament_id)
-            except Ornament.DoesNotExist:
-                continue
-
-            OrderOrnament.objects.create(
-                order=self.object,
-                ornament=ornament,
-                gold_rate=Decimal(str(line.get('gold_rate', 0) or 0)),
-                diamond_rate=Decimal(str(line.get('diamond_rate', 0) or 0)),
-                zircon_rate=Decimal(str(line.get('zircon_rate', 0) or 0)),
-                stone_rate=Decimal(str(line.get('stone_rate', 0) or 0)),
-                jarti=Decimal(str(line.get('jarti', 0) or 0)),
-                own_gold=Decimal(str(line.get('own_gold', 0) or 0)),
-                jyala=Decimal(str(line.get('jyala', 0) or 0)),
-                line_amount=Decimal(str(line.get('line_amount', 0) or 0)),
-            )
-
-            # Also mark ornament as belonging to this order and flag as ORDER type
-            ornament.order = self.object
-            try:
-                ornament.ornament_type = Ornament.OrnamentCategory.ORDER
-            except AttributeError:
-                ornament.ornament_type = 'order'
-            ornament.save()
+        # Create per-line OrderOrnament entries from JSON payload and mark
+        # their ornaments as belonging to this order
+        save_order_lines(self.object, parse_lines(form.cleaned_data.get('order_lines_json')))
 
         # Save metal stock formset - NOW with the saved order instance
         metal_stock_formset = MetalStockFormSet(self.request.POST, instance=self.object)
@@ -566,63 +491,18 @@ class OrderUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse_lazy('order:list')
 
+    @transaction.atomic
     def form_valid(self, form):
         # Save the order
         self.object = form.save()
 
-        # Rebuild per-line OrderOrnament entries from JSON payload
-        order_lines_raw = form.cleaned_data.get('order_lines_json') or '[]'
-        try:
-            lines = json.loads(order_lines_raw)
-        except (TypeError, ValueError):
-            lines = []
-
-        # Clear existing lines
-        self.object.order_ornaments.all().delete()
+        # Rebuild per-line OrderOrnament entries from JSON payload; ornaments
+        # no longer on the order go back to stock
+        save_order_lines(self.object, parse_lines(form.cleaned_data.get('order_lines_json')), replace=True)
 
         # Clear existing payments (will be rebuilt below)
         self.object.payments.all().delete()
 
-        new_ornament_ids = []
-        for line in lines:
-            ornament_id = line.get('ornament_id')
-            if not ornament_id:
-                continue
-            try:
-                ornament = Ornament.objects.get(pk=ornament_id)
-            except Ornament.DoesNotExist:
-                continue
-
-            OrderOrnament.objects.create(
-                order=self.object,
-                ornament=ornament,
-                gold_rate=Decimal(str(line.get('gold_rate', 0) or 0)),
-                diamond_rate=Decimal(str(line.get('diamond_rate', 0) or 0)),
-                zircon_rate=Decimal(str(line.get('zircon_rate', 0) or 0)),
-                stone_rate=Decimal(str(line.get('stone_rate', 0) or 0)),
-                jarti=Decimal(str(line.get('jarti', 0) or 0)),
-                own_gold=Decimal(str(line.get('own_gold', 0) or 0)),
-                jyala=Decimal(str(line.get('jyala', 0) or 0)),
-                line_amount=Decimal(str(line.get('line_amount', 0) or 0)),
-            )
-
-            # Track and mark ornaments linked to this order
-            new_ornament_ids.append(ornament.id)
-            ornament.order = self.object
-            try:
-                ornament.ornament_type = Ornament.OrnamentCategory.ORDER
-            except AttributeError:
-                ornament.ornament_type = 'order'
-            ornament.save()
-
-        # Detach ornaments no longer present in this order
-        if new_ornament_ids:
-            # Revert ornament_type back to STOCK for removed ornaments
-            Ornament.objects.filter(order=self.object).exclude(id__in=new_ornament_ids).update(
-                order=None,
-                ornament_type='stock',
-            )
-
         # Save metal stock formset - NOW with the saved order instance
         metal_stock_formset = MetalStockFormSet(self.request.POST, instance=self.object)
         
@@ -842,7 +722,7 @@ def order_print_view(request):
 
     view = OrderListView()
     view.request = request
-    orders = view.get_queryset()
+    orders = view.get_base_queryset()
 
     return render(request, "order/print_view.html", {"orders": orders})
 
@@ -853,11 +733,12 @@ def order_export_excel(request):
 
     view = OrderListView()
     view.request = request
-    orders = view.get_queryset()
+    orders = view.get_base_queryset()
+    order_ids = orders.order_by().values("pk")
+    order_sort = ("-order__order_date", "-order__sn")
 
-    wb = openpyxl.Workbook()
-    ws_orders = wb.active
-    ws_orders.title = "Orders"
+    status_labels = dict(Order.STATUS_CHOICES)
+    payment_labels = dict(Order.PAYMENT_CHOICES)
 
     order_headers = [
         "Order No",
@@ -875,28 +756,30 @@ def order_export_excel(request):
         "Paid Amount",
         "Remaining Amount",
     ]
-    ws_orders.append(order_headers)
-
-    for o in orders:
-        ws_orders.append([
-            o.sn,
-            str(o.order_date) if o.order_date else "",
-            str(o.deliver_date) if o.deliver_date else "",
-            o.customer_name,
-            o.phone_number,
-            o.get_status_display(),
-            o.amount,
-            o.discount,
-            o.subtotal,
-            o.tax,
-            o.total,
-            o.get_payment_mode_display(),
-            o.payment_amount,
-            o.remaining_amount,
-        ])
-
-    # Sheet 2: Order Ornaments (line items)
-    ws_lines = wb.create_sheet(title="OrderOrnaments")
+
+    def order_rows():
+        rows = stream(
+            orders.order_by("-order_date", "-sn"),
+            "sn", "order_date", "deliver_date", "customer_name", "phone_number", "status",
+            "amount", "discount", "subtotal", "tax", "total", "remaining_amount",
+        )
+        # Payments for each chunk of streamed orders are fetched together.
+        for batch in chunked(rows):
+            modes, paid = {}, {}
+            payments = OrderPayment.objects.filter(order_id__in=[row[0] for row in batch])
+            for order_id, mode, amount in payments.values_list("order_id", "payment_mode", "amount"):
+                modes.setdefault(order_id, []).append(payment_labels.get(mode, mode))
+                paid[order_id] = paid.get(order_id, Decimal("0")) + (amount or Decimal("0"))
+            for row in batch:
+                yield (
+                    *row[:5],
+                    status_labels.get(row[5], row[5]),
+                    *row[6:11],
+                    ", ".join(modes.get(row[0], [])),
+                    paid.get(row[0], Decimal("0")),
+                    row[11],
+                )
+
     line_headers = [
         "Order No",
         "Customer",
@@ -916,46 +799,17 @@ def order_export_excel(request):
         "Jyala",
         "Line Amount",
     ]
-    ws_lines.append(line_headers)
-
-    for o in orders.prefetch_related("order_ornaments__ornament"):
-        for line in o.order_ornaments.all():
-            orn = line.ornament
-            ws_lines.append([
-                o.sn,
-                o.customer_name,
-                orn.code if orn else "",
-                orn.ornament_name if orn else "",
-                orn.metal_type if orn else "",
-                float(orn.weight or 0) if orn else 0,
-                float(orn.diamond_weight or 0) if orn else 0,
-                float(getattr(orn, "zircon_weight", 0) or 0) if orn else 0,
-                float(orn.stone_weight or 0) if orn else 0,
-                line.gold_rate,
-                line.diamond_rate,
-                line.zircon_rate,
-                line.stone_rate,
-                line.jarti,
-                line.own_gold,
-                line.jyala,
-                line.line_amount,
-            ])
+    lines = stream(
+        OrderOrnament.objects.filter(order_id__in=order_ids).order_by(*order_sort, "pk"),
+        "order_id", "order__customer_name", "ornament__code", "ornament__ornament_name", "ornament__metal_type",
+        "ornament__weight", "ornament__diamond_weight", "ornament__zircon_weight", "ornament__stone_weight",
+        "gold_rate", "diamond_rate", "zircon_rate", "stone_rate", "jarti", "own_gold", "jyala", "line_amount",
+    )
+    line_rows = (
+        (*row[:5], *(float(weight or 0) for weight in row[5:9]), *row[9:])
+        for row in lines
+    )
 
-    # Auto column width helper
-    def autosize(sheet):
-        for col in sheet.columns:
-            max_length = 0
-            col_letter = get_column_letter(col[0].column)
-            for cell in col:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            sheet.column_dimensions[col_letter].width = max_length + 2
-
-    autosize(ws_orders)
-    autosize(ws_lines)
-
-    # Sheet 3: Order Payments
-    ws_pay = wb.create_sheet(title="OrderPayments")
     pay_headers = [
         "Order No",
         "Customer",
@@ -963,31 +817,26 @@ def order_export_excel(request):
         "Amount",
         "Created",
     ]
-    ws_pay.append(pay_headers)
-
-    for o in orders.prefetch_related("payments"):
-        for p in o.payments.all():
-            ws_pay.append([
-                o.sn,
-                o.customer_name,
-                p.get_payment_mode_display() if hasattr(p, "get_payment_mode_display") else p.payment_mode,
-                p.amount,
-                p.created_at.strftime("%Y-%m-%d %H:%M") if p.created_at else "",
-            ])
-
-    autosize(ws_pay)
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    response = HttpResponse(
-        output.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    payments = stream(
+        OrderPayment.objects.filter(order_id__in=order_ids).order_by(*order_sort, "-created_at"),
+        "order_id", "order__customer_name", "payment_mode", "amount", "created_at",
+    )
+    pay_rows = (
+        (
+            order_id,
+            customer_name,
+            payment_labels.get(mode, mode),
+            amount,
+            created_at.strftime("%Y-%m-%d %H:%M") if created_at else "",
+        )
+        for order_id, customer_name, mode, amount, created_at in payments
     )
-    response["Content-Disposition"] = 'attachment; filename="orders.xlsx"'
 
-    return response
+    export = XlsxExport()
+    export.add_sheet("Orders", order_headers, order_rows())
+    export.add_sheet("OrderOrnaments", line_headers, line_rows)
+    export.add_sheet("OrderPayments", pay_headers, pay_rows)
+    return export.response("orders.xlsx")
 
 
 @login_required(login_url='/accounts/login/')
@@ -995,7 +844,7 @@ def order_ornaments_export_excel(request):
     """Export order line items (OrderOrnament) to Excel."""
     view = OrderListView()
     view.request = request
-    orders = view.get_queryset()
+    orders = view.get_base_queryset()
 
     wb = openpyxl.Workbook()
     ws = wb.active
@@ -1070,7 +919,7 @@ def order_payments_export_excel(request):
     """Export order payments to Excel."""
     view = OrderListView()
     view.request = request
-    orders = view.get_queryset()
+    orders = view.get_base_queryset()
 
     wb = openpyxl.Workbook()
     ws = wb.active
@@ -6,6 +6,7 @@ from django.urls import reverse
 from django.utils.html import format_html
 from .models import MainCategory, SubCategory, Ornament
 from .models import Kaligar, Kaligar_Ornaments, Kaligar_CashAccount, Kaligar_GoldAccount
+from .models import PendingImagePurge
 
 @admin.register(MainCategory)
 class MainCategory(admin.ModelAdmin):
@@ -59,3 +60,13 @@ class KaligarAdmin(admin.ModelAdmin):
     search_fields = ('name', 'panno', 'phone_no')
     inlines = [KaligarOrnamentsInline, KaligarCashAccountInline, KaligarGoldAccountInline]
 
+
+@admin.register(PendingImagePurge)
+class PendingImagePurgeAdmin(admin.ModelAdmin):
+    list_display = ('public_id', 'attempts', 'last_error', 'created_at')
+    search_fields = ('public_id',)
+    actions = ['retry']
+
+    @admin.action(description='Retry on the next image cleanup run')
+    def retry(self, request, queryset):
+        queryset.update(attempts=0, last_error='')
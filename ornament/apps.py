@@ -9,6 +9,8 @@ class OrnamentConfig(AppConfig):
         # Import signal handlers to ensure they are registered when the app is loaded
         try:
             import ornament.signals  # noqa: F401
+            import ornament.barcodes  # noqa: F401  (background tasks)
+            import ornament.images  # noqa: F401
         except Exception:
             # Avoid raising on import errors during manage.py commands that don't need signals
             pass
@@ -0,0 +1,208 @@
+"""Barcode image rendering queue.
+
+Saving an ornament used to start a thread that rendered its barcode PNG
+to a temp file and uploaded it to Cloudinary; an import of 500 ornaments
+started 500 threads, each with its own DB connection, and any still
+running died with the web worker.  Now a save only notes the ornament's pk
+(:func:`queue`); when the transaction commits, the pks noted in it are
+added to the waiting ``ornament.render_barcodes`` background job, or
+become a new one, which ``manage.py run_jobs`` picks up.  With
+``BACKGROUND_JOBS_EAGER`` nothing is queued, so uploads never run inside a
+request; ``manage.py generate_barcode_images`` renders what is pending.
+
+The job renders the PNGs in memory and uploads them through the uploader's
+shared connection pool, in batches of :data:`BATCH_SIZE`, and retries
+failed uploads.  It writes each batch's ``barcode_image`` values with a
+single ``bulk_update``.  Ornaments that still fail simply stay pending:
+ornaments with a barcode but no image *are* the queue.  A later job, or
+``manage.py generate_barcode_images``, picks them up again.
+
+``settings.BARCODE_STORAGE = 'local'`` writes the PNGs under
+``BARCODE_LOCAL_DIR`` instead of uploading them, so the pipeline runs
+offline (tests, development).
+"""
+from __future__ import annotations
+
+import logging
+import time
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from common.bulk_import import chunked
+from main.services.jobs import enqueue, report, task
+
+logger = logging.getLogger(__name__)
+
+TASK_KIND = 'ornament.render_barcodes'
+FOLDER = 'barcodes'
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 1.0
+
+_PENDING_ATTR = '_ornament_barcodes_pending'
+
+
+def render_png(code: str) -> bytes:
+    """CODE128 barcode image for ``code`` as PNG bytes."""
+    import barcode
+    from barcode.writer import ImageWriter
+
+    buffer = BytesIO()
+    barcode.get_barcode_class('code128')(code, writer=ImageWriter()).write(buffer)
+    return buffer.getvalue()
+
+
+def public_id_for(code: str) -> str:
+    return f'barcode_{code}'
+
+
+class CloudinaryStore:
+    """Uploads to the ``barcodes/`` folder of the configured Cloudinary account."""
+
+    def save(self, public_id: str, content: bytes) -> str:
+        import cloudinary.uploader
+
+        result = cloudinary.uploader.upload(
+            BytesIO(content), folder=f'{FOLDER}/', public_id=public_id, overwrite=True,
+        )
+        return result['public_id']
+
+
+class LocalStore:
+    """Writes ``<root>/<public_id>.png``; for offline runs and tests."""
+
+    def __init__(self, root=None):
+        self.root = Path(root or getattr(settings, 'BARCODE_LOCAL_DIR', Path(settings.BASE_DIR) / 'media' / FOLDER))
+
+    def save(self, public_id: str, content: bytes) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / f'{public_id}.png').write_bytes(content)
+        return f'{FOLDER}/{public_id}'
+
+
+def get_store():
+    if getattr(settings, 'BARCODE_STORAGE', 'cloudinary') == 'local':
+        return LocalStore()
+    return CloudinaryStore()
+
+
+def pending():
+    """Ornaments that have a barcode but no barcode image yet."""
+    from .models import Ornament
+
+    return (
+        Ornament.objects.exclude(barcode__isnull=True).exclude(barcode='')
+        .filter(Q(barcode_image__isnull=True) | Q(barcode_image=''))
+    )
+
+
+def _store_with_retries(store, public_id, content):
+    delay = RETRY_DELAY
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return store.save(public_id, content)
+        except Exception:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+
+def render(pks=None, regenerate=False, store=None, batch_size=BATCH_SIZE, progress=None):
+    """Render and store barcode images; returns ``(rendered, failures)``.
+
+    Covers the pending ornaments among ``pks`` (all pending ones when
+    ``pks`` is ``None``), or every ornament with a barcode when
+    ``regenerate`` is set.  ``failures`` lists ``(pk, error)`` pairs;
+    ``progress(done, total)`` is called after each batch.
+    """
+    from .models import Ornament
+
+    store = store or get_store()
+    candidates = pending()
+    if regenerate:
+        candidates = Ornament.objects.exclude(barcode__isnull=True).exclude(barcode='')
+    if pks is not None:
+        candidates = candidates.filter(pk__in=list(pks))
+    todo = list(candidates.order_by('pk').values_list('pk', flat=True))
+
+    rendered, failures, done = 0, [], 0
+    for batch in chunked(todo, batch_size):
+        updated = []
+        for ornament in Ornament.objects.filter(pk__in=batch).only('pk', 'barcode', 'barcode_image'):
+            try:
+                content = render_png(ornament.barcode)
+                ornament.barcode_image = _store_with_retries(store, public_id_for(ornament.barcode), content)
+            except Exception as exc:
+                logger.warning('Barcode image for ornament %s failed: %s', ornament.pk, exc)
+                failures.append((ornament.pk, str(exc) or exc.__class__.__name__))
+                continue
+            updated.append(ornament)
+        if updated:
+            Ornament.objects.bulk_update(updated, ['barcode_image'])
+        rendered += len(updated)
+        done += len(batch)
+        if progress is not None:
+            progress(done, len(todo))
+    return rendered, failures
+
+
+def _flush_pending():
+    from main.models import BackgroundJob
+
+    connection = transaction.get_connection()
+    pks = getattr(connection, _PENDING_ATTR, None)
+    setattr(connection, _PENDING_ATTR, None)
+    # Running jobs inline would upload inside the request; the ornaments stay
+    # pending for ``generate_barcode_images`` instead.
+    if not pks or getattr(settings, 'BACKGROUND_JOBS_EAGER', False):
+        return
+
+    with transaction.atomic():
+        # The row lock makes a worker's claim wait until the pks are added.
+        job = (
+            BackgroundJob.objects.select_for_update()
+            .filter(kind=TASK_KIND, status='queued')
+            .order_by('pk')
+            .first()
+        )
+        if job is not None:
+            queued = job.payload.get('pks')
+            if queued is not None:  # None already covers every pending ornament
+                job.payload = {**job.payload, 'pks': sorted(set(queued) | pks)}
+                job.save(update_fields=['payload'])
+            return
+    enqueue(TASK_KIND, payload={'pks': sorted(pks)})
+
+
+def queue(*pks):
+    """Render barcode images for ``pks`` in the background once the transaction commits.
+
+    All pks queued in one transaction go into one job, and into the job
+    already waiting in the queue if there is one.
+    """
+    pks = {pk for pk in pks if pk}
+    if not pks:
+        return
+    connection = transaction.get_connection()
+    pending_pks = getattr(connection, _PENDING_ATTR, None)
+    if pending_pks is None:
+        pending_pks = set()
+        setattr(connection, _PENDING_ATTR, pending_pks)
+    pending_pks.update(pks)
+    transaction.on_commit(_flush_pending)
+
+
+@task(TASK_KIND, 'Barcode images')
+def render_job(job):
+    pks = job.payload.get('pks')
+    rendered, failures = render(pks=pks, progress=lambda done, total: report(job, done, total))
+    job.errors = [f'Ornament {pk}: {error}' for pk, error in failures]
+    message = f'Rendered {rendered} barcode image(s).'
+    if failures:
+        message += f' {len(failures)} failed and stay queued for the next run.'
+    return message
@@ -0,0 +1,47 @@
+"""Bulk creation of ornaments for the importers.
+
+``bulk_create`` skips the ``post_save`` handlers in ``ornament.signals``, so
+:func:`create_ornaments` does their work set-wise: codes and barcodes are
+filled in with one ``bulk_update``, the stock summary is adjusted per bucket
+and barcode images are queued as one background job once the transaction
+commits.
+"""
+from common.bulk_import import BATCH_SIZE, chunked
+
+from . import barcodes, stock_summary
+from .models import Ornament
+from .signals import default_barcode, default_code
+
+
+def add_to_summary(pks):
+    """Add bulk-created ornaments to the stock summary, one grouped query per batch."""
+    for batch in chunked(pks):
+        stock_summary.add_ornaments(Ornament.objects.filter(pk__in=batch))
+
+
+def create_ornaments(ornaments, update_summary=True):
+    """Insert unsaved ornaments and return them with their pks set.
+
+    Pass ``update_summary=False`` to batch several calls into one
+    :func:`add_to_summary` at the end of an import.
+    """
+    if not ornaments:
+        return []
+    Ornament.objects.bulk_create(ornaments, batch_size=BATCH_SIZE)
+
+    coded = []
+    for ornament in ornaments:
+        if not ornament.code or not ornament.barcode:
+            ornament.code = ornament.code or default_code(ornament)
+            ornament.barcode = ornament.barcode or default_barcode(ornament)
+            coded.append(ornament)
+    if coded:
+        Ornament.objects.bulk_update(coded, ['code', 'barcode'], batch_size=BATCH_SIZE)
+
+    pks = [ornament.pk for ornament in ornaments]
+    if update_summary:
+        add_to_summary(pks)
+    for ornament in ornaments:
+        ornament._stock_summary_state = stock_summary.state_of(ornament)
+    barcodes.queue(*pks)
+    return ornaments
@@ -8,8 +8,8 @@ from decimal import Decimal
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
 from .models import Ornament, MainCategory, SubCategory, Kaligar
+from . import search as ornament_search
 
 
 def query_ornaments(query_text):
@@ -98,10 +98,8 @@ def query_ornaments(query_text):
             pass
     
     # Search by ornament name
-    name_matches = ornaments.filter(
-        Q(ornament_name__icontains=query_text) |
-        Q(code__icontains=query_text) |
-        Q(description__icontains=query_text)
+    name_matches = ornament_search.search(
+        ornaments, query_text, fields=('ornament_name', 'code', 'description'), weight_fields=()
     )
     
     if name_matches.exists():
@@ -0,0 +1,176 @@
+"""Cloudinary image lifecycle for ornaments.
+
+An ornament's ``image`` and ``barcode_image`` are Cloudinary assets that
+have to be deleted when the ornament replaces them or is itself deleted.
+Clearing a field leaves its asset alone.  The
+signals used to re-read the row on every save to find the old public ids,
+and they called ``cloudinary.uploader.destroy`` inside the request, one
+network round trip per image.  A bulk delete stalled on thousands of them.
+
+Now :func:`capture` remembers the public ids an ornament was loaded with
+(``Ornament.from_db``), so a save compares against those without a query.
+Assets to delete are written as ``PendingImagePurge`` rows in the same
+transaction as the change, so nothing is deleted for a change that rolls
+back.  When the transaction commits, an ``ornament.purge_images``
+background job is queued.  Its purger deletes the assets through
+Cloudinary's bulk ``delete_resources`` call, up to :data:`BATCH_SIZE` ids
+per request, and leaves rows that failed for the next run (at most
+:data:`MAX_ATTEMPTS` times).
+
+``settings.IMAGE_PURGE_SERVICE = 'stub'`` swaps Cloudinary for a
+:class:`StubService` that only records what it was asked to delete.
+"""
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from main.services.jobs import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FIELDS = ('image', 'barcode_image')
+TASK_KIND = 'ornament.purge_images'
+# Cloudinary's Admin API deletes at most 100 public ids per call.
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+
+
+def public_id(value):
+    if not value:
+        return None
+    if getattr(value, 'public_id', None):
+        return value.public_id
+    return str(value)
+
+
+def _ids_of(instance, fields=IMAGE_FIELDS):
+    return {field: public_id(getattr(instance, field, None)) for field in fields}
+
+
+def capture(instance):
+    """Remember the public ids a loaded ornament has (if its image fields were loaded)."""
+    loaded = instance.__dict__
+    instance._image_ids = _ids_of(instance) if all(field in loaded for field in IMAGE_FIELDS) else None
+
+
+def load_ids(instance):
+    """Before an update: make sure the ids the row was stored with are known.
+
+    Costs one query only for instances built by hand or loaded with
+    ``only()``/``defer()`` leaving out the image fields.
+    """
+    from .models import Ornament
+
+    if getattr(instance, '_image_ids', None) is None:
+        row = Ornament.objects.filter(pk=instance.pk).values(*IMAGE_FIELDS).first() or {}
+        instance._image_ids = {field: public_id(row.get(field)) for field in IMAGE_FIELDS}
+
+
+def record_save(instance, created, update_fields=None):
+    """Schedule the assets a saved ornament replaced with other ones."""
+    before = getattr(instance, '_image_ids', None)
+    if not created and before:
+        fields = [f for f in IMAGE_FIELDS if update_fields is None or f in update_fields]
+        after = _ids_of(instance, fields)
+        schedule(
+            before[field] for field in fields
+            if before[field] and after[field] and before[field] != after[field]
+        )
+    capture(instance)
+
+
+def record_delete(instance):
+    """Schedule every asset of a deleted ornament."""
+    schedule(_ids_of(instance).values())
+
+
+def _enqueue_purge():
+    from main.models import BackgroundJob
+
+    if not BackgroundJob.objects.filter(kind=TASK_KIND, status='queued').exists():
+        enqueue(TASK_KIND)
+
+
+def schedule(public_ids):
+    """Queue assets for deletion once the current transaction commits."""
+    from .models import PendingImagePurge
+
+    rows = [PendingImagePurge(public_id=value) for value in dict.fromkeys(public_ids) if value]
+    if not rows:
+        return
+    PendingImagePurge.objects.bulk_create(rows)
+    transaction.on_commit(_enqueue_purge)
+
+
+class CloudinaryService:
+    """Bulk deletes through the Cloudinary Admin API."""
+
+    def delete(self, public_ids):
+        """Delete ``public_ids``; returns the ids that are gone (deleted or not found)."""
+        import cloudinary.api
+
+        result = cloudinary.api.delete_resources(list(public_ids), invalidate=True)
+        return set(result.get('deleted', {}))
+
+
+class StubService:
+    """Records deletions instead of calling Cloudinary (tests, offline runs)."""
+
+    def __init__(self):
+        self.deleted = []
+
+    def delete(self, public_ids):
+        self.deleted.extend(public_ids)
+        return set(public_ids)
+
+
+def get_service():
+    if getattr(settings, 'IMAGE_PURGE_SERVICE', 'cloudinary') == 'stub':
+        return StubService()
+    return CloudinaryService()
+
+
+def purge(service=None, batch_size=BATCH_SIZE):
+    """Delete every pending asset in batches; returns ``(purged, failed)`` row counts."""
+    from .models import PendingImagePurge
+
+    service = service or get_service()
+    purged = failed = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            PendingImagePurge.objects.filter(pk__gt=last_pk, attempts__lt=MAX_ATTEMPTS)
+            .order_by('pk')[:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+        ids = list(dict.fromkeys(row.public_id for row in rows))
+        try:
+            gone = service.delete(ids)
+            error = 'Not deleted by the service.'
+        except Exception as exc:
+            logger.warning('Image purge of %s asset(s) failed: %s', len(ids), exc)
+            gone, error = set(), str(exc) or exc.__class__.__name__
+
+        done = [row.pk for row in rows if row.public_id in gone]
+        left = [row.pk for row in rows if row.public_id not in gone]
+        PendingImagePurge.objects.filter(pk__in=done).delete()
+        if left:
+            PendingImagePurge.objects.filter(pk__in=left).update(attempts=F('attempts') + 1, last_error=error[:500])
+        purged += len(done)
+        failed += len(left)
+    return purged, failed
+
+
+@task(TASK_KIND, 'Image cleanup')
+def purge_job(job):
+    purged, failed = purge()
+    message = f'Deleted {purged} image(s).'
+    if failed:
+        message += f' {failed} could not be deleted and will be retried.'
+    return message
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
-from django.db.models import Q
+
+from main.services.jobs import enqueue
+from ornament import barcodes
 from ornament.models import Ornament
 
 
@@ -24,6 +26,11 @@ class Command(BaseCommand):
             default=50,
             help='Number of ornaments to process in each batch',
         )
+        parser.add_argument(
+            '--queue',
+            action='store_true',
+            help='Queue a background job for `run_jobs` instead of rendering here',
+        )
 
     def handle(self, *args, **options):
         regenerate = options['regenerate']
@@ -44,40 +51,31 @@ class Command(BaseCommand):
             Ornament.objects.bulk_update(ornaments_list, ['barcode'], batch_size=batch_size)
             self.stdout.write(self.style.SUCCESS(f'✓ Generated barcodes for {count} ornaments'))
 
+        if options['queue']:
+            job = enqueue(barcodes.TASK_KIND)
+            self.stdout.write(self.style.SUCCESS(f'✓ Queued barcode job #{job.pk} for pending ornaments.'))
+            return
+
         if regenerate:
             # Regenerate for all ornaments with barcodes
-            ornaments = Ornament.objects.filter(barcode__isnull=False)
+            ornaments = Ornament.objects.exclude(barcode__isnull=True).exclude(barcode='')
             self.stdout.write(self.style.WARNING('Regenerating barcode images for ALL ornaments with barcodes...'))
         else:
             # Only generate for ornaments with barcodes but without barcode images
-            ornaments = Ornament.objects.filter(barcode__isnull=False).filter(Q(barcode_image__isnull=True) | Q(barcode_image=''))
+            ornaments = barcodes.pending()
             self.stdout.write('Generating barcode images for ornaments without images...')
 
-        if limit:
-            ornaments = ornaments[:limit]
-
-        total = ornaments.count()
+        pks = list(ornaments.order_by('pk').values_list('pk', flat=True)[:limit])
+        total = len(pks)
         self.stdout.write(f'\nProcessing {total} ornaments...\n')
-        
-        count = 0
-        errors = 0
-        
-        for i, ornament in enumerate(ornaments, 1):
-            try:
-                if not ornament.barcode:
-                    self.stdout.write(self.style.WARNING(f'⊘ [{i}/{total}] Skipping {ornament.code}: No barcode'))
-                    continue
-                    
-                self.stdout.write(f'[{i}/{total}] Generating barcode for {ornament.code} ({ornament.barcode})...')
-                ornament.generate_barcode_image()
-                ornament.save(update_fields=['barcode_image'])
-                self.stdout.write(self.style.SUCCESS(f'  ✓ Success: {ornament.barcode_image}'))
-                count += 1
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'  ✗ Error for {ornament.code}: {e}'))
-                errors += 1
-
-        self.stdout.write(self.style.SUCCESS(f'\n✓ Completed! Generated {count} barcode images. Errors: {errors}'))
 
+        def progress(done, total):
+            self.stdout.write(f'[{done}/{total}] processed')
 
+        count, failures = barcodes.render(
+            pks=pks, regenerate=regenerate, batch_size=batch_size, progress=progress,
+        )
+        for pk, error in failures:
+            self.stdout.write(self.style.ERROR(f'  ✗ Error for ornament {pk}: {error}'))
 
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Completed! Generated {count} barcode images. Errors: {len(failures)}'))
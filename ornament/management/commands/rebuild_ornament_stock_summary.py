@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ornament import stock_summary
+from ornament.models import Ornament
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ornament stock summary table from the ornament table'
+
+    def handle(self, *args, **options):
+        total = Ornament.objects.count()
+        self.stdout.write(f'Rebuilding stock summary from {total} ornaments...')
+        buckets = stock_summary.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✓ Completed! Wrote {buckets} summary buckets.'))
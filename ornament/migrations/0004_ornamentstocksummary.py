@@ -0,0 +1,88 @@
+# Generated by Django 5.0 on 2026-10-17 17:13
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import BooleanField, Case, Count, DecimalField, F, Sum, Value, When
+
+KEY_FIELDS = ('ornament_type', 'status', 'metal_type', 'type', 'maincategory_id')
+AMOUNT_FIELDS = ('weight', 'gross_weight', 'diamond_weight', 'jarti', 'jyala', 'stone_totalprice')
+
+
+def populate_summary(apps, schema_editor):
+    Ornament = apps.get_model('ornament', 'Ornament')
+    OrnamentStockSummary = apps.get_model('ornament', 'OrnamentStockSummary')
+    rows = (
+        Ornament.objects.order_by()
+        .annotate(
+            _has_weight=Case(When(weight__gt=0, then=Value(True)), default=Value(False), output_field=BooleanField()),
+            _has_diamond_weight=Case(
+                When(diamond_weight__gt=0, then=Value(True)), default=Value(False), output_field=BooleanField()
+            ),
+        )
+        .values(*KEY_FIELDS, '_has_weight', '_has_diamond_weight')
+        .annotate(
+            _count=Count('id'),
+            _diamond_value=Sum(
+                F('diamond_weight') * F('diamond_rate'),
+                output_field=DecimalField(max_digits=18, decimal_places=5),
+            ),
+            **{f'_{field}': Sum(field) for field in AMOUNT_FIELDS},
+        )
+    )
+    OrnamentStockSummary.objects.bulk_create(
+        [
+            OrnamentStockSummary(
+                **{field: row[field] for field in KEY_FIELDS},
+                has_weight=bool(row['_has_weight']),
+                has_diamond_weight=bool(row['_has_diamond_weight']),
+                count=row['_count'],
+                diamond_value=row['_diamond_value'] or Decimal('0'),
+                **{field: row[f'_{field}'] or Decimal('0') for field in AMOUNT_FIELDS},
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ornament', '0003_kaligar_ornaments_ornament_fk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrnamentStockSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ornament_type', models.CharField(choices=[('stock', 'Stock'), ('order', 'Order'), ('sales', 'Sales')], max_length=10)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('deleted', 'Deleted'), ('destroyed', 'Destroyed')], max_length=10)),
+                ('metal_type', models.CharField(choices=[('Gold', 'Gold'), ('Silver', 'Silver'), ('Diamond', 'Diamond'), ('Others', 'Others')], max_length=50)),
+                ('type', models.CharField(choices=[('24KARAT', '24 Karat'), ('23KARAT', '23 Karat'), ('22KARAT', '22 Karat'), ('18KARAT', '18 Karat'), ('14KARAT', '14 Karat')], max_length=10)),
+                ('has_weight', models.BooleanField(default=False)),
+                ('has_diamond_weight', models.BooleanField(default=False)),
+                ('count', models.IntegerField(default=0)),
+                ('weight', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=14)),
+                ('gross_weight', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=14)),
+                ('diamond_weight', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=14)),
+                ('jarti', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=14)),
+                ('jyala', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=14)),
+                ('stone_totalprice', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=14)),
+                ('diamond_value', models.DecimalField(decimal_places=5, default=Decimal('0.00000'), help_text='Sum of diamond_weight × diamond_rate', max_digits=18)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('maincategory', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='ornament.maincategory')),
+            ],
+            options={
+                'verbose_name': 'Ornament stock summary',
+                'verbose_name_plural': 'Ornament stock summary',
+                'indexes': [models.Index(fields=['ornament_type', 'status', 'metal_type'], name='ornament_or_ornamen_fba2ab_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ornamentstocksummary',
+            constraint=models.UniqueConstraint(fields=('ornament_type', 'status', 'metal_type', 'type', 'maincategory', 'has_weight', 'has_diamond_weight'), name='uniq_ornament_stock_summary_bucket'),
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
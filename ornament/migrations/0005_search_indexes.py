@@ -0,0 +1,44 @@
+# Generated by Django 5.0 on 2026-10-17 17:57
+
+from common.migration_utils import PostgreSQLOnlyRunSQL
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0004_orderornament_own_gold'),
+        ('ornament', '0004_ornamentstocksummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ornament',
+            index=models.Index(fields=['weight'], name='ornament_weight_idx'),
+        ),
+        # Trigram indexes over UPPER(column) so the icontains/iexact lookups
+        # Django emits on PostgreSQL (UPPER(col::text) LIKE UPPER(...)) can
+        # use them; see ornament.search.
+        PostgreSQLOnlyRunSQL(
+            sql="""
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS ornament_name_trgm_idx
+                ON ornament_ornament USING gin (UPPER(ornament_name::text) gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS ornament_code_trgm_idx
+                ON ornament_ornament USING gin (UPPER(code::text) gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS ornament_barcode_trgm_idx
+                ON ornament_ornament USING gin (UPPER(barcode::text) gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS ornament_description_trgm_idx
+                ON ornament_ornament USING gin (UPPER(description::text) gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS ornament_code_upper_idx
+                ON ornament_ornament (UPPER(code::text));
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS ornament_code_upper_idx;
+            DROP INDEX IF EXISTS ornament_description_trgm_idx;
+            DROP INDEX IF EXISTS ornament_barcode_trgm_idx;
+            DROP INDEX IF EXISTS ornament_code_trgm_idx;
+            DROP INDEX IF EXISTS ornament_name_trgm_idx;
+            """,
+        ),
+    ]
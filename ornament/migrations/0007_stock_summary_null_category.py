@@ -0,0 +1,49 @@
+# Generated by Django 5.0 on 2026-10-17 18:59
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+BUCKET_FIELDS = ('ornament_type', 'status', 'metal_type', 'type', 'has_weight', 'has_diamond_weight')
+AMOUNT_FIELDS = (
+    'count', 'weight', 'gross_weight', 'diamond_weight', 'jarti', 'jyala',
+    'stone_totalprice', 'diamond_value',
+)
+
+
+def merge_uncategorised_buckets(apps, schema_editor):
+    """Fold duplicate buckets without a main category into one row each."""
+    Summary = apps.get_model('ornament', 'OrnamentStockSummary')
+    rows = Summary.objects.filter(maincategory__isnull=True)
+    duplicates = rows.values(*BUCKET_FIELDS).annotate(rows=Count('pk')).filter(rows__gt=1)
+    for bucket in list(duplicates):
+        bucket.pop('rows')
+        buckets = list(rows.filter(**bucket).order_by('pk'))
+        keep, extra = buckets[0], buckets[1:]
+        Summary.objects.filter(pk=keep.pk).update(**{
+            field: F(field) + sum(getattr(row, field) for row in extra)
+            for field in AMOUNT_FIELDS
+        })
+        Summary.objects.filter(pk__in=[row.pk for row in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ornament', '0006_pending_image_purge'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_uncategorised_buckets, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='ornamentstocksummary',
+            name='uniq_ornament_stock_summary_bucket',
+        ),
+        migrations.AddConstraint(
+            model_name='ornamentstocksummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('maincategory__isnull', False)), fields=('ornament_type', 'status', 'metal_type', 'type', 'maincategory', 'has_weight', 'has_diamond_weight'), name='uniq_ornament_stock_summary_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='ornamentstocksummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('maincategory__isnull', True)), fields=('ornament_type', 'status', 'metal_type', 'type', 'has_weight', 'has_diamond_weight'), name='uniq_ornament_stock_summary_nocat'),
+        ),
+    ]
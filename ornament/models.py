@@ -69,6 +69,8 @@ from nepali_datetime_field.models import NepaliDateField
 from django.core.validators import MinValueValidator, RegexValidator
 from cloudinary.models import CloudinaryField
 
+from . import images, stock_summary
+
 class MainCategory(models.Model):
     name = models.CharField(max_length=255)
 
@@ -371,53 +373,108 @@ class Ornament(models.Model):
         return Decimal('0.000')
     
     def generate_barcode_image(self):
-        """Generate and save barcode image for this ornament."""
-        import barcode
-        from io import BytesIO
-        from django.core.files.base import ContentFile
-        import cloudinary.uploader
-        import tempfile
-        import os
-        
+        """Render this ornament's barcode and store it now (see ``ornament.barcodes``)."""
+        from . import barcodes
+
         if not self.barcode:
             return
-        
-        try:
-            # Use CODE128 barcode format (most common for products)
-            barcode_class = barcode.get_barcode_class('code128')
-            barcode_instance = barcode_class(self.barcode, writer=barcode.writer.ImageWriter())
-            
-            # Generate barcode image to BytesIO
-            buffer = BytesIO()
-            barcode_instance.write(buffer)
-            buffer.seek(0)
-            
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-                tmp.write(buffer.getvalue())
-                tmp_path = tmp.name
-            
-            try:
-                # Upload to Cloudinary
-                result = cloudinary.uploader.upload(
-                    tmp_path,
-                    folder='barcodes/',
-                    public_id=f"barcode_{self.barcode}",
-                    overwrite=True
-                )
-                
-                # Set the barcode_image to the Cloudinary public_id
-                self.barcode_image = result['public_id']
-            finally:
-                # Clean up temporary file
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-                    
-        except Exception as e:
-            print(f"Error generating barcode image: {e}")
-            raise
-    
+        self.barcode_image = barcodes.get_store().save(
+            barcodes.public_id_for(self.barcode), barcodes.render_png(self.barcode),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stock-summary bucket this row was loaded with so the
+        # post_save signal can move it between buckets without a re-query.
+        stock_summary.capture_state(instance)
+        # Likewise its Cloudinary public ids, for ornament.images.
+        images.capture(instance)
+        return instance
+
     class Meta:
         ordering = ["id"]
+        indexes = [
+            # Weight-range search terms (see ornament.search).
+            models.Index(fields=["weight"], name="ornament_weight_idx"),
+        ]
     # Code generation for `code` moved to `ornament.signals.generate_ornament_code`
-    # to keep model `save()` simple and avoid coupling persistence logic.
\ No newline at end of file
+    # to keep model `save()` simple and avoid coupling persistence logic.
+
+class PendingImagePurge(models.Model):
+    """Cloudinary asset waiting to be deleted by ``ornament.images.purge``."""
+
+    public_id = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['pk']
+
+    def __str__(self):
+        return self.public_id
+
+
+class OrnamentStockSummary(models.Model):
+    """Materialized ornament totals per stock bucket.
+
+    One row per (ornament_type, status, metal_type, type, maincategory) plus
+    whether the ornaments carry metal / diamond weight, so reports that only
+    count weighted pieces can still be answered from this table.  Kept
+    current by ``ornament.signals``; rebuild with
+    ``manage.py rebuild_ornament_stock_summary``.
+    """
+
+    ornament_type = models.CharField(max_length=10, choices=Ornament.OrnamentCategory.choices)
+    status = models.CharField(max_length=10, choices=Ornament.StatusCategory.choices)
+    metal_type = models.CharField(max_length=50, choices=Ornament.MetalTypeCategory.choices)
+    type = models.CharField(max_length=10, choices=Ornament.TypeCategory.choices)
+    maincategory = models.ForeignKey(MainCategory, on_delete=models.CASCADE, null=True, blank=True)
+    has_weight = models.BooleanField(default=False)
+    has_diamond_weight = models.BooleanField(default=False)
+
+    count = models.IntegerField(default=0)
+    weight = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal('0.000'))
+    gross_weight = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal('0.000'))
+    diamond_weight = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal('0.000'))
+    jarti = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal('0.000'))
+    jyala = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal('0.000'))
+    stone_totalprice = models.DecimalField(max_digits=14, decimal_places=3, default=Decimal('0.000'))
+    diamond_value = models.DecimalField(
+        max_digits=18,
+        decimal_places=5,
+        default=Decimal('0.00000'),
+        help_text="Sum of diamond_weight × diamond_rate",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Ornament stock summary"
+        verbose_name_plural = "Ornament stock summary"
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'ornament_type', 'status', 'metal_type', 'type',
+                    'maincategory', 'has_weight', 'has_diamond_weight',
+                ],
+                condition=models.Q(maincategory__isnull=False),
+                name='uniq_ornament_stock_summary_bucket',
+            ),
+            # NULLs never collide in a unique index, so uncategorised buckets
+            # get their own constraint without ``maincategory``.
+            models.UniqueConstraint(
+                fields=[
+                    'ornament_type', 'status', 'metal_type', 'type',
+                    'has_weight', 'has_diamond_weight',
+                ],
+                condition=models.Q(maincategory__isnull=True),
+                name='uniq_ornament_stock_summary_nocat',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['ornament_type', 'status', 'metal_type']),
+        ]
+
+    def __str__(self):
+        return f"{self.ornament_type}/{self.status}/{self.metal_type}/{self.type}: {self.count}"
@@ -0,0 +1,140 @@
+"""Ornament search shared by the admin lists, the order form and the storefront.
+
+A query matches ornaments in two ways:
+
+* **Exact match** – an ornament whose code (case-insensitive) or barcode is
+  the query.  It is listed first, ahead of the term matches, so a scanned
+  or typed code lands on top without hiding longer codes (``R1`` still
+  lists ``R10`` and ``R11`` after it).
+* **Term match** – the query is split on whitespace and every
+  term must match.  Text terms use ``icontains`` on the text fields; on
+  PostgreSQL the ``pg_trgm`` GIN indexes over ``UPPER(column)`` (migration
+  ``0005_search_indexes``) serve those ``LIKE`` lookups, while SQLite test
+  databases simply scan.  Weight terms (``10g``, ``10-12``, ``>5``) become
+  range filters on the weight columns rather than ``LIKE`` on a decimal
+  cast; they still match codes containing the same characters.
+"""
+from __future__ import annotations
+
+import re
+from decimal import Decimal, InvalidOperation
+from typing import NamedTuple, Optional
+
+from django.db.models import Case, Q, Value, When
+
+TEXT_FIELDS = ('ornament_name', 'code', 'barcode')
+WEIGHT_FIELDS = ('weight', 'gross_weight', 'diamond_weight')
+
+_NUMBER = r'(\d+(?:\.\d+)?)'
+_UNIT = r'(?:g|gm|gms|gram|grams)?'
+_RANGE_RE = re.compile(rf'^{_NUMBER}{_UNIT}\s*(?:-|\.\.|to)\s*{_NUMBER}{_UNIT}$', re.IGNORECASE)
+_BOUND_RE = re.compile(rf'^(<=|>=|<|>){_NUMBER}{_UNIT}$', re.IGNORECASE)
+_WEIGHT_RE = re.compile(rf'^{_NUMBER}{_UNIT}$', re.IGNORECASE)
+
+
+class WeightRange(NamedTuple):
+    """Bounds of a weight term; ``None`` means unbounded."""
+
+    low: Optional[Decimal] = None
+    high: Optional[Decimal] = None
+    include_low: bool = True
+    include_high: bool = True
+
+    def q(self, field: str) -> Q:
+        query = Q()
+        if self.low is not None:
+            query &= Q(**{f'{field}__gte' if self.include_low else f'{field}__gt': self.low})
+        if self.high is not None:
+            query &= Q(**{f'{field}__lte' if self.include_high else f'{field}__lt': self.high})
+        return query
+
+
+def _decimal(text: str) -> Optional[Decimal]:
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        return None
+
+
+def parse_weight(term: str) -> Optional[WeightRange]:
+    """Read a weight term, or return ``None`` if ``term`` is not one.
+
+    ``10-12`` / ``10..12`` / ``10g to 12g`` are inclusive ranges, ``>5`` /
+    ``<=8`` are open bounds, and a single number matches weights written
+    with that prefix, as the old ``weight__icontains`` did for ``10`` or
+    ``10.5``: ``10`` is ``[10, 11)`` and ``10.5`` is ``[10.5, 10.6)``.
+    """
+    term = term.strip()
+    match = _RANGE_RE.match(term)
+    if match:
+        low, high = sorted((_decimal(match.group(1)), _decimal(match.group(2))))
+        return WeightRange(low, high)
+
+    match = _BOUND_RE.match(term)
+    if match:
+        op, value = match.group(1), _decimal(match.group(2))
+        if op.startswith('>'):
+            return WeightRange(low=value, include_low=(op == '>='))
+        return WeightRange(high=value, include_high=(op == '<='))
+
+    match = _WEIGHT_RE.match(term)
+    if match:
+        value = _decimal(match.group(1))
+        step = Decimal(1).scaleb(value.as_tuple().exponent)
+        return WeightRange(value, value + step, include_high=False)
+    return None
+
+
+def text_q(term: str, fields=TEXT_FIELDS) -> Q:
+    """``term`` contained in any of ``fields``."""
+    query = Q()
+    for field in fields:
+        query |= Q(**{f'{field}__icontains': term})
+    return query
+
+
+def weight_q(weight_range: WeightRange, fields=WEIGHT_FIELDS) -> Q:
+    """Any of ``fields`` within ``weight_range``."""
+    query = Q()
+    for field in fields:
+        query |= weight_range.q(field)
+    return query
+
+
+def term_q(term: str, fields=TEXT_FIELDS, weight_fields=WEIGHT_FIELDS) -> Q:
+    """Filter for one search term."""
+    weight_range = parse_weight(term) if weight_fields else None
+    if weight_range is None:
+        return text_q(term, fields)
+    # "1023" or "2081-12" may be part of a code as well as a weight.
+    return text_q(term, fields) | weight_q(weight_range, weight_fields)
+
+
+def exact_q(text: str) -> Q:
+    """The ornament whose code or barcode is ``text``."""
+    return Q(code__iexact=text) | Q(barcode=text)
+
+
+def search(queryset, text: str, fields=TEXT_FIELDS, weight_fields=WEIGHT_FIELDS, exact=True):
+    """Filter an Ornament ``queryset`` by the search box ``text``."""
+    text = (text or '').strip()
+    if not text:
+        return queryset
+
+    # A spaced range ("10 - 12", "10 to 12") is one weight term.
+    if weight_fields and _RANGE_RE.match(text):
+        return queryset.filter(weight_q(parse_weight(text), weight_fields))
+
+    query = Q()
+    for term in text.split():
+        query &= term_q(term, fields, weight_fields)
+    if not (exact and ' ' not in text):
+        return queryset.filter(query)
+
+    # Exact code/barcode matches first, then the queryset's own ordering.
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return (
+        queryset.filter(query | exact_q(text))
+        .alias(_exact=Case(When(exact_q(text), then=Value(0)), default=Value(1)))
+        .order_by('_exact', *ordering)
+    )
@@ -1,11 +1,8 @@
-from django.db import transaction
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-import threading
-
-import cloudinary.uploader
 
 from .models import Ornament
+from . import barcodes, images, stock_summary
 
 
 def _first_char(value, default='X'):
@@ -14,54 +11,61 @@ def _first_char(value, default='X'):
     return text[0].upper() if text else default
 
 
-def _get_public_id(field_value):
-    if not field_value:
-        return None
-
-    if hasattr(field_value, 'public_id') and field_value.public_id:
-        return field_value.public_id
-
-    return str(field_value) if field_value else None
+@receiver(pre_save, sender=Ornament)
+def remember_stock_summary_bucket(sender, instance, raw=False, **kwargs):
+    """Make sure an update knows which summary bucket the row came from."""
+    if raw or instance._state.adding or not instance.pk:
+        return
+    if getattr(instance, '_stock_summary_state', None) is None:
+        instance._stock_summary_state = stock_summary.load_state(instance)
 
 
-def _destroy_cloudinary_resource(public_id):
-    if not public_id:
+@receiver(post_save, sender=Ornament)
+def update_stock_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
         return
+    stock_summary.record_save(instance, created)
+
 
-    try:
-        cloudinary.uploader.destroy(public_id, invalidate=True)
-    except Exception:
-        pass
+@receiver(post_delete, sender=Ornament)
+def update_stock_summary_on_delete(sender, instance, **kwargs):
+    stock_summary.record_delete(instance)
 
 
 @receiver(pre_save, sender=Ornament)
-def delete_old_ornament_images_on_change(sender, instance, **kwargs):
-    if not instance.pk:
+def remember_ornament_images(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding or not instance.pk:
         return
+    if update_fields is None or set(update_fields) & set(images.IMAGE_FIELDS):
+        images.load_ids(instance)
 
-    try:
-        previous = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
+
+@receiver(post_save, sender=Ornament)
+def delete_replaced_ornament_images(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Queue images the ornament no longer uses for deletion after commit."""
+    if raw:
         return
+    images.record_save(instance, created, update_fields)
 
-    for field_name in ('image', 'barcode_image'):
-        old_value = getattr(previous, field_name, None)
-        new_value = getattr(instance, field_name, None)
 
-        old_public_id = _get_public_id(old_value)
-        new_public_id = _get_public_id(new_value)
+@receiver(post_delete, sender=Ornament)
+def delete_ornament_images_on_delete(sender, instance, **kwargs):
+    images.record_delete(instance)
 
-        if old_public_id and new_public_id and old_public_id != new_public_id:
-            _destroy_cloudinary_resource(old_public_id)
 
+def default_code(instance):
+    """Readable code from the leading letters of the ornament's names plus its pk."""
+    name_letter = _first_char(instance.ornament_name)
+    sub_category = _first_char(instance.subcategory.name if instance.subcategory else '')
+    main_category = _first_char(instance.maincategory.name if instance.maincategory else '')
+    kaligar_letter = _first_char(instance.kaligar.name if instance.kaligar else '')
+    ornament_type_letter = _first_char(instance.ornament_type)
+    return f"{name_letter}{sub_category}{main_category}{kaligar_letter}{ornament_type_letter}{instance.pk}"
 
-@receiver(post_delete, sender=Ornament)
-def delete_ornament_images_on_delete(sender, instance, **kwargs):
-    for field_name in ('image', 'barcode_image'):
-        public_id = _get_public_id(getattr(instance, field_name, None))
-        if public_id:
-            _destroy_cloudinary_resource(public_id)
 
+def default_barcode(instance):
+    # Format: ORN-{10-digit zero-padded ID}
+    return f"ORN-{instance.pk:010d}"
 
 
 @receiver(post_save, sender=Ornament)
@@ -83,20 +87,13 @@ def generate_ornament_code(sender, instance, created, **kwargs):
 
     # Generate code if not already set
     if not instance.code:
-        name_letter = _first_char(instance.ornament_name)
-        sub_category = _first_char(instance.subcategory.name if instance.subcategory else '')
-        main_category = _first_char(instance.maincategory.name if instance.maincategory else '')
-        kaligar_letter = _first_char(instance.kaligar.name if instance.kaligar else '')
-        ornament_type_letter = _first_char(instance.ornament_type)
-
-        instance.code = f"{name_letter}{sub_category}{main_category}{kaligar_letter}{ornament_type_letter}{instance.pk}"
+        instance.code = default_code(instance)
         should_update = True
         update_fields.append('code')
 
     # Generate barcode if not already set
     if not instance.barcode:
-        # Format: ORN-{10-digit zero-padded ID}
-        instance.barcode = f"ORN-{instance.pk:010d}"
+        instance.barcode = default_barcode(instance)
         should_update = True
         update_fields.append('barcode')
 
@@ -106,21 +103,9 @@ def generate_ornament_code(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=Ornament)
-def generate_barcode_image(sender, instance, created, **kwargs):
-    """Generate barcode image after save (ensure barcode is set first)."""
+def generate_barcode_image(sender, instance, created, raw=False, **kwargs):
+    """Queue the barcode image for rendering once the save commits."""
+    if raw:
+        return
     if instance.barcode and not instance.barcode_image:
-        def _generate(pk):
-            try:
-                inst = Ornament.objects.get(pk=pk)
-                inst.generate_barcode_image()
-                inst.save(update_fields=['barcode_image'])
-            except Exception as e:
-                print(f"Async barcode generation failed for ornament {pk}: {e}")
-
-        def start_async_generation():
-            thread = threading.Thread(target=_generate, args=(instance.pk,), daemon=True)
-            thread.start()
-
-        transaction.on_commit(start_async_generation)
-
-
+        barcodes.queue(instance.pk)
@@ -0,0 +1,178 @@
+"""Keep ``OrnamentStockSummary`` in step with the ``Ornament`` table.
+
+Every ornament belongs to exactly one summary bucket.  Saves move the
+ornament's contribution from its old bucket to its new one with two
+``F()`` updates, so the summary never needs to rescan the ornament table.
+Queryset ``.update()`` calls bypass signals; use :func:`update_ornaments`
+for those so the affected buckets (and storefront prices) are adjusted in
+bulk, and :func:`add_ornaments` after a ``bulk_create``.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, DecimalField, F, Sum, Value, When
+
+KEY_FIELDS = ('ornament_type', 'status', 'metal_type', 'type', 'maincategory_id')
+AMOUNT_FIELDS = ('weight', 'gross_weight', 'diamond_weight', 'jarti', 'jyala', 'stone_totalprice')
+TRACKED_FIELDS = KEY_FIELDS + AMOUNT_FIELDS + ('diamond_rate',)
+
+ZERO = Decimal('0')
+
+
+def _decimal(value):
+    return value if value is not None else ZERO
+
+
+def state_of(instance):
+    """Return ``(bucket_key, amounts)`` for an ornament instance."""
+    amounts = {field: _decimal(getattr(instance, field)) for field in AMOUNT_FIELDS}
+    amounts['diamond_value'] = amounts['diamond_weight'] * _decimal(instance.diamond_rate)
+    key = {field: getattr(instance, field) for field in KEY_FIELDS}
+    key['has_weight'] = amounts['weight'] > 0
+    key['has_diamond_weight'] = amounts['diamond_weight'] > 0
+    return key, amounts
+
+
+def capture_state(instance):
+    """Remember the bucket an instance currently belongs to (if fully loaded)."""
+    loaded = instance.__dict__
+    if all(field in loaded for field in TRACKED_FIELDS):
+        instance._stock_summary_state = state_of(instance)
+    else:
+        instance._stock_summary_state = None
+
+
+def load_state(instance):
+    """Fetch the stored bucket for an instance that was not loaded with one."""
+    from .models import Ornament
+
+    row = Ornament.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+    if row is None:
+        return None
+    return state_of(Ornament(**row))
+
+
+def _apply(key, count, amounts, sign):
+    from .models import OrnamentStockSummary
+
+    updates = {'count': F('count') + sign * count}
+    for field, value in amounts.items():
+        updates[field] = F(field) + sign * value
+
+    with transaction.atomic():
+        updated = OrnamentStockSummary.objects.filter(**key).update(**updates)
+        if sign > 0 and not updated:
+            summary, created = OrnamentStockSummary.objects.get_or_create(
+                **key, defaults={'count': count, **amounts}
+            )
+            if not created:
+                OrnamentStockSummary.objects.filter(pk=summary.pk).update(**updates)
+        elif sign < 0:
+            OrnamentStockSummary.objects.filter(**key, count__lte=0).delete()
+
+
+def record_save(instance, created):
+    """Move a saved ornament into its current bucket."""
+    previous = None if created else getattr(instance, '_stock_summary_state', None)
+    current = state_of(instance)
+    if previous == current:
+        return
+    if previous is not None:
+        _apply(previous[0], 1, previous[1], -1)
+    _apply(current[0], 1, current[1], 1)
+    instance._stock_summary_state = current
+
+
+def record_delete(instance):
+    """Remove a deleted ornament from its bucket."""
+    state = getattr(instance, '_stock_summary_state', None) or state_of(instance)
+    _apply(state[0], 1, state[1], -1)
+
+
+def grouped_buckets(queryset):
+    """Aggregate an Ornament queryset into summary buckets with one query."""
+    decimal_output = DecimalField(max_digits=18, decimal_places=5)
+    rows = (
+        queryset.order_by()
+        .annotate(
+            _has_weight=Case(When(weight__gt=0, then=Value(True)), default=Value(False), output_field=BooleanField()),
+            _has_diamond_weight=Case(
+                When(diamond_weight__gt=0, then=Value(True)), default=Value(False), output_field=BooleanField()
+            ),
+        )
+        .values(*KEY_FIELDS, '_has_weight', '_has_diamond_weight')
+        .annotate(
+            _count=Count('id'),
+            diamond_value=Sum(F('diamond_weight') * F('diamond_rate'), output_field=decimal_output),
+            **{f'_{field}': Sum(field) for field in AMOUNT_FIELDS},
+        )
+    )
+    buckets = []
+    for row in rows:
+        key = {field: row[field] for field in KEY_FIELDS}
+        key['has_weight'] = bool(row['_has_weight'])
+        key['has_diamond_weight'] = bool(row['_has_diamond_weight'])
+        amounts = {field: _decimal(row[f'_{field}']) for field in AMOUNT_FIELDS}
+        amounts['diamond_value'] = _decimal(row['diamond_value'])
+        buckets.append((key, row['_count'], amounts))
+    return buckets
+
+
+def _invalidate_caches():
+    # Signal-less bulk changes still change which metals/categories are in
+    # stock, and every stock report and storefront page.
+    from main.services import cache_versions
+
+    cache_versions.bump(cache_versions.CUSTOMER_NAV)
+    cache_versions.bump_on_commit(cache_versions.REPORTS, cache_versions.STOREFRONT)
+
+
+def _refresh_storefront_prices(pks):
+    from main.services import storefront_prices
+
+    storefront_prices.refresh_many(pks)
+
+
+def update_ornaments(queryset, **changes):
+    """``queryset.update(**changes)`` that keeps the stock summary current."""
+    from .models import Ornament
+
+    with transaction.atomic():
+        pks = list(queryset.values_list('pk', flat=True))
+        if not pks:
+            return 0
+        affected = Ornament.objects.filter(pk__in=pks)
+        before = grouped_buckets(affected)
+        updated = affected.update(**changes)
+        after = grouped_buckets(affected)
+        for key, count, amounts in before:
+            _apply(key, count, amounts, -1)
+        for key, count, amounts in after:
+            _apply(key, count, amounts, 1)
+        _refresh_storefront_prices(pks)
+    _invalidate_caches()
+    return updated
+
+
+def add_ornaments(queryset):
+    """Add signal-less inserts (``bulk_create``) to the summary, bucket by bucket."""
+    with transaction.atomic():
+        for key, count, amounts in grouped_buckets(queryset):
+            _apply(key, count, amounts, 1)
+        _refresh_storefront_prices(queryset.values_list('pk', flat=True))
+    _invalidate_caches()
+
+
+def rebuild():
+    """Recreate the whole summary table from the ornament table."""
+    from .models import Ornament, OrnamentStockSummary
+
+    with transaction.atomic():
+        OrnamentStockSummary.objects.all().delete()
+        rows = [
+            OrnamentStockSummary(**key, count=count, **amounts)
+            for key, count, amounts in grouped_buckets(Ornament.objects.all())
+        ]
+        OrnamentStockSummary.objects.bulk_create(rows, batch_size=500)
+    _invalidate_caches()
+    return len(rows)
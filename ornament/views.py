@@ -4,7 +4,7 @@ from django.urls import reverse_lazy
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Ornament, Stone, Motimala, Potey
+from .models import Ornament, OrnamentStockSummary, Stone, Motimala, Potey
 # Import ListView and CreateView for generic class-based views
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from .forms import OrnamentForm, KaligarCashAccountForm, KaligarGoldAccountForm, KaligarLossReturnForm, KaligarWorkRecordForm, OrnamentWorkGoldForm
@@ -200,7 +200,6 @@ from order.models import Order, OrderOrnament
 from .forms import OrnamentForm
 from django.http import HttpResponse
 from django.shortcuts import render, redirect
-from django.db.models import Q
 from io import BytesIO
 from django.contrib import messages
 from decimal import Decimal
@@ -209,7 +208,10 @@ import openpyxl
 from openpyxl.utils import get_column_letter
 import nepali_datetime as ndt
 from main.models import Stock
+from main.services.stock_valuation import OrnamentStockSnapshot
 from django.db import IntegrityError
+from common.xlsx_export import XlsxExport, stream
+from . import search as ornament_search
 
 class MainCategoryCreateView(CreateView):
     model = MainCategory
@@ -265,14 +267,7 @@ class OrnamentListView(ListView):
         search=self.request.GET.get('search')
 
         if search:
-            qs = qs.filter(
-                Q(code__icontains=search) |
-                Q(barcode__icontains=search) |
-                Q(weight__icontains=search) |
-                Q(diamond_weight__icontains=search) |
-                Q(ornament_name__icontains=search) |
-                Q(gross_weight__icontains=search)
-            )
+            qs = ornament_search.search(qs, search)
 
         if code:
             qs = qs.filter(code__icontains=code)
@@ -368,14 +363,7 @@ class OrnamentAdminInventoryView(ListView):
         search = self.request.GET.get('search')
 
         if search:
-            from django.db.models import Q
-            qs = qs.filter(
-                Q(code__icontains=search) |
-                Q(ornament_name__icontains=search) |
-                Q(weight__icontains=search) |
-                Q(diamond_weight__icontains=search) |
-                Q(gross_weight__icontains=search)
-            )
+            qs = ornament_search.search(qs, search)
 
         if code:
             qs = qs.filter(code__icontains=code)
@@ -667,10 +655,6 @@ def export_excel(request):
     view.request = request  # attach request
     ornaments = view.get_queryset()
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Ornaments"
-
     headers = [
         "Ornament Date", "Code", "Metal Type","Type", "Ornament Type",
         "MainCategory", "SubCategory", "Ornament Name","Gross Weight",
@@ -678,59 +662,28 @@ def export_excel(request):
         "Stone Price Per Carat","Stone Total Price",
         "Jarti","Jyala","Kaligar","Description","Image","Order","Created at","Updated at","Status"
     ]
-    ws.append(headers)
-
-    for o in ornaments:
-        ws.append([
-            str(o.ornament_date),
-            o.code,
-            o.metal_type,
-            o.type,
-            o.ornament_type,
-            o.maincategory.name if o.maincategory else "",
-            o.subcategory.name if o.subcategory else "",
-            o.ornament_name,
-            o.gross_weight,
-            o.weight,
-            o.diamond_weight,
-            o.diamond_rate,
-            o.zircon_weight,
-            o.stone_weight,
-            o.stone_percaratprice,
-            o.stone_totalprice,
-            o.jarti,
-            o.jyala,
-            o.kaligar.name if o.kaligar else "",
-            o.description if o.description else "",
-            str(o.image) if o.image else "",
-            str(o.order) if o.order else "",
-            str(o.created_at),
-            str(o.updated_at),
-            "fetched"
-        ])
-
-    # Auto column width
-    for col in ws.columns:
-        max_length = 0
-        col_letter = get_column_letter(col[0].column)
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws.column_dimensions[col_letter].width = max_length + 2
-
-    # Create virtual file
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    response = HttpResponse(
-        output.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    rows = stream(
+        ornaments,
+        "ornament_date", "code", "metal_type", "type", "ornament_type",
+        "maincategory__name", "subcategory__name", "ornament_name", "gross_weight",
+        "weight", "diamond_weight", "diamond_rate", "zircon_weight", "stone_weight",
+        "stone_percaratprice", "stone_totalprice", "jarti", "jyala", "kaligar__name",
+        "description", "image", "order__sn", "order__customer_name", "created_at", "updated_at",
     )
-    response['Content-Disposition'] = 'attachment; filename="ornaments.xlsx"'
 
-    return response
+    def ornament_rows():
+        for row in rows:
+            order_sn, customer_name = row[21], row[22]
+            yield (
+                *row[:21],
+                f"Order {order_sn} - {customer_name}" if order_sn is not None else "",
+                *row[23:],
+                "fetched",
+            )
 
+    export = XlsxExport()
+    export.add_sheet("Ornaments", headers, ornament_rows())
+    return export.response("ornaments.xlsx")
 
 
 def to_decimal(val):
@@ -1368,17 +1321,24 @@ def ornament_report(request):
     return render(request, 'ornament/ornament_report.html', context)
 
 
+# Karat factors used by the weight report (23K and unknown karats are not counted).
+WEIGHT_REPORT_KARAT_FACTORS = {
+    '24KARAT': Decimal('1'),
+    '22KARAT': Decimal('0.92'),
+    '18KARAT': Decimal('0.75'),
+    '14KARAT': Decimal('0.60'),
+}
+
+
 @login_required(login_url='/accounts/login/')
 def ornament_weight_report(request):
     """Show ornament total net weight by metal type."""
-    from django.db.models import F, Count
-    from django.db.models import Q
     # Use latest fetched daily rates for per tola pricing
-    from main.models import DailyRate
+    from main.services import rates
 
     # Include active stock ornaments that have either net metal weight or diamond weight.
     # This ensures diamond-only entries (diamond_weight > 0, weight = 0) are not skipped.
-    base_qs = Ornament.objects.filter(
+    base_qs = OrnamentStockSummary.objects.filter(
         ornament_type=Ornament.OrnamentCategory.STOCK,
         status=Ornament.StatusCategory.ACTIVE,
         metal_type__in=[
@@ -1386,12 +1346,10 @@ def ornament_weight_report(request):
             Ornament.MetalTypeCategory.SILVER,
             Ornament.MetalTypeCategory.DIAMOND,
         ],
-    ).filter(
-        Q(weight__gt=0) | Q(diamond_weight__gt=0)
-    )
+    ).exclude(has_weight=False, has_diamond_weight=False)
 
     # Get latest daily gold/silver per tola rates
-    daily_rate = DailyRate.objects.order_by('-created_at').first()
+    daily_rate = rates.latest(request)
     gold_rate = daily_rate.gold_rate if daily_rate else Decimal('0')
     silver_rate = daily_rate.silver_rate if daily_rate else Decimal('0')
     
@@ -1406,16 +1364,19 @@ def ornament_weight_report(request):
         except Stock.DoesNotExist:
             pass
 
-    # Group by metal type
-    weight_by_metal = list(
-        base_qs.values('metal_type').annotate(
-            total_weight=Sum('weight'),
-            total_gross_weight=Sum('gross_weight'),
-            total_jarti=Sum('jarti'),
-            total_jyala=Sum('jyala'),
-            ornament_count=Count('id')
-        ).order_by('metal_type')
-    )
+    # Group by metal type/karat once; every figure below is derived from it.
+    snapshot = OrnamentStockSnapshot.from_summary(base_qs)
+    weight_by_metal = [
+        {
+            'metal_type': mtype,
+            'total_weight': snapshot.total('weight', mtype),
+            'total_gross_weight': snapshot.total('gross_weight', mtype),
+            'total_jarti': snapshot.total('jarti', mtype),
+            'total_jyala': snapshot.total('jyala', mtype),
+            'ornament_count': snapshot.count(mtype),
+        }
+        for mtype in snapshot.metal_types()
+    ]
 
     grand_total_amount = Decimal('0')
     total_gold_amount_with_diamond = Decimal('0')
@@ -1429,17 +1390,15 @@ def ornament_weight_report(request):
 
     for metal in weight_by_metal:
         mtype = metal['metal_type']
-        mqs = base_qs.filter(metal_type=mtype)
         # Karat breakdown
-        karats = mqs.values('type').annotate(weight_sum=Sum('weight'))
-        karat_dict = {k['type']: k['weight_sum'] or Decimal('0') for k in karats}
+        karat_dict = snapshot.weight_by_type(mtype)
         k24 = karat_dict.get('24KARAT', Decimal('0'))
         k22 = karat_dict.get('22KARAT', Decimal('0'))
         k18 = karat_dict.get('18KARAT', Decimal('0'))
         k14 = karat_dict.get('14KARAT', Decimal('0'))
-        eq_24k = k24 + (k22 * Decimal('0.92')) + (k18 * Decimal('0.75')) + (k14 * Decimal('0.60'))
+        eq_24k = snapshot.equivalent_24k(mtype, WEIGHT_REPORT_KARAT_FACTORS, default=Decimal('0'))
         # Stone price
-        stone_total = mqs.aggregate(total=Sum('stone_totalprice'))['total'] or Decimal('0')
+        stone_total = snapshot.total('stone_totalprice', mtype)
         # Jarti/Jyala
         total_jarti = metal['total_jarti'] or Decimal('0')
         total_jyala = metal['total_jyala'] or Decimal('0')
@@ -1484,7 +1443,7 @@ def ornament_weight_report(request):
             # Jyala: gold net weight × 1800
             jyala_amount = diamond_gold_net_weight * Decimal('1800')
             # Diamond price: total diamond weight × 35000
-            diamond_weight_total = mqs.aggregate(dw=Sum('diamond_weight'))['dw'] or Decimal('0')
+            diamond_weight_total = snapshot.total('diamond_weight', mtype)
             diamond_weight_amount = diamond_weight_total * Decimal('35000')
             # Total (exclude jarti/stone per spec unless required)
             amount = gold_amount + jyala_amount + diamond_weight_amount
@@ -1515,47 +1474,17 @@ def ornament_weight_report(request):
         grand_total_amount += amount
 
     # Overall totals
-    totals = base_qs.aggregate(
-        total_weight=Sum('weight'),
-        total_gross_weight=Sum('gross_weight'),
-        total_jarti=Sum('jarti'),
-        total_jyala=Sum('jyala'),
-        total_count=Count('id')
-    )
-    # Overall 24k equivalent for Gold
-    gold_qs = base_qs.filter(metal_type='Gold')
-    gold_karats = gold_qs.values('type').annotate(weight_sum=Sum('weight'))
-    gold_karat_dict = {k['type']: k['weight_sum'] or Decimal('0') for k in gold_karats}
-    gold_24k_total = gold_karat_dict.get('24KARAT', Decimal('0'))
-    gold_22k_total = gold_karat_dict.get('22KARAT', Decimal('0'))
-    gold_18k_total = gold_karat_dict.get('18KARAT', Decimal('0'))
-    gold_14k_total = gold_karat_dict.get('14KARAT', Decimal('0'))
-    total_gold_24k_equivalent = gold_24k_total + (gold_22k_total * Decimal('0.92')) + (gold_18k_total * Decimal('0.75')) + (gold_14k_total * Decimal('0.60'))
-    
-    # Overall 24k equivalent for Silver
-    silver_qs = base_qs.filter(metal_type='Silver')
-    silver_karats = silver_qs.values('type').annotate(weight_sum=Sum('weight'))
-    silver_karat_dict = {k['type']: k['weight_sum'] or Decimal('0') for k in silver_karats}
-    silver_24k_total = silver_karat_dict.get('24KARAT', Decimal('0'))
-    silver_22k_total = silver_karat_dict.get('22KARAT', Decimal('0'))
-    silver_18k_total = silver_karat_dict.get('18KARAT', Decimal('0'))
-    silver_14k_total = silver_karat_dict.get('14KARAT', Decimal('0'))
-    total_silver_24k_equivalent = silver_24k_total + (silver_22k_total * Decimal('0.92')) + (silver_18k_total * Decimal('0.75')) + (silver_14k_total * Decimal('0.60'))
-    
-    # Overall 24k equivalent for Diamond (gold content in diamond ornaments)
-    diamond_qs = base_qs.filter(metal_type='Diamond')
-    diamond_karats = diamond_qs.values('type').annotate(weight_sum=Sum('weight'))
-    diamond_karat_dict = {k['type']: k['weight_sum'] or Decimal('0') for k in diamond_karats}
-    diamond_24k_total = diamond_karat_dict.get('24KARAT', Decimal('0'))
-    diamond_22k_total = diamond_karat_dict.get('22KARAT', Decimal('0'))
-    diamond_18k_total = diamond_karat_dict.get('18KARAT', Decimal('0'))
-    diamond_14k_total = diamond_karat_dict.get('14KARAT', Decimal('0'))
-    total_diamond_24k_equivalent = (
-        diamond_24k_total
-        + (diamond_22k_total * Decimal('0.92'))
-        + (diamond_18k_total * Decimal('0.75'))
-        + (diamond_14k_total * Decimal('0.60'))
-    )
+    totals = {
+        'total_weight': snapshot.total('weight'),
+        'total_gross_weight': snapshot.total('gross_weight'),
+        'total_jarti': snapshot.total('jarti'),
+        'total_jyala': snapshot.total('jyala'),
+        'total_count': snapshot.count(),
+    }
+    # Overall 24k equivalent per metal (Diamond = gold content in diamond ornaments)
+    total_gold_24k_equivalent = snapshot.equivalent_24k('Gold', WEIGHT_REPORT_KARAT_FACTORS, default=Decimal('0'))
+    total_silver_24k_equivalent = snapshot.equivalent_24k('Silver', WEIGHT_REPORT_KARAT_FACTORS, default=Decimal('0'))
+    total_diamond_24k_equivalent = snapshot.equivalent_24k('Diamond', WEIGHT_REPORT_KARAT_FACTORS, default=Decimal('0'))
 
     context = {
         'weight_by_metal': weight_by_metal,
@@ -1823,8 +1752,8 @@ def barcode_scanner(request):
                 error_message = f"Ornament with barcode '{barcode}' not found."
     
     # Get the latest rate
-    from main.models import DailyRate
-    current_rate = DailyRate.objects.first()
+    from main.services import rates
+    current_rate = rates.latest(request)
     
     context = {
         'searched_ornament': searched_ornament,
@@ -1889,10 +1818,10 @@ def ornament_price_calculator(request, pk):
     ornament = get_object_or_404(Ornament, pk=pk)
     
     # Get the latest rate
-    from main.models import DailyRate
+    from main.services import rates
     from decimal import Decimal
     
-    current_rate = DailyRate.objects.first()
+    current_rate = rates.latest(request)
     
     # Get weights
     diamond_weight = Decimal(str(ornament.diamond_weight or 0))
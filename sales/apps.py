@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class SalesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sales"
+
+    def ready(self):
+        # Register the import wizard's background task
+        import sales.jobs  # noqa: F401
+        # Monthly sales rollup maintenance
+        import sales.signals  # noqa: F401
@@ -0,0 +1,23 @@
+"""Background task for the sales import wizard (see ``main.services.jobs``)."""
+from main.services.jobs import report, task
+
+
+@task("sales.import_wizard", "Sales import")
+def import_wizard(job):
+    """Create the orders and sales in the workbook uploaded to the wizard."""
+    from .views import ExcelImportProcessor
+
+    importer = ExcelImportProcessor(None)
+    report(job, message="Reading workbook...")
+    orders_data, warnings = importer.read_workbook(job.input_path)
+    job.errors.extend(warnings)
+
+    report(job, 0, len(orders_data), "Creating orders...")
+    imported_count, errors = importer.import_orders(
+        orders_data, progress=lambda done, total: report(job, done, total)
+    )
+    job.errors.extend(errors)
+    return (
+        f'Successfully imported {imported_count} complete orders with all ornaments! '
+        f'({importer.stats.throughput()})'
+    )
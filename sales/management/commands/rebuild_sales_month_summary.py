@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from sales import monthly_rollup
+from sales.models import Sale
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly sales summary table from the sales table'
+
+    def handle(self, *args, **options):
+        total = Sale.objects.filter(is_deleted=False).count()
+        self.stdout.write(f'Rebuilding monthly sales summary from {total} sales...')
+        months = monthly_rollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✓ Completed! Wrote {months} monthly rows.'))
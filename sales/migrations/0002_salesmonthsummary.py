@@ -0,0 +1,54 @@
+# Generated by Django 5.0 on 2026-10-17 17:50
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesMonthSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('sales_count', models.PositiveIntegerField(default=0)),
+                ('total_sales_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('total_remaining', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('total_tax', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('total_profit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('total_jarti', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('ornament_gold_weight', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('ornament_gold_weight_24k', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('ornament_silver_weight', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('ornament_silver_weight_24k', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('ornament_diamond_weight', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('ornament_diamond_weight_24k', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('ornament_diamond_carat', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('raw_gold_weight', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('raw_silver_weight', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=16)),
+                ('ornament_gold_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('ornament_silver_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('ornament_diamond_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('ornament_sales_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('raw_gold_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('raw_silver_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('raw_sales_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sales month summary',
+                'verbose_name_plural': 'Sales month summary',
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='salesmonthsummary',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='unique_sales_month_summary'),
+        ),
+    ]
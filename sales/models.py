@@ -192,3 +192,95 @@ class SalesMetalStock(models.Model):
             self.line_amount = Decimal('0.00')
         super().save(*args, **kwargs)
         super().save(*args, **kwargs)
+
+
+def _weight_field():
+    return models.DecimalField(max_digits=16, decimal_places=3, default=Decimal("0.000"))
+
+
+def _amount_field():
+    return models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0.00"))
+
+
+class SalesMonthSummary(models.Model):
+    """Sales totals for one Nepali (BS) month, excluding deleted sales.
+
+    Kept current by ``sales.signals`` through ``sales.monthly_rollup``, so
+    the dashboard chart, forecast and monthly report read one row per month
+    instead of every sale.  Rebuild with ``manage.py rebuild_sales_month_summary``.
+    """
+
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+
+    sales_count = models.PositiveIntegerField(default=0)
+    total_sales_amount = _amount_field()
+    total_remaining = _amount_field()
+    total_tax = _amount_field()
+    total_profit = _amount_field()
+    total_jarti = _weight_field()
+
+    ornament_gold_weight = _weight_field()
+    ornament_gold_weight_24k = _weight_field()
+    ornament_silver_weight = _weight_field()
+    ornament_silver_weight_24k = _weight_field()
+    ornament_diamond_weight = _weight_field()
+    ornament_diamond_weight_24k = _weight_field()
+    ornament_diamond_carat = _weight_field()
+    raw_gold_weight = _weight_field()
+    raw_silver_weight = _weight_field()
+
+    ornament_gold_amount = _amount_field()
+    ornament_silver_amount = _amount_field()
+    ornament_diamond_amount = _amount_field()
+    ornament_sales_amount = _amount_field()
+    raw_gold_amount = _amount_field()
+    raw_silver_amount = _amount_field()
+    raw_sales_amount = _amount_field()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    NEPALI_MONTHS = {
+        1: 'Baishakh', 2: 'Jestha', 3: 'Ashadh', 4: 'Shrawan',
+        5: 'Bhadra', 6: 'Ashwin', 7: 'Kartik', 8: 'Mangsir',
+        9: 'Poush', 10: 'Magh', 11: 'Falgun', 12: 'Chaitra',
+    }
+
+    class Meta:
+        verbose_name = "Sales month summary"
+        verbose_name_plural = "Sales month summary"
+        ordering = ["-year", "-month"]
+        constraints = [
+            models.UniqueConstraint(fields=["year", "month"], name="unique_sales_month_summary"),
+        ]
+
+    def __str__(self):
+        return f"{self.month_key}: {self.sales_count} sales"
+
+    @property
+    def month_key(self):
+        return f"{self.year}-{self.month:02d}"
+
+    @property
+    def month_name(self):
+        return self.NEPALI_MONTHS.get(self.month, str(self.month))
+
+    @property
+    def label(self):
+        return f"{self.month_name} {self.year}"
+
+    @property
+    def ornament_total_weight_24k(self):
+        return self.ornament_gold_weight_24k + self.ornament_diamond_weight_24k
+
+    @property
+    def total_gold_weight(self):
+        return self.ornament_total_weight_24k + self.raw_gold_weight
+
+    @property
+    def total_silver_weight(self):
+        return self.ornament_silver_weight_24k + self.raw_silver_weight
+
+    @property
+    def total_diamond_weight(self):
+        return self.ornament_diamond_weight_24k
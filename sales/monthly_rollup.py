@@ -0,0 +1,234 @@
+"""Keep ``SalesMonthSummary`` in step with sales.
+
+A change to a sale, its order, an order line or a raw metal line marks the
+sale's Nepali month as dirty; the dirty months are recomputed once when the
+transaction commits, from that month's sales only.  Bulk writes that skip
+signals (``bulk_create`` imports, restores) call :func:`refresh_months` or
+:func:`rebuild` themselves.  Both also invalidate the cached report pages.
+"""
+from decimal import Decimal
+
+import nepali_datetime as ndt
+from django.db import transaction
+
+ZERO = Decimal("0")
+WEIGHT_PLACES = Decimal("0.001")
+AMOUNT_PLACES = Decimal("0.01")
+
+WEIGHT_FIELDS = (
+    "total_jarti",
+    "ornament_gold_weight",
+    "ornament_gold_weight_24k",
+    "ornament_silver_weight",
+    "ornament_silver_weight_24k",
+    "ornament_diamond_weight",
+    "ornament_diamond_weight_24k",
+    "ornament_diamond_carat",
+    "raw_gold_weight",
+    "raw_silver_weight",
+)
+AMOUNT_FIELDS = (
+    "total_sales_amount",
+    "total_remaining",
+    "total_tax",
+    "total_profit",
+    "ornament_gold_amount",
+    "ornament_silver_amount",
+    "ornament_diamond_amount",
+    "ornament_sales_amount",
+    "raw_gold_amount",
+    "raw_silver_amount",
+    "raw_sales_amount",
+)
+SUMMED_FIELDS = ("sales_count",) + WEIGHT_FIELDS + AMOUNT_FIELDS
+
+_PENDING_ATTR = "_sales_month_rollup_pending"
+
+
+def _purity_factors():
+    from ornament.models import Ornament
+
+    return {
+        Ornament.TypeCategory.TWENTYFOURKARAT: Decimal("1"),
+        Ornament.TypeCategory.TWENTHREEKARAT: Decimal("23") / Decimal("24"),
+        Ornament.TypeCategory.TWENTYTWOKARAT: Decimal("22") / Decimal("24"),
+        Ornament.TypeCategory.EIGHTEENKARAT: Decimal("18") / Decimal("24"),
+        Ornament.TypeCategory.FOURTEENKARAT: Decimal("14") / Decimal("24"),
+    }
+
+
+def month_of(sale_date):
+    """``(year, month)`` of a BS sale date, or ``None``."""
+    if not sale_date:
+        return None
+    return sale_date.year, sale_date.month
+
+
+def month_bounds(year, month):
+    """``(first day, first day of the next month)`` as BS dates."""
+    start = ndt.date(year, month, 1)
+    end = ndt.date(year + 1, 1, 1) if month == 12 else ndt.date(year, month + 1, 1)
+    return start, end
+
+
+def _sales_queryset():
+    from .models import Sale
+
+    return Sale.objects.filter(is_deleted=False, sale_date__isnull=False).select_related("order").prefetch_related(
+        "order__order_ornaments__ornament", "sale_metals"
+    )
+
+
+def _empty():
+    figures = {field: ZERO for field in WEIGHT_FIELDS + AMOUNT_FIELDS}
+    figures["sales_count"] = 0
+    return figures
+
+
+def add_sale(figures, sale, purity_factors):
+    """Add one sale (with prefetched lines and metals) to a month's figures."""
+    order = sale.order
+    figures["sales_count"] += 1
+
+    counts = {"gold": 0, "silver": 0, "diamond": 0}
+    for line in order.order_ornaments.all():
+        ornament = line.ornament
+        weight = ornament.weight or ZERO
+        factor = purity_factors.get(ornament.type, Decimal("1.00"))
+        metal_type = str(ornament.metal_type or "").lower()
+        if metal_type in counts:
+            figures[f"ornament_{metal_type}_weight"] += weight
+            figures[f"ornament_{metal_type}_weight_24k"] += weight * factor
+            counts[metal_type] += 1
+        if metal_type == "diamond":
+            figures["ornament_diamond_carat"] += ornament.diamond_weight or ZERO
+
+        customer_jarti = line.jarti or ZERO
+        figures["total_jarti"] += customer_jarti
+        jarti_difference = customer_jarti - (ornament.jarti or ZERO)
+        figures["total_profit"] += (jarti_difference / Decimal("11.664") * (line.gold_rate or ZERO)) + (line.jyala or ZERO)
+
+    raw_amount = ZERO
+    for metal in sale.sale_metals.all():
+        if metal.metal_type in ("gold", "silver"):
+            amount = metal.line_amount or ZERO
+            figures[f"raw_{metal.metal_type}_weight"] += metal.quantity or ZERO
+            figures[f"raw_{metal.metal_type}_amount"] += amount
+            raw_amount += amount
+    figures["raw_sales_amount"] += raw_amount
+
+    # Ornament amount is split evenly across the bill's gold/silver/diamond pieces.
+    total = order.total or ZERO
+    ornament_amount = total - raw_amount
+    ornament_count = sum(counts.values())
+    if ornament_count > 0 and ornament_amount > 0:
+        per_item = ornament_amount / ornament_count
+        for metal_type, count in counts.items():
+            figures[f"ornament_{metal_type}_amount"] += per_item * count
+    figures["ornament_sales_amount"] += ornament_amount
+
+    figures["total_sales_amount"] += total
+    figures["total_remaining"] += order.remaining_amount or ZERO
+    figures["total_tax"] += order.tax or ZERO
+
+
+def _rounded(figures):
+    rounded = {"sales_count": figures["sales_count"]}
+    for field in WEIGHT_FIELDS:
+        rounded[field] = figures[field].quantize(WEIGHT_PLACES)
+    for field in AMOUNT_FIELDS:
+        rounded[field] = figures[field].quantize(AMOUNT_PLACES)
+    return rounded
+
+
+def _invalidate_reports():
+    from main.services import cache_versions
+
+    cache_versions.bump_on_commit(cache_versions.REPORTS)
+
+
+def refresh_months(months):
+    """Recompute the summary rows of ``(year, month)`` pairs from their sales."""
+    from .models import SalesMonthSummary
+
+    purity_factors = _purity_factors()
+    with transaction.atomic():
+        for year, month in sorted(set(months)):
+            start, end = month_bounds(year, month)
+            figures = _empty()
+            for sale in _sales_queryset().filter(sale_date__gte=start, sale_date__lt=end):
+                add_sale(figures, sale, purity_factors)
+            if figures["sales_count"]:
+                SalesMonthSummary.objects.update_or_create(year=year, month=month, defaults=_rounded(figures))
+            else:
+                SalesMonthSummary.objects.filter(year=year, month=month).delete()
+    _invalidate_reports()
+
+
+def rebuild():
+    """Recreate the whole summary table from the sales table."""
+    from .models import SalesMonthSummary
+
+    purity_factors = _purity_factors()
+    months = {}
+    for sale in _sales_queryset().order_by("sale_date", "pk").iterator(chunk_size=500):
+        key = month_of(sale.sale_date)
+        add_sale(months.setdefault(key, _empty()), sale, purity_factors)
+
+    with transaction.atomic():
+        SalesMonthSummary.objects.all().delete()
+        SalesMonthSummary.objects.bulk_create(
+            [SalesMonthSummary(year=year, month=month, **_rounded(figures)) for (year, month), figures in months.items()]
+        )
+    _invalidate_reports()
+    return len(months)
+
+
+def _flush_pending():
+    connection = transaction.get_connection()
+    pending = getattr(connection, _PENDING_ATTR, None)
+    setattr(connection, _PENDING_ATTR, None)
+    if pending:
+        refresh_months(pending)
+
+
+def mark_dirty(*months):
+    """Queue ``(year, month)`` pairs to be refreshed when the transaction commits.
+
+    Months marked several times in one transaction are recomputed once: the
+    first commit callback refreshes everything pending and the rest find
+    nothing left to do.
+    """
+    months = {month for month in months if month}
+    if not months:
+        return
+    connection = transaction.get_connection()
+    pending = getattr(connection, _PENDING_ATTR, None)
+    if pending is None:
+        pending = set()
+        setattr(connection, _PENDING_ATTR, pending)
+    pending.update(months)
+    transaction.on_commit(_flush_pending)
+
+
+def months_of_orders(order_ids):
+    """Months of the sales made from ``order_ids``."""
+    from .models import Sale
+
+    return {
+        month_of(sale_date)
+        for sale_date in Sale.objects.filter(order_id__in=order_ids).values_list("sale_date", flat=True)
+    }
+
+
+def summary_totals(rows):
+    """Column totals over summary rows, including the derived weights."""
+    totals = {field: ZERO for field in SUMMED_FIELDS}
+    for row in rows:
+        for field in SUMMED_FIELDS:
+            totals[field] += getattr(row, field)
+    totals["ornament_total_weight_24k"] = totals["ornament_gold_weight_24k"] + totals["ornament_diamond_weight_24k"]
+    totals["total_gold_weight"] = totals["ornament_total_weight_24k"] + totals["raw_gold_weight"]
+    totals["total_silver_weight"] = totals["ornament_silver_weight_24k"] + totals["raw_silver_weight"]
+    totals["total_diamond_weight"] = totals["ornament_diamond_weight_24k"]
+    return totals
@@ -0,0 +1,52 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from order.models import Order, OrderOrnament
+
+from . import monthly_rollup
+from .models import Sale, SalesMetalStock
+
+
+@receiver(pre_save, sender=Sale)
+def remember_sale_month(sender, instance, raw=False, **kwargs):
+    """A sale moved to another date has to leave its old month too."""
+    if raw or instance._state.adding or not instance.pk:
+        instance._rollup_previous_month = None
+        return
+    previous = Sale.objects.filter(pk=instance.pk).values_list('sale_date', flat=True).first()
+    instance._rollup_previous_month = monthly_rollup.month_of(previous)
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+def refresh_sale_month(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    monthly_rollup.mark_dirty(
+        monthly_rollup.month_of(instance.sale_date),
+        getattr(instance, '_rollup_previous_month', None),
+    )
+
+
+@receiver(post_save, sender=Order)
+def refresh_order_month(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    monthly_rollup.mark_dirty(*monthly_rollup.months_of_orders([instance.pk]))
+
+
+@receiver(post_save, sender=OrderOrnament)
+@receiver(post_delete, sender=OrderOrnament)
+def refresh_order_line_month(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    monthly_rollup.mark_dirty(*monthly_rollup.months_of_orders([instance.order_id]))
+
+
+@receiver(post_save, sender=SalesMetalStock)
+@receiver(post_delete, sender=SalesMetalStock)
+def refresh_sale_metal_month(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sale_date = Sale.objects.filter(pk=instance.sale_id).values_list('sale_date', flat=True).first()
+    monthly_rollup.mark_dirty(monthly_rollup.month_of(sale_date))
@@ -0,0 +1,199 @@
+"""SQL-side figures for the sales list.
+
+``annotate_sale_figures`` attaches per-sale weights and amounts as correlated
+subqueries, so a page of sales can be rendered without prefetching every
+order line, and ``tab_totals`` folds those annotations into the footer totals
+and row counts of every filter tab with a single conditional aggregate.
+
+24K equivalents are carried as "karat units" (weight multiplied by the karat
+number) so the database only ever multiplies exact decimals; dividing by 24
+happens once, in Python.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    BooleanField, Case, Count, DecimalField, Exists, ExpressionWrapper, F,
+    IntegerField, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+
+from order.models import OrderOrnament, OrderPayment
+from ornament.models import Ornament
+
+from .models import SalesMetalStock
+
+ZERO = Decimal("0")
+KARAT_UNITS_PER_24K = Decimal("24")
+
+WEIGHT_FIELD = DecimalField(max_digits=18, decimal_places=3)
+AMOUNT_FIELD = DecimalField(max_digits=18, decimal_places=2)
+
+# Karat numbers for ornament types; anything else counts as pure (24).
+ORNAMENT_KARATS = {
+    Ornament.TypeCategory.TWENTYFOURKARAT: 24,
+    Ornament.TypeCategory.TWENTHREEKARAT: 23,
+    Ornament.TypeCategory.TWENTYTWOKARAT: 22,
+    Ornament.TypeCategory.EIGHTEENKARAT: 18,
+    Ornament.TypeCategory.FOURTEENKARAT: 14,
+}
+
+# Keys of every totals dict built for the sales list.
+TOTAL_FIELDS = (
+    "weight",
+    "total",
+    "paid",
+    "remaining",
+    "profit",
+    "gold_sold_weight",
+    "silver_sold_weight",
+    "diamond_sold_weight",
+    "gold_24_weight",
+    "silver_24_weight",
+    "order_total",
+)
+
+# Sale annotation summed into each totals key (24K keys are karat units).
+_TOTAL_SOURCES = {
+    "weight": "total_weight",
+    "total": "display_total",
+    "paid": "paid_total",
+    "remaining": "remaining_total",
+    "profit": "profit_total",
+    "gold_sold_weight": "gold_sold_weight",
+    "silver_sold_weight": "silver_sold_weight",
+    "diamond_sold_weight": "diamond_sold_weight",
+    "gold_24_weight": "gold_24_units",
+    "silver_24_weight": "silver_24_units",
+    "order_total": "order_total",
+}
+_UNIT_FIELDS = ("gold_24_weight", "silver_24_weight")
+
+
+def _karat_units(weight_field):
+    whens = [When(ornament__type=karat, then=Value(units)) for karat, units in ORNAMENT_KARATS.items()]
+    karat = Case(*whens, default=Value(24), output_field=IntegerField())
+    return ExpressionWrapper(F(weight_field) * karat, output_field=WEIGHT_FIELD)
+
+
+def _sum(queryset, group_field, expression, output_field):
+    """Correlated ``SUM`` over ``queryset`` as a non-null subquery expression."""
+    rows = (
+        queryset.order_by()
+        .values(group_field)
+        .annotate(_total=Sum(expression, output_field=output_field))
+        .values("_total")
+    )
+    return Coalesce(Subquery(rows, output_field=output_field), Value(ZERO), output_field=output_field)
+
+
+def _combined(expression, output_field=WEIGHT_FIELD):
+    return ExpressionWrapper(expression, output_field=output_field)
+
+
+def _any(*conditions):
+    return ExpressionWrapper(Q(*conditions, _connector=Q.OR), output_field=BooleanField())
+
+
+def annotate_sale_figures(queryset):
+    """Annotate a Sale queryset with the weights and amounts the list shows.
+
+    Adds ``total_weight``, ``gold_sold_weight``, ``silver_sold_weight``,
+    ``diamond_sold_weight``, ``own_gold``, ``display_total``, ``paid_total``,
+    ``order_total``, ``remaining_total``, ``profit_total``, ``gold_24_units`` and
+    ``silver_24_units``, plus the boolean tab flags used by :data:`TABS`.
+    """
+    lines = OrderOrnament.objects.filter(order=OuterRef("order_id"))
+    metals = SalesMetalStock.objects.filter(sale=OuterRef("pk"))
+    gold_lines = lines.filter(ornament__metal_type__iexact=Ornament.MetalTypeCategory.GOLD)
+    silver_lines = lines.filter(ornament__metal_type__iexact=Ornament.MetalTypeCategory.SILVER)
+    diamond_lines = lines.filter(ornament__metal_type__iexact=Ornament.MetalTypeCategory.DIAMOND)
+    gold_metals = metals.filter(metal_type=SalesMetalStock.MetalType.GOLD)
+    silver_metals = metals.filter(metal_type=SalesMetalStock.MetalType.SILVER)
+
+    queryset = queryset.annotate(
+        _ornament_count=Coalesce(
+            Subquery(
+                lines.order_by().values("order").annotate(_n=Count("pk")).values("_n"),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        _ornament_weight=_sum(lines, "order", "ornament__weight", WEIGHT_FIELD),
+        _metal_weight=_sum(metals, "sale", "quantity", WEIGHT_FIELD),
+        _metal_total=_sum(metals, "sale", "line_amount", AMOUNT_FIELD),
+        _gold_ornament_weight=_sum(gold_lines, "order", "ornament__weight", WEIGHT_FIELD),
+        _gold_ornament_units=_sum(gold_lines, "order", _karat_units("ornament__weight"), WEIGHT_FIELD),
+        _silver_ornament_weight=_sum(silver_lines, "order", "ornament__weight", WEIGHT_FIELD),
+        _silver_ornament_units=_sum(silver_lines, "order", _karat_units("ornament__weight"), WEIGHT_FIELD),
+        _gold_metal_weight=_sum(gold_metals, "sale", "quantity", WEIGHT_FIELD),
+        _silver_metal_weight=_sum(silver_metals, "sale", "quantity", WEIGHT_FIELD),
+        diamond_sold_weight=_sum(diamond_lines, "order", "ornament__diamond_weight", WEIGHT_FIELD),
+        own_gold=_sum(lines, "order", "own_gold", WEIGHT_FIELD),
+        paid_total=_sum(OrderPayment.objects.filter(order=OuterRef("order_id")), "order", "amount", AMOUNT_FIELD),
+        _is_gold=_any(Exists(gold_lines), Exists(gold_metals)),
+        _is_silver=_any(Exists(silver_lines), Exists(silver_metals)),
+        _is_diamond=Exists(diamond_lines),
+        _is_own_gold=Exists(lines.filter(own_gold__gt=0)),
+    )
+    # Raw metal lines have always been counted as pure metal in the 24K figures.
+    return queryset.annotate(
+        total_weight=_combined(F("_ornament_weight") + F("_metal_weight")),
+        gold_sold_weight=_combined(F("_gold_ornament_weight") + F("_gold_metal_weight")),
+        silver_sold_weight=_combined(F("_silver_ornament_weight") + F("_silver_metal_weight")),
+        gold_24_units=_combined(F("_gold_ornament_units") + F("_gold_metal_weight") * Value(24)),
+        silver_24_units=_combined(F("_silver_ornament_units") + F("_silver_metal_weight") * Value(24)),
+        display_total=Case(
+            When(_ornament_count=0, then=F("_metal_total")),
+            default=Coalesce(F("order__total"), Value(ZERO), output_field=AMOUNT_FIELD),
+            output_field=AMOUNT_FIELD,
+        ),
+        order_total=Coalesce(F("order__total"), Value(ZERO), output_field=AMOUNT_FIELD),
+        remaining_total=Coalesce(F("order__remaining_amount"), Value(ZERO), output_field=AMOUNT_FIELD),
+        profit_total=_combined(
+            Coalesce(F("order__total"), Value(ZERO), output_field=AMOUNT_FIELD)
+            - Coalesce(F("order__amount"), Value(ZERO), output_field=AMOUNT_FIELD),
+            AMOUNT_FIELD,
+        ),
+    )
+
+
+# Filter tabs of the sales list, keyed by their context prefix.
+TABS = {
+    "all": Q(),
+    "gold": Q(_is_gold=True),
+    "silver": Q(_is_silver=True),
+    "diamond": Q(_is_diamond=True),
+    "own_gold": Q(_is_own_gold=True),
+    "pan": Q(pan_number__isnull=False) & ~Q(pan_number__exact=""),
+}
+
+
+def tab_totals(annotated_queryset):
+    """Return ``{tab: (count, totals)}`` for every tab with one query."""
+    aggregates = {}
+    for tab, condition in TABS.items():
+        condition = condition or None
+        aggregates[f"{tab}_count"] = Count("pk", filter=condition)
+        for key, source in _TOTAL_SOURCES.items():
+            aggregates[f"{tab}_{key}"] = Sum(source, filter=condition)
+    row = annotated_queryset.order_by().aggregate(**aggregates)
+
+    result = {}
+    for tab in TABS:
+        totals = {key: row[f"{tab}_{key}"] or ZERO for key in TOTAL_FIELDS}
+        for key in _UNIT_FIELDS:
+            totals[key] = totals[key] / KARAT_UNITS_PER_24K
+        result[tab] = (row[f"{tab}_count"] or 0, totals)
+    return result
+
+
+def apply_row_figures(sales):
+    """Set the per-row attributes the template reads on hydrated sales."""
+    for sale in sales:
+        sale.gold_24_weight = sale.gold_24_units / KARAT_UNITS_PER_24K
+        sale.silver_24_weight = sale.silver_24_units / KARAT_UNITS_PER_24K
+        sale.non_zero_metal_lines = [
+            metal for metal in sale.sale_metals.all()
+            if (metal.line_amount or ZERO) > ZERO
+        ]
+        sale.non_zero_metal_count = len(sale.non_zero_metal_lines)
@@ -1,5 +1,5 @@
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views import View
 from django.views.generic import ListView, UpdateView, CreateView, DeleteView, FormView, TemplateView
 from django.contrib.auth.decorators import login_required
@@ -10,6 +10,7 @@ from datetime import timedelta, date as py_date, datetime as py_datetime
 from io import BytesIO
 import json
 import math
+import os
 import nepali_datetime as ndt
 from django.http import HttpResponse
 from django.contrib import messages
@@ -24,10 +25,19 @@ from django.conf import settings
 
 from order.models import Order, OrderOrnament, OrderPayment, DebtorPayment
 from order.forms import OrderForm, OrnamentFormSet
+from order.totals import with_total_paid
 from ornament.models import Ornament, Kaligar, MainCategory, SubCategory
-from .models import Sale
+from ornament.bulk import add_to_summary, create_ornaments
+from ornament.stock_summary import update_ornaments
+from .models import Sale, SalesMonthSummary
+from .totals import TABS, annotate_sale_figures, apply_row_figures, tab_totals
 from .forms import ExcelImportForm, SaleUpdateForm
 from finance.models import SundryDebtor
+from common.bulk_import import ImportStats, chunked, existing_keys, in_bulk_by
+from common.xlsx_export import XlsxExport, stream
+from main.services import cache_versions
+from main.services.jobs import enqueue
+from main.services.view_cache import cached_view
 
 
 class CreateSaleFromOrderView(LoginRequiredMixin, View):
@@ -66,8 +76,9 @@ class CreateSaleFromOrderView(LoginRequiredMixin, View):
         )
 
         # Mark ornaments on this order as sales items
-        Ornament.objects.filter(order=order).update(
-            ornament_type=Ornament.OrnamentCategory.SALES
+        update_ornaments(
+            Ornament.objects.filter(order=order),
+            ornament_type=Ornament.OrnamentCategory.SALES,
         )
 
         # Mark the order as delivered once it is added to sales
@@ -93,11 +104,15 @@ class SalesListView(LoginRequiredMixin, ListView):
             queryset=OrderOrnament.objects.select_related('ornament')
         )
         
+        # Orders carry total_paid as an annotation instead of their payments.
         queryset = (
             super()
             .get_queryset()
-            .select_related("order")
-            .prefetch_related(ornament_prefetch, "sale_metals")
+            .prefetch_related(
+                Prefetch("order", queryset=with_total_paid(Order.objects.all())),
+                ornament_prefetch,
+                "sale_metals",
+            )
         )
         search = self.request.GET.get("search")
         if search:
@@ -118,245 +133,42 @@ class SalesListView(LoginRequiredMixin, ListView):
             )
         )
 
-        return queryset.distinct().order_by('-bill_no_num', '-id')
+        # Weights and amounts come from correlated subqueries, so only the
+        # rows actually sliced for display are computed and prefetched.
+        return annotate_sale_figures(queryset).order_by('-bill_no_num', '-id')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Get paginated sales for the current page
-        paginated_sales = context["sales"]
-        
-        # Get full unpaginated queryset for filtering
-        full_sales_qs = self.get_queryset()
-        
-        context["sales_count"] = full_sales_qs.count()
-
-        gold_metal = Ornament.MetalTypeCategory.GOLD
-        silver_metal = Ornament.MetalTypeCategory.SILVER
-        diamond_metal = Ornament.MetalTypeCategory.DIAMOND
-
-        # Optimize: Use values_list to get IDs then filter - reduces database queries
-        # Get IDs for each filter type to avoid multiple count() queries
-        gold_sale_ids = set(
-            full_sales_qs.filter(
-                Q(order__order_ornaments__ornament__metal_type__iexact=gold_metal)
-                | Q(sale_metals__metal_type="gold")
-            ).distinct().values_list('id', flat=True)
-        )
-        silver_sale_ids = set(
-            full_sales_qs.filter(
-                Q(order__order_ornaments__ornament__metal_type__iexact=silver_metal)
-                | Q(sale_metals__metal_type="silver")
-            ).distinct().values_list('id', flat=True)
-        )
-        diamond_sale_ids = set(
-            full_sales_qs.filter(
-                Q(order__order_ornaments__ornament__metal_type__iexact=diamond_metal)
-            ).distinct().values_list('id', flat=True)
-        )
-        own_gold_sale_ids = set(
-            full_sales_qs.filter(
-                Q(order__order_ornaments__own_gold__gt=0)
-            ).distinct().values_list('id', flat=True)
-        )
-        pan_sale_ids = set(
-            full_sales_qs.filter(
-                Q(pan_number__isnull=False) & ~Q(pan_number__exact="")
-            ).distinct().values_list('id', flat=True)
-        )
-
-        # Create filtered querysets using the IDs
-        context["gold_sales"] = full_sales_qs.filter(id__in=gold_sale_ids)
-        context["silver_sales"] = full_sales_qs.filter(id__in=silver_sale_ids)
-        context["diamond_sales"] = full_sales_qs.filter(id__in=diamond_sale_ids)
-        context["own_gold_sales"] = full_sales_qs.filter(id__in=own_gold_sale_ids)
-        context["pan_sales"] = full_sales_qs.filter(id__in=pan_sale_ids)
-
-        # Use len() on sets instead of count() - much faster
-        context["all_sales_count"] = context["sales_count"]
-        context["gold_sales_count"] = len(gold_sale_ids)
-        context["silver_sales_count"] = len(silver_sale_ids)
-        context["diamond_sales_count"] = len(diamond_sale_ids)
-        context["own_gold_sales_count"] = len(own_gold_sale_ids)
-        context["pan_sales_count"] = len(pan_sale_ids)
-
-        # Calculate gold/silver weights and total sales amount (including raw metals)
-        purity_factors = {
-            Ornament.TypeCategory.TWENTYFOURKARAT: Decimal("1"),
-            Ornament.TypeCategory.TWENTHREEKARAT: Decimal("23") / Decimal("24"),
-            Ornament.TypeCategory.TWENTYTWOKARAT: Decimal("22") / Decimal("24"),
-            Ornament.TypeCategory.EIGHTEENKARAT: Decimal("18") / Decimal("24"),
-            Ornament.TypeCategory.FOURTEENKARAT: Decimal("14") / Decimal("24"),
-        }
-
-        # OPTIMIZATION: Single iteration over all sales with cached calculations
-        # Build a cache of sale data to avoid re-iterating
-        sale_data_cache = {}
-        
-        gold_sold_weight = Decimal("0")
-        silver_sold_weight = Decimal("0")
-        diamond_sold_weight = Decimal("0")
-        gold_24_weight = Decimal("0")
-        silver_24_weight = Decimal("0")
-        total_sales_amount = Decimal("0")
-
-        # Single iteration to calculate all required metrics for ALL sales
-        for sale in full_sales_qs:
-            # Cache ornament and metal data for this sale
-            ornament_lines = list(sale.order.order_ornaments.all())
-            sale_metals = list(sale.sale_metals.all())
-            non_zero_metal_lines = [
-                metal for metal in sale_metals
-                if (metal.line_amount or Decimal("0")) > Decimal("0")
-            ]
-            
-            # Calculate ornament weights
-            ornament_weight = Decimal("0")
-            sale_gold_sold = Decimal("0")
-            sale_silver_sold = Decimal("0")
-            sale_diamond_sold = Decimal("0")
-            sale_gold_24 = Decimal("0")
-            sale_silver_24 = Decimal("0")
-            sale_own_gold = Decimal("0")
-            
-            for line in ornament_lines:
-                weight = line.ornament.weight or Decimal("0")
-                ornament_weight += weight
-                factor = purity_factors.get(getattr(line.ornament, 'type', None), Decimal("1.00"))
-                metal_type = str(getattr(line.ornament, 'metal_type', '')).lower()
-                own_gold = line.own_gold or Decimal("0")
-                sale_own_gold += own_gold
-                
-                if metal_type == str(gold_metal).lower():
-                    sale_gold_sold += weight
-                    gold_sold_weight += weight
-                    weighted = weight * factor
-                    sale_gold_24 += weighted
-                    gold_24_weight += weighted
-                elif metal_type == str(getattr(Ornament.MetalTypeCategory, 'DIAMOND', 'diamond')).lower():
-                    diamond_wt = line.ornament.diamond_weight or Decimal("0")
-                    sale_diamond_sold += diamond_wt
-                    diamond_sold_weight += diamond_wt
-                elif metal_type == str(silver_metal).lower():
-                    sale_silver_sold += weight
-                    silver_sold_weight += weight
-                    weighted = weight * factor
-                    sale_silver_24 += weighted
-                    silver_24_weight += weighted
-            
-            # Calculate metal weights and amounts
-            metal_weight = Decimal("0")
-            metal_total = Decimal("0")
-            
-            for metal in sale_metals:
-                quantity = metal.quantity or Decimal("0")
-                metal_weight += quantity
-                metal_total += metal.line_amount or Decimal("0")
-                
-                if metal.metal_type == 'gold':
-                    gold_sold_weight += quantity
-                    sale_gold_sold += quantity
-                    metal_factor = purity_factors.get(getattr(metal, 'purity', None), Decimal("1.00"))
-                    weighted = quantity * metal_factor
-                    sale_gold_24 += weighted
-                    gold_24_weight += weighted
-                elif metal.metal_type == 'silver':
-                    silver_sold_weight += quantity
-                    sale_silver_sold += quantity
-                    metal_factor = purity_factors.get(getattr(metal, 'purity', None), Decimal("1.00"))
-                    weighted = quantity * metal_factor
-                    sale_silver_24 += weighted
-                    silver_24_weight += weighted
-                
-            total_sales_amount += sale.order.total or Decimal("0")
-            
-            # Cache computed values for this sale
-            sale_data_cache[sale.id] = {
-                'ornament_weight': ornament_weight,
-                'metal_weight': metal_weight,
-                'total_weight': ornament_weight + metal_weight,
-                'gold_sold_weight': sale_gold_sold,
-                'silver_sold_weight': sale_silver_sold,
-                'diamond_sold_weight': sale_diamond_sold,
-                'own_gold': sale_own_gold,
-                # Backward-compatible keys used by existing table sections
-                'gold_24_weight': sale_gold_24,
-                'silver_24_weight': sale_silver_24,
-                'metal_total': metal_total,
-                'display_total': metal_total if len(ornament_lines) == 0 else (sale.order.total or Decimal("0")),
-                'ornament_count': len(ornament_lines),
-                'non_zero_metal_lines': non_zero_metal_lines,
-                'non_zero_metal_count': len(non_zero_metal_lines),
-            }
-
-        # Patch sales with cached data - no additional queries needed
-        def apply_cached_totals(queryset):
-            for sale in queryset:
-                cached = sale_data_cache.get(sale.id)
-                if cached:
-                    sale.total_weight = cached['total_weight']
-                    sale.gold_sold_weight = cached['gold_sold_weight']
-                    sale.silver_sold_weight = cached['silver_sold_weight']
-                    sale.diamond_sold_weight = cached['diamond_sold_weight']
-                    sale.own_gold = cached['own_gold']
-                    sale.gold_24_weight = cached['gold_24_weight']
-                    sale.silver_24_weight = cached['silver_24_weight']
-                    sale.display_total = cached['display_total']
-                    sale.non_zero_metal_lines = cached['non_zero_metal_lines']
-                    sale.non_zero_metal_count = cached['non_zero_metal_count']
-
-        # Patch paginated sales with cached data - no additional queries needed
-        apply_cached_totals(paginated_sales)
-        apply_cached_totals(context["gold_sales"])
-        apply_cached_totals(context["silver_sales"])
-        apply_cached_totals(context["diamond_sales"])
-        apply_cached_totals(context["own_gold_sales"])
-        apply_cached_totals(context["pan_sales"])
-
-        # Calculate category totals from cached data - no additional queries
-        def calculate_totals_from_cache(queryset):
-            totals = {
-                "weight": Decimal("0"),
-                "total": Decimal("0"),
-                "paid": Decimal("0"),
-                "remaining": Decimal("0"),
-                "profit": Decimal("0"),
-                "gold_sold_weight": Decimal("0"),
-                "silver_sold_weight": Decimal("0"),
-                "diamond_sold_weight": Decimal("0"),
-                # Backward-compatible keys used by existing table sections
-                "gold_24_weight": Decimal("0"),
-                "silver_24_weight": Decimal("0"),
-            }
-            for sale in queryset:
-                cached = sale_data_cache.get(sale.id)
-                if cached:
-                    totals["weight"] += cached['total_weight']
-                    totals["total"] += cached['display_total']
-                    totals["gold_sold_weight"] += cached['gold_sold_weight']
-                    totals["silver_sold_weight"] += cached['silver_sold_weight']
-                    totals["diamond_sold_weight"] += cached['diamond_sold_weight']
-                    totals["gold_24_weight"] += cached['gold_24_weight']
-                    totals["silver_24_weight"] += cached['silver_24_weight']
-                    totals["paid"] += sale.order.total_paid or Decimal("0")
-                    totals["remaining"] += sale.order.remaining_amount or Decimal("0")
-                    totals["profit"] += (sale.order.total or Decimal("0")) - (sale.order.amount or Decimal("0"))
-            return totals
+        full_sales_qs = self.object_list
+
+        # One conditional aggregate gives every tab's row count and totals.
+        tabs = tab_totals(full_sales_qs)
+        context["sales_count"] = tabs["all"][0]
+        for tab, (count, totals) in tabs.items():
+            context[f"{tab}_sales_count"] = count
+            context[f"{tab}_totals"] = totals
+
+        # Each tab shows the same page window as the main list; only those
+        # rows are fetched and hydrated.
+        page_obj = context["page_obj"]
+        offset = (page_obj.number - 1) * self.paginate_by
+        apply_row_figures(context["sales"])
+        for tab, condition in TABS.items():
+            if tab == "all":
+                continue
+            rows = list(full_sales_qs.filter(condition)[offset:offset + self.paginate_by])
+            apply_row_figures(rows)
+            context[f"{tab}_sales"] = rows
 
+        all_totals = context["all_totals"]
         context.update(
             {
-                "gold_sold_weight": gold_sold_weight,
-                "silver_sold_weight": silver_sold_weight,
-                "diamond_sold_weight": diamond_sold_weight,
-                "gold_24_weight": gold_24_weight,
-                "silver_24_weight": silver_24_weight,
-                "total_sales_amount": total_sales_amount,
-                "all_totals": calculate_totals_from_cache(full_sales_qs),
-                "gold_totals": calculate_totals_from_cache(full_sales_qs.filter(id__in=gold_sale_ids)),
-                "silver_totals": calculate_totals_from_cache(full_sales_qs.filter(id__in=silver_sale_ids)),
-                "diamond_totals": calculate_totals_from_cache(full_sales_qs.filter(id__in=diamond_sale_ids)),
-                "own_gold_totals": calculate_totals_from_cache(full_sales_qs.filter(id__in=own_gold_sale_ids)),
-                "pan_totals": calculate_totals_from_cache(full_sales_qs.filter(id__in=pan_sale_ids)),
+                "gold_sold_weight": all_totals["gold_sold_weight"],
+                "silver_sold_weight": all_totals["silver_sold_weight"],
+                "diamond_sold_weight": all_totals["diamond_sold_weight"],
+                "gold_24_weight": all_totals["gold_24_weight"],
+                "silver_24_weight": all_totals["silver_24_weight"],
+                "total_sales_amount": all_totals["order_total"],
             }
         )
         return context
@@ -444,7 +256,8 @@ class DeleteSaleAndOrderView(LoginRequiredMixin, View):
 
         if order is not None:
             # Return ornaments on this order back to stock
-            Ornament.objects.filter(order=order).update(
+            update_ornaments(
+                Ornament.objects.filter(order=order),
                 order=None,
                 ornament_type=Ornament.OrnamentCategory.STOCK,
             )
@@ -681,8 +494,6 @@ def sales_export_excel(request):
     view.request = request
     sales = view.get_queryset()
 
-    wb = openpyxl.Workbook()
-
     headers = [
         "Bill No",
         "Sale Date (BS)",
@@ -701,77 +512,40 @@ def sales_export_excel(request):
         "Paid Amount",
         "Remaining Amount",
     ]
+    status_labels = dict(Order.STATUS_CHOICES)
+    payment_labels = dict(Order.PAYMENT_CHOICES)
+
+    def sales_rows(queryset):
+        rows = stream(
+            queryset,
+            "bill_no", "sale_date", "order__sn", "order__order_date", "order__customer_name",
+            "order__phone_number", "order__status", "total_weight", "order__amount", "order__discount",
+            "order__subtotal", "order__tax", "order__total", "paid_total", "order__remaining_amount",
+        )
+        # Payment modes are looked up per chunk of streamed rows.
+        for batch in chunked(rows):
+            modes = {}
+            payments = OrderPayment.objects.filter(order_id__in=[row[2] for row in batch])
+            for order_id, mode in payments.values_list("order_id", "payment_mode"):
+                modes.setdefault(order_id, []).append(payment_labels.get(mode, mode))
+            for row in batch:
+                yield (
+                    *row[:6],
+                    status_labels.get(row[6], row[6]),
+                    *row[7:13],
+                    ", ".join(modes.get(row[2], [])),
+                    *row[13:],
+                )
 
-    def append_sales_sheet(ws, queryset):
-        ws.append(headers)
-        for s in queryset:
-            o = s.order
-            payment_modes = ", ".join([p.get_payment_mode_display() for p in o.payments.all()]) if o.payments.exists() else ""
-            ornament_weight = sum((line.ornament.weight or Decimal("0")) for line in o.order_ornaments.all())
-            metal_weight = sum((metal.quantity or Decimal("0")) for metal in s.sale_metals.all())
-            total_weight = ornament_weight + metal_weight
-            ws.append([
-                s.bill_no,
-                str(s.sale_date) if s.sale_date else "",
-                o.sn,
-                str(o.order_date) if o.order_date else "",
-                o.customer_name,
-                o.phone_number,
-                o.get_status_display(),
-                total_weight,
-                o.amount,
-                o.discount,
-                o.subtotal,
-                o.tax,
-                o.total,
-                payment_modes,
-                o.total_paid,
-                o.remaining_amount,
-            ])
-
-        for col in ws.columns:
-            max_length = 0
-            col_letter = get_column_letter(col[0].column)
-            for cell in col:
-                if cell.value is not None:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws.column_dimensions[col_letter].width = max_length + 2
-
-    # Sheet 1: All sales
-    ws_all = wb.active
-    ws_all.title = "All Sales"
-    append_sales_sheet(ws_all, sales)
-
-    # Sheet 2: Gold sales group
-    gold_sales = sales.filter(
-        Q(order__order_ornaments__ornament__metal_type__iexact=Ornament.MetalTypeCategory.GOLD)
-        | Q(sale_metals__metal_type="gold")
-    ).distinct()
-    ws_gold = wb.create_sheet(title="Gold Sales")
-    append_sales_sheet(ws_gold, gold_sales)
-
-    # Sheet 3: Silver sales group
-    silver_sales = sales.filter(
-        Q(order__order_ornaments__ornament__metal_type__iexact=Ornament.MetalTypeCategory.SILVER)
-        | Q(sale_metals__metal_type="silver")
-    ).distinct()
-    ws_silver = wb.create_sheet(title="Silver Sales")
-    append_sales_sheet(ws_silver, silver_sales)
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    response = HttpResponse(
-        output.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = 'attachment; filename="sales.xlsx"'
-
-    return response
+    export = XlsxExport()
+    export.add_sheet("All Sales", headers, sales_rows(sales))
+    export.add_sheet("Gold Sales", headers, sales_rows(sales.filter(TABS["gold"])))
+    export.add_sheet("Silver Sales", headers, sales_rows(sales.filter(TABS["silver"])))
+    return export.response("sales.xlsx")
 
 
 @login_required(login_url='/accounts/login/')
+@cached_view(cache_versions.REPORTS)
 def sales_monthly_tax_report(request):
     """Export monthly sales tax report to Excel."""
 
@@ -1152,7 +926,6 @@ class ImportWizardStepTwoView(LoginRequiredMixin, FormView):
             
             # Store file temporarily in session
             import tempfile
-            import os
             
             # Save file to temp directory
             temp_dir = tempfile.gettempdir()
@@ -1201,100 +974,172 @@ class ImportWizardStepThreeView(LoginRequiredMixin, View):
         return render(request, 'sales/import_wizard_step3.html', context)
     
     def post(self, request):
-        """Execute the import."""
+        """Queue the import and follow it on the job page."""
         file_path = request.session.get('import_file_path')
         
-        if not file_path:
+        if not file_path or not os.path.exists(file_path):
             messages.error(request, 'Session expired. Please start import again.')
             return redirect('sales:import_wizard_step1')
         
-        try:
-            # Process the file
-            wb = openpyxl.load_workbook(file_path, data_only=True)
-            ws = wb.active
-            
-            # Parse headers
-            headers = []
-            for cell in ws[1]:
-                if cell.value:
-                    headers.append(str(cell.value).strip().lower())
-            
-            # Map columns
-            col_map = self._map_columns(headers)
-            
-            # Group orders by Bill No
-            orders_data = {}
-            last_bill_no = None
-            
-            for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=False), start=2):
-                try:
-                    row_data = {}
-                    for header, col_idx in col_map.items():
-                        if col_idx is not None and col_idx < len(row):
-                            cell_value = row[col_idx].value
-                            row_data[header] = cell_value
-                    
-                    if not any(row_data.values()):
-                        continue
-                    
-                    # Normalize bill_no and carry forward for multi-line bills where
-                    # Excel keeps bill number only on the first row.
-                    bill_no = self._normalize_bill_no(row_data.get('bill_no'))
-                    if bill_no:
-                        last_bill_no = bill_no
-                    elif last_bill_no:
-                        bill_no = last_bill_no
-                    else:
-                        bill_no = f'AUTO_{row_num}'
+        job = enqueue(
+            'sales.import_wizard',
+            user=request.user,
+            input_path=file_path,
+            next_url=reverse('sales:sales_list'),
+        )
+        del request.session['import_file_path']
+        del request.session['import_headers']
+        return redirect('main:job_detail', pk=job.pk)
 
-                    if bill_no not in orders_data:
-                        orders_data[bill_no] = {'order_info': {}, 'ornaments': []}
-                    
-                    if not orders_data[bill_no]['order_info']:
-                        orders_data[bill_no]['order_info'] = {
-                            'customer_name': row_data.get('customer_name', ''),
-                            'phone_number': row_data.get('phone_number', ''),
-                            'pan_number': row_data.get('pan_number', ''),
-                            'address': row_data.get('address', ''),
-                            'description': row_data.get('description', ''),
-                            'order_date': row_data.get('order_date'),
-                            'sale_date': row_data.get('sale_date'),
-                            'discount': self._parse_decimal(row_data.get('discount', 0)),
-                            'tax': self._parse_decimal(row_data.get('tax', 0)),
-                            'all_total': self._parse_decimal(row_data.get('all_total', 0)),
-                            'payment_mode': row_data.get('payment_mode', 'cash'),
-                            'order_type': row_data.get('order_type', 'custom'),
-                            'status': row_data.get('status', 'delivered'),
-                        }
-                    
-                    ornament_data = {
-                        'ornament_name': row_data.get('ornament_name', ''),
-                        'metal_type': row_data.get('metal_type', ''),
-                        'type': row_data.get('type', '24k'),
-                        'metal_weight': self._parse_decimal(row_data.get('metal_weight', 0)),
-                        'diamond_weight': self._parse_decimal(row_data.get('diamond_weight', 0)),
-                        'stone_weight': self._parse_decimal(row_data.get('stone_weight', 0)),
-                        'own_gold': self._parse_decimal(row_data.get('own_gold', 0)),
-                        'rate': self._parse_decimal(row_data.get('rate', 0)),
-                        'amount': self._parse_decimal(row_data.get('amount', 0)),
-                        'jarti': self._parse_decimal(row_data.get('jarti', 0)),
-                        'jyala': self._parse_decimal(row_data.get('jyala', 0)),
-                        'stones': self._parse_decimal(row_data.get('stones', 0)),
-                        'kaligar_name': row_data.get('kaligar_name', ''),
+
+class ExcelImportProcessor:
+    """Helper class for Excel import processing.
+
+    Call :meth:`prefetch` with the grouped bills before creating orders so
+    duplicate bill numbers and kaligars are looked up once, and
+    :meth:`finish` afterwards to add the new ornaments to the stock summary.
+    """
+    
+    def __init__(self, request):
+        self.request = request
+        self.stats = ImportStats()
+        self.sold_bill_nos = None
+        self.kaligars = {}
+        self.created_ornament_ids = []
+        self._blank_kaligar = None
+
+    def prefetch(self, orders_data):
+        """Load existing sale bill numbers and kaligars for a whole import."""
+        self.sold_bill_nos = existing_keys(
+            Sale.objects.all(), 'bill_no', (str(bill_no or '').strip() for bill_no in orders_data)
+        )
+        names = {
+            str(ornament.get('kaligar_name') or '').strip()
+            for order_data in orders_data.values()
+            for ornament in order_data['ornaments']
+        }
+        self.kaligars = in_bulk_by(Kaligar.objects.all(), 'name', names)
+
+    def finish(self):
+        """Apply the ornaments created by this import to the stock summary once."""
+        add_to_summary(self.created_ornament_ids)
+        self.created_ornament_ids = []
+        return self.stats.stop()
+
+    def _bill_exists(self, bill_no):
+        if self.sold_bill_nos is not None:
+            return bill_no in self.sold_bill_nos
+        return Sale.objects.filter(bill_no=bill_no).exists()
+
+    def _get_kaligar(self, name):
+        kaligar = self.kaligars.get(name)
+        if kaligar is None:
+            kaligar, _ = Kaligar.objects.get_or_create(name=name)
+            self.kaligars[name] = kaligar
+        return kaligar
+    
+    def read_workbook(self, file_path):
+        """Group the wizard workbook's rows by bill number.
+
+        Returns ``(orders_data, warnings)`` where ``orders_data`` maps each
+        bill to its ``order_info`` and ``ornaments`` rows.
+        """
+        wb = openpyxl.load_workbook(file_path, data_only=True)
+        ws = wb.active
+        warnings = []
+
+        # Parse headers
+        headers = []
+        for cell in ws[1]:
+            if cell.value:
+                headers.append(str(cell.value).strip().lower())
+
+        # Map columns
+        col_map = self.map_columns(headers)
+
+        # Group orders by Bill No
+        orders_data = {}
+        last_bill_no = None
+
+        for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=False), start=2):
+            try:
+                row_data = {}
+                for header, col_idx in col_map.items():
+                    if col_idx is not None and col_idx < len(row):
+                        cell_value = row[col_idx].value
+                        row_data[header] = cell_value
+
+                if not any(row_data.values()):
+                    continue
+
+                # Normalize bill_no and carry forward for multi-line bills where
+                # Excel keeps bill number only on the first row.
+                bill_no = self.normalize_bill_no(row_data.get('bill_no'))
+                if bill_no:
+                    last_bill_no = bill_no
+                elif last_bill_no:
+                    bill_no = last_bill_no
+                else:
+                    bill_no = f'AUTO_{row_num}'
+
+                if bill_no not in orders_data:
+                    orders_data[bill_no] = {'order_info': {}, 'ornaments': []}
+
+                if not orders_data[bill_no]['order_info']:
+                    orders_data[bill_no]['order_info'] = {
+                        'customer_name': row_data.get('customer_name', ''),
+                        'phone_number': row_data.get('phone_number', ''),
+                        'pan_number': row_data.get('pan_number', ''),
+                        'address': row_data.get('address', ''),
+                        'description': row_data.get('description', ''),
+                        'order_date': row_data.get('order_date'),
+                        'sale_date': row_data.get('sale_date'),
+                        'discount': self.parse_decimal(row_data.get('discount', 0)),
+                        'tax': self.parse_decimal(row_data.get('tax', 0)),
+                        'all_total': self.parse_decimal(row_data.get('all_total', 0)),
+                        'payment_mode': row_data.get('payment_mode', 'cash'),
+                        'order_type': row_data.get('order_type', 'custom'),
+                        'status': row_data.get('status', 'delivered'),
                     }
-                    orders_data[bill_no]['ornaments'].append(ornament_data)
-                
-                except Exception as e:
-                    messages.warning(request, f'Row {row_num}: Skipped - {str(e)}')
-            
-            # Create orders
-            imported_count = 0
-            errors = []
-            
-            importer = ExcelImportProcessor(request)
-            for bill_no, order_data in orders_data.items():
+
+                ornament_data = {
+                    'ornament_name': row_data.get('ornament_name', ''),
+                    'metal_type': row_data.get('metal_type', ''),
+                    'type': row_data.get('type', '24k'),
+                    'metal_weight': self.parse_decimal(row_data.get('metal_weight', 0)),
+                    'diamond_weight': self.parse_decimal(row_data.get('diamond_weight', 0)),
+                    'stone_weight': self.parse_decimal(row_data.get('stone_weight', 0)),
+                    'own_gold': self.parse_decimal(row_data.get('own_gold', 0)),
+                    'rate': self.parse_decimal(row_data.get('rate', 0)),
+                    'amount': self.parse_decimal(row_data.get('amount', 0)),
+                    'jarti': self.parse_decimal(row_data.get('jarti', 0)),
+                    'jyala': self.parse_decimal(row_data.get('jyala', 0)),
+                    'stones': self.parse_decimal(row_data.get('stones', 0)),
+                    'kaligar_name': row_data.get('kaligar_name', ''),
+                }
+                orders_data[bill_no]['ornaments'].append(ornament_data)
+
+            except Exception as e:
+                warnings.append(f'Row {row_num}: Skipped - {str(e)}')
+
+        return orders_data, warnings
+
+    def import_orders(self, orders_data, progress=None):
+        """Create every grouped bill; returns ``(imported_count, errors)``.
+
+        ``progress(done, total)`` is called after each bill.
+        """
+        imported_count = 0
+        errors = []
+        total = len(orders_data)
+
+        self.prefetch(orders_data)
+        # One outer transaction; each bill still gets its own savepoint
+        # inside create_complete_order so a bad bill is skipped on its own.
+        with transaction.atomic():
+            for done, (bill_no, order_data) in enumerate(orders_data.items(), start=1):
                 try:
-                    result = importer.create_complete_order(
+                    result = self.create_complete_order(
                         bill_no,
                         order_data['order_info'],
                         order_data['ornaments']
@@ -1306,43 +1151,12 @@ class ImportWizardStepThreeView(LoginRequiredMixin, View):
                             errors.append(f"Bill {bill_no}: {result['error']}")
                 except Exception as e:
                     errors.append(f"Bill {bill_no}: {str(e)}")
-            
-            # Clean up
-            import os
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            
-            del request.session['import_file_path']
-            del request.session['import_headers']
-            
-            # Show results
-            if imported_count > 0:
-                messages.success(
-                    request,
-                    f'✅ Successfully imported {imported_count} complete orders with all ornaments!'
-                )
-            
-            if errors:
-                for error in errors[:10]:
-                    messages.warning(request, error)
-            
-            return redirect('sales:sales_list')
-        
-        except Exception as e:
-            messages.error(request, f'Failed to import: {str(e)}')
-            return redirect('sales:import_wizard_step1')
-    
-    def _map_columns(self, headers):
-        """Map columns from headers."""
-        processor = ExcelImportProcessor(self.request)
-        return processor.map_columns(headers)
-    
-    def _parse_decimal(self, value):
-        """Parse decimal value."""
-        processor = ExcelImportProcessor(self.request)
-        return processor.parse_decimal(value)
+                if progress is not None:
+                    progress(done, total)
+            self.finish()
+        return imported_count, errors
 
-    def _normalize_bill_no(self, value):
+    def normalize_bill_no(self, value):
         """Normalize bill numbers from Excel cells (e.g. 1.0 -> '1')."""
         if value is None:
             return ''
@@ -1367,13 +1181,6 @@ class ImportWizardStepThreeView(LoginRequiredMixin, View):
 
         return text
 
-
-class ExcelImportProcessor:
-    """Helper class for Excel import processing."""
-    
-    def __init__(self, request):
-        self.request = request
-    
     def map_columns(self, headers):
         """Map Excel headers to model fields."""
         col_map = {
@@ -1493,7 +1300,7 @@ class ExcelImportProcessor:
             if not customer_name:
                 return {'success': False, 'error': 'Customer name is required'}
 
-            if bill_no and Sale.objects.filter(bill_no=bill_no).exists():
+            if bill_no and self._bill_exists(bill_no):
                 return {'success': False, 'error': f'Sale with bill no {bill_no} already exists'}
 
             order_date = self._parse_nepali_date(order_info.get('order_date'))
@@ -1533,7 +1340,8 @@ class ExcelImportProcessor:
                 default_kaligar = self._get_import_blank_kaligar()
                 total_line_amount = Decimal('0')
                 gold_payment_total = Decimal('0')
-                created_lines = 0
+                ornaments = []
+                lines = []
 
                 for ornament_data in ornaments_list:
                     ornament_name = str(ornament_data.get('ornament_name') or '').strip()
@@ -1542,7 +1350,7 @@ class ExcelImportProcessor:
 
                     kaligar_name_raw = str(ornament_data.get('kaligar_name') or '').strip()
                     if kaligar_name_raw:
-                        ornament_kaligar, _ = Kaligar.objects.get_or_create(name=kaligar_name_raw)
+                        ornament_kaligar = self._get_kaligar(kaligar_name_raw)
                     else:
                         ornament_kaligar = default_kaligar
 
@@ -1565,7 +1373,7 @@ class ExcelImportProcessor:
                     auto_jarti = (metal_weight * Decimal('0.05')).quantize(Decimal('0.001'))
                     auto_jyala = Decimal('2000') if metal_type == Ornament.MetalTypeCategory.DIAMOND else Decimal('0')
 
-                    ornament = Ornament.objects.create(
+                    ornament = Ornament(
                         ornament_date=sale_date,
                         ornament_name=ornament_name,
                         ornament_type=Ornament.OrnamentCategory.SALES,
@@ -1594,7 +1402,8 @@ class ExcelImportProcessor:
                         gold_amount = (own_gold / Decimal('11.664')) * rate_value
                         gold_payment_total += gold_amount
 
-                    OrderOrnament.objects.create(
+                    ornaments.append(ornament)
+                    lines.append(OrderOrnament(
                         order=order,
                         ornament=ornament,
                         gold_rate=rate_value,
@@ -1604,14 +1413,16 @@ class ExcelImportProcessor:
                         own_gold=own_gold,
                         jyala=line_jyala,
                         line_amount=line_amount,
-                    )
+                    ))
 
                     total_line_amount += line_amount
-                    created_lines += 1
 
-                if created_lines == 0:
+                if not lines:
                     raise ValueError('No valid ornament rows found for this bill')
 
+                create_ornaments(ornaments, update_summary=False)
+                OrderOrnament.objects.bulk_create(lines)
+
                 order.amount = total_line_amount
                 order.subtotal = max(Decimal('0'), total_line_amount - discount)
                 order.total = order.subtotal + tax
@@ -1697,7 +1508,12 @@ class ExcelImportProcessor:
                     address=order.address,
                 )
 
-                return {'success': True, 'order_id': order.sn}
+            if self.sold_bill_nos is not None and bill_no:
+                self.sold_bill_nos.add(bill_no)
+            self.created_ornament_ids.extend(ornament.pk for ornament in ornaments)
+            self.stats.rows += len(ornaments_list)
+            self.stats.created += 1
+            return {'success': True, 'order_id': order.sn}
         
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -1820,12 +1636,15 @@ class ExcelImportProcessor:
         The Ornament model requires a non-null Kaligar FK, so imports cannot
         store true NULL here without a schema change.
         """
-        kaligar = Kaligar.objects.filter(name='').first()
-        if kaligar:
-            return kaligar
-        return Kaligar.objects.create(name='', panno='000000000')
+        if self._blank_kaligar is None:
+            self._blank_kaligar = (
+                Kaligar.objects.filter(name='').first()
+                or Kaligar.objects.create(name='', panno='000000000')
+            )
+        return self._blank_kaligar
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class SalesByMonthView(LoginRequiredMixin, ListView):
     """List sales filtered by a selected month and year."""
     
@@ -1835,9 +1654,11 @@ class SalesByMonthView(LoginRequiredMixin, ListView):
     ordering = ["bill_no"]
     
     def get_queryset(self):
-        queryset = super().get_queryset().select_related("order").prefetch_related(
-            "order__order_ornaments__ornament", "sale_metals"
+        queryset = super().get_queryset().filter(is_deleted=False).prefetch_related(
+            Prefetch("order", queryset=with_total_paid(Order.objects.all())),
+            "order__order_ornaments__ornament", "order__payments", "sale_metals"
         )
+        self.summary_month = None
         
         # Get month and year from query params, default to current month/year
         month = self.request.GET.get('month')
@@ -1871,6 +1692,7 @@ class SalesByMonthView(LoginRequiredMixin, ListView):
                 sale_date__gte=start_date,
                 sale_date__lte=end_date
             )
+            self.summary_month = (year_int, month_int)
         except (ValueError, TypeError):
             pass
         
@@ -1922,117 +1744,80 @@ class SalesByMonthView(LoginRequiredMixin, ListView):
             {'value': 12, 'name': 'Chaitra'},
         ]
         
-        # Calculate statistics for filtered sales
-        if context['sales']:
-            gold_24_weight = Decimal("0")
-            silver_weight = Decimal("0")
-            total_sales_amount = Decimal("0")
-            total_remaining_amount = Decimal("0")
-            total_profit = Decimal("0")
-            total_tax = Decimal("0")
-            
-            # Payment method breakdown
-            payment_methods = {
-                'cash': Decimal("0"),
-                'fonepay': Decimal("0"),
-                'bank': Decimal("0"),
-                'gold': Decimal("0"),
-                'silver': Decimal("0"),
-                'sundry_debtor': Decimal("0"),
-            }
-            
-            for sale in context["sales"]:
-                # Ornaments — gold = actual ornament weight (no purity conversion)
-                for line in sale.order.order_ornaments.all():
-                    weight = line.ornament.weight or Decimal("0")
-                    metal_type = getattr(line.ornament, 'metal_type', None)
-                    if metal_type == getattr(Ornament.MetalTypeCategory, 'GOLD', 'gold'):
-                        gold_24_weight += weight
-                    elif metal_type == getattr(Ornament.MetalTypeCategory, 'SILVER', 'silver'):
-                        silver_weight += weight
-                    
-                    # Calculate profit: (customer_jarti - ornament_jarti) / 11.664 * rate + jyala
-                    customer_jarti = line.jarti or Decimal("0")
-                    ornament_jarti = line.ornament.jarti or Decimal("0")
-                    rate = line.gold_rate or Decimal("0")
-                    jyala = line.jyala or Decimal("0")
-                    
-                    jarti_difference = customer_jarti - ornament_jarti
-                    profit = (jarti_difference / Decimal("11.664") * rate) + jyala
-                    total_profit += profit
-                
-                # Raw metals — add actual quantity to gold/silver totals
-                for metal in sale.sale_metals.all():
-                    if metal.metal_type == 'gold':
-                        gold_24_weight += metal.quantity or Decimal("0")
-                    elif metal.metal_type == 'silver':
-                        silver_weight += metal.quantity or Decimal("0")
-                
-                # Add order total, remaining amount, and tax
-                total_sales_amount += sale.order.total or Decimal("0")
-                total_remaining_amount += sale.order.remaining_amount or Decimal("0")
-                total_tax += sale.order.tax or Decimal("0")
-                
-                # Collect payment method totals
-                for payment in sale.order.payments.all():
-                    payment_mode = payment.payment_mode
-                    if payment_mode in payment_methods:
-                        payment_methods[payment_mode] += payment.amount or Decimal("0")
-            
-            # Patch each sale with total_weight, display_total, and profit
-            for sale in context["sales"]:
-                ornament_weight = sum([(line.ornament.weight or Decimal("0")) for line in sale.order.order_ornaments.all()])
-                metal_weight = sum([(metal.quantity or Decimal("0")) for metal in sale.sale_metals.all()])
-                sale.total_weight = ornament_weight + metal_weight
-                
-                metal_total = sum([(metal.line_amount or Decimal("0")) for metal in sale.sale_metals.all()])
-                if sale.order.order_ornaments.count() == 0:
-                    sale.display_total = metal_total
-                else:
-                    sale.display_total = sale.order.total or Decimal("0")
-                
-                # Calculate profit for this sale
-                sale_profit = Decimal("0")
-                for line in sale.order.order_ornaments.all():
-                    customer_jarti = line.jarti or Decimal("0")
-                    ornament_jarti = line.ornament.jarti or Decimal("0")
-                    rate = line.gold_rate or Decimal("0")
-                    jyala = line.jyala or Decimal("0")
-                    
-                    jarti_difference = customer_jarti - ornament_jarti
-                    profit = (jarti_difference / Decimal("11.664") * rate) + jyala
-                    sale_profit += profit
-                
-                sale.profit = sale_profit
-            
-            context['gold_24_weight'] = gold_24_weight
-            context['silver_weight'] = silver_weight
-            context['total_sales_amount'] = total_sales_amount
-            context['total_remaining_amount'] = total_remaining_amount
-            context['total_profit'] = total_profit
-            context['total_tax'] = total_tax
-            context['payment_methods'] = payment_methods
-            context['sales_count'] = len(context['sales'])
+        # Month totals come from the monthly sales summary; profit and the
+        # payment breakdown from the listed sales.
+        summary = None
+        if self.summary_month:
+            summary = SalesMonthSummary.objects.filter(
+                year=self.summary_month[0], month=self.summary_month[1]
+            ).first()
+
+        payment_methods = {
+            'cash': Decimal("0"),
+            'fonepay': Decimal("0"),
+            'bank': Decimal("0"),
+            'gold': Decimal("0"),
+            'silver': Decimal("0"),
+            'sundry_debtor': Decimal("0"),
+        }
+        payments = (
+            OrderPayment.objects.filter(order__sale__in=[sale.pk for sale in context["sales"]], payment_mode__in=payment_methods)
+            .values("payment_mode")
+            .annotate(total=Sum("amount"))
+        )
+        for row in payments:
+            payment_methods[row["payment_mode"]] = row["total"] or Decimal("0")
+
+        # Patch each sale with total_weight, display_total, and profit
+        total_profit = Decimal("0")
+        for sale in context["sales"]:
+            lines = sale.order.order_ornaments.all()
+            metals = sale.sale_metals.all()
+            ornament_weight = sum([(line.ornament.weight or Decimal("0")) for line in lines])
+            metal_weight = sum([(metal.quantity or Decimal("0")) for metal in metals])
+            sale.total_weight = ornament_weight + metal_weight
+
+            metal_total = sum([(metal.line_amount or Decimal("0")) for metal in metals])
+            if not lines:
+                sale.display_total = metal_total
+            else:
+                sale.display_total = sale.order.total or Decimal("0")
+
+            # Calculate profit: (customer_jarti - ornament_jarti) / 11.664 * rate + jyala
+            sale_profit = Decimal("0")
+            for line in lines:
+                customer_jarti = line.jarti or Decimal("0")
+                ornament_jarti = line.ornament.jarti or Decimal("0")
+                rate = line.gold_rate or Decimal("0")
+                jyala = line.jyala or Decimal("0")
+
+                jarti_difference = customer_jarti - ornament_jarti
+                sale_profit += (jarti_difference / Decimal("11.664") * rate) + jyala
+
+            sale.profit = sale_profit
+            total_profit += sale_profit
+
+        # Gold/silver = actual ornament weight (no purity conversion) plus raw metal
+        if summary is not None:
+            context['gold_24_weight'] = summary.ornament_gold_weight + summary.raw_gold_weight
+            context['silver_weight'] = summary.ornament_silver_weight + summary.raw_silver_weight
+            context['total_sales_amount'] = summary.total_sales_amount
+            context['total_remaining_amount'] = summary.total_remaining
+            context['total_tax'] = summary.total_tax
         else:
             context['gold_24_weight'] = Decimal("0")
             context['silver_weight'] = Decimal("0")
             context['total_sales_amount'] = Decimal("0")
             context['total_remaining_amount'] = Decimal("0")
-            context['total_profit'] = Decimal("0")
             context['total_tax'] = Decimal("0")
-            context['payment_methods'] = {
-                'cash': Decimal("0"),
-                'fonepay': Decimal("0"),
-                'bank': Decimal("0"),
-                'gold': Decimal("0"),
-                'silver': Decimal("0"),
-                'sundry_debtor': Decimal("0"),
-            }
-            context['sales_count'] = 0
+        context['total_profit'] = total_profit
+        context['payment_methods'] = payment_methods
+        context['sales_count'] = len(context['sales'])
         
         return context
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class SalesForecastView(LoginRequiredMixin, TemplateView):
     """Sales forecasting based on historical monthly totals."""
 
@@ -2040,7 +1825,6 @@ class SalesForecastView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        from sales.models import Sale
 
         nepali_months = {
             1: "Baishakh",
@@ -2057,35 +1841,17 @@ class SalesForecastView(LoginRequiredMixin, TemplateView):
             12: "Chaitra",
         }
 
-        sales = (
-            Sale.objects.select_related("order")
-            .exclude(sale_date__isnull=True)
-            .order_by("sale_date")
-        )
-
-        monthly_totals = {}
-        for sale in sales:
-            try:
-                year = sale.sale_date.year
-                month = sale.sale_date.month
-            except AttributeError:
-                continue
-            key = (year, month)
-            monthly_totals.setdefault(key, Decimal("0"))
-            monthly_totals[key] += sale.order.total or Decimal("0")
-
-        keys_sorted = sorted(monthly_totals.keys())
+        # Last 12 months with sales, oldest first
+        months = list(SalesMonthSummary.objects.order_by("-year", "-month")[:12])[::-1]
         actual_points = [
             {
-                "year": y,
-                "month": m,
-                "label": f"{nepali_months.get(m, m)} {y}",
-                "total": float(monthly_totals[(y, m)]),
+                "year": row.year,
+                "month": row.month,
+                "label": row.label,
+                "total": float(row.total_sales_amount),
             }
-            for (y, m) in keys_sorted
+            for row in months
         ]
-
-        actual_points = actual_points[-12:]
         actual_values = [p["total"] for p in actual_points]
 
         if actual_values:
@@ -2157,6 +1923,7 @@ class SalesForecastView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class CustomerSegmentationView(LoginRequiredMixin, TemplateView):
     """Segment customers by buying behavior for targeted insights."""
 
@@ -2222,6 +1989,7 @@ class CustomerSegmentationView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class ProductPerformanceView(LoginRequiredMixin, TemplateView):
     """Evaluate product and product-line performance from sales."""
 
@@ -2301,6 +2069,7 @@ class ProductPerformanceView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class MarginAnalysisView(LoginRequiredMixin, TemplateView):
     """Analyze profit margins by product and product line."""
 
@@ -2398,6 +2167,7 @@ class MarginAnalysisView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(cached_view(cache_versions.REPORTS), name='dispatch')
 class TrendAnalysisView(LoginRequiredMixin, TemplateView):
     """Identify trends in customer preferences and seasonal demand."""
 
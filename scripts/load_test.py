@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Concurrent load test measuring time to first byte (TTFB) and total latency.
+
+Standard library only, so it runs from any machine that can reach the site.
+Each run hits the given paths round-robin from ``--concurrency`` threads,
+with one keep-alive HTTP connection per thread.  It then prints p50/p95/p99
+TTFB and total time per path.  ``--output`` saves the run as JSON;
+``--compare`` prints a saved run next to this one.
+
+To measure what persistent database connections buy, run gunicorn against
+a local PostgreSQL twice and compare (see docs/DEPLOYMENT.md):
+
+    DATABASE_CONN_MAX_AGE=0  gunicorn mysite.wsgi --env DJANGO_SETTINGS_MODULE=mysite.settings_local
+    python scripts/load_test.py http://127.0.0.1:8000 --label conn-0 --output conn-0.json
+
+    DATABASE_CONN_MAX_AGE=60 gunicorn mysite.wsgi --env DJANGO_SETTINGS_MODULE=mysite.settings_local
+    python scripts/load_test.py http://127.0.0.1:8000 --label conn-60 --compare conn-0.json
+
+Pages behind the login need ``--session <sessionid cookie value>``.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ['/', '/api/products/featured/']
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Worker:
+    """One keep-alive connection; reconnects when the server closes it."""
+
+    def __init__(self, base, headers, timeout):
+        self.base = base
+        self.headers = headers
+        self.timeout = timeout
+        self.conn = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.base.scheme == 'https' else http.client.HTTPConnection
+        self.conn = cls(self.base.netloc, timeout=self.timeout)
+
+    def get(self, path):
+        if self.conn is None:
+            self._connect()
+        started = time.perf_counter()
+        try:
+            self.conn.request('GET', path, headers=self.headers)
+            response = self.conn.getresponse()
+            ttfb = time.perf_counter() - started
+            response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            self.conn.close()
+            self.conn = None
+            return {'path': path, 'error': str(exc) or exc.__class__.__name__}
+        total = time.perf_counter() - started
+        if response.getheader('Connection', '').lower() == 'close':
+            self.conn.close()
+            self.conn = None
+        return {'path': path, 'status': response.status, 'ttfb': ttfb, 'total': total}
+
+
+def run(url, paths, requests, concurrency, session=None, timeout=30.0, warmup=5):
+    base = urlsplit(url.rstrip('/'))
+    headers = {'User-Agent': 'load-test', 'Host': base.netloc}
+    if session:
+        headers['Cookie'] = f'sessionid={session}'
+    local = threading.local()
+
+    def fetch(index):
+        if not hasattr(local, 'worker'):
+            local.worker = Worker(base, headers, timeout)
+        return local.worker.get(base.path + paths[index % len(paths)])
+
+    warm = Worker(base, headers, timeout)
+    for index in range(warmup):
+        warm.get(base.path + paths[index % len(paths)])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(fetch, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    results = []
+    for path in paths:
+        rows = [s for s in samples if s['path'] == path]
+        ok = [s for s in rows if 'error' not in s]
+        ttfb = [s['ttfb'] * 1000 for s in ok]
+        total = [s['total'] * 1000 for s in ok]
+        results.append({
+            'path': path,
+            'requests': len(rows),
+            'errors': len(rows) - len(ok),
+            'non_2xx': sum(1 for s in ok if not 200 <= s['status'] < 300),
+            'ttfb_p50_ms': round(statistics.median(ttfb), 2) if ttfb else None,
+            'ttfb_p95_ms': round(percentile(ttfb, 95), 2) if ttfb else None,
+            'ttfb_p99_ms': round(percentile(ttfb, 99), 2) if ttfb else None,
+            'total_p50_ms': round(statistics.median(total), 2) if total else None,
+            'total_p95_ms': round(percentile(total, 95), 2) if total else None,
+        })
+    return {
+        'url': url,
+        'requests': requests,
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(requests / elapsed, 1) if elapsed else None,
+        'results': results,
+    }
+
+
+def _fmt(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def print_report(report, previous=None):
+    print(f"{report.get('label') or report['url']}: {report['requests']} requests, "
+          f"concurrency {report['concurrency']}, {report['requests_per_s']} req/s")
+    before = {row['path']: row for row in (previous or {}).get('results', [])}
+    header = f"{'path':40} {'p50 ttfb':>9} {'p95 ttfb':>9} {'p99 ttfb':>9} {'p50 total':>10} {'errors':>7}"
+    if previous:
+        header += f" {'was p50':>9} {'change':>8}"
+    print(header)
+    for row in report['results']:
+        line = (f"{row['path'][:40]:40} {_fmt(row['ttfb_p50_ms']):>9} {_fmt(row['ttfb_p95_ms']):>9} "
+                f"{_fmt(row['ttfb_p99_ms']):>9} {_fmt(row['total_p50_ms']):>10} {row['errors'] + row['non_2xx']:>7}")
+        old = before.get(row['path'])
+        if previous:
+            old_p50 = old and old['ttfb_p50_ms']
+            change = ((row['ttfb_p50_ms'] - old_p50) / old_p50 * 100) if old_p50 and row['ttfb_p50_ms'] else None
+            line += f" {_fmt(old_p50):>9} {'-' if change is None else f'{change:+.0f}%':>8}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('url', help='Base URL, e.g. http://127.0.0.1:8000')
+    parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable).')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--session', help='sessionid cookie for pages behind the login.')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--label', help='Name for this run in the report.')
+    parser.add_argument('--output', help='Write the run as JSON to this file.')
+    parser.add_argument('--compare', help='JSON from an earlier run to compare against.')
+    args = parser.parse_args(argv)
+
+    report = run(args.url, args.paths or DEFAULT_PATHS, args.requests, args.concurrency,
+                 session=args.session, timeout=args.timeout)
+    report['label'] = args.label
+    previous = None
+    if args.compare:
+        with open(args.compare) as handle:
+            previous = json.load(handle)
+    print_report(report, previous)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    failed = sum(row['errors'] for row in report['results'])
+    return 1 if failed == report['requests'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from goldsilverpurchase.models import Party
+from main.models import BackgroundJob
+from main.services import jobs
+from sales.models import Sale
+
+
+class BackgroundJobTest(TestCase):
+    """Heavy data-settings actions are queued and finished by the worker."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+
+    def _status(self, job):
+        return self.client.get(reverse('main:job_status', args=[job.pk])).json()
+
+    def test_delete_all_data_waits_for_the_worker(self):
+        Party.objects.create(party_name='Known', panno='123456789')
+        response = self.client.post(
+            reverse('gsp:data_settings'),
+            {'delete_all': 'true', 'confirm_delete': 'DELETE_ALL_DATA_CONFIRMED'},
+        )
+
+        job = BackgroundJob.objects.get()
+        self.assertRedirects(response, reverse('main:job_detail', args=[job.pk]))
+        self.assertEqual(self._status(job)['status'], 'queued')
+        self.assertTrue(Party.objects.exists())
+
+        self.assertEqual(jobs.run_pending(), 1)
+        state = self._status(job)
+        self.assertEqual(state['status'], 'succeeded')
+        self.assertEqual(state['percent'], 100)
+        self.assertIn('Total records removed: 1', state['message'])
+        self.assertFalse(Party.objects.exists())
+
+    def test_full_dump_is_downloadable(self):
+        Party.objects.create(party_name='Known', panno='123456789')
+        self.client.post(reverse('gsp:export_full_db_dump'))
+        job = BackgroundJob.objects.get()
+        jobs.run_pending()
+
+        download_url = self._status(job)['download_url']
+        self.assertEqual(download_url, reverse('main:job_download', args=[job.pk]))
+        response = self.client.get(download_url)
+        dump = json.loads(b''.join(response.streaming_content))
+        models = {row['model'] for row in dump}
+        self.assertIn('goldsilverpurchase.party', models)
+        self.assertNotIn('main.backgroundjob', models)
+
+    def test_json_import_collects_row_errors(self):
+        backup = {'Party': [{'party_name': 'Imported', 'panno': '987654321'}], 'MetalStockType': [{}]}
+        upload = SimpleUploadedFile('backup.json', json.dumps(backup).encode())
+        self.client.post(reverse('gsp:import_all_data_json'), {'import_file': upload})
+        job = BackgroundJob.objects.get()
+        self.assertTrue(os.path.exists(job.input_path))
+
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertIn('Party: 1', job.message)
+        self.assertEqual(job.errors, ['MetalStockType: missing lookup for row'])
+        self.assertTrue(Party.objects.filter(party_name='Imported').exists())
+        self.assertFalse(os.path.exists(job.input_path))
+
+    def test_invalid_upload_fails_the_job(self):
+        upload = SimpleUploadedFile('backup.json', b'not json')
+        self.client.post(reverse('gsp:import_all_data_json'), {'import_file': upload})
+        jobs.run_pending()
+
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.message, 'Invalid JSON file format.')
+        self.assertEqual(self._status(job)['download_url'], '')
+
+    def test_a_failed_input_copy_fails_the_job(self):
+        missing = os.path.join(tempfile.mkdtemp(), 'gone.json')
+        with self.assertRaises(OSError):
+            jobs.enqueue('gsp.import_all_data_json', input_path=missing)
+
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(jobs.claim_next())
+
+    def test_a_job_is_claimed_once(self):
+        job = jobs.enqueue('gsp.delete_all_data')
+        self.assertIsNotNone(jobs.claim(job.pk))
+        self.assertIsNone(jobs.claim(job.pk))
+        self.assertIsNone(jobs.claim_next())
+
+    def test_sales_wizard_import_runs_in_background(self):
+        wb = openpyxl.Workbook()
+        wb.active.append(['Bill No', 'Customer Name', 'Ornament Name', 'Metal Weight', 'Rate'])
+        wb.active.append([501, 'Gita', 'Ring', 2, 100])
+        wb.active.append([None, None, 'Chain', 3, 100])
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        wb.save(path)
+        session = self.client.session
+        session['import_file_path'] = path
+        session['import_headers'] = ['bill no']
+        session.save()
+
+        response = self.client.post(reverse('sales:import_wizard_step3'))
+        job = BackgroundJob.objects.get(kind='sales.import_wizard')
+        self.assertRedirects(response, reverse('main:job_detail', args=[job.pk]))
+        self.assertNotIn('import_file_path', self.client.session)
+        self.assertFalse(os.path.exists(path))
+
+        jobs.run_pending()
+        state = self._status(job)
+        self.assertEqual(state['status'], 'succeeded', state['message'])
+        self.assertEqual(state['next_url'], reverse('sales:sales_list'))
+        self.assertEqual(Sale.objects.get(bill_no='501').order.order_ornaments.count(), 2)
@@ -0,0 +1,119 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from main.models import BackgroundJob
+from main.services import jobs
+from ornament import barcodes
+from ornament.bulk import create_ornaments
+from ornament.models import Kaligar, Ornament
+
+
+class FlakyStore:
+    """Fails the first ``failures`` saves, then stores like the local backend."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        self.local = barcodes.LocalStore()
+
+    def save(self, public_id, content):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError('upload failed')
+        return self.local.save(public_id, content)
+
+
+class BarcodeQueueTest(TestCase):
+    """Barcode images are rendered by one queued job per transaction, not per-save threads."""
+
+    def setUp(self):
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+
+    def _ornament(self, **extra):
+        return Ornament(
+            ornament_name='Ring', metal_type='Gold', type='24KARAT', weight=Decimal('1.000'),
+            kaligar=self.kaligar, **extra,
+        )
+
+    def test_save_queues_one_job_rendered_by_the_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ornament = self._ornament()
+            ornament.save()
+
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.kind, barcodes.TASK_KIND)
+        self.assertEqual(job.payload, {'pks': [ornament.pk]})
+
+        self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        ornament.refresh_from_db()
+        self.assertEqual(str(ornament.barcode_image), f'barcodes/barcode_{ornament.barcode}')
+        png = settings.BARCODE_LOCAL_DIR / f'barcode_{ornament.barcode}.png'
+        self.assertTrue(png.read_bytes().startswith(b'\x89PNG'))
+        self.assertFalse(barcodes.pending().exists())
+
+    def test_bulk_create_queues_a_single_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            created = create_ornaments([self._ornament() for _ in range(5)])
+
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.payload['pks'], sorted(o.pk for o in created))
+
+        with self.assertNumQueries(3):
+            # pending pks, one batch load and one bulk update
+            rendered, failures = barcodes.render(pks=job.payload['pks'], batch_size=10)
+        self.assertEqual((rendered, failures), (5, []))
+
+    def test_saves_join_the_job_already_waiting(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._ornament()
+            first.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self._ornament()
+            second.save()
+
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.payload, {'pks': [first.pk, second.pk]})
+
+        jobs.run_pending()
+        with self.captureOnCommitCallbacks(execute=True):
+            third = self._ornament()
+            third.save()
+        self.assertEqual(BackgroundJob.objects.filter(status='queued').get().payload, {'pks': [third.pk]})
+
+    @override_settings(BACKGROUND_JOBS_EAGER=True)
+    def test_eager_mode_leaves_barcodes_pending(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._ornament().save()
+        self.assertFalse(BackgroundJob.objects.exists())
+        self.assertEqual(barcodes.pending().count(), 1)
+
+    @mock.patch.object(barcodes, 'RETRY_DELAY', 0)
+    def test_uploads_are_retried(self):
+        ornament = self._ornament(barcode='ORN-RETRY')
+        Ornament.objects.bulk_create([ornament])
+        store = FlakyStore(failures=barcodes.MAX_ATTEMPTS - 1)
+
+        rendered, failures = barcodes.render(store=store)
+
+        self.assertEqual((rendered, failures), (1, []))
+        self.assertEqual(store.calls, barcodes.MAX_ATTEMPTS)
+
+    @mock.patch.object(barcodes, 'RETRY_DELAY', 0)
+    def test_failed_ornaments_stay_pending(self):
+        ornament = self._ornament(barcode='ORN-FAIL')
+        Ornament.objects.bulk_create([ornament])
+        job = jobs.enqueue(barcodes.TASK_KIND)
+
+        with mock.patch.object(barcodes, 'get_store', return_value=FlakyStore(failures=99)):
+            jobs.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertIn('1 failed', job.message)
+        self.assertEqual(len(job.errors), 1)
+        self.assertEqual(list(barcodes.pending().values_list('barcode', flat=True)), ['ORN-FAIL'])
@@ -0,0 +1,57 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from main.models import DailyRate
+from main.services import benchmarks, synthetic_data
+from order.models import Order
+from ornament.models import Ornament, OrnamentStockSummary
+from sales.models import Sale, SalesMonthSummary
+
+
+class SyntheticDataTest(TestCase):
+    """The generator writes a consistent data set and the runner reports on it."""
+
+    def test_generate_and_benchmark(self):
+        counts = synthetic_data.generate(ornaments=40, years=0.5, seed=7, log=lambda message: None)
+
+        self.assertEqual(counts['stock_ornaments'], 40)
+        self.assertEqual(counts['orders'], 20)
+        self.assertEqual(Order.objects.count(), 20)
+        self.assertEqual(Sale.objects.count(), counts['sales'])
+        self.assertEqual(Ornament.objects.count(), 40 + counts['order_ornaments'])
+        self.assertEqual(DailyRate.objects.filter(rate_date__isnull=True).count(), 0)
+        self.assertEqual(DailyRate.objects.count(), counts['daily_rates'])
+        # Derived tables were rebuilt after the bulk inserts.
+        self.assertTrue(OrnamentStockSummary.objects.exists())
+        self.assertTrue(SalesMonthSummary.objects.exists())
+
+        # A second run adds to the first without clashing codes or bills.
+        again = synthetic_data.generate(ornaments=5, years=0.5, seed=7, log=lambda message: None)
+        self.assertEqual(again['daily_rates'], 0)
+        self.assertEqual(Order.objects.count(), 22)
+
+        user = get_user_model().objects.create_superuser(username='bench', password='pass')
+        report = benchmarks.run(user, repeat=1)
+
+        json.dumps(report)
+        self.assertEqual(report['data']['order.Order'], 22)
+        results = {row['name']: row for row in report['results']}
+        self.assertEqual(set(results), {entry.name for entry in benchmarks.ENTRY_POINTS})
+        for row in results.values():
+            self.assertIn(row['status'], (200, 302), row['name'])
+            self.assertGreater(row['queries'], 0)
+        # The import ran inside a rolled back transaction.
+        self.assertEqual(Ornament.objects.count(), 45 + counts['order_ornaments'] + again['order_ornaments'])
+
+    def test_compare(self):
+        previous = {'results': [{'name': 'dashboard', 'median_ms': 100.0, 'queries': 30}]}
+        current = {'results': [
+            {'name': 'dashboard', 'median_ms': 80.0, 'queries': 25},
+            {'name': 'sales_list', 'median_ms': 50.0, 'queries': 20},
+        ]}
+        self.assertEqual(benchmarks.compare(previous, current), [
+            ('dashboard', 100.0, 80.0, -20.0, 30, 25),
+            ('sales_list', None, 50.0, None, None, 20),
+        ])
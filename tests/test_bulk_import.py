@@ -0,0 +1,143 @@
+from decimal import Decimal
+from io import BytesIO
+
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from goldsilverpurchase import ledger
+from goldsilverpurchase.models import (
+    CustomerPurchase, GoldSilverPurchase, MetalStockMovement, MetalStockType, Party,
+)
+from order.models import Order, OrderOrnament
+from ornament import stock_summary
+from ornament.models import Kaligar, Ornament, OrnamentStockSummary
+from sales.models import Sale
+from sales.views import ExcelImportProcessor
+
+
+def _workbook(sheets):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets.items():
+        ws = wb.create_sheet(title)
+        ws.append([f'col{i}' for i in range(len(rows[0]))])
+        for row in rows:
+            ws.append(row)
+    buffer = BytesIO()
+    wb.save(buffer)
+    return SimpleUploadedFile('import.xlsx', buffer.getvalue())
+
+
+def _summary_rows():
+    return sorted(OrnamentStockSummary.objects.values_list('metal_type', 'type', 'count', 'weight'))
+
+
+class BulkImportTest(TestCase):
+    """Bulk imports write the same rows the per-row imports used to."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+
+    def _messages(self, response):
+        return ' '.join(str(m) for m in get_messages(response.wsgi_request))
+
+    def test_purchase_import_skips_duplicates_and_books_movements(self):
+        MetalStockType.objects.create(name=MetalStockType.StockTypeChoices.RAW)
+        party = Party.objects.create(party_name='Known', panno='123456789')
+        GoldSilverPurchase.objects.create(bill_no='B1', party=party, metal_type='gold', quantity=Decimal('1'))
+
+        row = ['2081-01-05', 'Known', '123456789', 'gold', '24K', 'raw gold', 11.6643, 150000, 'tola', 500, 0, 0, 'cash', 1, '']
+        upload = _workbook({'Sheet': [
+            ['B1'] + row,
+            ['B2'] + row,
+            ['B2'] + row,
+            ['B3', '2081-01-06', 'New Party', '987654321'] + row[3:],
+        ]})
+        response = self.client.post(reverse('gsp:gsp_import_excel'), {'file': upload})
+
+        self.assertIn('rows/sec', self._messages(response))
+        self.assertEqual(GoldSilverPurchase.objects.count(), 3)
+        b2 = GoldSilverPurchase.objects.get(bill_no='B2')
+        self.assertEqual(b2.party, party)
+        self.assertEqual(b2.amount, Decimal('150500.00'))
+        self.assertEqual(GoldSilverPurchase.objects.get(bill_no='B3').party.panno, '987654321')
+        self.assertEqual(
+            MetalStockMovement.objects.filter(reference_type='GoldSilverPurchase', reference_id__in=['B2', 'B3']).count(),
+            2,
+        )
+        self.assertEqual(ledger.verify(), {})
+
+    def test_customer_purchase_import_numbers_rows(self):
+        CustomerPurchase.objects.create(sn='7', customer_name='Old', metal_type='gold', ornament_name='Ring')
+        row = ['2081-01-05', 'Ram', 'Kathmandu', '9800000000', 'gold', 'Chain', 10, 90, 9, 9.5, 100000, 0, 0, 0, 0, 0]
+        upload = _workbook({'Sheet': [[None] + row, ['12'] + row]})
+        self.client.post(reverse('gsp:customer_import_excel'), {'file': upload})
+
+        self.assertEqual(
+            sorted(CustomerPurchase.objects.exclude(sn='7').values_list('sn', flat=True)), ['8', '9'],
+        )
+        purchase = CustomerPurchase.objects.get(sn='8')
+        self.assertEqual(purchase.profit_weight, Decimal('0.500'))
+        self.assertEqual(purchase.amount, Decimal('77158.51'))
+
+    def test_all_data_import_links_orders_ornaments_and_sales(self):
+        ornament_row = ['Ring', 'Gold', '22KARAT', 'stock', 'Rings', None, 'Hari', 5, 5.2, 0, 0, 0, 0, 0, 0, '2081-01-01', '', '', None, None]
+        upload = _workbook({
+            'Orders': [[900, '2081-01-01', '2081-01-02', 'Sita', '9800000000', 'delivered', 'custom', '', 0, 1000, 1000, 0, 1000, 'cash', 0, 0, None, None]],
+            'OrderPayments': [[900, 'cash', 1000, None, None]],
+            'Ornaments': [[1, None] + ornament_row, [2, 'IMP-2'] + ornament_row],
+            'OrderOrnaments': [[900, 1, 100, 0, 0, 0, 0, 0, 1000, None, None]],
+            'Sales': [[900, '55', '2081-01-02', None, None]],
+        })
+        response = self.client.post(reverse('gsp:data_settings'), {'import_file': upload})
+
+        self.assertIn('rows/sec', self._messages(response))
+        order = Order.objects.get(sn=900)
+        self.assertEqual(order.payments.get().amount, Decimal('1000.00'))
+        line = OrderOrnament.objects.get(order=order)
+        self.assertTrue(line.ornament.code)
+        self.assertEqual(line.ornament.barcode, f'ORN-{line.ornament.pk:010d}')
+        self.assertEqual(line.ornament.maincategory.name, 'Rings')
+        self.assertEqual(Kaligar.objects.filter(name='Hari').count(), 1)
+        self.assertEqual(Sale.objects.get(order=order).bill_no, '55')
+
+        imported = _summary_rows()
+        stock_summary.rebuild()
+        self.assertEqual(imported, _summary_rows())
+
+    def test_sales_processor_prefetches_and_updates_summary_once(self):
+        Sale.objects.create(order=Order.objects.create(customer_name='Old', phone_number='9800000000'), bill_no='1')
+        bills = {
+            '1': {'order_info': {'customer_name': 'Dup'}, 'ornaments': [{'ornament_name': 'Ring', 'metal_weight': Decimal('1')}]},
+            '2': {
+                'order_info': {'customer_name': 'Gita', 'sale_date': '2081-02-01'},
+                'ornaments': [
+                    {'ornament_name': 'Ring', 'metal_weight': Decimal('2'), 'rate': Decimal('100'), 'kaligar_name': 'Shyam'},
+                    {'ornament_name': 'Chain', 'metal_weight': Decimal('3'), 'rate': Decimal('100'), 'kaligar_name': 'Shyam'},
+                ],
+            },
+        }
+        processor = ExcelImportProcessor(RequestFactory().get('/'))
+        processor.prefetch(bills)
+        results = {
+            bill_no: processor.create_complete_order(bill_no, data['order_info'], data['ornaments'])
+            for bill_no, data in bills.items()
+        }
+        stats = processor.finish()
+
+        self.assertFalse(results['1']['success'])
+        self.assertTrue(results['2']['success'])
+        self.assertEqual(stats.created, 1)
+        order = Sale.objects.get(bill_no='2').order
+        self.assertEqual(order.order_ornaments.count(), 2)
+        self.assertEqual(order.total, Decimal('500'))
+        self.assertEqual(Ornament.objects.filter(kaligar__name='Shyam').count(), 2)
+
+        imported = _summary_rows()
+        stock_summary.rebuild()
+        self.assertEqual(imported, _summary_rows())
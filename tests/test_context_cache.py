@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from main import context_processors
+from main.models import CustomerPageImage, DailyRate
+from ornament.models import Kaligar, Ornament
+
+
+class SharedContextCacheTest(TestCase):
+    """Template chrome is served from the versioned cache until its data changes."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        # The logo slot row is created on first use; start from a settled state.
+        CustomerPageImage.get_for_slot(CustomerPageImage.PageSlot.SITE_LOGO)
+        cache.clear()
+
+    def _render_chrome(self):
+        request = self.factory.get('/')
+        context = {}
+        for processor in (
+            context_processors.latest_rate,
+            context_processors.site_branding,
+            context_processors.customer_nav,
+        ):
+            context.update(processor(request))
+        return context
+
+    def test_warm_cache_needs_no_queries(self):
+        DailyRate.objects.create(bs_date='1 Baisakh 2082', gold_rate=Decimal('150000'))
+        self._render_chrome()
+
+        with self.assertNumQueries(0):
+            context = self._render_chrome()
+        self.assertEqual(context['latest_rate'].gold_rate, Decimal('150000'))
+
+    def test_saves_invalidate_cached_values(self):
+        DailyRate.objects.create(bs_date='1 Baisakh 2082', gold_rate=Decimal('150000'))
+        self.assertEqual(self._render_chrome()['customer_metal_type_pages'], [])
+
+        DailyRate.objects.create(bs_date='2 Baisakh 2082', gold_rate=Decimal('151000'))
+        kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+        Ornament.objects.create(
+            code='NAV-1', ornament_name='Ring', metal_type='Gold', weight=Decimal('1.000'), kaligar=kaligar,
+        )
+        logo = CustomerPageImage.get_for_slot(CustomerPageImage.PageSlot.SITE_LOGO)
+        logo.is_active = False
+        logo.save()
+
+        context = self._render_chrome()
+        self.assertEqual(context['latest_rate'].gold_rate, Decimal('151000'))
+        self.assertEqual([page['value'] for page in context['customer_metal_type_pages']], ['Gold'])
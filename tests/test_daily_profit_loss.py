@@ -0,0 +1,92 @@
+import datetime
+from decimal import Decimal
+
+import nepali_datetime as ndt
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from goldsilverpurchase.models import MetalStock, MetalStockMovement, MetalStockType
+from main.models import DailyRate
+from order import pnl
+from ornament.models import Kaligar, Ornament
+from ornament.stock_summary import update_ornaments
+
+
+class DailyProfitLossSeriesTest(TestCase):
+    """The daily series values the stock held on each day at that day's rate."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+        self.today = timezone.localdate()
+        kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+
+        self._ornament(kaligar, 'PL-1', '10.000', days_ago=5)
+        destroyed = self._ornament(kaligar, 'PL-2', '5.000', days_ago=10)
+        update_ornaments(Ornament.objects.filter(pk=destroyed.pk), status=Ornament.StatusCategory.DESTROYED)
+        Ornament.objects.filter(pk=destroyed.pk).update(updated_at=self._at(2))
+
+        stock = MetalStock.objects.create(
+            metal_type='gold', purity='24K',
+            stock_type=MetalStockType.objects.create(name=MetalStockType.StockTypeChoices.RAW),
+        )
+        MetalStockMovement.objects.create(
+            metal_stock=stock, movement_type='in', quantity=Decimal('20.000'),
+            movement_date=ndt.date.from_datetime_date(self.today - datetime.timedelta(days=3)),
+        )
+
+        self._rate('116640', days_ago=20)
+        self._rate('233280', days_ago=1)
+
+    def _at(self, days_ago):
+        day = self.today - datetime.timedelta(days=days_ago)
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time(12)))
+
+    def _ornament(self, kaligar, code, weight, days_ago):
+        return Ornament.objects.create(
+            code=code, ornament_name='Ring', metal_type='Gold', type='24KARAT', weight=Decimal(weight),
+            kaligar=kaligar, ornament_date=ndt.date.from_datetime_date(self.today - datetime.timedelta(days=days_ago)),
+        )
+
+    def _rate(self, gold_rate, days_ago):
+        day = ndt.date.from_datetime_date(self.today - datetime.timedelta(days=days_ago))
+        DailyRate.objects.create(
+            bs_date=day.strftime('%Y-%m-%d'), gold_rate=Decimal(gold_rate), silver_rate=Decimal('1166.40'),
+        )
+
+    def test_weights_and_values_follow_history(self):
+        rows = pnl.daily_series(7)
+
+        self.assertEqual(len(rows), 7)
+        self.assertEqual([round(row['gold_weight'], 3) for row in rows], [5, 15, 15, 15, 10, 10, 10])
+        self.assertEqual([round(row['stock_gold_weight'], 3) for row in rows], [0, 0, 0, 20, 20, 20, 20])
+        self.assertEqual(
+            [round(row['total_value']) for row in rows],
+            [50000, 150000, 150000, 350000, 300000, 600000, 600000],
+        )
+        self.assertEqual(round(pnl.profit_loss(rows)[-1]['value']), 550000)
+
+    def test_days_before_first_rate_are_skipped(self):
+        DailyRate.objects.all().delete()
+        self._rate('116640', days_ago=2)
+        self.assertEqual(len(pnl.daily_series(30)), 3)
+
+    def test_given_weights_are_not_queried_again(self):
+        weights = pnl.current_weights()
+        with CaptureQueriesContext(connection) as given:
+            rows = pnl.daily_series(7, weights=weights)
+        with CaptureQueriesContext(connection) as computed:
+            pnl.daily_series(7)
+        self.assertEqual(rows, pnl.daily_series(7))
+        self.assertLess(len(given), len(computed))
+
+    def test_report_view(self):
+        response = self.client.get(reverse('order:daily_profit_loss_report'), {'days': '100000'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['days'], pnl.MAX_DAYS)
+        self.assertEqual(response.context['gold_count'], 1)
+        self.assertAlmostEqual(response.context['gold_weight'], 10.0)
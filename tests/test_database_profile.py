@@ -0,0 +1,43 @@
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from mysite import database
+
+
+class PostgresConfigTest(SimpleTestCase):
+    """The production database profile keeps connections open and checks them."""
+
+    def test_defaults_persist_and_health_check_connections(self):
+        config = database.postgres_config({'DATABASE_NAME': 'shop', 'DATABASE_HOST': 'db'})
+
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((config['NAME'], config['HOST']), ('shop', 'db'))
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS'], {'connect_timeout': 5})
+        self.assertNotIn('DISABLE_SERVER_SIDE_CURSORS', config)
+
+    def test_overrides(self):
+        config = database.postgres_config({
+            'DATABASE_CONN_MAX_AGE': 'None',
+            'DATABASE_CONN_HEALTH_CHECKS': 'False',
+            'DATABASE_PGBOUNCER': 'True',
+        })
+
+        self.assertIsNone(config['CONN_MAX_AGE'])
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+        self.assertTrue(config['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_pool_replaces_persistent_connections(self):
+        with mock.patch.object(database, '_pool_available', return_value=True):
+            config = database.postgres_config({'DATABASE_POOL': 'True', 'DATABASE_POOL_MAX_SIZE': '4'})
+
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 4, 'timeout': 10})
+
+    def test_pool_without_support_is_a_configuration_error(self):
+        with mock.patch.object(database, '_pool_available', return_value=False):
+            with self.assertRaises(ImproperlyConfigured):
+                database.postgres_config({'DATABASE_POOL': 'True'})
@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from main.models import BackgroundJob
+from main.services import jobs
+from ornament import images
+from ornament.models import Kaligar, Ornament, PendingImagePurge
+
+
+class FailingService:
+    def __init__(self):
+        self.calls = 0
+
+    def delete(self, public_ids):
+        self.calls += 1
+        raise ConnectionError('cloudinary unavailable')
+
+
+class ImagePurgeTest(TestCase):
+    """Old ornament images are deleted by a background job, in batches, after commit."""
+
+    def setUp(self):
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+        ornament = Ornament(
+            ornament_name='Ring', metal_type='Gold', type='24KARAT', weight=Decimal('1.000'),
+            kaligar=self.kaligar, image='ornaments/old', barcode='ORN-IMG', barcode_image='barcodes/old',
+        )
+        Ornament.objects.bulk_create([ornament])
+        self.ornament = Ornament.objects.get(barcode='ORN-IMG')
+
+    def test_replacing_an_image_queues_it_without_reloading_the_row(self):
+        self.ornament.image = 'ornaments/new'
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(2):
+                # the update and the pending-purge insert (stock summary untouched)
+                self.ornament.save(update_fields=['image'])
+
+        self.assertEqual(list(PendingImagePurge.objects.values_list('public_id', flat=True)), ['ornaments/old'])
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.kind, images.TASK_KIND)
+
+        self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertFalse(PendingImagePurge.objects.exists())
+
+    def test_unchanged_images_are_kept(self):
+        self.ornament.ornament_name = 'Bangle'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ornament.save()
+        self.assertFalse(PendingImagePurge.objects.exists())
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_cleared_images_are_kept(self):
+        self.ornament.image = None
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ornament.save()
+        self.assertFalse(PendingImagePurge.objects.exists())
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_deleting_ornaments_queues_one_job(self):
+        other = Ornament(
+            ornament_name='Chain', metal_type='Gold', type='24KARAT', weight=Decimal('1.000'),
+            kaligar=self.kaligar, image='ornaments/chain',
+        )
+        Ornament.objects.bulk_create([other])
+        with self.captureOnCommitCallbacks(execute=True):
+            Ornament.objects.all().delete()
+
+        self.assertEqual(
+            sorted(PendingImagePurge.objects.values_list('public_id', flat=True)),
+            ['barcodes/old', 'ornaments/chain', 'ornaments/old'],
+        )
+        self.assertEqual(BackgroundJob.objects.filter(kind=images.TASK_KIND).count(), 1)
+
+    def test_purge_deletes_in_batches(self):
+        images.schedule(f'ornaments/{n}' for n in range(5))
+        service = images.StubService()
+
+        self.assertEqual(images.purge(service=service, batch_size=2), (5, 0))
+        self.assertEqual(service.deleted, [f'ornaments/{n}' for n in range(5)])
+        self.assertFalse(PendingImagePurge.objects.exists())
+
+    def test_failures_are_kept_for_retry(self):
+        images.schedule(['ornaments/a', 'ornaments/b'])
+        service = FailingService()
+
+        self.assertEqual(images.purge(service=service), (0, 2))
+        row = PendingImagePurge.objects.first()
+        self.assertEqual(row.attempts, 1)
+        self.assertIn('cloudinary unavailable', row.last_error)
+
+        PendingImagePurge.objects.update(attempts=images.MAX_ATTEMPTS)
+        self.assertEqual(images.purge(service=service), (0, 0))
+        self.assertEqual(service.calls, 1)
@@ -0,0 +1,69 @@
+import io
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from common.json_stream import iter_array
+from goldsilverpurchase.models import Party
+from main.models import BackgroundJob
+from main.services import jobs
+
+
+class JsonStreamTest(SimpleTestCase):
+    """Arrays are read element by element whatever the chunk boundaries."""
+
+    def test_round_trip_with_tiny_reads(self):
+        items = [{'pk': 1, 'rate': 1500.25, 'name': 'सुन'}, [1, 2e3, -4], 'x, ]', None, True, 12345]
+        text = json.dumps(items, indent=1, ensure_ascii=False)
+        for read_size in (1, 2, 3, 7, 64):
+            with self.subTest(read_size=read_size):
+                parsed = list(iter_array(io.StringIO(text), read_size=read_size))
+                self.assertEqual(parsed, items)
+
+    def test_empty_array_and_bom(self):
+        self.assertEqual(list(iter_array(io.StringIO('﻿ [ ] '))), [])
+        self.assertEqual(list(iter_array(io.StringIO('[]'), read_size=1)), [])
+
+    def test_malformed_input_raises(self):
+        for text in ('{"a": 1}', '[1 2]', '[1, 2] 3', '[1, '):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                list(iter_array(io.StringIO(text), read_size=2))
+
+
+class FullRestoreTest(TestCase):
+    """The full restore streams the dump and fixes impossible Nepali dates."""
+
+    def test_restore_loads_records_and_clamps_dates(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+        Party.objects.create(party_name='Replaced', panno='111111111')
+        dump = [
+            {'model': 'goldsilverpurchase.party', 'pk': 7, 'fields': {'party_name': 'Restored', 'panno': '222222222'}},
+            {'model': 'goldsilverpurchase.metalstocktype', 'pk': 3, 'fields': {'name': 'raw'}},
+            {'model': 'goldsilverpurchase.goldsilverpurchase', 'pk': 5, 'fields': {
+                'bill_no': 'B-1', 'bill_date': '2081-01-32', 'party': 7, 'particular': 'Gold bar',
+                'metal_type': 'gold', 'purity': '24K', 'quantity': '10.000', 'rate': '100.00',
+                'amount': '1000.00', 'created_at': '2024-05-14T10:00:00Z', 'updated_at': '2024-05-14T10:00:00Z',
+            }},
+        ]
+        upload = SimpleUploadedFile('dump.json', json.dumps(dump).encode())
+        self.client.post(
+            reverse('gsp:import_full_db_dump'),
+            {'import_file': upload, 'confirm_full_restore': 'RESTORE_FULL_DB'},
+        )
+        self.assertEqual(jobs.run_pending(), 1)
+
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.status, 'succeeded', job.message)
+        self.assertIn('3 records', job.message)
+        self.assertIn('1 invalid Nepali date(s) auto-corrected', job.message)
+        self.assertFalse(os.path.exists(job.input_path))
+        self.assertEqual(list(Party.objects.values_list('party_name', flat=True)), ['Restored'])
+
+        from goldsilverpurchase.models import GoldSilverPurchase
+        purchase = GoldSilverPurchase.objects.get(pk=5)
+        self.assertEqual(str(purchase.bill_date), '2081-01-31')
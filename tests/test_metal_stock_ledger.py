@@ -0,0 +1,88 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from goldsilverpurchase import ledger
+from goldsilverpurchase.models import MetalStock, MetalStockMovement, MetalStockType
+
+
+class MetalStockLedgerTest(TestCase):
+    """Incremental ledger updates must agree with a full walk of the movements."""
+
+    def setUp(self):
+        stock_type = MetalStockType.objects.create(name=MetalStockType.StockTypeChoices.RAW)
+        self.stock = MetalStock.objects.create(
+            metal_type=MetalStock.MetalType.GOLD,
+            stock_type=stock_type,
+            purity=MetalStock.Purity.TWENTYFOURKARAT,
+            quantity=Decimal('30.000'),
+            rate_unit='tola',
+        )
+
+    def _move(self, quantity, rate, movement_type='in', stock=None):
+        return MetalStockMovement.objects.create(
+            metal_stock=stock or self.stock,
+            movement_type=movement_type,
+            quantity=Decimal(quantity),
+            rate=Decimal(rate),
+        )
+
+    def _legacy_unit_cost(self):
+        total_qty, total_cost = Decimal('0'), Decimal('0')
+        for m in self.stock.movements.filter(movement_type='in'):
+            if m.rate and m.quantity:
+                total_qty += m.quantity
+                total_cost += m.rate * m.quantity
+        if not total_qty:
+            return Decimal('0.00')
+        return (total_cost / total_qty).quantize(Decimal('0.01'))
+
+    def assertConsistent(self):
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.unit_cost, self._legacy_unit_cost())
+        self.assertEqual(ledger.verify(), {})
+
+    def test_insert_update_delete(self):
+        first = self._move('10.000', '150000')
+        second = self._move('20.000', '160000')
+        self._move('5.000', '170000', movement_type='out')
+        self.assertConsistent()
+
+        first = MetalStockMovement.objects.get(pk=first.pk)
+        first.rate = Decimal('140000')
+        first.save()
+        self.assertConsistent()
+
+        second.delete()
+        self.assertConsistent()
+        last = MetalStockMovement.objects.order_by('-pk').first()
+        self.assertEqual(last.ledger_quantity, Decimal('10.000'))
+        self.assertEqual(last.ledger_balance, Decimal('5.000'))
+        self.assertEqual(self.stock.ledger_balance, Decimal('5.000'))
+
+    def test_moving_between_stocks(self):
+        other = MetalStock.objects.create(
+            metal_type=MetalStock.MetalType.GOLD,
+            stock_type=self.stock.stock_type,
+            purity=MetalStock.Purity.TWENTYTWOKARAT,
+        )
+        movement = self._move('10.000', '150000')
+        movement.metal_stock = other
+        movement.save()
+
+        other.refresh_from_db()
+        self.assertEqual(other.ledger_quantity, Decimal('10.000'))
+        self.assertConsistent()
+
+    def test_reconcile_command_detects_and_repairs_drift(self):
+        self._move('10.000', '150000')
+        MetalStock.objects.filter(pk=self.stock.pk).update(ledger_quantity=Decimal('99'))
+
+        out = StringIO()
+        call_command('reconcile_metal_stock', stdout=out)
+        self.assertIn('drifted', out.getvalue())
+
+        call_command('reconcile_metal_stock', '--rebuild', stdout=StringIO())
+        self.assertConsistent()
@@ -0,0 +1,119 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+import nepali_datetime as ndt
+
+from goldsilverpurchase import positions
+from goldsilverpurchase.models import MetalStock, MetalStockMovement, MetalStockPosition, MetalStockType
+
+
+class MetalStockPositionTest(TestCase):
+    """Positions track their stocks and feed the stock list and detail pages."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+        self.raw = MetalStockType.objects.create(name=MetalStockType.StockTypeChoices.RAW)
+        self.refined = MetalStockType.objects.create(name=MetalStockType.StockTypeChoices.REFINED)
+
+    def _stock(self, metal_type='gold', stock_type=None, purity='24K', rate_unit='tola'):
+        return MetalStock.objects.create(
+            metal_type=metal_type, stock_type=stock_type or self.raw, purity=purity, rate_unit=rate_unit,
+        )
+
+    def _move(self, stock, quantity, rate='0', movement_type='in', **extra):
+        movement = MetalStockMovement.objects.create(
+            metal_stock=stock, movement_type=movement_type, quantity=Decimal(quantity), rate=Decimal(rate), **extra,
+        )
+        stock.refresh_from_db()
+        stock.quantity = stock.ledger_balance
+        stock.save()
+        return movement
+
+    def _position(self, metal_type='gold', stock_type=None, purity='24K'):
+        return MetalStockPosition.objects.get(metal_type=metal_type, stock_type=stock_type or self.raw, purity=purity)
+
+    def test_position_follows_stock_writes(self):
+        tola_stock = self._stock()
+        gram_stock = self._stock(rate_unit='gram')
+        self._move(tola_stock, '11.6643', '116643')
+        self._move(gram_stock, '40.000', '9000')
+        self._move(gram_stock, '10.000', movement_type='out')
+
+        position = self._position()
+        self.assertEqual(position.stock_count, 2)
+        self.assertEqual(position.quantity, Decimal('41.664'))
+        self.assertEqual(position.value, Decimal('386643.00'))
+        self.assertTrue(position.is_low_stock)
+
+        tola_stock.purity = '22K'
+        tola_stock.save()
+        self.assertEqual(self._position().stock_count, 1)
+        self.assertEqual(self._position(purity='22K').quantity, Decimal('11.664'))
+
+        gram_stock.delete()
+        self.assertFalse(MetalStockPosition.objects.filter(purity='24K').exists())
+
+    def test_rebuild_matches_incremental(self):
+        stock = self._stock()
+        self._move(stock, '60.000', '150000')
+        self._move(self._stock(metal_type='silver', stock_type=self.refined), '300.000', '2500')
+        before = {
+            positions.key_of(p): (p.quantity, p.value, p.avg_cost_per_tola, p.is_low_stock)
+            for p in MetalStockPosition.objects.all()
+        }
+
+        MetalStockPosition.objects.all().delete()
+        call_command('rebuild_metal_stock_positions', stdout=StringIO())
+        after = {
+            positions.key_of(p): (p.quantity, p.value, p.avg_cost_per_tola, p.is_low_stock)
+            for p in MetalStockPosition.objects.all()
+        }
+        self.assertEqual(before, after)
+        self.assertEqual(len(after), 2)
+
+    def test_list_reads_positions(self):
+        self._move(self._stock(), '60.000', '150000')
+        self._move(self._stock(purity='22K'), '20.000', '130000')
+        self._move(self._stock(metal_type='silver'), '100.000', '2000')
+
+        response = self.client.get(reverse('gsp:metal_stock_list'))
+        self.assertEqual(response.context['total_gold_quantity'], Decimal('80.000'))
+        self.assertEqual(response.context['total_silver_quantity'], Decimal('100.000'))
+        self.assertEqual(response.context['avg_gold_purchase_rate_tola'].quantize(Decimal('1')), Decimal('145000'))
+        self.assertEqual(len(response.context['low_stock_items']), 2)
+
+        response = self.client.get(reverse('gsp:metal_stock_list'), {'purity': '22K'})
+        self.assertEqual(response.context['avg_gold_purchase_rate_tola'].quantize(Decimal('1')), Decimal('130000'))
+
+    def test_detail_pages_movements_by_keyset(self):
+        stock = self._stock()
+        day = ndt.date(2080, 1, 1)
+        for idx in range(55):
+            self._move(stock, '1.000', '100000', movement_date=day + datetime.timedelta(days=idx // 2))
+        self._move(stock, '2.000', movement_type='out')  # undated, listed last
+        MetalStock.objects.filter(pk=stock.pk).update(quantity=Decimal('0'))
+
+        url = reverse('gsp:metal_stock_detail', args=[stock.pk])
+        first = self.client.get(url)
+        stock.refresh_from_db()
+        self.assertEqual(stock.quantity, Decimal('53.000'))
+        self.assertEqual(first.context['avg_unit_cost_from_movements'], Decimal('100000'))
+        self.assertEqual(len(first.context['movements']), 50)
+
+        second = self.client.get(url, {'after': first.context['older_cursor']})
+        self.assertIsNone(second.context['older_cursor'])
+        seen = [m.pk for m in first.context['movements']] + [m.pk for m in second.context['movements']]
+        expected = list(
+            MetalStockMovement.objects.filter(metal_stock=stock)
+            .order_by('-movement_date', '-created_at', '-pk')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertIsNone(second.context['movements'][-1].movement_date)
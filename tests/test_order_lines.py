@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from order.lines import parse_lines, save_order_lines
+from order.models import Order, OrderMetalStock, OrderPayment
+from ornament.models import Kaligar, Ornament, OrnamentStockSummary
+
+
+class SaveOrderLinesTest(TestCase):
+    """Order lines are stored with a fixed number of queries."""
+
+    def setUp(self):
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+        self.ornaments = [
+            Ornament.objects.create(
+                code=f'OL-{idx}', ornament_name='Ring', metal_type='Silver' if idx % 3 == 0 else 'Gold',
+                type='22KARAT', weight=Decimal('5.000'), kaligar=self.kaligar,
+            )
+            for idx in range(12)
+        ]
+
+    def _order(self, idx):
+        return Order.objects.create(customer_name=f'Customer {idx}', phone_number='9841234567')
+
+    def _lines(self, ornaments):
+        return [{'ornament_id': ornament.pk, 'line_amount': '1000', 'jyala': '50'} for ornament in ornaments]
+
+    def _query_count(self, order, ornaments):
+        with CaptureQueriesContext(connection) as queries:
+            save_order_lines(order, self._lines(ornaments))
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        # The first call creates the order-type summary buckets.
+        self._query_count(self._order(1), self.ornaments[:2])
+        few = self._query_count(self._order(2), self.ornaments[2:4])
+        many = self._query_count(self._order(3), self.ornaments[4:12])
+        self.assertEqual(few, many)
+
+    def test_lines_move_ornaments_to_the_order(self):
+        order = self._order(1)
+        lines = self._lines(self.ornaments[:3]) + [{'ornament_id': 999999}, {'jyala': '1'}]
+        save_order_lines(order, lines)
+        self.assertEqual(order.order_ornaments.count(), 3)
+        self.assertEqual(
+            set(Ornament.objects.filter(order=order, ornament_type='order').values_list('pk', flat=True)),
+            {ornament.pk for ornament in self.ornaments[:3]},
+        )
+
+        save_order_lines(order, self._lines(self.ornaments[1:2]), replace=True)
+        self.assertEqual(list(order.order_ornaments.values_list('ornament_id', flat=True)), [self.ornaments[1].pk])
+        self.ornaments[0].refresh_from_db()
+        self.assertIsNone(self.ornaments[0].order)
+        self.assertEqual(self.ornaments[0].ornament_type, 'stock')
+        self.assertEqual(
+            OrnamentStockSummary.objects.filter(ornament_type='order').values_list('count', flat=True).get(),
+            1,
+        )
+
+    def test_recompute_totals_from_lines(self):
+        order = self._order(1)
+        order.discount = Decimal('300')
+        save_order_lines(order, self._lines(self.ornaments[:3]))  # one silver line
+        OrderMetalStock.objects.create(order=order, metal_type='gold', quantity=Decimal('1'), rate_per_gram=Decimal('500'))
+        OrderPayment.objects.create(order=order, payment_mode='cash', amount=Decimal('1200'))
+
+        order.recompute_totals_from_lines()
+        order.refresh_from_db()
+        self.assertEqual(order.amount, Decimal('3500'))
+        self.assertEqual(order.taxable_amount, Decimal('2285.71'))
+        self.assertEqual(order.total, Decimal('3200'))
+        self.assertEqual(order.remaining_amount, Decimal('2000'))
+
+    def test_parse_lines(self):
+        self.assertEqual(parse_lines('[{"ornament_id": 1}]'), [{'ornament_id': 1}])
+        self.assertEqual(parse_lines('not json'), [])
+        self.assertEqual(parse_lines(None), [])
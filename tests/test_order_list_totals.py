@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from order import totals as order_totals
+from order.models import Order, OrderOrnament, OrderPayment
+from ornament.models import Kaligar, Ornament
+
+
+class OrderListTotalsTest(TestCase):
+    """Status tab figures come from one grouped query over the listed orders."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+
+    def _order(self, idx, status, lines, total='1000', amount='900', remaining='400'):
+        order = Order.objects.create(
+            customer_name=f'Customer {idx}', phone_number='9841234567', status=status,
+            total=Decimal(total), amount=Decimal(amount), remaining_amount=Decimal(remaining),
+        )
+        for line_idx, (metal_type, karat, weight) in enumerate(lines):
+            ornament = Ornament.objects.create(
+                code=f'OL-{idx}-{line_idx}', ornament_name='Ring', metal_type=metal_type, type=karat,
+                weight=Decimal(weight), kaligar=self.kaligar,
+            )
+            OrderOrnament.objects.create(order=order, ornament=ornament)
+        return order
+
+    def test_grouped_totals_match_per_line_weights(self):
+        self._order(1, 'order', [('Gold', '22KARAT', '10.000'), ('Gold', '18KARAT', '4.000')])
+        self._order(2, 'order', [('Silver', '24KARAT', '50.000')])
+        self._order(3, 'processing', [('Gold', '24KARAT', '2.500'), ('Gold', '14KARAT', '1.000')])
+
+        by_status = order_totals.status_totals(order_totals.annotate_order_figures(Order.objects.all()))
+
+        self.assertEqual(by_status['order']['count'], 2)
+        self.assertEqual(by_status['order']['gold_24k_weight'], Decimal('12.800'))
+        self.assertEqual(by_status['order']['remaining'], Decimal('800'))
+        self.assertEqual(by_status['processing']['gold_24k_weight'], Decimal('3.100'))
+        self.assertEqual(by_status['delivered']['count'], 0)
+
+        overall = order_totals.overall_totals(by_status)
+        self.assertEqual(overall['count'], 3)
+        self.assertEqual(overall['total'] - overall['amount'], Decimal('300'))
+
+    def test_list_shows_only_the_selected_tab(self):
+        self._order(1, 'order', [('Gold', '22KARAT', '10.000')])
+        self._order(2, 'on_hold', [('Gold', '24KARAT', '5.000')])
+
+        response = self.client.get(reverse('order:list'), {'status': 'on_hold'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['active_status'], 'on_hold')
+        self.assertEqual([order.customer_name for order in response.context['orders']], ['Customer 2'])
+        self.assertEqual(response.context['status_counts']['order'], 1)
+        self.assertEqual(response.context['order_count'], 2)
+        self.assertAlmostEqual(response.context['total_24k_weight'], 14.8)
+        self.assertEqual(response.context['orders'][0].total_weight, Decimal('5.000'))
+
+    def test_total_paid_annotation(self):
+        order = self._order(1, 'order', [])
+        OrderPayment.objects.create(order=order, payment_mode='cash', amount=Decimal('250'))
+        OrderPayment.objects.create(order=order, payment_mode='fonepay', amount=Decimal('100'))
+        unpaid = self._order(2, 'order', [])
+
+        annotated = order_totals.with_total_paid(Order.objects.filter(pk__in=[order.pk, unpaid.pk])).order_by('pk')
+        with self.assertNumQueries(1):
+            self.assertEqual([row.total_paid for row in annotated], [Decimal('350'), Decimal('0')])
+        self.assertEqual(Order.objects.get(pk=order.pk).total_paid, Decimal('350'))
+
+    def test_total_paid_follows_refresh_from_db(self):
+        order = self._order(1, 'order', [])
+        OrderPayment.objects.create(order=order, payment_mode='cash', amount=Decimal('250'))
+
+        annotated = order_totals.with_total_paid(Order.objects.filter(pk=order.pk)).get()
+        OrderPayment.objects.create(order=order, payment_mode='cash', amount=Decimal('50'))
+        annotated.refresh_from_db()
+
+        self.assertEqual(annotated.total_paid, Decimal('300'))
+
+    def test_line_counts_do_not_multiply(self):
+        order = self._order(1, 'order', [('Gold', '22KARAT', '10.000'), ('Gold', '18KARAT', '4.000')])
+        for _ in range(3):
+            order.order_metals.create(metal_type='gold', quantity=Decimal('1.000'))
+
+        counted = order_totals.with_line_counts(Order.objects.filter(pk=order.pk)).get()
+
+        self.assertEqual((counted.ornament_count, counted.metal_count), (2, 3))
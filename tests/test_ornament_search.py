@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from ornament import search as ornament_search
+from ornament.models import Kaligar, Ornament
+
+
+class OrnamentSearchTest(TestCase):
+    """Exact code/barcode lookups, per-term text matches and weight ranges."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+        kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+        self.ring = Ornament.objects.create(
+            code='R-1', barcode='ORN-000101', ornament_name='Gold Ring', metal_type='Gold',
+            type='22KARAT', weight=Decimal('10.250'), kaligar=kaligar,
+        )
+        self.big_ring = Ornament.objects.create(
+            code='R-10', barcode='ORN-000102', ornament_name='Gold Ring Heavy', metal_type='Gold',
+            type='22KARAT', weight=Decimal('21.000'), kaligar=kaligar,
+        )
+        self.chain = Ornament.objects.create(
+            code='C-7', barcode='ORN-000103', ornament_name='Silver Chain', metal_type='Silver',
+            type='24KARAT', weight=Decimal('11.500'), kaligar=kaligar,
+        )
+
+    def _codes(self, text, **kwargs):
+        return sorted(ornament_search.search(Ornament.objects.all(), text, **kwargs).values_list('code', flat=True))
+
+    def test_parse_weight(self):
+        parse = ornament_search.parse_weight
+        self.assertEqual(parse('10-12'), ornament_search.WeightRange(Decimal('10'), Decimal('12')))
+        self.assertEqual(parse('12g to 10g'), ornament_search.WeightRange(Decimal('10'), Decimal('12')))
+        self.assertEqual(parse('10.5'), ornament_search.WeightRange(Decimal('10.5'), Decimal('10.6'), include_high=False))
+        self.assertEqual(parse('>20'), ornament_search.WeightRange(low=Decimal('20'), include_low=False))
+        self.assertIsNone(parse('ring'))
+
+    def test_exact_code_and_barcode(self):
+        self.assertEqual(self._codes('ORN-000103'), ['C-7'])
+        self.assertEqual(self._codes('R-'), ['R-1', 'R-10'])
+
+    def test_exact_match_comes_first(self):
+        newest_first = Ornament.objects.order_by('-id')
+        ranked = ornament_search.search(newest_first, 'r-1').values_list('code', flat=True)
+        self.assertEqual(list(ranked), ['R-1', 'R-10'])
+
+        ranked = ornament_search.search(newest_first, 'ORN-000101').values_list('code', flat=True)
+        self.assertEqual(list(ranked), ['R-1'])
+
+        ranked = ornament_search.search(newest_first, 'R-').values_list('code', flat=True)
+        self.assertEqual(list(ranked), ['R-10', 'R-1'])
+
+    def test_terms_and_weights(self):
+        self.assertEqual(self._codes('gold heavy'), ['R-10'])
+        self.assertEqual(self._codes('10-12'), ['C-7', 'R-1'])
+        self.assertEqual(self._codes('ring >15g'), ['R-10'])
+        self.assertEqual(self._codes('11'), ['C-7'])
+
+    def test_views_use_search(self):
+        response = self.client.get(reverse('order:search_ornaments'), {'q': 'chain'})
+        self.assertEqual([row['code'] for row in response.json()['ornaments']], ['C-7'])
+
+        response = self.client.get(reverse('ornament:list'), {'search': '20-25'})
+        self.assertEqual([ornament.code for ornament in response.context['object_list']], ['R-10'])
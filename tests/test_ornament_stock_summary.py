@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from ornament import stock_summary
+from ornament.models import Kaligar, Ornament, OrnamentStockSummary
+
+
+def _summary_rows():
+    return sorted(
+        OrnamentStockSummary.objects.values_list(
+            'ornament_type', 'status', 'metal_type', 'type', 'count', 'weight', 'jyala',
+        )
+    )
+
+
+class OrnamentStockSummaryTest(TestCase):
+    """Incremental summary maintenance must agree with a full rebuild."""
+
+    def setUp(self):
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+
+    def _create(self, code, **kwargs):
+        defaults = {
+            'ornament_name': 'Test',
+            'metal_type': 'Gold',
+            'weight': Decimal('10.000'),
+            'jyala': Decimal('100.000'),
+            'kaligar': self.kaligar,
+        }
+        defaults.update(kwargs)
+        return Ornament.objects.create(code=code, **defaults)
+
+    def assertMatchesRebuild(self):
+        incremental = _summary_rows()
+        stock_summary.rebuild()
+        self.assertEqual(incremental, _summary_rows())
+
+    def test_create_update_delete(self):
+        ring = self._create('SUM-1')
+        self._create('SUM-2', metal_type='Silver', weight=Decimal('50.000'))
+        self.assertMatchesRebuild()
+
+        ring = Ornament.objects.get(pk=ring.pk)
+        ring.weight = Decimal('12.500')
+        ring.type = Ornament.TypeCategory.TWENTYTWOKARAT
+        ring.save()
+        self.assertMatchesRebuild()
+
+        ring.delete()
+        self.assertMatchesRebuild()
+        self.assertFalse(OrnamentStockSummary.objects.filter(metal_type='Gold').exists())
+
+    def test_bulk_update_moves_buckets(self):
+        self._create('SUM-3')
+        self._create('SUM-4')
+
+        stock_summary.update_ornaments(
+            Ornament.objects.all(), ornament_type=Ornament.OrnamentCategory.SALES,
+        )
+
+        bucket = OrnamentStockSummary.objects.get()
+        self.assertEqual(bucket.ornament_type, Ornament.OrnamentCategory.SALES)
+        self.assertEqual(bucket.count, 2)
+        self.assertEqual(bucket.weight, Decimal('20.000'))
+        self.assertMatchesRebuild()
+
+    def test_uncategorised_bucket_is_unique(self):
+        self._create('SUM-5')
+        bucket = OrnamentStockSummary.objects.get()
+        self.assertIsNone(bucket.maincategory)
+
+        key = {
+            field: getattr(bucket, field)
+            for field in stock_summary.KEY_FIELDS + ('has_weight', 'has_diamond_weight')
+        }
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            OrnamentStockSummary.objects.create(**key, count=1)
@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from goldsilverpurchase.models import RequestQueryMetric
+from main.models import DailyRate
+from main.services import query_metrics
+from order.models import Order, OrderOrnament
+from ornament.models import Kaligar, Ornament
+from sales.models import Sale
+
+
+class QueryBudgetTest(TestCase):
+    """Views stay within their declared query budgets; the middleware records them."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+
+    def _sales(self, count):
+        for idx in range(count):
+            order = Order.objects.create(customer_name=f'Customer {idx}', phone_number='9841234567')
+            ornament = Ornament.objects.create(
+                code=f'QB-{idx}', ornament_name='Ring', metal_type='Gold', type='24KARAT',
+                weight=Decimal('1.000'), kaligar=self.kaligar,
+            )
+            OrderOrnament.objects.create(order=order, ornament=ornament)
+            Sale.objects.create(order=order, bill_no=str(idx))
+
+    def test_sales_list_within_budget(self):
+        self._sales(15)
+        with query_metrics.query_budget('sales:sales_list'):
+            response = self.client.get(reverse('sales:sales_list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_dashboard_within_budget(self):
+        DailyRate.objects.create(bs_date='2082-09-11', gold_rate=Decimal('150000'), silver_rate=Decimal('2000'))
+        self._sales(5)
+        with query_metrics.query_budget('main:dashboard'):
+            response = self.client.get(reverse('main:dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_budget_failure_lists_repeated_statements(self):
+        self._sales(3)
+        with self.assertRaises(query_metrics.QueryBudgetExceeded) as raised:
+            with query_metrics.query_budget(2):
+                for ornament in Ornament.objects.all():
+                    ornament.kaligar.name
+        self.assertIn('4 queries run', str(raised.exception))
+        self.assertIn('3x SELECT', str(raised.exception))
+
+    def test_signature_masks_literals(self):
+        self.assertEqual(
+            query_metrics.signature("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?',
+        )
+
+    @override_settings(QUERY_METRICS_ENABLED=True, QUERY_METRICS_SAMPLE_RATE=1.0)
+    def test_middleware_records_requests(self):
+        self._sales(3)
+        self.client.get(reverse('sales:sales_list'))
+
+        metric = RequestQueryMetric.objects.get()
+        self.assertEqual(metric.view_name, 'sales:sales_list')
+        self.assertEqual(metric.status_code, 200)
+        self.assertGreater(metric.query_count, 0)
+        self.assertEqual(metric.query_budget, query_metrics.budget_for('sales:sales_list'))
+        self.assertFalse(metric.over_budget)
+
+        response = self.client.get(reverse('gsp:performance_report'))
+        summary = {row['view_name']: row for row in response.context['view_query_summary']}
+        self.assertEqual(summary['sales:sales_list']['requests'], 1)
+
+    def test_middleware_off_by_default(self):
+        self.client.get(reverse('sales:sales_list'))
+        self.assertFalse(RequestQueryMetric.objects.exists())
@@ -0,0 +1,56 @@
+import datetime
+from decimal import Decimal
+
+import nepali_datetime as ndt
+from django.test import TestCase
+
+from main.models import DailyRate
+from main.services import cache_versions, rates
+
+
+class RateHistoryTest(TestCase):
+    """Rates are indexed by the date they apply to, whatever the bs_date text."""
+
+    def setUp(self):
+        cache_versions.bump(cache_versions.DAILY_RATE)
+
+    def _rate(self, bs_date, gold_rate):
+        return DailyRate.objects.create(bs_date=bs_date, gold_rate=Decimal(gold_rate), silver_rate=Decimal('1500'))
+
+    def test_parse_rate_date(self):
+        expected = ndt.date(2082, 9, 11).to_datetime_date()
+        self.assertEqual(rates.parse_rate_date('11 Poush 2082'), expected)
+        self.assertEqual(rates.parse_rate_date('११ पौष २०८२'), expected)
+        self.assertEqual(rates.parse_rate_date('2082-09-11'), expected)
+        self.assertEqual(rates.parse_rate_date('2025-12-27'), datetime.date(2025, 12, 27))
+        self.assertIsNone(rates.parse_rate_date('yesterday'))
+
+    def test_lookups(self):
+        self._rate('1 Poush 2082', '150000')
+        self._rate('2082-09-05', '152000')
+        self._rate('3 Poush 2082', '151000')  # entered late, but dated earlier
+
+        self.assertEqual(rates.latest().gold_rate, Decimal('152000'))
+        self.assertEqual(rates.rate_on(ndt.date(2082, 9, 4)).gold_rate, Decimal('151000'))
+        self.assertIsNone(rates.rate_on(ndt.date(2082, 8, 30)))
+
+        gold, silver = rates.rates_between(ndt.date(2082, 8, 30), ndt.date(2082, 9, 6))
+        self.assertEqual(gold, [None, 150000.0, 150000.0, 151000.0, 151000.0, 152000.0, 152000.0])
+        self.assertEqual(silver[-1], 1500.0)
+
+    def test_latest_is_cached_until_a_rate_changes(self):
+        rate = self._rate('1 Poush 2082', '150000')
+        rates.latest()
+        with self.assertNumQueries(0):
+            self.assertEqual(rates.latest().gold_rate, Decimal('150000'))
+
+        rate.gold_rate = Decimal('155000')
+        rate.save()
+        self.assertEqual(rates.latest().gold_rate, Decimal('155000'))
+
+    def test_backfill(self):
+        rate = self._rate('2 Poush 2082', '150000')
+        DailyRate.objects.filter(pk=rate.pk).update(rate_date=None)
+        self.assertEqual(rates.backfill(), 1)
+        rate.refresh_from_db()
+        self.assertEqual(rate.rate_date, ndt.date(2082, 9, 2).to_datetime_date())
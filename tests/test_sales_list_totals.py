@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from order.models import Order, OrderOrnament, OrderPayment
+from ornament.models import Kaligar, Ornament
+from sales.models import Sale, SalesMetalStock
+
+
+class SalesListTotalsTest(TestCase):
+    """Tab counts and totals are aggregated in SQL and match the line data."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+
+    def _sale(self, idx, ornaments=(), metals=(), total='0', amount='0', paid='0', pan=None):
+        order = Order.objects.create(
+            customer_name=f'Customer {idx}',
+            phone_number='9841234567',
+            total=Decimal(total),
+            amount=Decimal(amount),
+            remaining_amount=Decimal(total) - Decimal(paid),
+        )
+        for n, (metal, karat, weight, own_gold) in enumerate(ornaments):
+            ornament = Ornament.objects.create(
+                code=f'SL-{idx}-{n}',
+                ornament_name='Ring',
+                metal_type=metal,
+                type=karat,
+                weight=Decimal(weight),
+                diamond_weight=Decimal('0.500') if metal == 'Diamond' else Decimal('0'),
+                kaligar=self.kaligar,
+            )
+            OrderOrnament.objects.create(order=order, ornament=ornament, own_gold=Decimal(own_gold))
+        if Decimal(paid):
+            OrderPayment.objects.create(order=order, payment_mode='cash', amount=Decimal(paid))
+        sale = Sale.objects.create(order=order, bill_no=str(idx), pan_number=pan)
+        for metal, quantity, rate in metals:
+            SalesMetalStock(
+                sale=sale, metal_type=metal, quantity=Decimal(quantity), rate_per_gram=Decimal(rate),
+            ).save()
+        return sale
+
+    def _context(self):
+        response = self.client.get(reverse('sales:sales_list'))
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    def test_tab_counts_and_totals(self):
+        self._sale(
+            1, ornaments=[('Gold', '22KARAT', '12.000', '2.000'), ('Silver', '24KARAT', '50.000', '0')],
+            total='150000', amount='140000', paid='100000', pan='123',
+        )
+        self._sale(2, metals=[('gold', '10.000', '12000'), ('silver', '5.000', '100')])
+        self._sale(3, ornaments=[('Diamond', '18KARAT', '4.000', '0')], total='90000', amount='85000', paid='90000')
+
+        context = self._context()
+
+        self.assertEqual(context['all_sales_count'], 3)
+        self.assertEqual(context['gold_sales_count'], 2)
+        self.assertEqual(context['silver_sales_count'], 2)
+        self.assertEqual(context['diamond_sales_count'], 1)
+        self.assertEqual(context['own_gold_sales_count'], 1)
+        self.assertEqual(context['pan_sales_count'], 1)
+
+        totals = context['all_totals']
+        self.assertEqual(totals['weight'], Decimal('81.000'))
+        self.assertEqual(totals['total'], Decimal('360500.00'))
+        self.assertEqual(totals['paid'], Decimal('190000.00'))
+        self.assertEqual(totals['remaining'], Decimal('50000.00'))
+        self.assertEqual(totals['profit'], Decimal('15000.00'))
+        self.assertEqual(totals['gold_sold_weight'], Decimal('22.000'))
+        self.assertEqual(totals['diamond_sold_weight'], Decimal('0.500'))
+        self.assertEqual(totals['gold_24_weight'], Decimal('11.000') + Decimal('10.000'))
+        self.assertEqual(totals['silver_24_weight'], Decimal('55.000'))
+
+        gold = context['gold_totals']
+        self.assertEqual(gold['total'], Decimal('270500.00'))
+        self.assertEqual(gold['gold_sold_weight'], Decimal('22.000'))
+
+        rows = {sale.bill_no: sale for sale in context['sales']}
+        self.assertEqual(rows['1'].gold_24_weight, Decimal('11.000'))
+        self.assertEqual(rows['2'].display_total, Decimal('120500.00'))
+        self.assertEqual(rows['2'].non_zero_metal_count, 2)
+
+    def test_query_count_does_not_grow_with_history(self):
+        for idx in range(3):
+            self._sale(idx, ornaments=[('Gold', '24KARAT', '1.000', '0')], total='1000', paid='500')
+        self._context()
+        with CaptureQueriesContext(connection) as small:
+            self._context()
+
+        for idx in range(3, 30):
+            self._sale(idx, ornaments=[('Gold', '24KARAT', '1.000', '0')], total='1000', paid='500')
+        with CaptureQueriesContext(connection) as large:
+            context = self._context()
+
+        self.assertEqual(len(context['gold_sales']), 10)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+import nepali_datetime as ndt
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from order.models import Order, OrderOrnament
+from ornament.models import Kaligar, Ornament
+from sales import monthly_rollup
+from sales.models import Sale, SalesMetalStock, SalesMonthSummary
+
+
+def _summary_rows():
+    return sorted(
+        SalesMonthSummary.objects.values_list(
+            'year', 'month', 'sales_count', 'total_sales_amount', 'ornament_gold_weight',
+            'ornament_gold_weight_24k', 'raw_silver_weight', 'raw_sales_amount', 'ornament_gold_amount',
+        )
+    )
+
+
+class SalesMonthSummaryTest(TestCase):
+    """Incremental month refreshes must agree with a full rebuild."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+
+    def _sale(self, idx, sale_date, weight='10.000', total='100000', metals=()):
+        order = Order.objects.create(customer_name=f'Customer {idx}', phone_number='9841234567', total=Decimal(total))
+        ornament = Ornament.objects.create(
+            code=f'MS-{idx}', ornament_name='Ring', metal_type='Gold', type='22KARAT',
+            weight=Decimal(weight), kaligar=self.kaligar,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderOrnament.objects.create(order=order, ornament=ornament, jyala=Decimal('500'))
+            sale = Sale.objects.create(order=order, bill_no=str(idx), sale_date=sale_date)
+            for metal, quantity, rate in metals:
+                SalesMetalStock(
+                    sale=sale, metal_type=metal, quantity=Decimal(quantity), rate_per_gram=Decimal(rate),
+                ).save()
+        return sale
+
+    def assertMatchesRebuild(self):
+        incremental = _summary_rows()
+        monthly_rollup.rebuild()
+        self.assertEqual(incremental, _summary_rows())
+
+    def test_changes_refresh_their_months(self):
+        baisakh, jestha = ndt.date(2081, 1, 15), ndt.date(2081, 2, 3)
+        first = self._sale(1, baisakh, metals=[('silver', '5.000', '100')])
+        self._sale(2, baisakh, weight='24.000', total='240000')
+        self._sale(3, jestha)
+        self.assertMatchesRebuild()
+
+        row = SalesMonthSummary.objects.get(year=2081, month=1)
+        self.assertEqual(row.sales_count, 2)
+        self.assertEqual(row.total_sales_amount, Decimal('340000.00'))
+        self.assertEqual(row.ornament_gold_weight, Decimal('34.000'))
+        self.assertEqual(row.ornament_gold_weight_24k, Decimal('31.167'))
+        self.assertEqual(row.raw_silver_amount, Decimal('500.00'))
+        self.assertEqual(row.ornament_gold_amount, Decimal('339500.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            line = first.order.order_ornaments.get()
+            line.jyala = Decimal('900')
+            line.save()
+            first.sale_date = jestha
+            first.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(SalesMonthSummary.objects.get(year=2081, month=2).sales_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.get(bill_no='2').soft_delete()
+        self.assertFalse(SalesMonthSummary.objects.filter(year=2081, month=1).exists())
+        self.assertMatchesRebuild()
+
+    def test_reports_read_the_summary(self):
+        self._sale(1, ndt.date(2081, 1, 15))
+        self._sale(2, ndt.date(2081, 3, 1), total='50000')
+
+        response = self.client.get(reverse('order:monthly_sales_report'))
+        self.assertEqual([row.month_key for row in response.context['monthly_data']], ['2081-03', '2081-01'])
+        self.assertEqual(response.context['monthly_totals']['total_sales_amount'], Decimal('150000.00'))
+
+        response = self.client.get(reverse('sales:sales_forecast'))
+        self.assertEqual([point['label'] for point in response.context['actual_points']], ['Baishakh 2081', 'Ashadh 2081'])
+
+        response = self.client.get(reverse('sales:sales_by_month'), {'year': 2081, 'month': 1})
+        self.assertEqual(response.context['sales_count'], 1)
+        self.assertEqual(response.context['total_sales_amount'], Decimal('100000.00'))
+        self.assertEqual(response.context['gold_24_weight'], Decimal('10.000'))
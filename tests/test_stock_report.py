@@ -0,0 +1,166 @@
+from decimal import Decimal
+
+import nepali_datetime as ndt
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from goldsilverpurchase import metals
+from goldsilverpurchase.models import CustomerPurchase, GoldSilverPurchase
+from main.models import Stock
+from main.services import stock_report
+from order.models import Order, OrderOrnament
+from ornament.models import Kaligar, Ornament
+from sales.models import Sale, SalesMetalStock
+
+
+def _rows(rows):
+    return [(row['label'], Decimal(row['qty']), Decimal(row['amount'])) for row in rows]
+
+
+class StockReportTest(TestCase):
+    """The fiscal-year stock report keeps its numbers while running a handful of queries."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+
+        Stock.objects.create(
+            year=2082, diamond=Decimal('2.000'), gold=Decimal('100.000'), silver=Decimal('500.000'),
+            jardi=Decimal('1500'), wages=Decimal('2500'),
+            diamond_rate=Decimal('50000'), gold_rate=Decimal('15000'), silver_rate=Decimal('200'),
+        )
+
+        in_year, before = ndt.date(2082, 5, 10), ndt.date(2081, 12, 1)
+        purchases = [
+            ('G-1', 'gold', 'Fine gold', '20.000', '150000', '1000', in_year),
+            ('G-2', 'gold', 'Jardi return', '5.000', '140000', '0', in_year),
+            ('G-3', 'gold', 'Old stock', '7.000', '130000', '0', before),
+            ('S-1', 'silver', 'Jarti silver', '300.000', '2000', '500', in_year),
+            ('D-1', 'diamond', 'Stones', '1.500', '60000', '0', in_year),
+        ]
+        for bill_no, metal, particular, quantity, rate, wages, bill_date in purchases:
+            GoldSilverPurchase.objects.create(
+                bill_no=bill_no, metal_type=metal, particular=particular, quantity=Decimal(quantity),
+                rate=Decimal(rate), rate_unit='gram', wages=Decimal(wages), bill_date=bill_date,
+            )
+        # An Excel import row whose metal type was not typed canonically.
+        imported = GoldSilverPurchase(
+            bill_no='G-4', metal_type=' GOLD ', particular='Import', quantity=Decimal('3.000'),
+            rate=Decimal('1000'), rate_unit='gram', wages=Decimal('100'), bill_date=in_year,
+        )
+        imported.calculate_amount()
+        GoldSilverPurchase.objects.bulk_create([imported])
+
+        customer_purchases = [
+            ('gold', '10.000', '9.000', '140000'),
+            ('silver', '200.000', '190.000', '1800'),
+            ('diamond', '4.000', '3.600', '130000'),
+        ]
+        for metal, weight, final_weight, rate in customer_purchases:
+            CustomerPurchase.objects.create(
+                customer_name='Walk-in', metal_type=metal, ornament_name='Old piece', weight=Decimal(weight),
+                final_weight=Decimal(final_weight), rate=Decimal(rate), rate_unit='gram', purchase_date=in_year,
+                diamond_weight=Decimal('0.500') if metal == 'diamond' else None,
+                diamond_rate=Decimal('50000') if metal == 'diamond' else None,
+            )
+
+        lines = [
+            ('Gold', '22KARAT', '10.000', '0', '150000', '0.500', '800', '0'),
+            ('Gold', '24KARAT', '5.000', '0', '80000', '0.250', '400', '0'),
+            ('Silver', '24KARAT', '100.000', '0', '25000', '2.000', '300', '0'),
+            ('Diamond', '18KARAT', '3.000', '0.400', '90000', '0.100', '600', '70000'),
+        ]
+        for idx, (metal, karat, weight, diamond_weight, amount, jarti, jyala, diamond_rate) in enumerate(lines):
+            order = Order.objects.create(
+                customer_name=f'Customer {idx}', phone_number='9841234567', total=Decimal(amount),
+                order_date=in_year,
+            )
+            ornament = Ornament.objects.create(
+                code=f'SR-{idx}', ornament_name='Ring', metal_type=metal, type=karat,
+                weight=Decimal(weight), diamond_weight=Decimal(diamond_weight), kaligar=self.kaligar,
+            )
+            OrderOrnament.objects.create(
+                order=order, ornament=ornament, line_amount=Decimal(amount), jarti=Decimal(jarti),
+                jyala=Decimal(jyala), diamond_rate=Decimal(diamond_rate),
+            )
+            sale = Sale.objects.create(order=order, bill_no=f'B-{idx}', sale_date=in_year)
+            if idx == 0:
+                SalesMetalStock(
+                    sale=sale, metal_type='gold', quantity=Decimal('2.000'), rate_per_gram=Decimal('14000'),
+                ).save()
+                SalesMetalStock(
+                    sale=sale, metal_type='silver', quantity=Decimal('50.000'), rate_per_gram=Decimal('190'),
+                ).save()
+
+    def assertRows(self, rows, expected):
+        self.assertEqual(_rows(rows), [(label, Decimal(qty), Decimal(amount)) for label, qty, amount in expected])
+
+    def test_fiscal_year_numbers(self):
+        response = self.client.get(reverse('main:stock_report'))
+        self.assertEqual(response.status_code, 200)
+        context = response.context
+
+        self.assertRows(context['opening_stock_rows'], [
+            ('Diamond', '2', '100000'),
+            ('Gold', '100', '1500000'),
+            ('Silver', '500', '100000'),
+            ('Jardi', '0', '1500'),
+            ('Wages', '0', '2500'),
+        ])
+        self.assertRows(context['purchase_rows'], [
+            ('Diamond', '2.0', '115000'),
+            ('Gold', '40.6', '4963000'),
+            ('Silver', '490', '942000'),
+            ('Jardi (Gold)', '0', '700000'),
+            ('Wages (Gold)', '0', '1100'),
+            ('Jardi (Silver)', '0', '600500'),
+            ('Wages (Silver)', '0', '500'),
+        ])
+        self.assertRows(context['sales_rows'], [
+            ('Diamond', '0.4', '28000'),
+            ('Gold', '19.05', '258000'),
+            ('Silver', '150', '34500'),
+            ('Jardi (Gold)', '0.74', '0.74'),
+            ('Wages (Gold)', '0', '1200'),
+            ('Jardi (Silver)', '2', '2'),
+            ('Wages (Silver)', '0', '300'),
+        ])
+        self.assertRows(context['stock_rows'], [
+            ('Diamond', '3.6', '187000'),
+            ('Gold', '125.6', '6233000'),
+            ('Silver', '890', '1017000'),
+            ('Jardi', '0', '1301997.26'),
+            ('Wages', '0', '2600'),
+        ])
+        self.assertEqual(context['purchase_totals'], {'qty': Decimal('532.6'), 'amount': Decimal('7322100')})
+        self.assertEqual(context['sales_totals'], {'qty': Decimal('172.19'), 'amount': Decimal('322002.74')})
+        self.assertEqual(context['stock_totals'], {'qty': Decimal('1019.2'), 'amount': Decimal('8741597.26')})
+
+        totals = context['totals']
+        self.assertEqual(totals['customer_amount'], Decimal('345000'))
+        self.assertEqual(totals['sales_amount'], Decimal('320500'))
+        self.assertEqual(totals['sales_weight'], Decimal('167.4'))
+        self.assertEqual(totals['gold_stock_amount'], Decimal('4705000'))
+        self.assertEqual(totals['gold_stock_weight'], Decimal('23.6'))
+        self.assertEqual(totals['silver_stock_amount'], Decimal('907500'))
+        self.assertEqual(totals['silver_stock_weight'], Decimal('340'))
+        self.assertEqual(totals['diamond_stock_amount'], Decimal('87000'))
+        self.assertEqual(totals['diamond_stock_weight'], Decimal('1.6'))
+
+    def test_one_query_per_source_table(self):
+        with self.assertNumQueries(6):
+            stock_report.build(ndt.date(2082, 4, 1), ndt.date(2083, 3, 30))
+
+    def test_imported_metal_type_is_stored_canonically(self):
+        self.assertEqual(GoldSilverPurchase.objects.get(bill_no='G-4').metal_type, 'gold')
+
+
+class CanonicalMetalTypeTest(SimpleTestCase):
+    def test_canonical(self):
+        self.assertEqual(metals.canonical(' GOLD '), 'gold')
+        self.assertEqual(metals.canonical('Silver'), 'silver')
+        self.assertEqual(metals.canonical('Diamond set'), 'diamond')
+        self.assertEqual(metals.canonical(' Platinum '), 'platinum')
+        self.assertEqual(metals.canonical(None), '')
@@ -0,0 +1,76 @@
+from decimal import Decimal
+from datetime import date
+
+from django.test import TestCase
+
+from main.models import Stock
+from main.services.stock_valuation import OrnamentStockSnapshot
+from main.views import calculate_daily_ornament_totals
+from ornament.models import Kaligar, Ornament
+
+
+class DailyOrnamentTotalsTest(TestCase):
+    """Snapshot valuation must match the per-ornament daily P&L figures."""
+
+    def setUp(self):
+        kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+        rows = [
+            ('Gold', '24KARAT', '10.000', '1.000', '500.000', '0', '0'),
+            ('Gold', '22KARAT', '5.000', '0.500', '300.000', '0', '0'),
+            ('Silver', '24KARAT', '100.000', '0', '200.000', '0', '0'),
+            ('Diamond', '18KARAT', '4.000', '0', '1000.000', '0.250', '750.000'),
+        ]
+        for idx, (metal, karat, weight, jarti, jyala, diamond, stone) in enumerate(rows):
+            Ornament.objects.create(
+                code=f'VAL-{idx}',
+                ornament_name='Test',
+                metal_type=metal,
+                type=karat,
+                weight=Decimal(weight),
+                jarti=Decimal(jarti),
+                jyala=Decimal(jyala),
+                diamond_weight=Decimal(diamond),
+                stone_totalprice=Decimal(stone),
+                kaligar=kaligar,
+            )
+        Stock.objects.create(year=2000, diamond_rate=Decimal('50000'))
+
+    def test_totals_match_per_ornament_formula(self):
+        gold_rate = Decimal('150000')
+        silver_rate = Decimal('2000')
+        result = calculate_daily_ornament_totals(
+            date.today(), gold_rate=gold_rate, silver_rate=silver_rate, diamond_rate=Decimal('0'),
+        )
+
+        gold_per_gram = gold_rate / Decimal('11.66')
+        silver_per_gram = silver_rate / Decimal('11.66')
+        expected_gold = (
+            (Decimal('10.000') * Decimal('1.00') + Decimal('5.000') * Decimal('0.98')) * gold_per_gram
+            + Decimal('1.500') * gold_per_gram
+            + Decimal('800.000')
+        )
+        expected_silver = Decimal('100.000') * silver_per_gram + Decimal('200.000')
+        expected_diamond = (
+            (Decimal('4.000') * Decimal('0.75')) / Decimal('11.664') * gold_rate
+            + Decimal('0.250') * Decimal('50000')
+            + Decimal('1000.000')
+            + Decimal('750.000')
+        )
+
+        self.assertEqual(result['gold_count'], 2)
+        self.assertEqual(result['gold_weight'], Decimal('15.000'))
+        self.assertAlmostEqual(result['gold_amount'], expected_gold, places=6)
+        self.assertAlmostEqual(result['silver_amount'], expected_silver, places=6)
+        self.assertAlmostEqual(result['diamond_amount'], expected_diamond, places=6)
+
+    def test_snapshot_is_reused_without_queries(self):
+        snapshot = OrnamentStockSnapshot.from_queryset(
+            Ornament.objects.filter(ornament_type=Ornament.OrnamentCategory.STOCK)
+        )
+        # Only the closing-stock diamond rate lookup (current year, then latest year)
+        # may hit the database; the ornament table is not read again.
+        with self.assertNumQueries(2):
+            calculate_daily_ornament_totals(
+                date.today(), gold_rate=Decimal('1'), silver_rate=Decimal('1'),
+                diamond_rate=Decimal('0'), snapshot=snapshot,
+            )
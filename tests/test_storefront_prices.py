@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from main.models import BackgroundJob, DailyRate, MetalCategoryPricingConfig, StorefrontPrice
+from main.services import jobs, storefront_prices
+from main.views import calculate_product_selling_amount
+from ornament import stock_summary
+from ornament.models import Kaligar, Ornament
+
+
+def _stored_prices():
+    return dict(StorefrontPrice.objects.values_list('ornament_id', 'selling_amount'))
+
+
+class StorefrontPriceIndexTest(TestCase):
+    """Stored prices must match the price calculator as rates and stock change."""
+
+    def setUp(self):
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+        DailyRate.objects.create(bs_date='1 Baisakh 2082', gold_rate=Decimal('150000'), silver_rate=Decimal('2000'))
+
+    def _create(self, code, **kwargs):
+        defaults = {
+            'ornament_name': 'Test',
+            'metal_type': 'Gold',
+            'weight': Decimal('11.664'),
+            'kaligar': self.kaligar,
+        }
+        defaults.update(kwargs)
+        return Ornament.objects.create(code=code, **defaults)
+
+    def assertMatchesCalculator(self):
+        rate = DailyRate.objects.order_by('-created_at').first()
+        expected = {
+            ornament.pk: calculate_product_selling_amount(ornament, rate).quantize(Decimal('0.01'))
+            for ornament in storefront_prices.listed_ornaments()
+        }
+        self.assertEqual(_stored_prices(), expected)
+
+    def test_ornament_saves_and_rate_changes(self):
+        ring = self._create('SP-1')
+        self._create('SP-2', metal_type='Diamond', diamond_weight=Decimal('0.500'), type='18KARAT')
+        self._create('SP-3', metal_type='Silver', weight=Decimal('50.000'))
+        self.assertEqual(_stored_prices()[ring.pk], Decimal('151000.00'))
+        self.assertMatchesCalculator()
+
+        ring.weight = Decimal('23.328')
+        ring.save()
+        self.assertEqual(_stored_prices()[ring.pk], Decimal('301000.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyRate.objects.create(bs_date='2 Baisakh 2082', gold_rate=Decimal('160000'), silver_rate=Decimal('2100'))
+        jobs.run_pending()
+        self.assertMatchesCalculator()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            config = MetalCategoryPricingConfig.get_config()
+            config.gold_enabled = False
+            config.save()
+        jobs.run_pending()
+        self.assertMatchesCalculator()
+
+    def test_rate_changes_queue_one_refresh_job(self):
+        self._create('SP-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyRate.objects.create(bs_date='2 Baisakh 2082', gold_rate=Decimal('160000'), silver_rate=Decimal('2100'))
+            DailyRate.objects.create(bs_date='3 Baisakh 2082', gold_rate=Decimal('170000'), silver_rate=Decimal('2200'))
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyRate.objects.create(bs_date='4 Baisakh 2082', gold_rate=Decimal('180000'), silver_rate=Decimal('2300'))
+        self.assertEqual(BackgroundJob.objects.filter(kind=storefront_prices.TASK_KIND).count(), 1)
+
+        jobs.run_pending()
+        self.assertMatchesCalculator()
+        # Rows already at the current version are left alone.
+        self.assertEqual(storefront_prices.refresh_stale(), 0)
+
+    def test_deleting_the_pricing_config_refreshes_prices(self):
+        ring = self._create('SP-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            config = MetalCategoryPricingConfig.get_config()
+            config.gold_enabled = False
+            config.save()
+        jobs.run_pending()
+        before = _stored_prices()[ring.pk]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MetalCategoryPricingConfig.objects.all().delete()
+        jobs.run_pending()
+        self.assertNotEqual(_stored_prices()[ring.pk], before)
+        self.assertMatchesCalculator()
+
+    def test_unlisted_ornaments_leave_the_index(self):
+        ring = self._create('SP-1')
+        chain = self._create('SP-2')
+        stock_summary.update_ornaments(Ornament.objects.filter(pk=ring.pk), ornament_type='sales')
+        chain.status = 'deleted'
+        chain.save()
+        self.assertEqual(_stored_prices(), {})
+
+    def test_shop_page_filters_sorts_and_pages_by_price(self):
+        for index in range(30):
+            self._create(f'SP-{index}', weight=Decimal('1.000') * (index + 1))
+
+        response = self.client.get(reverse('main:shop'), {'sort': 'price-high'})
+        products = list(response.context['products'])
+        self.assertEqual(response.context['total_products'], 30)
+        self.assertEqual(len(products), 24)
+        self.assertEqual(products[0].weight, Decimal('30.000'))
+        self.assertEqual(
+            [p.calculated_selling_amount for p in products],
+            sorted((p.calculated_selling_amount for p in products), reverse=True),
+        )
+
+        response = self.client.get(
+            reverse('main:shop'), {'sort': 'price-low', 'price': '0-50000', 'page': 1}
+        )
+        prices = [p.calculated_selling_amount for p in response.context['products']]
+        self.assertEqual(len(prices), 3)
+        self.assertTrue(all(price <= 50000 for price in prices))
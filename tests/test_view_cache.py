@@ -0,0 +1,191 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from goldsilverpurchase.importing import create_customer_purchases
+from goldsilverpurchase.models import CustomerPurchase
+from main.services import cache_versions
+from main.services.view_cache import cached_view
+from mysite.caches import cache_config
+from order.models import Order, OrderOrnament
+from ornament.models import Kaligar, Ornament, Stone
+from sales.models import Sale
+
+
+@override_settings(VIEW_CACHE_TIMEOUT=600)
+class ViewCacheTest(TestCase):
+    """Report and storefront pages are cached until the data behind them changes."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.kaligar = Kaligar.objects.create(name='Test Kaligar', panno='123456789')
+
+    def _login(self, user=None, csrf='a' * 32):
+        self.client.force_login(user or self.user)
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = csrf
+
+    def _ornament(self, code):
+        return Ornament.objects.create(
+            code=code, ornament_name='Ring', metal_type='Gold', type='24KARAT',
+            weight=Decimal('1.000'), kaligar=self.kaligar, ornament_type='stock', status='active',
+        )
+
+    def _sale(self, code):
+        order = Order.objects.create(customer_name=f'Customer {code}', phone_number='9841234567')
+        OrderOrnament.objects.create(order=order, ornament=self._ornament(code))
+        return Sale.objects.create(order=order, bill_no=code)
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_report_is_served_from_cache_until_a_sale_commits(self):
+        self._login()
+        url = reverse('order:sales_report')
+        self.assertGreater(self._queries(url), 2)
+
+        # Only the session and user are loaded for a cached page.
+        self.assertEqual(self._queries(url), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._sale('VC-1')
+        self.assertGreater(self._queries(url), 2)
+        self.assertEqual(self._queries(url), 2)
+
+    def test_storefront_is_shared_by_visitors_and_follows_ornament_changes(self):
+        url = reverse('main:shop')
+        self._ornament('VC-A')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.context['total_products'], 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).content, first.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._ornament('VC-B')
+        self.assertEqual(self.client.get(url).context['total_products'], 2)
+
+    def test_stock_report_follows_stone_changes(self):
+        self._login()
+        url = reverse('ornament:ornament_stock_report')
+        stone = Stone.objects.create(
+            name='Ruby', cost_per_carat=Decimal('100'), carat=Decimal('2.000'), sales_per_carat=Decimal('150'),
+        )
+        first = self.client.get(url)
+        self.assertEqual(first.context['total_stones_amount'], Decimal('300'))
+
+        stone.carat = Decimal('4.000')
+        with self.captureOnCommitCallbacks(execute=True):
+            stone.save()
+        response = self.client.get(url)
+        self.assertIsNotNone(response.context, 'the stale page was served from the cache')
+        self.assertEqual(response.context['total_stones_amount'], Decimal('600'))
+        self.assertEqual(response.context['grand_total'], Decimal('600'))
+
+    def test_bulk_imports_bump_reports(self):
+        before = cache_versions.version(cache_versions.REPORTS)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_customer_purchases([CustomerPurchase(
+                customer_name='Walk-in', metal_type='gold', ornament_name='Ring', weight=Decimal('1.000'),
+                final_weight=Decimal('1.000'), rate=Decimal('1000'), rate_unit='gram',
+            )])
+        self.assertEqual(cache_versions.version(cache_versions.REPORTS), before + 1)
+
+    def test_bumps_are_deferred_to_commit_and_merged(self):
+        before = cache_versions.version(cache_versions.REPORTS)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            cache_versions.bump_on_commit(cache_versions.REPORTS)
+            cache_versions.bump_on_commit(cache_versions.REPORTS, cache_versions.STOREFRONT)
+        self.assertEqual(cache_versions.version(cache_versions.REPORTS), before)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(cache_versions.version(cache_versions.REPORTS), before + 1)
+
+
+@override_settings(VIEW_CACHE_TIMEOUT=600)
+class CachedViewRulesTest(TestCase):
+    """Who shares a cached page, and when the cache is bypassed."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.calls = 0
+
+        @cached_view(cache_versions.REPORTS)
+        def view(request):
+            self.calls += 1
+            if request.GET.get('form'):
+                get_token(request)
+            return HttpResponse(f'page {self.calls}')
+
+        self.view = view
+        self.alice = get_user_model().objects.create_user(username='alice', password='pass')
+        self.bob = get_user_model().objects.create_user(username='bob', password='pass')
+
+    def _get(self, user=None, csrf='a' * 32, path='/report/', pending_messages=0):
+        request = self.factory.get(path)
+        request.user = user or AnonymousUser()
+        if csrf:
+            request.COOKIES[settings.CSRF_COOKIE_NAME] = csrf
+        request._messages = [object()] * pending_messages
+        return self.view(request).content
+
+    def test_signed_in_pages_are_per_user_and_csrf_cookie(self):
+        self.assertEqual(self._get(self.alice), b'page 1')
+        self.assertEqual(self._get(self.alice), b'page 1')
+        self.assertEqual(self._get(self.bob), b'page 2')
+        self.assertEqual(self._get(self.alice, csrf='b' * 32), b'page 3')
+        self.assertEqual(self._get(self.alice, path='/report/?year=2081'), b'page 4')
+
+    def test_signed_in_without_csrf_cookie_is_not_cached(self):
+        self._get(self.alice, csrf=None)
+        self.assertEqual(self._get(self.alice, csrf=None), b'page 2')
+
+    def test_anonymous_pages_are_shared_unless_they_hold_a_csrf_token(self):
+        self._get(csrf=None)
+        self.assertEqual(self._get(csrf='c' * 32), b'page 1')
+
+        self._get(path='/report/?form=1')
+        self.assertEqual(self._get(path='/report/?form=1'), b'page 3')
+
+    def test_pending_messages_bypass_the_cache(self):
+        self._get(self.alice)
+        self.assertEqual(self._get(self.alice, pending_messages=1), b'page 2')
+
+    def test_timeout_zero_turns_caching_off(self):
+        with override_settings(VIEW_CACHE_TIMEOUT=0):
+            self._get(self.alice)
+            self.assertEqual(self._get(self.alice), b'page 2')
+
+
+class CacheConfigTest(SimpleTestCase):
+    def test_backends(self):
+        self.assertEqual(cache_config({})['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+
+        file_cache = cache_config({'CACHE_BACKEND': 'file'}, base_dir='/srv/site')
+        self.assertEqual(file_cache['BACKEND'], 'django.core.cache.backends.filebased.FileBasedCache')
+        self.assertEqual(file_cache['LOCATION'], '/srv/site/cache')
+
+        redis = cache_config({'CACHE_BACKEND': 'redis', 'CACHE_URL': 'redis://cache:6379/2'})
+        self.assertEqual(redis['LOCATION'], 'redis://cache:6379/2')
+
+        self.assertEqual(cache_config({}, default='file')['BACKEND'], file_cache['BACKEND'])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            cache_config({'CACHE_BACKEND': 'memcache'})
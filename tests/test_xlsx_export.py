@@ -0,0 +1,98 @@
+from decimal import Decimal
+from io import BytesIO
+
+import nepali_datetime as ndt
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from finance.models import Employee, EmployeeSalary, Expense
+from order.models import Order, OrderOrnament, OrderPayment
+from ornament.models import Kaligar, Ornament
+from sales.models import Sale
+
+
+class XlsxExportTest(TestCase):
+    """Exports stream write-only workbooks with the same sheets and rows."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='staff', password='pass')
+        self.client.force_login(user)
+
+        kaligar = Kaligar.objects.create(name='Hari', panno='123456789')
+        self.order = Order.objects.create(customer_name='Sita', phone_number='9800000000', status='delivered')
+        self.ornament = Ornament.objects.create(
+            code='EX-1', ornament_name='Ring', metal_type='Gold', type='24KARAT',
+            weight=Decimal('5.000'), kaligar=kaligar, order=self.order,
+        )
+        OrderOrnament.objects.create(order=self.order, ornament=self.ornament, line_amount=Decimal('1000'))
+        OrderPayment.objects.create(order=self.order, payment_mode='cash', amount=Decimal('300'))
+        OrderPayment.objects.create(order=self.order, payment_mode='bank', amount=Decimal('200'))
+        Sale.objects.create(order=self.order, bill_no='77')
+
+        employee = Employee.objects.create(
+            first_name='Ram', last_name='Thapa', email='ram@example.com',
+            position='Clerk', base_salary=Decimal('15000'),
+        )
+        EmployeeSalary.objects.create(employee=employee, month=ndt.date(2081, 1, 1), base_salary=Decimal('15000'))
+        Expense.objects.create(
+            category='other', description='Tea', amount=Decimal('150'), expense_date=ndt.date(2081, 1, 2),
+        )
+
+    def _workbook(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        return openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+
+    def _rows(self, sheet):
+        return list(sheet.iter_rows(min_row=2, values_only=True))
+
+    def test_order_export_lists_lines_and_payments(self):
+        wb = self._workbook(reverse('order:export_excel'))
+
+        self.assertEqual(wb.sheetnames, ['Orders', 'OrderOrnaments', 'OrderPayments'])
+        (order_row,) = self._rows(wb['Orders'])
+        self.assertEqual(order_row[0], self.order.sn)
+        self.assertEqual(order_row[3], 'Sita')
+        self.assertEqual(sorted(order_row[11].split(', ')), ['Bank', 'Cash'])
+        self.assertEqual(order_row[12], 500)
+        (line,) = self._rows(wb['OrderOrnaments'])
+        self.assertEqual(line[2:5], ('EX-1', 'Ring', 'Gold'))
+        self.assertEqual(line[5], 5)
+        self.assertEqual(len(self._rows(wb['OrderPayments'])), 2)
+
+    def test_ornament_export_names_related_rows(self):
+        wb = self._workbook(reverse('ornament:export_excel'))
+
+        (row,) = self._rows(wb['Ornaments'])
+        self.assertEqual(row[1], 'EX-1')
+        self.assertEqual(row[18], 'Hari')
+        self.assertEqual(row[21], f'Order {self.order.sn} - Sita')
+        self.assertEqual(row[-1], 'fetched')
+
+    def test_sales_export_splits_sheets(self):
+        wb = self._workbook(reverse('sales:export_excel'))
+
+        self.assertEqual(wb.sheetnames, ['All Sales', 'Gold Sales', 'Silver Sales'])
+        self.assertEqual([row[0] for row in self._rows(wb['All Sales'])], ['77'])
+        self.assertEqual(self._rows(wb['Silver Sales']), [])
+
+    def test_finance_export_all(self):
+        wb = self._workbook(reverse('finance:finance_export_all'))
+
+        self.assertEqual(wb.sheetnames, ['Expenses', 'Employees', 'Salaries', 'Debtors', 'Creditors'])
+        self.assertEqual(self._rows(wb['Expenses']), [('other', 'Tea', 150, '2081-01-02', None)])
+        (employee,) = self._rows(wb['Employees'])
+        self.assertEqual(employee[-1], 'true')
+        (salary,) = self._rows(wb['Salaries'])
+        self.assertEqual(salary[:4], ('ram@example.com', 'Ram Thapa', '2081-01-01', 15000))
+
+    def test_all_data_export_has_every_sheet(self):
+        wb = self._workbook(reverse('gsp:export_all_data'))
+
+        self.assertIn('Order', wb.sheetnames)
+        self.assertIn('OrderPayment', wb.sheetnames)
+        self.assertEqual(self._rows(wb['Sale'])[0][1], '77')